@@ -0,0 +1,159 @@
+"""Time of /history queries on a large backtest_runs table.
+
+Fills a temporary database with --runs synthetic runs (stats only in
+stats_json, as rows stored before the metric columns existed), times the
+init_db() backfill of the metric columns, then compares:
+- sorting by profit factor the old way (read and parse every stats_json,
+  sort in Python) against query_runs() on the indexed column,
+- a deep page by OFFSET against the same page by keyset (`after`),
+- a filtered, sorted page (strategy + min trades, by drawdown).
+
+Run:
+    PYTHONPATH=. python3 scripts/bench_history.py
+    PYTHONPATH=. python3 scripts/bench_history.py --runs 100000 --page 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+import src.core.database as database_module
+from scripts.test_strategies_selftest import patched_attr
+from web.history import LIST_COLUMNS, PAGE_SIZE, decode_cursor, encode_cursor, query_runs
+
+STRATEGIES = ("ema_cross", "rsi_reversion", "donchian_breakout", "bmsb")
+
+LEGACY_SCHEMA = """
+    CREATE TABLE backtest_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT UNIQUE NOT NULL,
+        strategy TEXT NOT NULL,
+        exchange TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        timeframe TEXT NOT NULL,
+        start_ts INTEGER,
+        end_ts INTEGER,
+        params_json TEXT NOT NULL,
+        stats_json TEXT NOT NULL,
+        chart_path TEXT,
+        csv_path TEXT,
+        created_at TEXT NOT NULL
+    );
+"""
+
+
+def fill(conn, runs: int) -> None:
+    rng = np.random.default_rng(0)
+    trades = rng.integers(0, 500, runs)
+    profit_factor = rng.lognormal(0, 0.5, runs)
+    drawdown = rng.uniform(1, 80, runs)
+    conn.execute(LEGACY_SCHEMA)
+    rows = (
+        (
+            f"run_{i:08d}",
+            STRATEGIES[i % len(STRATEGIES)],
+            "binance",
+            f"SYM{i % 200:03d}/USDT",
+            "1h",
+            "{}",
+            json.dumps(
+                {
+                    "Total trades": int(trades[i]),
+                    "Total Net Profit": float(profit_factor[i] * 1000 - 1000),
+                    "Profit Factor": float(profit_factor[i]),
+                    "Max Drawdown (%)": float(drawdown[i]),
+                    "Sharpe Ratio": float(profit_factor[i] - 1),
+                    "CAGR (%)": float(profit_factor[i] * 10 - 10),
+                }
+            ),
+            f"2024-01-01T00:00:{i:08d}",
+        )
+        for i in range(runs)
+    )
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO backtest_runs (
+                run_id, strategy, exchange, symbol, timeframe, params_json, stats_json, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+
+
+def timed(fn, repeat: int = 5) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def old_sort_by_profit_factor(conn, page: int):
+    rows = conn.execute("SELECT run_id, stats_json FROM backtest_runs").fetchall()
+    scored = [(json.loads(stats).get("Profit Factor"), run_id) for run_id, stats in rows]
+    scored.sort(reverse=True)
+    return scored[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark /history queries")
+    parser.add_argument("--runs", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=1000, help="page number for the deep-page timings")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, patched_attr(database_module, "DB_PATH", Path(tmp) / "runs.db"):
+        conn = database_module.get_connection()
+        started = time.perf_counter()
+        fill(conn, args.runs)
+        print(f"{args.runs:,} runs inserted in {time.perf_counter() - started:.1f} s")
+
+        started = time.perf_counter()
+        database_module.init_db()
+        print(f"init_db backfill + indexes: {time.perf_counter() - started:.1f} s")
+
+        print("sort by profit factor, first page")
+        old_s, _ = timed(lambda: old_sort_by_profit_factor(conn, 0), repeat=1)
+        new_s, _ = timed(lambda: query_runs(conn, sort="profit_factor"))
+        print(f"  parse every stats_json: {old_s * 1000:10.1f} ms")
+        print(f"  indexed column:         {new_s * 1000:10.1f} ms")
+
+        skip = args.page * PAGE_SIZE
+        offset_sql = f"""
+            SELECT {', '.join(LIST_COLUMNS)} FROM backtest_runs
+            WHERE profit_factor IS NOT NULL
+            ORDER BY profit_factor DESC, id DESC LIMIT ? OFFSET ?
+        """
+        offset_s, offset_rows = timed(lambda: conn.execute(offset_sql, (PAGE_SIZE, skip)).fetchall())
+        previous = dict(conn.execute(offset_sql, (1, skip - 1)).fetchone())
+        after = decode_cursor(encode_cursor(previous, "profit_factor"), "profit_factor")
+        keyset_s, (keyset_rows, _) = timed(lambda: query_runs(conn, sort="profit_factor", after=after))
+        assert [row["id"] for row in offset_rows] == [row["id"] for row in keyset_rows]
+        print(f"page {args.page} by profit factor")
+        label = f"OFFSET {skip:,}:"
+        print(f"  {label:<24s}{offset_s * 1000:10.1f} ms")
+        print(f"  keyset (after):         {keyset_s * 1000:10.1f} ms")
+
+        filtered_s, (rows, _) = timed(
+            lambda: query_runs(
+                conn,
+                filters={"strategy": "bmsb"},
+                ranges={"total_trades": (100, None)},
+                sort="max_drawdown_pct",
+                order="asc",
+            )
+        )
+        print(f"strategy + min trades, by drawdown: {filtered_s * 1000:.1f} ms ({len(rows)} rows)")
+        database_module.close_thread_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
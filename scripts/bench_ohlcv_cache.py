@@ -0,0 +1,91 @@
+"""fetch_ohlcv load time: SQLite rows vs the columnar .npy cache.
+
+Builds a throwaway database with --rows 1m candles (default 1,000,000) and
+times fetch_ohlcv with the cache disabled, the first cached call (cache
+build) and warm cached calls for the full series and a one-month slice.
+
+Run:
+    PYTHONPATH=. python3 scripts/bench_ohlcv_cache.py
+    PYTHONPATH=. python3 scripts/bench_ohlcv_cache.py --rows 2000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import src.core.data as data
+import src.core.database as database
+import src.core.ohlcv_cache as ohlcv_cache
+from scripts.test_strategies_selftest import patched_attr
+
+
+def build_db(path: str, rows: int) -> None:
+    start = 1_600_000_000_000
+    ts = start + np.arange(rows, dtype=np.int64) * 60_000
+    close = 10_000 + np.cumsum(np.random.default_rng(7).normal(0, 5, rows))
+    frame = pd.DataFrame(
+        {
+            "exchange": "binance",
+            "symbol": "BTC/USDT",
+            "timeframe": "1m",
+            "timestamp": ts,
+            "open": close,
+            "high": close + 2,
+            "low": close - 2,
+            "close": close,
+            "volume": 1.0,
+        }
+    )
+    conn = sqlite3.connect(path)
+    frame.to_sql("ohlcv_clean", conn, index=False)
+    conn.execute("CREATE INDEX idx_clean ON ohlcv_clean(exchange, symbol, timeframe, timestamp)")
+    conn.commit()
+    conn.close()
+
+
+def timed(label: str, **kwargs) -> pd.DataFrame:
+    started = time.perf_counter()
+    df = data.fetch_ohlcv(exchange="binance", symbol="BTC/USDT", timeframe="1m", **kwargs)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34}{len(df):>10}{elapsed * 1000:>12.1f} ms")
+    return df
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        build_db(db_path, args.rows)
+
+        full = {"limit": args.rows}
+        month = {"start_date": "2020-10-01", "end_date": "2020-10-31", "limit": args.rows}
+
+        print(f"{'case':<34}{'rows':>10}{'time':>15}")
+        print("-" * 59)
+        with patched_attr(database, "DB_PATH", db_path), patched_attr(ohlcv_cache, "CACHE_DIR", os.path.join(tmp, "cache")):
+            with patched_attr(data, "CACHE_ENABLED", False):
+                sql_df = timed("sqlite full", **full)
+                timed("sqlite one month", **month)
+
+            cached_df = timed("cache build (first call)", **full)
+            timed("cache warm full", **full)
+            timed("cache warm one month", **month)
+
+        pd.testing.assert_frame_equal(sql_df, cached_df)
+        print("Cached frame identical to SQLite frame")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
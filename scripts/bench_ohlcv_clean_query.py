@@ -0,0 +1,108 @@
+"""ohlcv_clean series read time vs number of other series stored.
+
+Fills the old layout (id column, no key, what sanitize_data used to create)
+and the keyed WITHOUT ROWID layout from init_db with the same candles:
+one target series plus --others other symbols of --rows candles each, and
+times fetch_ohlcv's query for one month of the target series.
+
+Run:
+    PYTHONPATH=. python3 scripts/bench_ohlcv_clean_query.py
+    PYTHONPATH=. python3 scripts/bench_ohlcv_clean_query.py --rows 200000 --others 0,10,40
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+from src.core.database import OHLCV_CLEAN_SCHEMA, UPSERT_OHLCV_CLEAN_SQL
+
+LEGACY_SCHEMA = """
+    CREATE TABLE ohlcv_clean (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        exchange TEXT, symbol TEXT, timeframe TEXT, timestamp INTEGER,
+        open REAL, high REAL, low REAL, close REAL, volume REAL
+    )
+"""
+
+QUERY = """
+    SELECT timestamp, open, high, low, close, volume
+    FROM ohlcv_clean
+    WHERE exchange = ?
+      AND symbol = ?
+      AND timeframe = ?
+      AND timestamp >= ?
+      AND timestamp <= ?
+    ORDER BY timestamp ASC LIMIT ?
+"""
+
+START_TS = 1_600_000_000_000
+
+
+def series_rows(symbol: str, rows: int):
+    ts = START_TS + np.arange(rows, dtype=np.int64) * 60_000
+    close = 100 + np.cumsum(np.random.default_rng(len(symbol)).normal(0, 1, rows))
+    return zip(["binance"] * rows, [symbol] * rows, ["1m"] * rows, ts.tolist(), close.tolist(),
+               close.tolist(), close.tolist(), close.tolist(), [1.0] * rows)
+
+
+def fill(path: str, schema: str, insert_sql: str, symbols: list[str], rows: int) -> float:
+    conn = sqlite3.connect(path)
+    conn.execute(schema)
+    started = time.perf_counter()
+    with conn:
+        for symbol in symbols:
+            conn.executemany(insert_sql, series_rows(symbol, rows))
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return elapsed
+
+
+def time_query(path: str, repeats: int = 5) -> float:
+    conn = sqlite3.connect(path)
+    params = ("binance", "TARGET/USDT", "1m", START_TS + 10 * 86_400_000, START_TS + 40 * 86_400_000, 50000)
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        conn.execute(QUERY, params).fetchall()
+        best = min(best, time.perf_counter() - started)
+    conn.close()
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="Candles per series")
+    parser.add_argument("--others", default="0,5,20", help="Comma list of other-series counts")
+    args = parser.parse_args()
+
+    legacy_insert = (
+        "INSERT INTO ohlcv_clean (exchange, symbol, timeframe, timestamp, open, high, low, close, volume) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+
+    print(f"{'other series':>12}{'legacy query':>16}{'keyed query':>16}{'legacy load':>14}{'keyed upsert':>14}")
+    print("-" * 72)
+    for others in [int(x) for x in args.others.split(",")]:
+        symbols = ["TARGET/USDT"] + [f"S{i:03d}/USDT" for i in range(others)]
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_db = os.path.join(tmp, "legacy.db")
+            keyed_db = os.path.join(tmp, "keyed.db")
+            legacy_load = fill(legacy_db, LEGACY_SCHEMA, legacy_insert, symbols, args.rows)
+            keyed_load = fill(keyed_db, OHLCV_CLEAN_SCHEMA, UPSERT_OHLCV_CLEAN_SQL, symbols, args.rows)
+            legacy_q = time_query(legacy_db)
+            keyed_q = time_query(keyed_db)
+        print(
+            f"{others:>12}{legacy_q * 1000:>13.1f} ms{keyed_q * 1000:>13.1f} ms"
+            f"{legacy_load:>12.2f} s{keyed_load:>12.2f} s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
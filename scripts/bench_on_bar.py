@@ -0,0 +1,107 @@
+"""Per-bar overhead of BacktesterV2 and of the bar-loop runners.
+
+First part: ns per on_bar() call with no position, one open long lot and
+a 3-lot pyramided long, on bars that never touch the stop or target (the
+common case). Second part: wall time per bar of the runners that drive
+BacktesterV2 bar by bar, on synthetic data (fetch_ohlcv patched, no
+database needed).
+
+Run:
+    PYTHONPATH=. python3 scripts/bench_on_bar.py
+    PYTHONPATH=. python3 scripts/bench_on_bar.py --calls 2000000 --bars 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+import src.strategies.basic_keltner_reversion.backtest_basic_keltner_reversion_v2 as bk_runner
+import src.strategies.bmsb.backtest_bmsb_v2 as bmsb_runner
+import src.strategies.ema_trend_hold.backtest_ema_trend_hold_v2 as trend_runner
+import src.strategies.emalyarovich_smas.backtest_emalyarovich_smas_v2 as sma_runner
+import src.strategies.k_davey_mom_keltner.backtest_k_davey_mom_keltner_v2 as kd_runner
+from scripts.test_strategies_selftest import make_synthetic_ohlcv, patched_attr
+from src.core.backtester_v2 import BacktesterV2
+
+RUNNERS = [
+    ("ema_trend_hold", trend_runner, trend_runner.run_backtest_ema_trend_hold_v2, {"trend_ema": 200}),
+    ("bmsb", bmsb_runner, bmsb_runner.run_backtest_bmsb_v2, {"sma_period": 20, "ema_period": 21, "tensignal_window": 3}),
+    ("emalyarovich_smas", sma_runner, sma_runner.run_backtest_emalyarovich_smas_v2,
+     {"sma_fast": 20, "sma_slow": 200, "slope_bars": 3}),
+    ("k_davey_mom_keltner", kd_runner, kd_runner.run_backtest_k_davey_mom_keltner_v2,
+     {"symbol": "MES", "position_mode": "fixed", "trade_size": 1.0}),
+    ("basic_keltner_reversion", bk_runner, bk_runner.run_backtest_basic_keltner_reversion_v2,
+     {"kc_ema_length": 20, "kc_atr_length": 20, "kc_atr_mult": 1.5}),
+]
+
+
+def engine(lots: int) -> BacktesterV2:
+    bt = BacktesterV2(stop_loss_pct=0.5, take_profit_pct=1.0, slippage_pct=0.0, pyramiding=3)
+    for i in range(lots):
+        bt.on_signal("LONG", 100.0, i, "bench", i)
+    return bt
+
+
+def ns_per_on_bar(lots: int, calls: int) -> float:
+    bt = engine(lots)
+    on_bar = bt.on_bar
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter_ns()
+        for i in range(calls):
+            on_bar(101.0, 99.0, i, i)
+        best = min(best, (time.perf_counter_ns() - started) / calls)
+    return best
+
+
+def us_per_bar(module, fn, kwargs, df, base_path) -> float:
+    def fake_fetch(**_kwargs):
+        return df.copy()
+
+    with patched_attr(module, "fetch_ohlcv", fake_fetch), contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        fn(
+            **{
+                "exchange": "binance",
+                "symbol": "BTC/USDT",
+                "timeframe": "1h",
+                "start_date": None,
+                "end_date": None,
+                "run_id": "bench",
+                "generate_report": False,
+                "generate_plots": False,
+                "generate_equity": False,
+                "base_path": base_path,
+                **kwargs,
+            }
+        )
+        return (time.perf_counter() - started) / len(df) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=1_000_000, help="on_bar calls per state")
+    parser.add_argument("--bars", type=int, default=10_000, help="Bars per runner")
+    args = parser.parse_args()
+
+    print(f"{'state':<20}{'ns/on_bar':>12}")
+    print("-" * 32)
+    for label, lots in (("flat", 0), ("long, 1 lot", 1), ("long, 3 lots", 3)):
+        print(f"{label:<20}{ns_per_on_bar(lots, args.calls):>12.1f}")
+
+    print()
+    print(f"{'runner':<26}{'us/bar':>10}")
+    print("-" * 36)
+    df = make_synthetic_ohlcv(rows=args.bars, freq="h")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, module, fn, kwargs in RUNNERS:
+            print(f"{name:<26}{us_per_bar(module, fn, kwargs, df, tmp):>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
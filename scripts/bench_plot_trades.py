@@ -0,0 +1,155 @@
+"""Time of candlestick chart rendering: per-candle artists vs collections.
+
+Draws one chart of --candles synthetic hourly candles twice: once with the
+old per-candle body (one vlines() call and one Rectangle patch per candle)
+and once with _add_candles() (one LineCollection of wicks, one
+PolyCollection of bodies), both saved as PNG. Then renders --charts trade
+windows of --window candles with plot_trades_candlestick_windows(),
+sequentially and with --workers processes (the pool only pays off with
+more than one CPU).
+
+Run:
+    PYTHONPATH=. python3 scripts/bench_plot_trades.py
+    PYTHONPATH=. python3 scripts/bench_plot_trades.py --candles 50000 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.patches import Rectangle
+
+from src.core.plotting.plot_trades import _add_candles, plot_trades_candlestick_windows
+
+
+def synthetic_ohlc(candles: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.005, candles)))
+    open_ = close * (1 + rng.normal(0, 0.002, candles))
+    spread = close * rng.uniform(0.001, 0.004, candles)
+    return pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2020-01-01", periods=candles, freq="h"),
+            "open": open_,
+            "high": np.maximum(open_, close) + spread,
+            "low": np.minimum(open_, close) - spread,
+            "close": close,
+            "volume": 1000.0,
+        }
+    )
+
+
+def synthetic_trades(df: pd.DataFrame, every: int) -> pd.DataFrame:
+    entries = np.arange(5, len(df) - 20, every)
+    exits = entries + 12
+    return pd.DataFrame(
+        {
+            "entry_time": df["timestamp"].to_numpy()[entries],
+            "exit_time": df["timestamp"].to_numpy()[exits],
+            "side": np.where(np.arange(len(entries)) % 2 == 0, "LONG", "SHORT"),
+            "entry_price": df["close"].to_numpy()[entries],
+            "exit_price": df["close"].to_numpy()[exits],
+            "net_pnl": df["close"].to_numpy()[exits] - df["close"].to_numpy()[entries],
+            "entry_trigger": "ema cross",
+            "exit_trigger": "stop",
+        }
+    )
+
+
+def old_candles(ax, x_values, df_plot, candle_width):
+    for idx, row in zip(x_values, df_plot.itertuples()):
+        color = "#2ca02c" if row.close >= row.open else "#d62728"
+        ax.vlines(idx, row.low, row.high, color=color, linewidth=1, alpha=0.9)
+
+        body_bottom = min(row.open, row.close)
+        body_height = max(abs(row.close - row.open), 1e-9)
+        rect = Rectangle(
+            (idx - candle_width / 2, body_bottom),
+            candle_width,
+            body_height,
+            facecolor=color,
+            edgecolor=color,
+            alpha=0.85,
+        )
+        ax.add_patch(rect)
+    ax.autoscale_view()
+
+
+def new_candles(ax, x_values, df_plot, candle_width):
+    _add_candles(
+        ax,
+        x_values,
+        df_plot["open"].to_numpy(dtype=float),
+        df_plot["high"].to_numpy(dtype=float),
+        df_plot["low"].to_numpy(dtype=float),
+        df_plot["close"].to_numpy(dtype=float),
+        candle_width,
+    )
+
+
+def time_chart(draw, df_plot: pd.DataFrame, path: str) -> float:
+    started = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(20, 8))
+    x_values = mdates.date2num(df_plot.index.to_numpy())
+    draw(ax, x_values, df_plot, (x_values[1] - x_values[0]) * 0.7)
+    fig.savefig(path)
+    plt.close(fig)
+    return time.perf_counter() - started
+
+
+def time_windows(df, trades, out_dir, window, charts, workers) -> float:
+    started = time.perf_counter()
+    _, items, _, _ = plot_trades_candlestick_windows(
+        df=df,
+        trades=trades,
+        output_dir=out_dir,
+        candles_per_chart=window,
+        max_charts=charts,
+        workers=workers,
+    )
+    elapsed = time.perf_counter() - started
+    assert len(items) == charts, f"expected {charts} charts, got {len(items)}"
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark candlestick chart rendering")
+    parser.add_argument("--candles", type=int, default=10_000)
+    parser.add_argument("--window", type=int, default=1000, help="candles per trade window chart")
+    parser.add_argument("--charts", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    df = synthetic_ohlc(args.candles)
+    df_plot = df.set_index("timestamp")
+    trades = synthetic_trades(df, every=max(args.window // 4, 20))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_s = time_chart(old_candles, df_plot, os.path.join(tmp, "old.png"))
+        new_s = time_chart(new_candles, df_plot, os.path.join(tmp, "new.png"))
+        print(f"one chart, {args.candles} candles")
+        print(f"  per-candle artists: {old_s:8.2f} s")
+        print(f"  collections:        {new_s:8.2f} s  ({old_s / new_s:.1f}x)")
+
+        seq_s = time_windows(df, trades, os.path.join(tmp, "seq"), args.window, args.charts, 1)
+        par_s = time_windows(df, trades, os.path.join(tmp, "par"), args.window, args.charts, args.workers)
+        print(f"{args.charts} windows of {args.window} candles (cpus: {os.cpu_count()})")
+        print(f"  sequential:         {seq_s:8.2f} s")
+        label = f"{args.workers} workers:"
+        print(f"  {label:<20s}{par_s:8.2f} s  ({seq_s / par_s:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
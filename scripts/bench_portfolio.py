@@ -0,0 +1,104 @@
+"""Time of a portfolio backtest vs single-symbol runner calls.
+
+Builds --symbols synthetic random-walk series of --bars hourly candles
+(every fifth symbol misses 10% of its bars, so the union index has gaps to
+align), then times one run_portfolio_backtest() over all of them against one
+run_backtest_*_v2 call on a single series, and that call times the number
+of symbols (fetch_ohlcv patched, no database needed).
+
+Run:
+    PYTHONPATH=. python3 scripts/bench_portfolio.py
+    PYTHONPATH=. python3 scripts/bench_portfolio.py --strategy rsi_reversion --symbols 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.test_strategies_selftest import patched_attr
+from src.core.analysis.portfolio import run_portfolio_backtest
+from src.core.analysis.sweep import load_runner
+
+PARAMS = {
+    "ema_cross": {"ema_fast": 12, "ema_slow": 26},
+    "rsi_reversion": {"rsi_period": 14, "rsi_entry": 30, "rsi_exit": 60},
+    "donchian_breakout": {"donchian_lookback": 20},
+}
+
+
+def synthetic_frames(symbols: int, bars: int) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2020-01-01", periods=bars, freq="h")
+    frames = {}
+    for s in range(symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+        spread = close * rng.uniform(0.001, 0.01, bars)
+        frame = pd.DataFrame(
+            {
+                "timestamp": index,
+                "open": close + rng.normal(0, 0.2, bars),
+                "high": close + spread,
+                "low": close - spread,
+                "close": close,
+                "volume": 1000.0,
+            }
+        )
+        if s % 5 == 4:
+            frame = frame[rng.random(bars) > 0.1].reset_index(drop=True)
+        frames[f"SYM{s:03d}"] = frame
+    return frames
+
+
+def single_run(strategy: str, frame: pd.DataFrame, base_path: str) -> float:
+    module, fn = load_runner(strategy)
+    with patched_attr(module, "fetch_ohlcv", lambda **_kwargs: frame.copy()), contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        fn(
+            exchange="bench",
+            symbol="SYM000",
+            timeframe="1h",
+            start_date=None,
+            end_date=None,
+            run_id="bench",
+            generate_report=False,
+            generate_plots=False,
+            generate_equity=False,
+            base_path=base_path,
+            **PARAMS[strategy],
+        )
+        return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--strategy", default="ema_cross", choices=sorted(PARAMS))
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--bars", type=int, default=10_000)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.symbols, args.bars)
+    with tempfile.TemporaryDirectory() as tmp:
+        single = min(single_run(args.strategy, frames["SYM000"], tmp) for _ in range(3))
+
+    started = time.perf_counter()
+    result = run_portfolio_backtest(args.strategy, list(frames), "bench", "1h", PARAMS[args.strategy], frames=frames)
+    portfolio = time.perf_counter() - started
+
+    print(f"{args.strategy}: {args.symbols} symbols x {args.bars:,} bars, {len(result['trades']):,} trades")
+    print(f"{'run':<28}{'time':>10}")
+    print("-" * 38)
+    print(f"{'single symbol runner':<28}{single:>8.3f} s")
+    print(f"{f'{args.symbols} single runs (est.)':<28}{single * args.symbols:>8.3f} s")
+    print(f"{'portfolio (all symbols)':<28}{portfolio:>8.3f} s  ({portfolio / single:.1f}x one run)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
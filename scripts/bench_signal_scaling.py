@@ -0,0 +1,85 @@
+"""Runtime scaling benchmark for the ema_cross, rsi_reversion and donchian_breakout runners.
+
+Runs each runner on synthetic data of growing length (fetch_ohlcv is patched,
+no database needed) and prints wall time and microseconds per bar. With the
+whole-frame signal functions the us/bar column should stay roughly flat; a
+quadratic runner would double it every time the bar count doubles.
+
+Run:
+    PYTHONPATH=. python3 scripts/bench_signal_scaling.py
+    PYTHONPATH=. python3 scripts/bench_signal_scaling.py --bars 12500 25000 50000 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+import src.strategies.donchian_breakout.backtest_donchian_breakout_v2 as don_runner
+import src.strategies.ema_cross.backtest_ema_cross_v2 as ema_runner
+import src.strategies.rsi_reversion.backtest_rsi_reversion_v2 as rsi_runner
+from scripts.test_strategies_selftest import make_synthetic_ohlcv, patched_attr
+
+
+JOBS = [
+    ("ema_cross", ema_runner, ema_runner.run_backtest_ema_cross_v2, {"ema_fast": 20, "ema_slow": 50}),
+    (
+        "rsi_reversion",
+        rsi_runner,
+        rsi_runner.run_backtest_rsi_reversion_v2,
+        {"rsi_period": 14, "rsi_entry": 30, "rsi_exit": 50},
+    ),
+    (
+        "donchian_breakout",
+        don_runner,
+        don_runner.run_backtest_donchian_breakout_v2,
+        {"donchian_lookback": 20},
+    ),
+]
+
+
+def time_runner(module, fn, kwargs, df, base_path) -> float:
+    def fake_fetch(**_kwargs):
+        return df.copy()
+
+    with patched_attr(module, "fetch_ohlcv", fake_fetch), contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        fn(
+            exchange="binance",
+            symbol="BTC/USDT",
+            timeframe="15m",
+            start_date=None,
+            end_date=None,
+            run_id="bench",
+            generate_report=False,
+            generate_plots=False,
+            generate_equity=False,
+            base_path=base_path,
+            **kwargs,
+        )
+        return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, nargs="+", default=[6250, 12500, 25000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'strategy':<20}{'bars':>10}{'seconds':>12}{'us/bar':>10}")
+    print("-" * 52)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, module, fn, kwargs in JOBS:
+            for bars in args.bars:
+                df = make_synthetic_ohlcv(rows=bars, freq="15min")
+                elapsed = time_runner(module, fn, kwargs, df, tmp)
+                print(f"{name:<20}{bars:>10}{elapsed:>12.3f}{elapsed / bars * 1e6:>10.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
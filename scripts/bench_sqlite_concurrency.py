@@ -0,0 +1,147 @@
+"""Read latency while a bulk insert runs: old connections vs the tuned pool.
+
+A writer process (the downloader) inserts --rows candles into ohlcv in
+--batch sized transactions while --readers threads (the web app) keep
+running the fetch_ohlcv query for one day of another, already stored
+series. Run once with the old setup (new default-journal connection per
+call) and once with database.get_connection (WAL, pragmas, per-thread
+reuse).
+
+Run:
+    PYTHONPATH=. python3 scripts/bench_sqlite_concurrency.py
+    PYTHONPATH=. python3 scripts/bench_sqlite_concurrency.py --rows 1000000 --readers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import src.core.database as database
+from scripts.test_strategies_selftest import patched_attr
+
+START_TS = 1_600_000_000_000
+
+READ_SQL = """
+    SELECT timestamp, open, high, low, close, volume
+    FROM ohlcv
+    WHERE exchange = ?
+      AND symbol = ?
+      AND timeframe = ?
+      AND timestamp >= ?
+      AND timestamp <= ?
+    ORDER BY timestamp ASC LIMIT 50000
+"""
+
+INSERT_SQL = """
+    INSERT OR IGNORE INTO ohlcv (
+        exchange, symbol, timeframe, timestamp,
+        open, high, low, close, volume
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+
+def candles(symbol: str, rows: int, offset: int = 0):
+    ts = START_TS + (offset + np.arange(rows, dtype=np.int64)) * 60_000
+    close = (100 + np.cumsum(np.random.default_rng(offset).normal(0, 1, rows))).tolist()
+    return list(zip(["binance"] * rows, [symbol] * rows, ["1m"] * rows, ts.tolist(), close, close, close, close, [1.0] * rows))
+
+
+def old_connection():
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def old_insert(rows):
+    conn = old_connection()
+    conn.executemany(INSERT_SQL, rows)
+    conn.commit()
+    conn.close()
+
+
+def write_all(db_path, pragmas, tuned, rows, batch):
+    database.DB_PATH = db_path
+    database.PRAGMAS = pragmas
+    insert = database.insert_ohlcv_rows if tuned else old_insert
+    for offset in range(0, rows, batch):
+        insert(candles("WRITE/USDT", min(batch, rows - offset), offset))
+
+
+def run_case(label: str, get_conn, insert, args) -> None:
+    database.init_db()
+    insert(candles("READ/USDT", 100_000))
+    tuned = get_conn is database.get_connection
+
+    stop = threading.Event()
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def reader():
+        params = ("binance", "READ/USDT", "1m", START_TS + 10 * 86_400_000, START_TS + 11 * 86_400_000)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                conn = get_conn()
+                conn.execute(READ_SQL, params).fetchall()
+                conn.close()
+            except sqlite3.OperationalError as exc:
+                with lock:
+                    errors.append(str(exc))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+
+    writer = mp.get_context("spawn").Process(
+        target=write_all, args=(str(database.DB_PATH), database.PRAGMAS, tuned, args.rows, args.batch)
+    )
+    started = time.perf_counter()
+    writer.start()
+    writer.join()
+    write_s = time.perf_counter() - started
+
+    stop.set()
+    for t in threads:
+        t.join()
+    if tuned:
+        database.close_thread_connections()
+
+    lat = np.array(latencies) * 1000 if latencies else np.array([np.nan])
+    print(
+        f"{label:<10}{write_s:>10.2f} s{args.rows / write_s:>12,.0f}{len(latencies):>8}"
+        f"{np.percentile(lat, 50):>9.1f}{np.percentile(lat, 99):>9.1f}{lat.max():>9.1f}{len(errors):>8}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=1000, help="Candles per insert transaction (downloader page size)")
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'setup':<10}{'write':>12}{'rows/s':>12}{'reads':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}")
+    print("-" * 77)
+    with tempfile.TemporaryDirectory() as tmp:
+        with patched_attr(database, "DB_PATH", os.path.join(tmp, "old.db")), patched_attr(database, "PRAGMAS", {}):
+            run_case("old", old_connection, old_insert, args)
+        with patched_attr(database, "DB_PATH", os.path.join(tmp, "tuned.db")):
+            run_case("tuned", database.get_connection, database.insert_ohlcv_rows, args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""Time of the stats kernel vs the old np.polyfit stats().
+
+Scores --runs candidate runs of --trades closed trades each: once with the
+old per-run stats() body (boolean masks, np.polyfit slopes), once with
+performance_stats() per run and once with a single
+performance_stats_batch() call. The kernel also returns Sharpe, Sortino,
+CAGR, MAR, Ulcer index and drawdown duration, which the old body did not.
+
+Run:
+    PYTHONPATH=. python3 scripts/bench_stats.py
+    PYTHONPATH=. python3 scripts/bench_stats.py --runs 5000 --trades 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from src.core.performance import performance_stats, performance_stats_batch
+
+
+def old_stats(net_pnls, equity_curve):
+    wins = net_pnls[net_pnls > 0]
+    losses = net_pnls[net_pnls < 0]
+    total_trades = len(net_pnls)
+    profit_factor = wins.sum() / abs(losses.sum()) if len(losses) > 0 else np.inf
+    avg_win = float(wins.mean()) if len(wins) > 0 else 0.0
+    avg_loss = float(losses.mean()) if len(losses) > 0 else 0.0
+    win_rate = len(wins) / total_trades
+    loss_rate = len(losses) / total_trades
+    tharp = (avg_win * win_rate + avg_loss * loss_rate) / abs(avg_loss) if avg_loss != 0 else np.nan
+
+    equity = np.array(equity_curve)
+    peaks = np.maximum.accumulate(equity)
+    drawdowns = (equity - peaks) / peaks
+    equity_slope = np.polyfit(np.arange(len(equity)), equity, 1)[0] if len(equity) > 1 else 0.0
+    pnl_slope = np.polyfit(np.arange(len(net_pnls)), net_pnls, 1)[0] if len(net_pnls) > 1 else 0.0
+    return {
+        "Total trades": total_trades,
+        "Total Net Profit": float(net_pnls.sum()),
+        "Profit Factor": profit_factor,
+        "Avg Trade Net Profit": avg_win,
+        "Avg Trade Net Loss": avg_loss,
+        "Tharp Expectancy": float(tharp),
+        "Max Drawdown (%)": float(drawdowns.min() * 100),
+        "Equity Curve Slope": float(equity_slope),
+        "Trade Net Profit Slope": float(pnl_slope),
+    }
+
+
+def timed(label: str, fn, runs: int) -> None:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28}{elapsed * 1e3:>10.1f} ms{elapsed / runs * 1e6:>12.1f} us/run")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=2_000, help="Candidate runs to score")
+    parser.add_argument("--trades", type=int, default=300, help="Closed trades per run")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pnls = [rng.normal(1.0, 20.0, args.trades) for _ in range(args.runs)]
+    curves = [np.concatenate([[1000.0], 1000.0 + np.cumsum(p)]) for p in pnls]
+    curve_lists = [c.tolist() for c in curves]
+
+    print(f"{args.runs:,} runs x {args.trades:,} trades")
+    print(f"{'stats':<28}{'total':>13}{'per run':>15}")
+    print("-" * 56)
+    timed("old stats() (polyfit)", lambda: [old_stats(p, c) for p, c in zip(pnls, curve_lists)], args.runs)
+    timed("performance_stats()", lambda: [performance_stats(p, c) for p, c in zip(pnls, curve_lists)], args.runs)
+    timed("performance_stats_batch()", lambda: performance_stats_batch(pnls, curves), args.runs)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
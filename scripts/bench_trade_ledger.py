@@ -0,0 +1,97 @@
+"""Memory and time of the trade ledger vs the old list of trade dicts.
+
+Records --trades closed trades the way BacktesterV2._close_trade does, then
+does what stats() and export_trades_csv need from them (the net_pnl array
+and a DataFrame). Time is measured without tracing; memory is the
+tracemalloc peak of a second run.
+
+Run:
+    PYTHONPATH=. python3 scripts/bench_trade_ledger.py
+    PYTHONPATH=. python3 scripts/bench_trade_ledger.py --trades 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.core.trade_ledger import TradeLedger
+
+
+def trade_fields(n: int):
+    rng = np.random.default_rng(0)
+    times = pd.date_range("2020-01-01", periods=n, freq="min", tz="UTC")
+    net = rng.normal(0, 5, n).tolist()
+    price = (100 + np.cumsum(rng.normal(0, 0.1, n))).tolist()
+    for i in range(n):
+        yield {
+            "entry_time": times[i],
+            "exit_time": times[i],
+            "side": "LONG",
+            "entry_price": price[i],
+            "exit_price": price[i] + 0.5,
+            "position_size": 100.0,
+            "qty": 100.0 / price[i],
+            "gross_pnl": net[i] + 0.2,
+            "commission_paid": 0.2,
+            "net_pnl": net[i],
+            "result": "WIN" if net[i] > 0 else "LOSS",
+            "entry_trigger": "EMA cross up",
+            "exit_trigger": "Stop Loss",
+            "bars_in_trade": i % 50,
+            "stop_price": price[i] * 0.98,
+            "take_profit_price": None,
+            "cash_after_trade": 1000.0 + net[i],
+            "pyramid_level": 1,
+        }
+
+
+def run_list(fields):
+    trades = []
+    for trade in fields:
+        trades.append(dict(trade))
+    net_pnls = np.array([t["net_pnl"] for t in trades])
+    frame = pd.DataFrame(trades)
+    return trades, net_pnls, frame
+
+
+def run_ledger(fields):
+    trades = TradeLedger()
+    for trade in fields:
+        trades.record(**trade)
+    return trades, trades.column("net_pnl"), trades.to_frame()
+
+
+def measure(label: str, fn, fields: list[dict]) -> None:
+    started = time.perf_counter()
+    fn(fields)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    kept = fn(fields)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    print(f"{label:<14}{elapsed:>10.2f} s{peak / 2**20:>12.1f} MB")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=300_000)
+    args = parser.parse_args()
+
+    fields = list(trade_fields(args.trades))
+    print(f"{args.trades:,} trades")
+    print(f"{'ledger':<14}{'time':>12}{'peak mem':>15}")
+    print("-" * 41)
+    measure("list of dicts", run_list, fields)
+    measure("TradeLedger", run_ledger, fields)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,35 @@
+"""Build higher timeframes in ohlcv_clean from a clean base series.
+
+Registered derived series are then refreshed by every sanitize_data run of
+their base series.
+
+Run:
+    PYTHONPATH=. python3 scripts/derive_timeframes.py --symbol BTC/USDT
+    PYTHONPATH=. python3 scripts/derive_timeframes.py --symbol ETH/USDT --timeframes 1h,4h,1d --full-rebuild
+"""
+
+import argparse
+
+from src.core.database import init_db
+from src.data.resampler import DERIVED_TIMEFRAMES, derive_timeframes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--exchange", default="binance")
+    parser.add_argument("--symbol", default="BTC/USDT")
+    parser.add_argument("--base", default="1m", help="Base timeframe stored in ohlcv_clean")
+    parser.add_argument("--timeframes", default=",".join(DERIVED_TIMEFRAMES))
+    parser.add_argument("--full-rebuild", action="store_true")
+    args = parser.parse_args()
+
+    init_db()
+    timeframes = [t.strip() for t in args.timeframes.split(",") if t.strip()]
+    written = derive_timeframes(args.exchange, args.symbol, timeframes, args.base, full_rebuild=args.full_rebuild)
+    for timeframe, bars in written.items():
+        print(f"{args.symbol} {timeframe}: {bars} bars written")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
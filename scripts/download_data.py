@@ -1,9 +1,37 @@
-from src.data.downloader import BinanceDownloader
+"""Backfill Binance OHLCV for a universe of symbols x timeframes.
 
-downloader = BinanceDownloader()
+Series download concurrently under one shared rate limit and resume after
+the newest candle already stored when --start falls inside the stored
+range; an earlier --start backfills from there.
 
-downloader.download(
-    symbol="BTC/USDT",
-    timeframe="15m",
-    start_date="2018-01-01"
-)
+Run:
+    PYTHONPATH=. python3 scripts/download_data.py
+    PYTHONPATH=. python3 scripts/download_data.py --symbols BTC/USDT,ETH/USDT,SOL/USDT \
+        --timeframes 15m,1h,4h --start 2018-01-01 --workers 6
+"""
+
+import argparse
+
+from src.data.universe_downloader import UniverseDownloader
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", default="BTC/USDT", help="Comma-separated symbols")
+    parser.add_argument("--timeframes", default="15m", help="Comma-separated timeframes")
+    parser.add_argument("--start", default="2018-01-01")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=None, help="Requests per second (default: exchange rateLimit)")
+    args = parser.parse_args()
+
+    downloader = UniverseDownloader(max_workers=args.workers, requests_per_second=args.rps)
+    results = downloader.download(
+        symbols=[s.strip() for s in args.symbols.split(",") if s.strip()],
+        timeframes=[t.strip() for t in args.timeframes.split(",") if t.strip()],
+        start_date=args.start,
+    )
+    return 1 if any(isinstance(r, Exception) for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+"""Load OHLCV histories from local CSV/Parquet files into the ohlcv table.
+
+One series per file; the file stem is the symbol unless mapped with --map.
+Files need a date/datetime/timestamp column plus open/high/low/close
+(volume optional). Parquet files need pyarrow.
+
+Run:
+    PYTHONPATH=. python3 scripts/ingest_ohlcv_files.py data/imports/futures --exchange stooq
+    PYTHONPATH=. python3 scripts/ingest_ohlcv_files.py "exports/*.parquet" --exchange yfinance \
+        --map ES_F=ES=F --map MES_F=MES=F --start 2018-01-01
+"""
+
+import argparse
+
+from src.core.database import init_db
+from src.data.ingest import ingest_files
+
+
+def parse_mapping(text):
+    stem, _, symbol = text.partition("=")
+    if not stem or not symbol:
+        raise argparse.ArgumentTypeError(f"Expected STEM=SYMBOL, got '{text}'")
+    return stem, symbol
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+", help="Files, directories or glob patterns")
+    parser.add_argument("--exchange", required=True)
+    parser.add_argument("--timeframe", default="1d")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--map", action="append", default=[], type=parse_mapping, help="STEM=SYMBOL")
+    args = parser.parse_args()
+
+    init_db()
+    results = ingest_files(
+        args.paths,
+        exchange=args.exchange,
+        timeframe=args.timeframe,
+        symbols=dict(args.map),
+        start_date=args.start,
+        end_date=args.end,
+    )
+
+    failed = 0
+    for symbol, outcome in results.items():
+        if isinstance(outcome, Exception):
+            failed += 1
+            print(f"{symbol}: FAILED ({outcome})")
+        else:
+            print(f"{symbol}: inserted {outcome} rows")
+    return 1 if failed or not results else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+"""Backtest one strategy over many symbols with shared capital.
+
+Parameter values follow scripts/run_sweep.py (name=value); every symbol
+uses the same parameters.
+
+Run:
+    PYTHONPATH=. python3 scripts/run_portfolio.py --strategy donchian_breakout \
+        --symbols BTC/USDT,ETH/USDT,SOL/USDT --timeframe 4h \
+        --set donchian_lookback=20 --max-asset-pct 0.25 --max-positions 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from datetime import datetime
+
+from scripts.run_sweep import parse_spec
+from src.core.analysis.portfolio import SIGNAL_BUILDERS, run_portfolio_backtest
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--strategy", required=True, choices=sorted(SIGNAL_BUILDERS))
+    parser.add_argument("--exchange", default="binance")
+    parser.add_argument("--symbols", required=True, help="Comma-separated symbols")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--raw", action="store_true", help="Use the raw ohlcv table instead of ohlcv_clean")
+    parser.add_argument("--set", action="append", default=[], type=parse_spec, help="name=value strategy parameter")
+    parser.add_argument("--initial-capital", type=float, default=10_000.0)
+    parser.add_argument("--position-pct", type=float, default=None, help="Share of cash per entry (default 1/symbols)")
+    parser.add_argument("--max-asset-pct", type=float, default=None, help="Cap per symbol, share of cash")
+    parser.add_argument("--max-positions", type=int, default=None)
+    parser.add_argument("--commission-pct", type=float, default=0.001)
+    parser.add_argument("--slippage-pct", type=float, default=0.001)
+    parser.add_argument("--stop-loss-pct", type=float, default=0.02)
+    parser.add_argument("--take-profit-pct", type=float, default=None)
+    parser.add_argument("--allow-short", action="store_true")
+    parser.add_argument("--output-dir", default=None)
+    args = parser.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    output_dir = args.output_dir
+    if output_dir is None:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = os.path.join("data", "reports", "portfolio", f"{args.strategy}_{len(symbols)}sym_{args.timeframe}_{stamp}")
+
+    result = run_portfolio_backtest(
+        args.strategy,
+        symbols,
+        exchange=args.exchange,
+        timeframe=args.timeframe,
+        params={name: values[0] for name, values in args.set},
+        start_date=args.start,
+        end_date=args.end,
+        use_clean=not args.raw,
+        initial_capital=args.initial_capital,
+        position_pct=args.position_pct,
+        max_asset_pct=args.max_asset_pct,
+        max_positions=args.max_positions,
+        commission_pct=args.commission_pct,
+        slippage_pct=args.slippage_pct,
+        allow_short=args.allow_short,
+        stop_loss_pct=args.stop_loss_pct,
+        take_profit_pct=args.take_profit_pct,
+        output_dir=output_dir,
+    )
+
+    print(result["symbol_stats"][["Total trades", "Total Net Profit", "Profit Factor", "Max Drawdown (%)"]].to_string())
+    print("-" * 60)
+    for key, value in result["stats"].items():
+        print(f"{key}: {value}")
+    print(f"Saved: {output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
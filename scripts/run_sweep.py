@@ -0,0 +1,118 @@
+"""Grid-search one strategy across a process pool and write a ranked CSV.
+
+Parameter specs:
+    name=10:50:5     inclusive range (start:stop:step)
+    name=10,20,30    explicit list
+    name=1.5         single value (same as --set)
+
+Run:
+    PYTHONPATH=. python3 scripts/run_sweep.py --strategy ema_cross \
+        --symbol BTC/USDT --timeframe 1h \
+        --param ema_fast=5:50:5 --param ema_slow=50:200:10 \
+        --set stop_loss_pct=0.02 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src.core.analysis.sweep import STRATEGY_RUNNERS, run_sweep
+
+
+def parse_scalar(text: str):
+    lowered = text.strip().lower()
+    if lowered in {"true", "false"}:
+        return lowered == "true"
+    if lowered in {"none", "null"}:
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text.strip()
+
+
+def parse_spec(spec: str):
+    if "=" not in spec:
+        raise argparse.ArgumentTypeError(f"Expected name=values, got '{spec}'")
+    name, values = spec.split("=", 1)
+
+    if values.count(":") == 2:
+        start, stop, step = (parse_scalar(v) for v in values.split(":"))
+        if step == 0:
+            raise argparse.ArgumentTypeError(f"Step must be non-zero in '{spec}'")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        grid = [start + i * step for i in range(max(count, 0))]
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            return name.strip(), grid
+        return name.strip(), [round(v, 10) for v in grid]
+
+    return name.strip(), [parse_scalar(v) for v in values.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--strategy", required=True, choices=sorted(STRATEGY_RUNNERS))
+    parser.add_argument("--exchange", default="binance")
+    parser.add_argument("--symbol", default="BTC/USDT")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--raw", action="store_true", help="Use the raw ohlcv table instead of ohlcv_clean")
+    parser.add_argument("--param", action="append", default=[], type=parse_spec, help="name=spec to sweep")
+    parser.add_argument("--set", action="append", default=[], type=parse_spec, help="name=value fixed for all runs")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="Total Net Profit")
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    param_grid = dict(args.param)
+    fixed_params = {name: values[0] for name, values in args.set}
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safe_symbol = args.symbol.replace("/", "")
+        output = os.path.join("data", "reports", "sweeps", f"{args.strategy}_{safe_symbol}_{args.timeframe}_{stamp}.csv")
+
+    started = time.perf_counter()
+    results = run_sweep(
+        args.strategy,
+        param_grid,
+        exchange=args.exchange,
+        symbol=args.symbol,
+        timeframe=args.timeframe,
+        start_date=args.start,
+        end_date=args.end,
+        use_clean=not args.raw,
+        fixed_params=fixed_params,
+        workers=args.workers,
+        rank_by=args.rank_by,
+        ascending=args.ascending,
+        output_csv=output,
+    )
+    elapsed = time.perf_counter() - started
+
+    if results.empty:
+        print("No results")
+        return 1
+
+    failed = int(results["error"].notna().sum())
+    print(f"{len(results)} runs in {elapsed:.1f}s ({len(results) / elapsed:.1f} runs/s), {failed} failed")
+    print(results.head(args.top).to_string(index=False))
+    print(f"Saved: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+"""Walk-forward optimization for one strategy.
+
+Windows are calendar spans ("18M", "6M", "90D", "2W", "1Y") or bar counts.
+Parameter specs follow scripts/run_sweep.py (name=start:stop:step or a,b,c).
+
+Run:
+    PYTHONPATH=. python3 scripts/run_walk_forward.py --strategy rsi_reversion \
+        --symbol BTC/USDT --timeframe 4h --train 18M --test 6M \
+        --param rsi_period=7:21:7 --param rsi_entry=25,30,35 --param rsi_exit=50,60
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from datetime import datetime
+
+from scripts.run_sweep import parse_spec
+from src.core.analysis.sweep import STRATEGY_RUNNERS
+from src.core.analysis.walk_forward import run_walk_forward
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--strategy", required=True, choices=sorted(STRATEGY_RUNNERS))
+    parser.add_argument("--exchange", default="binance")
+    parser.add_argument("--symbol", default="BTC/USDT")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--raw", action="store_true", help="Use the raw ohlcv table instead of ohlcv_clean")
+    parser.add_argument("--train", default="18M")
+    parser.add_argument("--test", default="6M")
+    parser.add_argument("--step", default=None, help="Window step (defaults to --test)")
+    parser.add_argument("--anchored", action="store_true", help="IS windows always start at the first bar")
+    parser.add_argument("--warmup-bars", type=int, default=None)
+    parser.add_argument("--param", action="append", default=[], type=parse_spec, help="name=spec to optimize")
+    parser.add_argument("--set", action="append", default=[], type=parse_spec, help="name=value fixed for all runs")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="Total Net Profit")
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--output-dir", default=None)
+    args = parser.parse_args()
+
+    output_dir = args.output_dir
+    if output_dir is None:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safe_symbol = args.symbol.replace("/", "")
+        output_dir = os.path.join("data", "reports", "walk_forward", f"{args.strategy}_{safe_symbol}_{args.timeframe}_{stamp}")
+
+    result = run_walk_forward(
+        args.strategy,
+        dict(args.param),
+        exchange=args.exchange,
+        symbol=args.symbol,
+        timeframe=args.timeframe,
+        start_date=args.start,
+        end_date=args.end,
+        use_clean=not args.raw,
+        train=args.train,
+        test=args.test,
+        step=args.step,
+        anchored=args.anchored,
+        warmup_bars=args.warmup_bars,
+        fixed_params={name: values[0] for name, values in args.set},
+        workers=args.workers,
+        rank_by=args.rank_by,
+        ascending=args.ascending,
+        output_dir=output_dir,
+    )
+
+    if result["windows"].empty:
+        print("No walk-forward windows (not enough data for train + test?)")
+        return 1
+
+    print(result["windows"].to_string(index=False))
+    print("-" * 60)
+    for key, value in result["stats"].items():
+        print(f"{key}: {value}")
+    print(f"Saved: {output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,31 +1,127 @@
 import os
-import sqlite3
+import numpy as np
 import pandas as pd
 from datetime import datetime, timezone
 
+from src.core.database import connect, ensure_ohlcv_clean_table, frame_to_ohlcv_rows, upsert_ohlcv_clean_rows
+from src.core.ohlcv_cache import invalidate_ohlcv_cache
+from src.data.resampler import TIMEFRAME_TO_MS, derived_timeframes, update_derived_series
+
 DB_PATH = "data/market_data.db"
 
 REPORT_DIR = "data/reports"
 os.makedirs(REPORT_DIR, exist_ok=True)
 
-TIMEFRAME_TO_MS = {
-    "1m": 60_000,
-    "3m": 180_000,
-    "5m": 300_000,
-    "15m": 900_000,
-    "30m": 1_800_000,
-    "1h": 3_600_000,
-    "2h": 7_200_000,
-    "4h": 14_400_000,
-    "6h": 21_600_000,
-    "12h": 43_200_000,
-    "1d": 86_400_000,
-    "3d": 259_200_000,
-    "1w": 604_800_000,
-}
-
-
-def sanitize_data(exchange="binance", symbol="BTC/USDT", timeframe="15m"):
+
+def fill_gaps(df, step_ms, exchange, symbol, timeframe):
+    """
+    Insert flat candles (O=H=L=C=previous close, volume 0) for every missing
+    step between consecutive rows of a timestamp-sorted, de-duplicated frame.
+
+    Returns (frame, gaps, inserted) where gaps is a list of
+    (first missing ts, next real ts, missing candles).
+    """
+    ts = df["timestamp"].to_numpy(dtype=np.int64)
+    if len(ts) < 2:
+        return df, [], 0
+
+    # A gap of d ms after a candle needs ceil(d / step) - 1 fillers, placed
+    # on that candle's grid (prev + step, prev + 2*step, ...).
+    missing = (np.diff(ts) - 1) // step_ms
+    gap_idx = np.flatnonzero(missing > 0)
+    if len(gap_idx) == 0:
+        return df, [], 0
+
+    counts = missing[gap_idx]
+    inserted = int(counts.sum())
+
+    prev_ts = ts[gap_idx]
+    offsets = np.arange(inserted, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    fill_ts = np.repeat(prev_ts, counts) + offsets * step_ms
+    fill_close = np.repeat(df["close"].to_numpy(dtype=np.float64)[gap_idx], counts)
+
+    # Lay real and filled candles out on the output grid directly instead of
+    # concat + sort: real row i moves down by the fillers inserted before it.
+    shift = np.zeros(len(ts), dtype=np.int64)
+    shift[gap_idx + 1] = counts
+    real_pos = np.arange(len(ts)) + np.cumsum(shift)
+    fill_pos = np.repeat(real_pos[gap_idx], counts) + offsets
+
+    fill_values = {
+        "timestamp": fill_ts,
+        "open": fill_close,
+        "high": fill_close,
+        "low": fill_close,
+        "close": fill_close,
+        "volume": 0.0,
+    }
+    out = {"exchange": exchange, "symbol": symbol, "timeframe": timeframe}
+    for column, values in fill_values.items():
+        real = df[column].to_numpy()
+        merged = np.empty(len(ts) + inserted, dtype=real.dtype)
+        merged[real_pos] = real
+        merged[fill_pos] = values
+        out[column] = merged
+    df = pd.DataFrame(out, columns=df.columns, copy=False)
+
+    gaps = list(zip((prev_ts + step_ms).tolist(), ts[gap_idx + 1].tolist(), counts.tolist()))
+    return df, gaps, inserted
+
+
+# -------------------------------------------------
+# HIGH-WATER MARK
+# -------------------------------------------------
+# Incremental runs only re-clean candles from (last cleaned timestamp -
+# overlap) onwards; the last clean candle before that point anchors gap
+# filling across the boundary. Series without a mark get a full rebuild.
+OVERLAP_BARS = 5
+
+
+def _ensure_state_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ohlcv_clean_state (
+            exchange TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            last_ts INTEGER NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (exchange, symbol, timeframe)
+        )
+    """)
+
+
+def get_high_water_mark(conn, exchange, symbol, timeframe):
+    """Last cleaned timestamp (ms) of the series, None if never sanitized."""
+    cur = conn.cursor()
+    _ensure_state_table(cur)
+    cur.execute(
+        "SELECT last_ts FROM ohlcv_clean_state WHERE exchange = ? AND symbol = ? AND timeframe = ?",
+        (exchange, symbol, timeframe),
+    )
+    row = cur.fetchone()
+    return None if row is None else int(row[0])
+
+
+def _set_high_water_mark(cur, exchange, symbol, timeframe, last_ts):
+    cur.execute(
+        """
+        INSERT OR REPLACE INTO ohlcv_clean_state (exchange, symbol, timeframe, last_ts, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (exchange, symbol, timeframe, int(last_ts), datetime.now(timezone.utc).isoformat()),
+    )
+
+
+def sanitize_data(exchange="binance", symbol="BTC/USDT", timeframe="15m", full_rebuild=False,
+                  overlap_bars=OVERLAP_BARS):
+    """
+    Clean the raw ohlcv series into ohlcv_clean.
+
+    By default only candles after the series' high-water mark (minus
+    `overlap_bars`) are validated, gap-filled and appended; the first run of a
+    series, raw candles older than the clean range, or full_rebuild=True
+    rewrite the whole series.
+    """
 
     step_ms = TIMEFRAME_TO_MS.get(timeframe)
     if not step_ms:
@@ -42,19 +138,77 @@ def sanitize_data(exchange="binance", symbol="BTC/USDT", timeframe="15m"):
 
     report_lines.append("")
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
 
     # -----------------------------
     # Load data
     # -----------------------------
-    df = pd.read_sql_query("""
-        SELECT exchange, symbol, timeframe, timestamp, open, high, low, close, volume
-        FROM ohlcv
-        WHERE exchange = ?
-          AND symbol = ?
-          AND timeframe = ?
-        ORDER BY timestamp ASC
-    """, conn, params=(exchange, symbol, timeframe))
+    high_water = None if full_rebuild else get_high_water_mark(conn, exchange, symbol, timeframe)
+    window_start = None
+    anchor = pd.DataFrame()
+
+    if high_water is not None:
+        window_start = high_water - overlap_bars * step_ms
+        anchor = pd.read_sql_query("""
+            SELECT exchange, symbol, timeframe, timestamp, open, high, low, close, volume
+            FROM ohlcv_clean
+            WHERE exchange = ?
+              AND symbol = ?
+              AND timeframe = ?
+              AND timestamp < ?
+            ORDER BY timestamp DESC
+            LIMIT 1
+        """, conn, params=(exchange, symbol, timeframe, window_start))
+
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT MIN(timestamp), MAX(timestamp) FROM ohlcv WHERE exchange = ? AND symbol = ? AND timeframe = ?",
+            (exchange, symbol, timeframe),
+        )
+        raw_first, raw_last = cur.fetchone()
+        cur.execute(
+            "SELECT MIN(timestamp) FROM ohlcv_clean WHERE exchange = ? AND symbol = ? AND timeframe = ?",
+            (exchange, symbol, timeframe),
+        )
+        clean_first = cur.fetchone()[0]
+
+        if anchor.empty:
+            # Mark older than the overlap (or clean rows deleted): start over.
+            high_water = window_start = None
+        elif raw_first is not None and raw_first < clean_first:
+            # Raw history backfilled before the clean range (download_since
+            # with an earlier start_date): the window alone would never
+            # clean it.
+            report_lines.append("Raw candles found before the clean range.")
+            high_water = window_start = None
+        elif raw_last is None or raw_last <= high_water:
+            conn.close()
+            print(f"[OK] ohlcv_clean already up to date for {exchange} {symbol} {timeframe}")
+            return
+
+    if high_water is None:
+        report_lines.append("Mode      : full rebuild")
+        df = pd.read_sql_query("""
+            SELECT exchange, symbol, timeframe, timestamp, open, high, low, close, volume
+            FROM ohlcv
+            WHERE exchange = ?
+              AND symbol = ?
+              AND timeframe = ?
+            ORDER BY timestamp ASC
+        """, conn, params=(exchange, symbol, timeframe))
+    else:
+        window_str = datetime.fromtimestamp(window_start / 1000, timezone.utc).isoformat()
+        report_lines.append(f"Mode      : incremental from {window_str} ({overlap_bars} candles overlap)")
+        df = pd.read_sql_query("""
+            SELECT exchange, symbol, timeframe, timestamp, open, high, low, close, volume
+            FROM ohlcv
+            WHERE exchange = ?
+              AND symbol = ?
+              AND timeframe = ?
+              AND timestamp >= ?
+            ORDER BY timestamp ASC
+        """, conn, params=(exchange, symbol, timeframe, window_start))
+    report_lines.append("")
 
     original_count = len(df)
     report_lines.append(f"Original rows loaded: {original_count}")
@@ -64,6 +218,7 @@ def sanitize_data(exchange="binance", symbol="BTC/USDT", timeframe="15m"):
         report_path = os.path.join(REPORT_DIR, "sanitize_report_EMPTY.txt")
         with open(report_path, "w") as f:
             f.write("\n".join(report_lines))
+        conn.close()
         return
 
     # Ensure numeric columns are numeric
@@ -136,46 +291,16 @@ def sanitize_data(exchange="binance", symbol="BTC/USDT", timeframe="15m"):
     report_lines.append("")
     report_lines.append("Step 5 - Detect and fill gaps")
 
-    filled_rows = []
-    gaps_summary = []
-    gap_count = 0
-
-    for i in range(1, len(df)):
-        prev_row = df.iloc[i - 1]
-        curr_row = df.iloc[i]
-
-        expected_ts = prev_row["timestamp"] + step_ms
-
-        if expected_ts < curr_row["timestamp"]:
-            # Gap detected
-            gap_start = expected_ts
-            gap_end = curr_row["timestamp"]
-            missing = 0
-
-            while expected_ts < curr_row["timestamp"]:
-                missing += 1
-                gap_count += 1
-
-                last_close = prev_row["close"]
-
-                filled_rows.append({
-                    "exchange": exchange,
-                    "symbol": symbol,
-                    "timeframe": timeframe,
-                    "timestamp": expected_ts,
-                    "open": last_close,
-                    "high": last_close,
-                    "low": last_close,
-                    "close": last_close,
-                    "volume": 0.0
-                })
-
-                expected_ts += step_ms
-
-            gaps_summary.append((gap_start, gap_end, missing))
+    # The anchor (last clean candle before the window) only bridges the gap
+    # into the window; it is already in ohlcv_clean and is dropped again.
+    if not anchor.empty:
+        df = pd.concat([anchor, df], ignore_index=True)
+    df, gaps_summary, inserted = fill_gaps(df, step_ms, exchange, symbol, timeframe)
+    if not anchor.empty:
+        df = df.iloc[1:].reset_index(drop=True)
 
     report_lines.append(f"Gaps detected: {len(gaps_summary)}")
-    report_lines.append(f"Missing candles inserted: {len(filled_rows)}")
+    report_lines.append(f"Missing candles inserted: {inserted}")
 
     if gaps_summary:
         report_lines.append("")
@@ -188,11 +313,14 @@ def sanitize_data(exchange="binance", symbol="BTC/USDT", timeframe="15m"):
         if len(gaps_summary) > 30:
             report_lines.append(f"  ... ({len(gaps_summary) - 30} more gaps omitted)")
 
-    # Insert filled candles
-    if filled_rows:
-        df_filled = pd.DataFrame(filled_rows)
-        df = pd.concat([df, df_filled], ignore_index=True)
-        df = df.sort_values("timestamp").reset_index(drop=True)
+    if df.empty:
+        report_lines.append("")
+        report_lines.append("ERROR: No valid candles left. ohlcv_clean not modified.")
+        report_path = os.path.join(REPORT_DIR, "sanitize_report_EMPTY.txt")
+        with open(report_path, "w") as f:
+            f.write("\n".join(report_lines))
+        conn.close()
+        return
 
     # -----------------------------
     # Final stats
@@ -207,7 +335,7 @@ def sanitize_data(exchange="binance", symbol="BTC/USDT", timeframe="15m"):
     report_lines.append(f"Removed NaNs     : {nan_removed}")
     report_lines.append(f"Removed dups     : {dup_removed}")
     report_lines.append(f"Removed invalid  : {invalid_count}")
-    report_lines.append(f"Inserted gaps    : {len(filled_rows)}")
+    report_lines.append(f"Inserted gaps    : {inserted}")
 
     start_ts = df["timestamp"].min()
     end_ts = df["timestamp"].max()
@@ -228,35 +356,46 @@ def sanitize_data(exchange="binance", symbol="BTC/USDT", timeframe="15m"):
     report_lines.append("Saving sanitized candles into table: ohlcv_clean")
 
     cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS ohlcv_clean (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            exchange TEXT,
-            symbol TEXT,
-            timeframe TEXT,
-            timestamp INTEGER,
-            open REAL,
-            high REAL,
-            low REAL,
-            close REAL,
-            volume REAL
-        )
-    """)
+    ensure_ohlcv_clean_table(cur)
 
-    cur.execute(
-        "DELETE FROM ohlcv_clean WHERE exchange = ? AND symbol = ? AND timeframe = ?",
-        (exchange, symbol, timeframe),
-    )
+    if window_start is None:
+        cur.execute(
+            "DELETE FROM ohlcv_clean WHERE exchange = ? AND symbol = ? AND timeframe = ?",
+            (exchange, symbol, timeframe),
+        )
+    else:
+        cur.execute(
+            "DELETE FROM ohlcv_clean WHERE exchange = ? AND symbol = ? AND timeframe = ? AND timestamp >= ?",
+            (exchange, symbol, timeframe, window_start),
+        )
+        report_lines.append(f"Replaced rows from overlap window: {cur.rowcount}")
 
-    conn.commit()
+    upsert_ohlcv_clean_rows(frame_to_ohlcv_rows(df), conn=conn)
 
-    df.to_sql("ohlcv_clean", conn, if_exists="append", index=False)
+    _ensure_state_table(cur)
+    _set_high_water_mark(cur, exchange, symbol, timeframe, df["timestamp"].max())
 
     report_lines.append(f"Inserted rows into ohlcv_clean: {len(df)}")
 
     conn.commit()
     conn.close()
 
+    invalidate_ohlcv_cache(exchange, symbol, timeframe, table="ohlcv_clean")
+
+    # -----------------------------
+    # Refresh timeframes derived from this series
+    # -----------------------------
+    conn = connect(DB_PATH)
+    derived = derived_timeframes(conn, exchange, symbol, base_timeframe=timeframe)
+    if derived:
+        written = update_derived_series(
+            conn, exchange, symbol, derived, base_timeframe=timeframe,
+            since_ts=window_start, full_rebuild=window_start is None,
+        )
+        report_lines.append("")
+        report_lines.append("Derived timeframes updated: " + ", ".join(f"{tf} (+{n})" for tf, n in written.items()))
+    conn.close()
+
 
     # -----------------------------
     # Write report to TXT
@@ -279,8 +418,18 @@ def sanitize_data(exchange="binance", symbol="BTC/USDT", timeframe="15m"):
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--exchange", default="binance")
+    parser.add_argument("--symbol", default="BTC/USDT")
+    parser.add_argument("--timeframe", default="15m")
+    parser.add_argument("--full-rebuild", action="store_true", help="Re-clean the whole series instead of the tail")
+    args = parser.parse_args()
+
     sanitize_data(
-        exchange="binance",
-        symbol="BTC/USDT",
-        timeframe="15m"
+        exchange=args.exchange,
+        symbol=args.symbol,
+        timeframe=args.timeframe,
+        full_rebuild=args.full_rebuild,
     )
@@ -6,16 +6,32 @@ Run:
 
 from __future__ import annotations
 
+import io
+import json
 import math
 import os
+import sqlite3
 import tempfile
+import threading
+import time
 import traceback
-from contextlib import contextmanager
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
 from dataclasses import dataclass
+from datetime import timezone
 
 import numpy as np
 import pandas as pd
-
+import pandas_ta as ta
+
+import scripts.sanitize_data as sanitize_module
+import src.core.chart_data as chart_data_module
+import src.core.data as data_module
+import src.core.database as database_module
+import src.core.frame_cache as frame_cache
+import src.core.ohlcv_cache as ohlcv_cache_module
+import src.core.plotting.plot_trades as plot_trades_module
+import src.data.downloader as downloader_module
+import src.data.universe_downloader as universe_module
 import src.strategies.basic_keltner_reversion.backtest_basic_keltner_reversion_v2 as bk_runner
 import src.strategies.bmsb.backtest_bmsb_v2 as bmsb_runner
 import src.strategies.donchian_breakout.backtest_donchian_breakout_v2 as don_runner
@@ -24,12 +40,41 @@ import src.strategies.ema_trend_hold.backtest_ema_trend_hold_v2 as trend_runner
 import src.strategies.emalyarovich_smas.backtest_emalyarovich_smas_v2 as sma_runner
 import src.strategies.k_davey_mom_keltner.backtest_k_davey_mom_keltner_v2 as kd_runner
 import src.strategies.rsi_reversion.backtest_rsi_reversion_v2 as rsi_runner
-from src.strategies.basic_keltner_reversion.strategy import keltner_reversion
+import web.history as history_module
+import web.jobs as jobs_module
+import web.trade_charts as trade_charts_module
+from scripts.sanitize_data import fill_gaps, get_high_water_mark
+from src.core.analysis.portfolio import run_portfolio_backtest
+from src.core.analysis.sweep import run_backtest_batch, run_sweep
+from src.core.analysis.walk_forward import build_windows, default_warmup_bars, run_walk_forward
+from src.core.backtester_portfolio import PortfolioBacktester
+from src.core.backtester_v2 import BacktesterV2
+from src.core.performance import STAT_KEYS, performance_stats, performance_stats_batch, span_years
+from src.core.backtester_vectorized import (
+    SIGNAL_EXIT_LONG,
+    SIGNAL_LONG,
+    VectorizedBacktester,
+)
+from src.core.frame_cache import DATASET_KEY_ATTR, LRUCache, cached_indicator
+from src.core.ohlcv_cache import cache_path, invalidate_ohlcv_cache, load_ohlcv_cached
+from src.core.streaming_ta import ADX, ATR, EMA, RSI, SMA, Donchian
+from src.core.ta import compute_adx, compute_atr, compute_rsi
+from src.core.trade_ledger import TradeLedger
+from src.data.downloader import BinanceDownloader
+from src.data.ingest import ingest_files, to_epoch_ms
+from src.data.resampler import bucket_start, resample_ohlcv, update_derived_series
+from src.data.universe_downloader import TokenBucket, UniverseDownloader
+from src.strategies.basic_keltner_reversion.strategy import (
+    KeltnerReversionState,
+    keltner_reversion,
+)
 from src.strategies.bmsb.strategy import compute_bmsb, compute_tensignal
 from src.strategies.donchian_breakout.strategy import check_signal as don_check
 from src.strategies.donchian_breakout.strategy import compute_donchian
+from src.strategies.ema_cross.strategy import EmaCrossState
 from src.strategies.ema_cross.strategy import check_signal as ema_check
 from src.strategies.ema_trend_hold.strategy import check_signal as trend_check
+from src.strategies.ema_trend_hold.strategy import compute_trend_ema
 from src.strategies.emalyarovich_smas.strategy import check_signal as smas_check
 from src.strategies.k_davey_mom_keltner.strategy import (
     compute_keltner_stochastic,
@@ -38,6 +83,14 @@ from src.strategies.k_davey_mom_keltner.strategy import (
 from src.strategies.rsi_reversion.strategy import check_signal as rsi_check
 
 
+BASELINE_CSV_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "docs",
+    "strategy_walkthroughs",
+    "csv_baselines",
+)
+
+
 @dataclass
 class TestResult:
     name: str
@@ -434,6 +487,1843 @@ def test_backtest_regression() -> list[TestResult]:
     return results
 
 
+def _assert_trades_match_baseline(strategy_name: str, trades: list[dict]) -> None:
+    baseline = pd.read_csv(
+        os.path.join(BASELINE_CSV_DIR, f"{strategy_name}.csv"),
+        float_precision="round_trip",
+    )
+    _assert(
+        len(trades) == len(baseline),
+        f"{strategy_name}: expected {len(baseline)} trades, got {len(trades)}",
+    )
+
+    for trade, (_, row) in zip(trades, baseline.iterrows()):
+        _assert(
+            pd.Timestamp(trade["entry_time"], tz="UTC") == pd.Timestamp(row["entry_time"]),
+            f"{strategy_name}: entry_time mismatch ({trade['entry_time']} vs {row['entry_time']})",
+        )
+        _assert(
+            pd.Timestamp(trade["exit_time"], tz="UTC") == pd.Timestamp(row["exit_time"]),
+            f"{strategy_name}: exit_time mismatch ({trade['exit_time']} vs {row['exit_time']})",
+        )
+        _assert(
+            trade["net_pnl"] == float(row["net_pnl"]),
+            f"{strategy_name}: net_pnl mismatch ({trade['net_pnl']} vs {row['net_pnl']})",
+        )
+        _assert(
+            trade["entry_trigger"] == row["entry_trigger"] and trade["exit_trigger"] == row["exit_trigger"],
+            f"{strategy_name}: trigger mismatch",
+        )
+
+
+def test_vectorized_engine_parity() -> list[TestResult]:
+    """VectorizedBacktester must reproduce the BacktesterV2 CSV baselines."""
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=430, freq="D")
+    close = df["close"].to_numpy()
+
+    try:
+        trend = compute_trend_ema(df["close"], 200).to_numpy()
+        signals = np.where(close > trend, SIGNAL_LONG, 0)
+        signals = np.where(close < trend, SIGNAL_EXIT_LONG, signals)
+        triggers = np.where(signals == SIGNAL_LONG, "Price above EMA200", "Price below EMA200")
+
+        bt = VectorizedBacktester(slippage_pct=0.001, allow_short=False, stop_loss_pct=0.02)
+        bt.run(df["timestamp"], df["high"], df["low"], close, signals, triggers, start=201)
+        _assert_trades_match_baseline("ema_trend_hold", bt.trades)
+        results.append(TestResult("ema_trend_hold.vectorized_parity", True))
+    except Exception as exc:
+        results.append(TestResult("ema_trend_hold.vectorized_parity", False, str(exc)))
+
+    try:
+        # The runner evaluates RSI on the previous closed bar.
+        rsi = compute_rsi(df["close"], 14).shift(1).to_numpy()
+        signals = np.where(rsi < 30, SIGNAL_LONG, 0)
+        signals = np.where((signals == 0) & (rsi > 50), SIGNAL_EXIT_LONG, signals)
+        triggers = np.array(
+            [
+                f"RSI {value:.2f} below 30" if code == SIGNAL_LONG else f"RSI {value:.2f} above 50"
+                for value, code in zip(rsi, signals)
+            ],
+            dtype=object,
+        )
+
+        bt = VectorizedBacktester(slippage_pct=0.001, allow_short=False, stop_loss_pct=0.02)
+        bt.run(df["timestamp"], df["high"], df["low"], close, signals, triggers, start=15)
+        _assert_trades_match_baseline("rsi_reversion", bt.trades)
+        results.append(TestResult("rsi_reversion.vectorized_parity", True))
+    except Exception as exc:
+        results.append(TestResult("rsi_reversion.vectorized_parity", False, str(exc)))
+
+    # No CSV baseline for donchian_breakout: the runner is checked against
+    # its original bar-by-bar BacktesterV2 loop instead, on random walks
+    # (the smooth synthetic close never breaks its channel).
+    fixtures = {
+        "default": (_random_walk_ohlcv(430, "D", seed=1), {"donchian_lookback": 20}),
+        "stops": (
+            _random_walk_ohlcv(1500, "h", seed=2),
+            {"donchian_lookback": 10, "stop_loss_pct": 0.006, "take_profit_pct": 0.004, "pyramiding": 2},
+        ),
+        "atr_stops": (
+            _random_walk_ohlcv(1500, "h", seed=3),
+            {"donchian_lookback": 10, "atr_period": 14, "atr_sl_mult": 0.5, "atr_tp_mult": 1.0},
+        ),
+    }
+    for fixture, (frame, params) in fixtures.items():
+        name = f"donchian_breakout.vectorized_parity_{fixture}"
+        try:
+            runner_bt = _run_donchian_vectorized(frame, params)
+            reference = _run_donchian_reference(frame, params)
+            _assert(len(reference.trades) > 0, "Fixture should trade")
+            pd.testing.assert_frame_equal(runner_bt.trades.to_frame(), reference.trades.to_frame())
+            _assert(runner_bt.stats() == reference.stats(), "Stats should match BacktesterV2")
+            if fixture == "stops":
+                exits = reference.trades.to_frame()["exit_trigger"]
+                _assert(
+                    exits.isin(["stop_loss", "take_profit"]).sum() >= 20,
+                    "Stop/take-profit fixture should exit mostly on stops",
+                )
+            results.append(TestResult(name, True))
+        except Exception as exc:
+            results.append(TestResult(name, False, str(exc)))
+
+    return results
+
+
+def _random_walk_ohlcv(rows: int, freq: str, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = close * rng.uniform(0.001, 0.01, rows)
+    return pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2021-01-01", periods=rows, freq=freq),
+            "open": open_,
+            "high": np.maximum(open_, close) + spread,
+            "low": np.minimum(open_, close) - spread,
+            "close": close,
+            "volume": 1000.0,
+        }
+    )
+
+
+def _run_donchian_vectorized(df: pd.DataFrame, params: dict) -> VectorizedBacktester:
+    """run_backtest_donchian_breakout_v2 on df; returns its backtester."""
+    created = []
+
+    class RecordingBacktester(VectorizedBacktester):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            patched_attr(don_runner, "fetch_ohlcv", lambda **_kwargs: df.copy()), \
+            patched_attr(don_runner, "VectorizedBacktester", RecordingBacktester), \
+            redirect_stdout(io.StringIO()):
+        don_runner.run_backtest_donchian_breakout_v2(
+            "binance", "BTC/USDT", "1h", None, None,
+            run_id="parity",
+            generate_report=False,
+            generate_plots=False,
+            generate_equity=False,
+            base_path=tmp,
+            **params,
+        )
+    return created[0]
+
+
+def _run_donchian_reference(df: pd.DataFrame, params: dict) -> BacktesterV2:
+    """The donchian runner's original per-bar BacktesterV2 loop."""
+    lookback = int(params["donchian_lookback"])
+    atr_period = params.get("atr_period")
+    df = compute_donchian(df, lookback)
+    atr_series = compute_atr(df, atr_period) if atr_period else None
+    bt = BacktesterV2(
+        slippage_pct=0.001,
+        allow_short=False,
+        **{key: value for key, value in params.items() if key not in ("donchian_lookback", "atr_period")},
+    )
+
+    for i in range(lookback + 1, len(df)):
+        bar = df.iloc[i]
+        bt.on_bar(high=bar["high"], low=bar["low"], timestamp=bar["timestamp"], bar_index=i)
+
+        current_side = bt.position.side if bt.position else None
+        signal, trigger = don_check(df.iloc[:i], lookback, current_side=current_side)
+
+        atr_value = None
+        if atr_series is not None and pd.notna(atr_series.iloc[i]):
+            atr_value = float(atr_series.iloc[i])
+        if signal == "LONG" and atr_series is not None and atr_value is None:
+            continue
+
+        bt.on_signal(signal, bar["close"], bar["timestamp"], trigger, i, atr_value=atr_value)
+
+    bt.mark_to_market(df["close"].to_numpy(), df["timestamp"])
+    return bt
+
+
+def _stream(indicator_update, rows) -> np.ndarray:
+    values = [indicator_update(*row) for row in rows]
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _assert_series_close(name: str, streamed: np.ndarray, expected, tol: float = 1e-9) -> None:
+    expected = np.asarray(expected, dtype=float)
+    _assert(
+        np.array_equal(np.isnan(streamed), np.isnan(expected)),
+        f"{name}: warmup NaNs differ from full-series version",
+    )
+    diff = np.nanmax(np.abs(streamed - expected)) if not np.isnan(expected).all() else 0.0
+    _assert(diff <= tol, f"{name}: max abs diff {diff} > {tol}")
+
+
+def test_streaming_indicators() -> list[TestResult]:
+    """streaming_ta objects must match the full-series pandas/pandas_ta output."""
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=600, freq="D")
+    closes = [(c,) for c in df["close"]]
+    bars = list(zip(df["high"], df["low"], df["close"]))
+
+    checks = [
+        ("ema", lambda: _stream(EMA(20).update, closes), lambda: ta.ema(df["close"], length=20)),
+        (
+            "ewm",
+            lambda: _stream(EMA(50, presma=False).update, closes),
+            lambda: df["close"].ewm(span=50, adjust=False).mean(),
+        ),
+        ("sma", lambda: _stream(SMA(30).update, closes), lambda: df["close"].rolling(30).mean()),
+        ("atr", lambda: _stream(ATR(14).update, bars), lambda: compute_atr(df, 14)),
+        ("rsi", lambda: _stream(RSI(14).update, closes), lambda: compute_rsi(df["close"], 14)),
+        ("adx", lambda: _stream(ADX(14).update, bars), lambda: compute_adx(df, 14)),
+        (
+            "donchian",
+            lambda: _stream(lambda h, l, c, d=Donchian(20): d.update(h, l)[0], bars),
+            lambda: df["high"].rolling(20).max(),
+        ),
+    ]
+    for name, streamed, expected in checks:
+        try:
+            _assert_series_close(name, streamed(), expected())
+            results.append(TestResult(f"streaming_ta.{name}", True))
+        except Exception as exc:
+            results.append(TestResult(f"streaming_ta.{name}", False, str(exc)))
+
+    try:
+        state = KeltnerReversionState(ema_length=20, atr_length=20, atr_mult=1.5)
+        for i, (high, low, close) in enumerate(bars[:120]):
+            streamed = state.update(high, low, close)
+            expected = keltner_reversion(df.iloc[: i + 1], ema_length=20, atr_length=20, atr_mult=1.5)
+            _assert(streamed == expected, f"bar {i}: {streamed} != {expected}")
+        results.append(TestResult("basic_keltner_reversion.streaming_state", True))
+    except Exception as exc:
+        results.append(TestResult("basic_keltner_reversion.streaming_state", False, str(exc)))
+
+    try:
+        state = EmaCrossState(fast=5, slow=12, trend_period=30)
+        for i, close in enumerate(df["close"].iloc[:200]):
+            streamed = state.update(close, current_side="LONG")
+            expected = ema_check(df.iloc[: i + 1].copy(), fast=5, slow=12, trend_period=30, current_side="LONG")
+            _assert(streamed == expected, f"bar {i}: {streamed} != {expected}")
+        results.append(TestResult("ema_cross.streaming_state", True))
+    except Exception as exc:
+        results.append(TestResult("ema_cross.streaming_state", False, str(exc)))
+
+    return results
+
+
+def test_parameter_sweep() -> list[TestResult]:
+    """run_sweep workers must reproduce the single-run stats for each combination."""
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=430, freq="D")
+
+    def fake_fetch(**_kwargs):
+        return df.copy()
+
+    try:
+        grid = {"rsi_period": [10, 14], "rsi_entry": [30, 35], "rsi_exit": [50]}
+        swept = run_sweep(
+            "rsi_reversion",
+            grid,
+            exchange="binance",
+            symbol="BTC/USDT",
+            timeframe="1d",
+            df=df,
+            workers=2,
+        )
+        _assert(len(swept) == 4, f"Expected 4 sweep rows, got {len(swept)}")
+        _assert(swept["error"].isna().all(), f"Sweep errors: {swept['error'].dropna().tolist()}")
+        _assert(
+            swept["Total Net Profit"].is_monotonic_decreasing,
+            "Sweep results should be ranked by Total Net Profit",
+        )
+
+        with tempfile.TemporaryDirectory() as tmp, patched_attr(rsi_runner, "fetch_ohlcv", fake_fetch):
+            for row in swept.itertuples(index=False):
+                stats, _, _ = rsi_runner.run_backtest_rsi_reversion_v2(
+                    exchange="binance",
+                    symbol="BTC/USDT",
+                    timeframe="1d",
+                    start_date=None,
+                    end_date=None,
+                    rsi_period=row.rsi_period,
+                    rsi_entry=row.rsi_entry,
+                    rsi_exit=row.rsi_exit,
+                    run_id="selftest",
+                    generate_report=False,
+                    generate_plots=False,
+                    generate_equity=False,
+                    base_path=tmp,
+                )
+                got = swept.loc[
+                    (swept["rsi_period"] == row.rsi_period) & (swept["rsi_entry"] == row.rsi_entry)
+                ].iloc[0]
+                _assert(
+                    got["Total trades"] == stats["Total trades"]
+                    and got["Total Net Profit"] == stats["Total Net Profit"],
+                    f"Sweep row {row.rsi_period}/{row.rsi_entry} differs from single run",
+                )
+        results.append(TestResult("sweep.pool_matches_single_run", True))
+    except Exception as exc:
+        results.append(TestResult("sweep.pool_matches_single_run", False, str(exc)))
+
+    return results
+
+
+def test_walk_forward() -> list[TestResult]:
+    """Walk-forward windows must tile the data and keep only OOS trades."""
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=430, freq="D")
+
+    try:
+        windows = build_windows(df["timestamp"], train="6M", test="3M")
+        _assert(len(windows) == 3, f"Expected 3 rolling 6M/3M windows, got {len(windows)}")
+        for prev, nxt in zip(windows, windows[1:]):
+            _assert(prev["oos_stop"] == nxt["oos_start"], "OOS windows should be contiguous")
+        anchored = build_windows(df["timestamp"], train=120, test=60, anchored=True)
+        _assert(all(w["is_start"] == 0 for w in anchored), "Anchored IS windows should start at bar 0")
+        results.append(TestResult("walk_forward.windows", True))
+    except Exception as exc:
+        results.append(TestResult("walk_forward.windows", False, str(exc)))
+
+    try:
+        outcome = run_walk_forward(
+            "rsi_reversion",
+            {"rsi_period": [10, 14], "rsi_entry": [30, 35], "rsi_exit": [50]},
+            exchange="binance",
+            symbol="BTC/USDT",
+            timeframe="1d",
+            df=df,
+            train=120,
+            test=60,
+            warmup_bars=30,
+            workers=2,
+        )
+        trades = outcome["trades"]
+        _assert(len(outcome["windows"]) == 6, f"Expected 6 windows, got {len(outcome['windows'])}")
+        _assert(not trades.empty, "Walk-forward should produce OOS trades on synthetic data")
+        first_oos = pd.Timestamp(df["timestamp"].iloc[120], tz="UTC")
+        _assert((trades["entry_time"] >= first_oos).all(), "Trades entered before OOS start must be dropped")
+        _assert(
+            math.isclose(outcome["stats"]["Total Net Profit"], float(trades["net_pnl"].sum())),
+            "Stitched stats should cover the stitched OOS trades",
+        )
+        results.append(TestResult("walk_forward.oos_stitching", True))
+    except Exception as exc:
+        results.append(TestResult("walk_forward.oos_stitching", False, str(exc)))
+
+    try:
+        grid = {"rsi_period": [10, 14], "rsi_entry": [30, 35], "rsi_exit": [50]}
+        fixed = {"initial_balance": 10000.0, "trade_size": 500, "pyramiding": 1}
+        _assert(
+            default_warmup_bars(grid, {**fixed, "initial_balance": 10000}) == 201,
+            "Sizing ints (initial_balance, trade_size) must not count as warmup",
+        )
+        _assert(default_warmup_bars({"ema_slow": [150, 300]}) == 301, "Lookback params should set the warmup")
+        outcome = run_walk_forward(
+            "rsi_reversion",
+            grid,
+            exchange="binance",
+            symbol="BTC/USDT",
+            timeframe="1d",
+            df=df,
+            train=120,
+            test=60,
+            fixed_params=fixed,
+            workers=1,
+        )
+        _assert(not outcome["trades"].empty, "Default warmup with initial_balance should still leave OOS trades")
+        results.append(TestResult("walk_forward.default_warmup", True))
+    except Exception as exc:
+        results.append(TestResult("walk_forward.default_warmup", False, str(exc)))
+
+    try:
+        params = {"rsi_period": 10, "rsi_entry": 35, "rsi_exit": 50}
+        base = {"exchange": "binance", "symbol": "BTC/USDT", "timeframe": "1d", "start_date": None, "end_date": None}
+        (_, _, free), (_, error, blocked) = run_backtest_batch(
+            "rsi_reversion", df, [(params, (0, 240), True), (params, (0, 240), True, 120)], base, workers=1
+        )
+        _assert(error is None, f"Blocked run failed: {error}")
+        cutoff = pd.Timestamp(df["timestamp"].iloc[120], tz="UTC")
+        _assert(
+            (pd.to_datetime([t["entry_time"] for t in free], utc=True) < cutoff).any(),
+            "Fixture should trade in the warmup",
+        )
+        entries = pd.to_datetime([t["entry_time"] for t in blocked], utc=True)
+        _assert(len(entries) and (entries >= cutoff).all(), "No trade may open before entry_start")
+        _assert(BacktesterV2.entry_start == 0, "entry_start must be reset after the task")
+        results.append(TestResult("walk_forward.oos_entry_start", True))
+    except Exception as exc:
+        results.append(TestResult("walk_forward.oos_entry_start", False, str(exc)))
+
+    return results
+
+
+def test_ohlcv_cache() -> list[TestResult]:
+    """The .npy cache must return the same frame SQLite does, per range."""
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=500, freq="h")
+    ts_ms = df["timestamp"].to_numpy().astype("datetime64[ms]").astype(np.int64)
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, "cache.db"))
+            stored = df.assign(exchange="binance", symbol="BTC/USDT", timeframe="1h", timestamp=ts_ms)
+            stored.to_sql("ohlcv_clean", conn, index=False)
+            root = os.path.join(tmp, "cache")
+
+            def expected(start_ts=None, end_ts=None, limit=50000):
+                mask = np.ones(len(df), dtype=bool)
+                if start_ts is not None:
+                    mask &= ts_ms >= start_ts
+                if end_ts is not None:
+                    mask &= ts_ms <= end_ts
+                out = df.loc[mask, ["timestamp", "open", "high", "low", "close", "volume"]].head(limit)
+                out = out.reset_index(drop=True)
+                out["timestamp"] = pd.to_datetime(ts_ms[mask][:limit], unit="ms")
+                return out
+
+            for start_ts, end_ts, limit in [
+                (None, None, 50000),
+                (int(ts_ms[100]), int(ts_ms[200]), 50000),
+                (int(ts_ms[100]) + 1, None, 50),
+            ]:
+                got = load_ohlcv_cached(conn, "binance", "BTC/USDT", "1h", "ohlcv_clean", start_ts, end_ts, limit, root=root)
+                pd.testing.assert_frame_equal(got, expected(start_ts, end_ts, limit))
+
+            _assert(
+                load_ohlcv_cached(conn, "binance", "ETH/USDT", "1h", root=root) is None,
+                "Missing series should fall through to SQLite (None)",
+            )
+            _assert(
+                load_ohlcv_cached(conn, "binance", "BTC/USDT", "1h", start_ts=int(ts_ms[-1]) + 1, root=root).empty,
+                "Range past the last candle should be empty",
+            )
+            # Files removed between the meta.json check and the loads (a
+            # concurrent invalidation): fall back to SQLite.
+            os.remove(cache_path("binance", "BTC/USDT", "1h", root=root) / "close.npy")
+            _assert(
+                load_ohlcv_cached(conn, "binance", "BTC/USDT", "1h", root=root) is None,
+                "Vanished cache files should fall through to SQLite (None)",
+            )
+            _assert(invalidate_ohlcv_cache("binance", "BTC/USDT", "1h", root=root) == 1, "Invalidation should drop the series")
+            _assert(not cache_path("binance", "BTC/USDT", "1h", root=root).exists(), "Cache dir should be removed")
+            conn.close()
+        results.append(TestResult("ohlcv_cache.matches_sqlite", True))
+    except Exception as exc:
+        results.append(TestResult("ohlcv_cache.matches_sqlite", False, str(exc)))
+
+    try:
+        # 200 raw candles, only the first 100 sanitized: a clean read past the
+        # clean tail must refresh ohlcv_clean, with or without the cache.
+        raw = df.iloc[:200].assign(exchange="binance", symbol="TEST/USDT", timeframe="1h", timestamp=ts_ms[:200])
+        raw = raw[["exchange", "symbol", "timeframe", "timestamp", "open", "high", "low", "close", "volume"]]
+        for cache_enabled in (True, False):
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = os.path.join(tmp, "refresh.db")
+                with patched_attr(database_module, "DB_PATH", db_path), \
+                        patched_attr(sanitize_module, "DB_PATH", db_path), \
+                        patched_attr(sanitize_module, "REPORT_DIR", tmp), \
+                        patched_attr(ohlcv_cache_module, "CACHE_DIR", os.path.join(tmp, "cache")), \
+                        patched_attr(data_module, "CACHE_ENABLED", cache_enabled):
+                    database_module.init_db()
+                    database_module.insert_ohlcv_rows(list(raw.iloc[:100].itertuples(index=False, name=None)))
+                    sanitize_module.sanitize_data("binance", "TEST/USDT", "1h")
+                    # Build the columnar series over the 100 clean candles.
+                    _assert(len(data_module.fetch_ohlcv("binance", "TEST/USDT", "1h")) == 100, "Expected 100 clean candles")
+                    database_module.insert_ohlcv_rows(list(raw.iloc[100:].itertuples(index=False, name=None)))
+
+                    got = data_module.fetch_ohlcv("binance", "TEST/USDT", "1h", start_date=int(ts_ms[150]))
+                    database_module.close_thread_connections()
+                _assert(len(got) == 50, f"cache={cache_enabled}: expected 50 refreshed candles, got {len(got)}")
+        results.append(TestResult("ohlcv_cache.clean_refresh", True))
+    except Exception as exc:
+        results.append(TestResult("ohlcv_cache.clean_refresh", False, str(exc)))
+
+    return results
+
+
+def test_frame_cache() -> list[TestResult]:
+    """LRU byte budget, hit/miss counters and indicator memo keys."""
+
+    results: list[TestResult] = []
+
+    try:
+        cache = LRUCache(max_bytes=3 * 8000, name="selftest")
+        for key in "abc":
+            cache.put(key, np.zeros(1000))
+        _assert(cache.get("a") is not None, "Entry should be cached")
+        cache.put("d", np.zeros(1000))
+        _assert(cache.get("b") is None, "Least recently used entry should be evicted by bytes")
+        _assert(cache.get("a") is not None, "Recently used entry should survive eviction")
+        stats = cache.stats()
+        _assert(stats["bytes"] <= stats["max_bytes"], "Cache should stay inside its byte budget")
+        _assert((stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1), f"Unexpected counters {stats}")
+        results.append(TestResult("frame_cache.lru_bytes", True))
+    except Exception as exc:
+        results.append(TestResult("frame_cache.lru_bytes", False, str(exc)))
+
+    try:
+        frame_cache.enable_frame_cache(max_bytes=10 * 1024 * 1024)
+        df = make_synthetic_ohlcv(rows=300)
+        df.attrs[DATASET_KEY_ATTR] = ("selftest",)
+        calls = []
+
+        def rsi_of(obj):
+            calls.append(len(obj))
+            return ta.rsi(obj, length=14)
+
+        first = cached_indicator(df["close"], "rsi:close", (14,), lambda: rsi_of(df["close"]))
+        again = cached_indicator(df["close"], "rsi:close", (14,), lambda: rsi_of(df["close"]))
+        head = df.iloc[:200]
+        sliced = cached_indicator(head["close"], "rsi:close", (14,), lambda: rsi_of(head["close"]))
+        _assert(calls == [300, 200], f"Expected one compute per distinct frame, got {calls}")
+        pd.testing.assert_series_equal(first, again)
+        _assert(first is not again, "Cached indicators should be returned as copies")
+        _assert(len(sliced) == 200, "Slices of a cached frame must not reuse the full-frame entry")
+
+        shifted = df["close"].shift(1)
+        _assert(shifted.attrs.get(DATASET_KEY_ATTR) == ("selftest",), "Fixture: derived series inherit attrs")
+        for derived in (shifted, df["close"].diff()):
+            got = cached_indicator(derived, "rsi:close", (14,), lambda: rsi_of(derived))
+            pd.testing.assert_series_equal(got, ta.rsi(derived, length=14))
+        _assert(calls == [300, 200, 300, 300], f"Derived series should not reuse the source entry: {calls}")
+        results.append(TestResult("frame_cache.indicator_memo", True))
+    except Exception as exc:
+        results.append(TestResult("frame_cache.indicator_memo", False, str(exc)))
+    finally:
+        frame_cache.disable_frame_cache()
+
+    return results
+
+
+def test_sanitize_gaps() -> list[TestResult]:
+    """Vectorized gap filling: flat candles on the previous candle's grid."""
+
+    results: list[TestResult] = []
+    step = 60_000
+
+    try:
+        # gaps of 2 candles after t=2 and of 2 (off-grid, 3.5 steps) after t=6
+        ts = np.array([0, 1, 2, 5, 6, 9.5, 10.5]) * step
+        df = pd.DataFrame(
+            {
+                "exchange": "binance",
+                "symbol": "BTC/USDT",
+                "timeframe": "1m",
+                "timestamp": ts.astype(np.int64),
+                "open": np.arange(7, dtype=float),
+                "high": np.arange(7, dtype=float) + 1,
+                "low": np.arange(7, dtype=float) - 1,
+                "close": np.arange(7, dtype=float) + 0.5,
+                "volume": 1.0,
+            }
+        )
+        filled, gaps, inserted = fill_gaps(df, step, "binance", "BTC/USDT", "1m")
+
+        expected_ts = (np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9.5, 10.5]) * step).astype(np.int64)
+        _assert(inserted == 5, f"Expected 5 filled candles, got {inserted}")
+        _assert(gaps == [(3 * step, 5 * step, 2), (7 * step, int(9.5 * step), 3)], f"Unexpected gap list {gaps}")
+        _assert(np.array_equal(filled["timestamp"].to_numpy(), expected_ts), "Filled timestamps out of order")
+        _assert(list(filled.columns) == list(df.columns), "Column order changed")
+
+        fillers = filled[~filled["timestamp"].isin(df["timestamp"])]
+        _assert(np.allclose(fillers["close"], [2.5, 2.5, 4.5, 4.5, 4.5]), "Fillers should carry the previous close")
+        _assert((fillers["open"] == fillers["close"]).all() and (fillers["high"] == fillers["low"]).all(), "Fillers should be flat")
+        _assert((fillers["volume"] == 0).all(), "Fillers should have zero volume")
+        pd.testing.assert_frame_equal(
+            filled[filled["timestamp"].isin(df["timestamp"])].reset_index(drop=True), df
+        )
+
+        _, no_gaps, none_inserted = fill_gaps(df.iloc[:3], step, "binance", "BTC/USDT", "1m")
+        _assert(no_gaps == [] and none_inserted == 0, "Contiguous frame should not be filled")
+        results.append(TestResult("sanitize.fill_gaps", True))
+    except Exception as exc:
+        results.append(TestResult("sanitize.fill_gaps", False, str(exc)))
+
+    try:
+        rng = np.random.default_rng(3)
+        rows = 600
+        ts = 1_600_000_000_000 + np.cumsum(1 + (rng.random(rows) < 0.02) * 3) * step
+        close = 100 + np.cumsum(rng.normal(0, 1, rows))
+        raw = pd.DataFrame(
+            {
+                "exchange": "binance",
+                "symbol": "TEST/USDT",
+                "timeframe": "1m",
+                "timestamp": ts,
+                "open": close,
+                "high": close + 1,
+                "low": close - 1,
+                "close": close,
+                "volume": 1.0,
+            }
+        )
+        raw.loc[450, "high"] = raw.loc[450, "low"] - 1  # invalid candle in the appended tail
+
+        def clean_rows(db_path):
+            with sqlite3.connect(db_path) as conn:
+                return pd.read_sql_query(
+                    "SELECT exchange, symbol, timeframe, timestamp, open, high, low, close, volume "
+                    "FROM ohlcv_clean ORDER BY timestamp",
+                    conn,
+                )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with patched_attr(sanitize_module, "REPORT_DIR", tmp), patched_attr(ohlcv_cache_module, "CACHE_DIR", tmp):
+                incremental_db = os.path.join(tmp, "incremental.db")
+                full_db = os.path.join(tmp, "full.db")
+
+                with sqlite3.connect(incremental_db) as conn:
+                    raw.iloc[:400].drop(index=398).to_sql("ohlcv", conn, index=False)
+                with patched_attr(sanitize_module, "DB_PATH", incremental_db):
+                    sanitize_module.sanitize_data("binance", "TEST/USDT", "1m")
+                    with sqlite3.connect(incremental_db) as conn:
+                        _assert(get_high_water_mark(conn, "binance", "TEST/USDT", "1m") == int(ts[399]), "Mark should be the last clean candle")
+                        # late candle inside the overlap window plus the new tail
+                        raw.iloc[[398, *range(400, rows)]].to_sql("ohlcv", conn, index=False, if_exists="append")
+                    sanitize_module.sanitize_data("binance", "TEST/USDT", "1m")
+                    sanitize_module.sanitize_data("binance", "TEST/USDT", "1m")  # no new rows: no-op
+
+                with sqlite3.connect(full_db) as conn:
+                    raw.to_sql("ohlcv", conn, index=False)
+                with patched_attr(sanitize_module, "DB_PATH", full_db):
+                    sanitize_module.sanitize_data("binance", "TEST/USDT", "1m", full_rebuild=True)
+
+                pd.testing.assert_frame_equal(clean_rows(incremental_db), clean_rows(full_db))
+                with sqlite3.connect(incremental_db) as conn:
+                    _assert(get_high_water_mark(conn, "binance", "TEST/USDT", "1m") == int(ts[-1]), "Mark should advance to the new tail")
+        results.append(TestResult("sanitize.incremental_matches_full", True))
+    except Exception as exc:
+        results.append(TestResult("sanitize.incremental_matches_full", False, str(exc)))
+
+    try:
+        backfilled = raw.copy()
+        backfilled.loc[50, "low"] = backfilled.loc[50, "high"] + 1  # invalid candle in the backfill
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with patched_attr(sanitize_module, "REPORT_DIR", tmp), patched_attr(ohlcv_cache_module, "CACHE_DIR", tmp):
+                incremental_db = os.path.join(tmp, "incremental.db")
+                full_db = os.path.join(tmp, "full.db")
+
+                with sqlite3.connect(incremental_db) as conn:
+                    backfilled.iloc[200:].to_sql("ohlcv", conn, index=False)
+                with patched_attr(sanitize_module, "DB_PATH", incremental_db):
+                    sanitize_module.sanitize_data("binance", "TEST/USDT", "1m")
+                    with sqlite3.connect(incremental_db) as conn:
+                        # older history downloaded after the first clean run, no new tail
+                        backfilled.iloc[:200].to_sql("ohlcv", conn, index=False, if_exists="append")
+                    sanitize_module.sanitize_data("binance", "TEST/USDT", "1m")
+
+                with sqlite3.connect(full_db) as conn:
+                    backfilled.to_sql("ohlcv", conn, index=False)
+                with patched_attr(sanitize_module, "DB_PATH", full_db):
+                    sanitize_module.sanitize_data("binance", "TEST/USDT", "1m", full_rebuild=True)
+
+                got = clean_rows(incremental_db)
+                _assert(int(got["timestamp"].iloc[0]) == int(ts[0]), "Backfilled raw candles should reach ohlcv_clean")
+                pd.testing.assert_frame_equal(got, clean_rows(full_db))
+        results.append(TestResult("sanitize.backfill_before_clean_range", True))
+    except Exception as exc:
+        results.append(TestResult("sanitize.backfill_before_clean_range", False, str(exc)))
+
+    return results
+
+
+def test_ohlcv_clean_schema() -> list[TestResult]:
+    """init_db migrates the old ohlcv_clean layout into the keyed table; upsert replaces by key."""
+
+    results: list[TestResult] = []
+    legacy_rows = [
+        ("binance", "BTC/USDT", "1m", 60_000, 1.0, 1.0, 1.0, 1.0, 1.0),
+        ("binance", "BTC/USDT", "1m", 60_000, 2.0, 2.0, 2.0, 2.0, 2.0),  # duplicate, newer id wins
+        ("binance", "BTC/USDT", "1m", 120_000, 3.0, 3.0, 3.0, 3.0, 3.0),
+        ("binance", "ETH/USDT", "1m", 60_000, 4.0, 4.0, 4.0, 4.0, 4.0),
+    ]
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "schema.db")
+            with sqlite3.connect(db_path) as conn:
+                conn.execute(
+                    "CREATE TABLE ohlcv_clean (id INTEGER PRIMARY KEY AUTOINCREMENT, exchange TEXT, symbol TEXT, "
+                    "timeframe TEXT, timestamp INTEGER, open REAL, high REAL, low REAL, close REAL, volume REAL)"
+                )
+                conn.executemany(
+                    "INSERT INTO ohlcv_clean (exchange, symbol, timeframe, timestamp, open, high, low, close, volume) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    legacy_rows,
+                )
+
+            with patched_attr(database_module, "DB_PATH", db_path), patched_attr(ohlcv_cache_module, "CACHE_DIR", tmp):
+                database_module.init_db()
+                database_module.init_db()  # idempotent on the new layout
+                database_module.upsert_ohlcv_clean_rows(
+                    [
+                        ("binance", "BTC/USDT", "1m", 120_000, 9.0, 9.0, 9.0, 9.0, 9.0),
+                        ("binance", "BTC/USDT", "1m", 180_000, 5.0, 5.0, 5.0, 5.0, 5.0),
+                    ]
+                )
+
+                conn = database_module.get_connection()
+                table_sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'ohlcv_clean'").fetchone()[0]
+                rows = [tuple(r) for r in conn.execute(
+                    "SELECT symbol, timestamp, close FROM ohlcv_clean ORDER BY symbol, timestamp"
+                )]
+                plan = " ".join(
+                    str(r[-1]) for r in conn.execute(
+                        "EXPLAIN QUERY PLAN SELECT timestamp, close FROM ohlcv_clean "
+                        "WHERE exchange = ? AND symbol = ? AND timeframe = ? AND timestamp >= ? "
+                        "ORDER BY timestamp ASC LIMIT 10",
+                        ("binance", "BTC/USDT", "1m", 0),
+                    )
+                )
+                conn.close()
+
+        _assert("WITHOUT ROWID" in table_sql.upper(), "ohlcv_clean should be WITHOUT ROWID")
+        _assert(
+            rows == [("BTC/USDT", 60_000, 2.0), ("BTC/USDT", 120_000, 9.0), ("BTC/USDT", 180_000, 5.0), ("ETH/USDT", 60_000, 4.0)],
+            f"Unexpected migrated/upserted rows {rows}",
+        )
+        _assert("PRIMARY KEY" in plan and "SCAN" not in plan, f"Series read should search the primary key: {plan}")
+        results.append(TestResult("database.ohlcv_clean_schema", True))
+    except Exception as exc:
+        results.append(TestResult("database.ohlcv_clean_schema", False, str(exc)))
+
+    return results
+
+
+def test_connection_pool() -> list[TestResult]:
+    """WAL/pragmas, per-thread reuse, close() semantics and the busy retry policy."""
+
+    results: list[TestResult] = []
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            with patched_attr(database_module, "DB_PATH", os.path.join(tmp, "pool.db")):
+                conn = database_module.get_connection()
+                _assert(database_module.get_connection() is conn, "Same thread should reuse its connection")
+                _assert(conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal", "Pool should use WAL")
+                _assert(conn.execute("PRAGMA synchronous").fetchone()[0] == 1, "synchronous should be NORMAL")
+
+                conn.execute("CREATE TABLE t (x INTEGER)")
+                conn.execute("INSERT INTO t VALUES (1)")
+                conn.close()  # uncommitted insert is discarded, connection stays usable
+                _assert(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0, "close() should roll back")
+
+                other = []
+                worker = threading.Thread(target=lambda: other.append(database_module.get_connection()))
+                worker.start()
+                worker.join()
+                _assert(other[0] is not conn, "Threads should not share connections")
+
+                attempts = []
+
+                def flaky_write():
+                    attempts.append(1)
+                    if len(attempts) < 3:
+                        raise sqlite3.OperationalError("database is locked")
+                    return "ok"
+
+                _assert(database_module.run_with_retry(flaky_write, base_delay=0) == "ok", "Retry should succeed")
+                _assert(len(attempts) == 3, "Locked writes should be retried")
+                try:
+                    database_module.run_with_retry(lambda: conn.execute("SELECT * FROM missing"), base_delay=0)
+                    raise AssertionError("Non-busy errors should not be retried")
+                except sqlite3.OperationalError:
+                    pass
+                database_module.close_thread_connections()
+        results.append(TestResult("database.connection_pool", True))
+    except Exception as exc:
+        results.append(TestResult("database.connection_pool", False, str(exc)))
+
+    return results
+
+
+class FakeExchange:
+    """ccxt stand-in serving 1m candles from a fixed range in pages."""
+
+    rateLimit = 0
+
+    def __init__(self, first_ts: int, count: int, step: int = 60_000):
+        self.timestamps = first_ts + np.arange(count, dtype=np.int64) * step
+        self.since_calls: list[int] = []
+
+    def load_markets(self):
+        return {}
+
+    def milliseconds(self):
+        return int(self.timestamps[-1]) + 1
+
+    def fetch_ohlcv(self, symbol, timeframe, since, limit=1000):
+        self.since_calls.append(since)
+        lo = int(np.searchsorted(self.timestamps, since, side="left"))
+        return [[int(ts), 1.0, 2.0, 0.5, 1.5, 10.0] for ts in self.timestamps[lo:lo + limit]]
+
+
+def test_downloader_streaming() -> list[TestResult]:
+    """Chunked commits, resume, and the concurrent universe downloader."""
+
+    results: list[TestResult] = []
+    first_ts = 1_514_764_800_000  # 2018-01-01
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            with patched_attr(database_module, "DB_PATH", os.path.join(tmp, "dl.db")), \
+                    patched_attr(ohlcv_cache_module, "CACHE_DIR", tmp):
+                commits = []
+                real_insert = downloader_module.insert_ohlcv_rows
+
+                def counting_insert(rows):
+                    commits.append(len(rows))
+                    real_insert(rows)
+
+                with patched_attr(downloader_module, "insert_ohlcv_rows", counting_insert):
+                    exchange = FakeExchange(first_ts, 2500)
+                    exchange.timestamps = exchange.timestamps[:1200]  # history so far
+                    downloader = BinanceDownloader(exchange=exchange)
+                    _assert(downloader.download("BTC/USDT", "1m", "2018-01-01", pages_per_commit=1) == 1200, "First run count")
+                    _assert(commits == [1000, 200], f"Expected one commit per page, got {commits}")
+
+                    exchange.timestamps = first_ts + np.arange(2500, dtype=np.int64) * 60_000
+                    exchange.since_calls.clear()
+                    commits.clear()
+                    fetched = downloader.download("BTC/USDT", "1m", "2018-01-01", pages_per_commit=10)
+                    _assert(exchange.since_calls[0] == first_ts + 1199 * 60_000 + 1, "Resume should start after the last candle")
+                    _assert(fetched == 1300 and commits == [1300], f"Resume should fetch only new candles, got {fetched} / {commits}")
+
+                    # Only newer history stored: an earlier start_date still backfills it.
+                    downloader.download("ETH/USDT", "1m", "2018-01-02")
+                    exchange.since_calls.clear()
+                    downloader.download("ETH/USDT", "1m", "2018-01-01")
+                    _assert(exchange.since_calls[0] == first_ts, "An earlier start_date should download from there")
+
+                conn = database_module.get_connection()
+                counts = [
+                    tuple(row) for row in conn.execute(
+                        "SELECT symbol, COUNT(*), COUNT(DISTINCT timestamp) FROM ohlcv GROUP BY symbol ORDER BY symbol"
+                    )
+                ]
+                conn.close()
+                database_module.close_thread_connections()
+        _assert(
+            counts == [("BTC/USDT", 2500, 2500), ("ETH/USDT", 2500, 2500)],
+            f"Expected 2500 stored candles per symbol, got {counts}",
+        )
+        results.append(TestResult("downloader.streaming_resume", True))
+    except Exception as exc:
+        results.append(TestResult("downloader.streaming_resume", False, str(exc)))
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            with patched_attr(database_module, "DB_PATH", os.path.join(tmp, "universe.db")), \
+                    patched_attr(ohlcv_cache_module, "CACHE_DIR", tmp):
+                writer_threads = set()
+                real_insert = universe_module.insert_ohlcv_rows
+
+                def recording_insert(rows):
+                    writer_threads.add(threading.current_thread().name)
+                    real_insert(rows)
+
+                with patched_attr(universe_module, "insert_ohlcv_rows", recording_insert):
+                    exchange = FakeExchange(first_ts, 2500)
+                    downloader = UniverseDownloader(exchange=exchange, max_workers=4, requests_per_second=400)
+                    # SOL/USDT 1m already has its newer candles; the earlier
+                    # start_date must still backfill the rest.
+                    database_module.insert_ohlcv_rows(
+                        [("binance", "SOL/USDT", "1m", int(ts), 1.0, 2.0, 0.5, 1.5, 10.0) for ts in exchange.timestamps[2000:]]
+                    )
+                    started = time.perf_counter()
+                    outcome = downloader.download(["BTC/USDT", "ETH/USDT", "SOL/USDT"], ["1m", "5m"], "2018-01-01")
+                    elapsed = time.perf_counter() - started
+
+                conn = database_module.get_connection()
+                counts = dict(
+                    ((r[0], r[1]), r[2])
+                    for r in conn.execute("SELECT symbol, timeframe, COUNT(*) FROM ohlcv GROUP BY symbol, timeframe")
+                )
+                conn.close()
+                database_module.close_thread_connections()
+
+        _assert(all(v == 2500 for v in outcome.values()) and len(outcome) == 6, f"Unexpected results {outcome}")
+        _assert(len(counts) == 6 and set(counts.values()) == {2500}, f"Unexpected stored counts {counts}")
+        _assert(writer_threads == {"ohlcv-writer"}, f"Inserts should come from the writer thread only: {writer_threads}")
+        _assert(exchange.since_calls.count(first_ts) == 6, "Every series should start at start_date")
+        # 18 pages, 4 tokens of burst, 400 req/s
+        _assert(len(exchange.since_calls) == 18 and elapsed >= 14 / 400, "Requests should be rate limited")
+
+        bucket = TokenBucket(rate=200, capacity=1)
+        started = time.perf_counter()
+        for _ in range(21):
+            bucket.acquire()
+        _assert(time.perf_counter() - started >= 20 / 200 * 0.95, "Token bucket should enforce its rate")
+        results.append(TestResult("downloader.universe_concurrent", True))
+    except Exception as exc:
+        results.append(TestResult("downloader.universe_concurrent", False, str(exc)))
+
+    return results
+
+
+def _expected_bars(base: pd.DataFrame, timeframe: str, step: int) -> pd.DataFrame:
+    grouped = base.assign(bucket=bucket_start(base["timestamp"], timeframe)).groupby("bucket")
+    bars = grouped.agg(
+        open=("open", "first"), high=("high", "max"), low=("low", "min"),
+        close=("close", "last"), volume=("volume", "sum"),
+        first=("timestamp", "min"), last=("timestamp", "max"),
+    )
+    complete = (bars["first"] == bars.index) & (bars["last"] == bars.index + step - 60_000)
+    return bars[complete].drop(columns=["first", "last"]).rename_axis("timestamp").reset_index()
+
+
+def test_resampler() -> list[TestResult]:
+    """1m -> higher timeframe aggregation and incremental derived series."""
+
+    results: list[TestResult] = []
+    rng = np.random.default_rng(11)
+    rows = 3 * 7 * 1440 + 333  # three weeks plus a partial day, starting mid-hour
+    ts = 1_599_999_960_000 + 17 * 60_000 + np.arange(rows, dtype=np.int64) * 60_000  # minute grid
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows))
+    base = pd.DataFrame(
+        {
+            "timestamp": ts,
+            "open": close + rng.normal(0, 0.1, rows),
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": rng.random(rows),
+        }
+    )
+
+    try:
+        for timeframe, step in [("15m", 900_000), ("1h", 3_600_000), ("1d", 86_400_000), ("1w", 604_800_000)]:
+            bars = resample_ohlcv(*(base[c] for c in base.columns), timeframe=timeframe)
+            expected = _expected_bars(base, timeframe, step)
+            got = pd.DataFrame(bars)
+            _assert(len(got) == len(expected) and len(got) > 0, f"{timeframe}: {len(got)} bars vs {len(expected)}")
+            _assert(np.array_equal(got["timestamp"], expected["timestamp"]), f"{timeframe}: bar open times differ")
+            for column in ("open", "high", "low", "close", "volume"):
+                _assert_series_close(f"{timeframe} {column}", got[column].to_numpy(), expected[column].to_numpy())
+        weekly = pd.to_datetime(resample_ohlcv(*(base[c] for c in base.columns), timeframe="1w")["timestamp"], unit="ms")
+        _assert((weekly.dayofweek == 0).all() and (weekly.hour == 0).all(), "Weekly bars should open Monday 00:00 UTC")
+        results.append(TestResult("resampler.aggregation", True))
+    except Exception as exc:
+        results.append(TestResult("resampler.aggregation", False, str(exc)))
+
+    try:
+        raw = base.assign(exchange="binance", symbol="TEST/USDT", timeframe="1m")
+        cut = 9 * 1440
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "derived.db")
+            with patched_attr(sanitize_module, "DB_PATH", db_path), patched_attr(sanitize_module, "REPORT_DIR", tmp), \
+                    patched_attr(ohlcv_cache_module, "CACHE_DIR", tmp):
+                with sqlite3.connect(db_path) as conn:
+                    raw.iloc[:cut].to_sql("ohlcv", conn, index=False)
+                sanitize_module.sanitize_data("binance", "TEST/USDT", "1m")
+                with sqlite3.connect(db_path) as conn:
+                    update_derived_series(conn, "binance", "TEST/USDT", ["1h", "1d"])
+                    raw.iloc[cut:].to_sql("ohlcv", conn, index=False, if_exists="append")
+                sanitize_module.sanitize_data("binance", "TEST/USDT", "1m")  # refreshes 1h / 1d
+
+                with sqlite3.connect(db_path) as conn:
+                    stored = pd.read_sql_query(
+                        "SELECT timeframe, timestamp, open, high, low, close, volume FROM ohlcv_clean "
+                        "WHERE timeframe != '1m' ORDER BY timeframe, timestamp",
+                        conn,
+                    )
+
+        for timeframe, step in [("1h", 3_600_000), ("1d", 86_400_000)]:
+            got = stored[stored["timeframe"] == timeframe].drop(columns="timeframe").reset_index(drop=True)
+            expected = _expected_bars(base, timeframe, step)
+            _assert(len(got) == len(expected), f"{timeframe}: {len(got)} stored bars vs {len(expected)} expected")
+            _assert(np.array_equal(got["timestamp"], expected["timestamp"]), f"{timeframe}: stored open times differ")
+            _assert_series_close(f"stored {timeframe} volume", got["volume"].to_numpy(), expected["volume"].to_numpy())
+            _assert_series_close(f"stored {timeframe} close", got["close"].to_numpy(), expected["close"].to_numpy())
+        results.append(TestResult("resampler.incremental_derived", True))
+    except Exception as exc:
+        results.append(TestResult("resampler.incremental_derived", False, str(exc)))
+
+    return results
+
+
+def test_file_ingest() -> list[TestResult]:
+    """Vectorized date -> ms conversion and the CSV batch ingest."""
+
+    results: list[TestResult] = []
+
+    try:
+        naive = pd.Series(pd.date_range("2020-01-01", periods=50, freq="D"))
+        aware = naive.dt.tz_localize("America/New_York")
+        for values in (naive, aware, naive.dt.strftime("%Y-%m-%d")):
+            # the per-row conversion the Stooq / Yahoo downloaders used to do
+            expected = [int(pd.Timestamp(v).replace(tzinfo=timezone.utc).timestamp() * 1000) for v in values]
+            _assert(to_epoch_ms(values).tolist() == expected, f"to_epoch_ms mismatch for {values.dtype}")
+        seconds = pd.Series([1_600_000_000, 1_600_086_400])
+        _assert(to_epoch_ms(seconds).tolist() == [1_600_000_000_000, 1_600_086_400_000], "Epoch seconds -> ms")
+        results.append(TestResult("ingest.epoch_ms", True))
+    except Exception as exc:
+        results.append(TestResult("ingest.epoch_ms", False, str(exc)))
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "files")
+            os.makedirs(source)
+            days = pd.date_range("2019-12-30", periods=40, freq="D")
+            for stem, scale in (("ES.F", 1.0), ("MES_F", 0.1)):
+                pd.DataFrame(
+                    {
+                        "Date": days.strftime("%Y-%m-%d"),
+                        "Open": np.arange(40) * scale,
+                        "High": np.arange(40) * scale + 1,
+                        "Low": np.arange(40) * scale - 1,
+                        "Close": np.arange(40) * scale + 0.5,
+                    }
+                ).to_csv(os.path.join(source, f"{stem}.csv"), index=False)
+            with open(os.path.join(source, "broken.csv"), "w") as f:
+                f.write("foo,bar\n1,2\n")
+
+            with patched_attr(database_module, "DB_PATH", os.path.join(tmp, "ingest.db")), \
+                    patched_attr(ohlcv_cache_module, "CACHE_DIR", tmp):
+                database_module.init_db()
+                outcome = ingest_files(source, "stooq", symbols={"MES_F": "MES.F"}, start_date="2020-01-01")
+                conn = database_module.get_connection()
+                stored = {
+                    r[0]: (r[1], r[2], r[3])
+                    for r in conn.execute(
+                        "SELECT symbol, COUNT(*), MIN(timestamp), SUM(volume) FROM ohlcv GROUP BY symbol"
+                    )
+                }
+                conn.close()
+                database_module.close_thread_connections()
+
+        jan_first = int(pd.Timestamp("2020-01-01", tz="UTC").timestamp() * 1000)
+        _assert(outcome["ES.F"] == 38 and outcome["MES.F"] == 38, f"Unexpected ingest counts {outcome}")
+        _assert(isinstance(outcome["broken"], ValueError), "File without a date column should be reported")
+        _assert(stored == {"ES.F": (38, jan_first, 0.0), "MES.F": (38, jan_first, 0.0)}, f"Unexpected rows {stored}")
+        results.append(TestResult("ingest.csv_batch", True))
+    except Exception as exc:
+        results.append(TestResult("ingest.csv_batch", False, str(exc)))
+
+    return results
+
+
+def test_trade_ledger() -> list[TestResult]:
+    """Columnar trade ledger: dict view, frame views and stats() on columns."""
+
+    results: list[TestResult] = []
+
+    try:
+        rng = np.random.default_rng(7)
+        times = pd.date_range("2021-01-01", periods=600, freq="h", tz="UTC")
+        trades = []
+        for i in range(600):
+            net = float(rng.normal(0, 5))
+            trades.append({
+                "entry_time": times[i], "exit_time": times[i] + pd.Timedelta(minutes=30),
+                "side": "LONG" if i % 3 else "SHORT", "entry_price": 100.0 + i, "exit_price": 101.0 + i,
+                "position_size": 50.0, "qty": 0.5, "gross_pnl": net + 0.1, "commission_paid": 0.1,
+                "net_pnl": net, "result": "WIN" if net > 0 else "LOSS", "entry_trigger": f"entry {i}",
+                "exit_trigger": "Stop Loss", "bars_in_trade": i % 7, "stop_price": None if i % 2 else 95.0 + i,
+                "take_profit_price": None, "cash_after_trade": 1000.0 + net, "pyramid_level": 1 + i % 2,
+                "entry_index": i, "commission_entry": 0.05,
+            })
+
+        ledger = TradeLedger(capacity=4)
+        for trade in trades:
+            ledger.append(trade)
+
+        _assert(len(ledger) == 600 and ledger[-1] == trades[-1] and ledger[10:12] == trades[10:12], "Indexing mismatch")
+        _assert(list(ledger) == trades, "Iterating the ledger should yield the recorded trade dicts")
+
+        frame = ledger.to_frame()
+        expected = pd.DataFrame(trades).astype({"stop_price": float, "take_profit_price": float})
+        pd.testing.assert_frame_equal(frame, expected[frame.columns])
+        _assert(np.shares_memory(frame["net_pnl"].to_numpy(), ledger.column("net_pnl")), "to_frame() should not copy")
+        frame["net_pnl"] = 0.0
+        _assert(ledger[0]["net_pnl"] == trades[0]["net_pnl"], "Editing the frame must not touch the ledger")
+
+        bt = BacktesterV2()
+        bt.trades = ledger
+        bt.equity_curve = [1000.0, *(1000.0 + np.cumsum([t["net_pnl"] for t in trades]))]
+        pnl_only = BacktesterV2()
+        pnl_only.trades = TradeLedger.from_columns(net_pnl=[t["net_pnl"] for t in trades])
+        pnl_only.equity_curve = bt.equity_curve
+        _assert(pd.Series(bt.stats()).equals(pd.Series(pnl_only.stats())), "stats() should only depend on the net_pnl column")
+        results.append(TestResult("trade_ledger.columns", True))
+    except Exception as exc:
+        results.append(TestResult("trade_ledger.columns", False, str(exc)))
+
+    return results
+
+
+def test_mark_to_market() -> list[TestResult]:
+    """Per-bar equity from mark_to_market() against a bar-by-bar reference."""
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=600, freq="h")
+    high = df["high"].to_numpy(dtype=float)
+    low = df["low"].to_numpy(dtype=float)
+    close = df["close"].to_numpy(dtype=float)
+    signals = np.random.default_rng(11).choice(["LONG", "SHORT", "EXIT", None], size=len(df), p=[0.05, 0.05, 0.03, 0.87])
+
+    for mode, kwargs in (
+        ("spot", {"pyramiding": 2, "stop_loss_pct": 0.03, "take_profit_pct": 0.05}),
+        ("futures", {"pnl_mode": "futures", "contract_multiplier": 5.0, "position_mode": "contracts",
+                     "trade_size": 2, "pyramiding": 3, "stop_loss_pct": None, "take_profit_pct": 0.04}),
+    ):
+        try:
+            bt = BacktesterV2(initial_capital=10_000.0, **kwargs)
+            multiplier = bt.contract_multiplier if mode == "futures" else 1.0
+            reference = np.empty(len(df))
+            for i in range(len(df)):
+                bt.on_bar(high[i], low[i], i, i)
+                bt.on_signal(signals[i], close[i], i, "selftest", i)
+                reference[i] = bt.cash + sum(
+                    (1 if lot.side == "LONG" else -1) * (close[i] - lot.entry_price) * lot.qty * multiplier
+                    for lot in bt.lots
+                )
+
+            equity = bt.mark_to_market(close)
+            _assert(len(bt.trades) > 10 and bt.lots, "Synthetic run should close trades and end with an open position")
+            _assert(np.allclose(equity, reference, rtol=0.0, atol=1e-6), "Per-bar equity differs from the reference")
+            trade_close_dd = BacktesterV2(initial_capital=10_000.0)
+            trade_close_dd.trades, trade_close_dd.equity_curve = bt.trades, bt.equity_curve
+            _assert(
+                bt.stats()["Max Drawdown (%)"] <= trade_close_dd.stats()["Max Drawdown (%)"],
+                "Bar drawdown should be at least the trade-close drawdown",
+            )
+            results.append(TestResult(f"equity.mark_to_market_{mode}", True))
+        except Exception as exc:
+            results.append(TestResult(f"equity.mark_to_market_{mode}", False, str(exc)))
+
+    return results
+
+
+def test_performance_stats() -> list[TestResult]:
+    """Stats kernel against the np.polyfit formulas, batch rows and known values."""
+
+    results: list[TestResult] = []
+    rng = np.random.default_rng(19)
+    runs = [rng.normal(2.0, 25.0, n) for n in (1, 2, 40, 500)]
+    curves = [np.concatenate([[1000.0], 1000.0 + np.cumsum(pnls)]) for pnls in runs]
+
+    try:
+        for pnls, curve in zip(runs, curves):
+            stats = performance_stats(pnls, curve)
+            peaks = np.maximum.accumulate(curve)
+            expected = {
+                "Total trades": len(pnls),
+                "Total Net Profit": pnls.sum(),
+                "Max Drawdown (%)": ((curve - peaks) / peaks).min() * 100,
+                "Equity Curve Slope": np.polyfit(np.arange(len(curve)), curve, 1)[0],
+                "Trade Net Profit Slope": np.polyfit(np.arange(len(pnls)), pnls, 1)[0] if len(pnls) > 1 else 0.0,
+            }
+            for key, value in expected.items():
+                _assert(np.isclose(stats[key], value, rtol=1e-9, atol=1e-9), f"{key}: {stats[key]} != {value}")
+        results.append(TestResult("performance.matches_polyfit", True))
+    except Exception as exc:
+        results.append(TestResult("performance.matches_polyfit", False, str(exc)))
+
+    try:
+        years = [None, 0.5, 1.0, 2.0]
+        batch = performance_stats_batch(runs, curves, years=years)
+        _assert(len(batch) == len(runs), "One batch row per run")
+        for i, (pnls, curve, span) in enumerate(zip(runs, curves, years)):
+            single = performance_stats(pnls, curve, years=span)
+            for key in STAT_KEYS:
+                a, b = single[key], batch.iloc[i][key]
+                _assert(
+                    (np.isnan(a) and np.isnan(b)) or np.isclose(a, b, rtol=1e-12),
+                    f"run {i} {key}: batch {b} != single {a}",
+                )
+        results.append(TestResult("performance.batch_matches_single", True))
+    except Exception as exc:
+        results.append(TestResult("performance.batch_matches_single", False, str(exc)))
+
+    try:
+        equity = np.array([100.0, 110.0, 99.0, 88.0, 99.0, 121.0, 110.0])
+        stats = performance_stats([10.0, -11.0, -11.0, 11.0, 22.0, -11.0], equity, years=2.0)
+        _assert(stats["Max Drawdown Duration (bars)"] == 3, "Underwater from bar 2 to bar 4, peak again at 5")
+        _assert(np.isclose(stats["Max Drawdown (%)"], -20.0), "110 -> 88 is -20%")
+        ulcer = np.sqrt(np.mean(np.array([0, 0, 10, 20, 10, 0, 100 / 11]) ** 2))
+        _assert(np.isclose(stats["Ulcer Index"], ulcer), "Ulcer index")
+        _assert(np.isclose(stats["CAGR (%)"], (1.1 ** 0.5 - 1) * 100), "CAGR over two years")
+        _assert(np.isclose(stats["MAR Ratio"], stats["CAGR (%)"] / 20.0), "MAR is CAGR / max drawdown")
+        returns = equity[1:] / equity[:-1] - 1
+        _assert(
+            np.isclose(stats["Sharpe Ratio"], returns.mean() / returns.std(ddof=1) * np.sqrt(len(returns) / 2.0)),
+            "Sharpe annualized with returns per year",
+        )
+        timestamps = pd.date_range("2020-01-01", periods=len(equity), freq="D")
+        _assert(np.isclose(span_years(timestamps), 6 / 365.25), "span_years of daily bars")
+        _assert(span_years(list(range(len(equity)))) is None, "Integer bar indices have no span")
+        results.append(TestResult("performance.known_values", True))
+    except Exception as exc:
+        results.append(TestResult("performance.known_values", False, str(exc)))
+
+    return results
+
+
+def test_portfolio() -> list[TestResult]:
+    """Portfolio engine: single-symbol parity, shared capital limits, per-symbol stats."""
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=1500, freq="h")
+    rng = np.random.default_rng(20)
+    df["close"] = df["close"] + np.cumsum(rng.normal(0, 0.4, len(df)))
+    df["high"] = np.maximum(df["high"], df["close"]) + 0.3
+    df["low"] = np.minimum(df["low"], df["close"]) - 0.3
+
+    def fake_fetch(**_kwargs):
+        return df.copy()
+
+    try:
+        params = {"ema_fast": 9, "ema_slow": 21}
+        fills = {"slippage_pct": 0.01, "allow_short": True, "stop_loss_pct": 0.02, "take_profit_pct": 0.04}
+        with tempfile.TemporaryDirectory() as tmp, patched_attr(ema_runner, "fetch_ohlcv", fake_fetch):
+            stats, _, csv_rel = ema_runner.run_backtest_ema_cross_v2(
+                exchange="binance",
+                symbol="BTC/USDT",
+                timeframe="1h",
+                start_date=None,
+                end_date=None,
+                run_id="selftest",
+                generate_report=False,
+                generate_plots=False,
+                generate_equity=False,
+                base_path=tmp,
+                **params,
+                **fills,
+            )
+            single = pd.read_csv(os.path.join(tmp, "static", csv_rel), float_precision="round_trip")
+
+        result = run_portfolio_backtest(
+            "ema_cross", ["BTC/USDT"], "binance", "1h", params,
+            frames={"BTC/USDT": df}, initial_capital=1000.0, position_pct=1.0, **fills,
+        )
+        trades = result["trades"]
+        _assert(len(trades) == len(single) > 10, f"Expected {len(single)} trades, got {len(trades)}")
+        _assert(np.array_equal(trades["net_pnl"].to_numpy(), single["net_pnl"].to_numpy()), "Trade PnLs differ")
+        _assert(trades["exit_trigger"].tolist() == single["exit_trigger"].tolist(), "Exit triggers differ")
+        _assert(pd.Series(result["stats"]).equals(pd.Series(stats)), "Portfolio stats differ from the single run")
+        results.append(TestResult("portfolio.single_symbol_parity", True))
+    except Exception as exc:
+        results.append(TestResult("portfolio.single_symbol_parity", False, str(exc)))
+
+    try:
+        frames = {}
+        for s in range(6):
+            walk = df.copy()
+            shift = np.cumsum(np.random.default_rng(s).normal(0, 0.5, len(walk)))
+            for column in ("open", "high", "low", "close"):
+                walk[column] = walk[column] + shift
+            frames[f"SYM{s}"] = walk
+        gapped = np.random.default_rng(99).random(len(df)) > 0.2
+        frames["SYM5"] = frames["SYM5"][gapped].reset_index(drop=True)
+
+        original_open = PortfolioBacktester._open
+        checks = []
+
+        def checked_open(self, col, *args, **kwargs):
+            cash = self.cash
+            original_open(self, col, *args, **kwargs)
+            lot = self.positions.get(col)
+            if lot is not None and lot.entry_index == args[2]:
+                checks.append((lot.position_size <= 0.2 * cash + 1e-9, self.committed <= cash + 1e-9, len(self.positions) <= 3))
+
+        with patched_attr(PortfolioBacktester, "_open", checked_open):
+            result = run_portfolio_backtest(
+                "ema_cross", list(frames), "binance", "1h", {"ema_fast": 9, "ema_slow": 21},
+                frames=frames, position_pct=0.3, max_asset_pct=0.2, max_positions=3,
+            )
+        bt = result["bt"]
+        _assert(len(checks) > 20 and all(all(c) for c in checks), "Entry broke a capital or position limit")
+
+        timestamps = pd.Index(result["equity"]["timestamp"])
+        sym5 = result["trades"][result["trades"]["symbol"] == "SYM5"]
+        own_rows = set(timestamps.get_indexer(frames["SYM5"]["timestamp"]))
+        _assert(len(sym5) > 0, "Gapped symbol should trade")
+        _assert(
+            set(sym5["entry_index"]) <= own_rows and set(sym5["entry_index"] + sym5["bars_in_trade"]) <= own_rows,
+            "Gapped symbol traded on a bar it has no candle for",
+        )
+
+        last_close = {symbol: float(frame["close"].iloc[-1]) for symbol, frame in frames.items()}
+        open_pnl = sum(
+            (1 if lot.side == "LONG" else -1) * (last_close[bt.symbols[col]] - lot.entry_price) * lot.qty
+            for col, lot in bt.positions.items()
+        )
+        _assert(np.isclose(bt.bar_equity[-1], bt.cash + open_pnl), "Final bar equity should be cash + open PnL")
+
+        per_symbol = result["symbol_stats"]
+        _assert(per_symbol["Total trades"].sum() == len(result["trades"]), "Per-symbol trade counts should add up")
+        _assert(
+            np.isclose(per_symbol["Total Net Profit"].sum(), result["stats"]["Total Net Profit"]),
+            "Per-symbol net profit should add up to the portfolio's",
+        )
+        results.append(TestResult("portfolio.shared_capital", True))
+    except Exception as exc:
+        results.append(TestResult("portfolio.shared_capital", False, str(exc)))
+
+    return results
+
+
+def test_backtest_jobs() -> list[TestResult]:
+    """Web job queue: stages, stored run, single claim, failures and recovery."""
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=600, freq="h")
+    params = {
+        "ema_fast": 9,
+        "ema_slow": 21,
+        "use_clean": True,
+        "initial_balance": 1000.0,
+        "position_mode": "all_in",
+        "trade_size": 30.0,
+        "position_pct": 0.03,
+        "commission_pct": 0.001,
+        "slippage_pct": 0.001,
+        "allow_short": True,
+        "stop_loss_pct": 0.02,
+        "take_profit_pct": None,
+        "pyramiding": 1,
+    }
+    payload = {
+        "strategy": "ema_cross",
+        "exchange": "binance",
+        "symbol": "BTC/USDT",
+        "timeframe": "1h",
+        "start_date": None,
+        "end_date": None,
+        "params": params,
+    }
+
+    def fail_fetch(**_kwargs):
+        raise RuntimeError("exchange offline")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp, \
+                patched_attr(database_module, "DB_PATH", os.path.join(tmp, "jobs.db")), \
+                patched_attr(ohlcv_cache_module, "CACHE_DIR", tmp), \
+                patched_attr(ema_runner, "generate_quantstats_report", lambda *args, **kwargs: None), \
+                patched_attr(ema_runner, "plot_trades_by_date", lambda *args, **kwargs: None), \
+                patched_attr(ema_runner, "plot_trades", lambda *args, **kwargs: None):
+            database_module.init_db()
+            stages = []
+            set_stage = jobs_module._set_stage
+
+            def recording_stage(job_id, stage):
+                stages.append(stage)
+                set_stage(job_id, stage)
+
+            job_id = jobs_module.create_job("run_ok", payload)
+            _assert(jobs_module.get_job(job_id)["status"] == "queued", "New job should be queued")
+            with patched_attr(ema_runner, "fetch_ohlcv", lambda **_kwargs: df.copy()), \
+                    patched_attr(trade_charts_module, "fetch_ohlcv", lambda **_kwargs: df.copy()), \
+                    patched_attr(trade_charts_module, "MAX_CHARTS", 2), \
+                    patched_attr(jobs_module, "_set_stage", recording_stage):
+                _assert(jobs_module.run_job(job_id, tmp) == "done", "Job should finish")
+                _assert(jobs_module.run_job(job_id, tmp) == "done", "A finished job should not run again")
+            _assert(stages == ["backtest", "report", "saving", "charts"], f"Unexpected stages: {stages}")
+
+            job = jobs_module.get_job(run_id="run_ok")
+            _assert(job["status"] == "done" and job["progress"] == 1.0, "Done job should report progress 1")
+            conn = database_module.get_connection()
+            run = conn.execute("SELECT * FROM backtest_runs WHERE run_id = 'run_ok'").fetchone()
+            _assert(run is not None, "Finished job should store its run")
+            _assert(json.loads(run["params_json"]) == params, "Stored params should be the job's")
+            _assert(
+                run["total_trades"] == json.loads(run["stats_json"])["Total trades"],
+                "Stored run should carry its metric columns",
+            )
+            _assert(os.path.exists(os.path.join(tmp, "static", run["csv_path"])), "Trades CSV should be written")
+            with patched_attr(trade_charts_module, "MAX_CHARTS", 2):
+                manifest = trade_charts_module.load_trade_charts(dict(run), params, os.path.join(tmp, "static"), render=False)
+            _assert(manifest is not None, "The charts stage should write the trades_windows manifest")
+            _assert(manifest["charts"] and manifest["error"] is None, f"Charts stage rendered nothing: {manifest}")
+            for chart in manifest["charts"]:
+                _assert(
+                    os.path.exists(os.path.join(tmp, "static", manifest["dir"], chart["filename"])),
+                    f"Missing chart {chart['filename']}",
+                )
+
+            failed_id = jobs_module.create_job("run_fail", payload)
+            with patched_attr(ema_runner, "fetch_ohlcv", fail_fetch), redirect_stderr(io.StringIO()):
+                _assert(jobs_module.run_job(failed_id, tmp) == "failed", "Job should fail")
+            failed = jobs_module.get_job(failed_id)
+            _assert(failed["status"] == "failed" and "exchange offline" in failed["error"], "Failure should be recorded")
+
+            queued_id = jobs_module.create_job("run_queued", payload)
+            stale_id = jobs_module.create_job("run_stale", payload)
+            with conn:
+                conn.execute(
+                    "UPDATE backtest_jobs SET status = 'running', worker_pid = -1 WHERE job_id = ?", (stale_id,)
+                )
+            _assert(jobs_module.recover_jobs() == [queued_id], "Only queued jobs should be resubmitted")
+            _assert(jobs_module.get_job(stale_id)["status"] == "failed", "Jobs of a dead worker should fail")
+            database_module.close_thread_connections()
+        results.append(TestResult("jobs.lifecycle", True))
+    except Exception as exc:
+        results.append(TestResult("jobs.lifecycle", False, str(exc)))
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp, \
+                patched_attr(database_module, "DB_PATH", os.path.join(tmp, "jobs.db")), \
+                patched_attr(frame_cache, "FRAME_CACHE", LRUCache(1 << 20, name="ohlcv_frames")), \
+                patched_attr(frame_cache, "INDICATOR_CACHE", LRUCache(1 << 18, name="indicators")):
+            database_module.init_db()
+            frame_cache.FRAME_CACHE.put("a", df)
+            frame_cache.FRAME_CACHE.get("a")
+            frame_cache.FRAME_CACHE.get("b")
+
+            done_id = jobs_module.create_job("run_cached", payload)
+            dead_id = jobs_module.create_job("run_dead_worker", payload)
+            _assert(jobs_module._claim(done_id), "Job should be claimed")
+            jobs_module._finish(done_id, cache_stats=frame_cache.frame_cache_stats())
+            conn = database_module.get_connection()
+            with conn:
+                conn.execute(
+                    "UPDATE backtest_jobs SET worker_pid = -1, cache_stats_json = ?, finished_at = ? WHERE job_id = ?",
+                    (json.dumps(frame_cache.frame_cache_stats()), "2000-01-01", dead_id),
+                )
+
+            workers = jobs_module.worker_cache_stats()
+            _assert(list(workers) == [os.getpid()], f"Only live workers should report: {list(workers)}")
+            _assert(workers[os.getpid()]["frames"]["hits"] == 1, "Worker stats should come from the job row")
+
+            total = frame_cache.combine_frame_cache_stats([frame_cache.frame_cache_stats(), *workers.values()])
+            _assert(total["processes"] == 2, "Web process and worker should both count")
+            _assert(
+                (total["frames"]["hits"], total["frames"]["misses"], total["frames"]["entries"]) == (2, 2, 2),
+                f"Stats should be summed: {total['frames']}",
+            )
+            _assert(total["frames"]["hit_rate"] == 0.5, "Hit rate should be recomputed from the sums")
+            database_module.close_thread_connections()
+        results.append(TestResult("jobs.worker_cache_stats", True))
+    except Exception as exc:
+        results.append(TestResult("jobs.worker_cache_stats", False, str(exc)))
+
+    return results
+
+
+def test_trade_charts_cache() -> list[TestResult]:
+    """Trade-window charts render once per trades CSV content and are read back from the manifest."""
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=200, freq="h")
+    run = {
+        "run_id": "run_1",
+        "strategy": "ema_cross",
+        "exchange": "binance",
+        "symbol": "BTC/USDT",
+        "timeframe": "1h",
+        "csv_path": "backtests/ema_cross/run_1/trades.csv",
+    }
+    trades = pd.DataFrame(
+        {
+            "entry_time": df["timestamp"].iloc[[10, 60]].to_numpy(),
+            "exit_time": df["timestamp"].iloc[[20, 80]].to_numpy(),
+            "net_pnl": [1.0, -1.0],
+        }
+    )
+    calls = []
+
+    def fake_windows(df, trades, output_dir, filename_prefix, **_kwargs):
+        calls.append(output_dir)
+        with open(os.path.join(output_dir, f"{filename_prefix}_w01.png"), "wb") as fh:
+            fh.write(b"png")
+        return "full", [{"filename": f"{filename_prefix}_w01.png", "window_label": "Window 1"}], False, 1
+
+    try:
+        with tempfile.TemporaryDirectory() as static_folder, \
+                patched_attr(trade_charts_module, "fetch_ohlcv", lambda **_kwargs: df.copy()), \
+                patched_attr(trade_charts_module, "plot_trades_candlestick_windows", fake_windows):
+            csv_abs = os.path.join(static_folder, run["csv_path"])
+            os.makedirs(os.path.dirname(csv_abs))
+            trades.to_csv(csv_abs, index=False)
+
+            first = trade_charts_module.load_trade_charts(run, {}, static_folder)
+            second = trade_charts_module.load_trade_charts(run, {}, static_folder)
+            _assert(len(calls) == 1, "Charts should render once per CSV content")
+            _assert(first == second and first["error"] is None, "Cached manifest should match the rendered one")
+            chart_file = os.path.join(static_folder, first["dir"], first["charts"][0]["filename"])
+            _assert(os.path.exists(chart_file), "Chart files should sit in the keyed directory")
+            _assert(not any(".tmp-" in name for name in os.listdir(os.path.dirname(os.path.join(static_folder, first["dir"])))),
+                    "Render directory should be renamed into place")
+
+            trades.iloc[:1].to_csv(csv_abs, index=False)
+            _assert(trade_charts_module.load_trade_charts(run, {}, static_folder, render=False) is None,
+                    "A rewritten CSV should miss the cache")
+            third = trade_charts_module.load_trade_charts(run, {}, static_folder)
+            _assert(len(calls) == 2 and third["key"] != first["key"], "A rewritten CSV should get a new key")
+
+            with patched_attr(trade_charts_module, "plot_trades_candlestick_windows",
+                              lambda **_kwargs: ("missing_ohlc", [], False, 0)):
+                trades.iloc[1:].to_csv(csv_abs, index=False)
+                missing = trade_charts_module.load_trade_charts(run, {}, static_folder)
+                _assert(missing["error"] and not missing["charts"], "Missing OHLC should report an error")
+                _assert(trade_charts_module.load_trade_charts(run, {}, static_folder, render=False) is None,
+                        "Missing OHLC should not be cached")
+        results.append(TestResult("trade_charts.cache", True))
+    except Exception as exc:
+        results.append(TestResult("trade_charts.cache", False, str(exc)))
+
+    return results
+
+
+def _reference_lttb(x, y, n_out):
+    every = (len(x) - 2) / (n_out - 2)
+    keep, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        nlo, nhi = hi, min(int((i + 2) * every) + 1, len(x))
+        cx, cy = np.mean(x[nlo:nhi]), np.mean(y[nlo:nhi])
+        areas = [abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        keep.append(a)
+    return keep + [len(x) - 1]
+
+
+def test_chart_data() -> list[TestResult]:
+    """Zoom-level OHLC merging, LTTB, viewport slicing/caching and trade markers."""
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=1001, freq="min")
+    rng = np.random.default_rng(3)
+    df["high"] = df["high"] + rng.random(len(df))
+    df["low"] = df["low"] - rng.random(len(df))
+    df["volume"] = rng.random(len(df))
+
+    try:
+        base = {column: df[column].to_numpy(dtype=float) for column in ("open", "high", "low", "close", "volume")}
+        base["timestamp"] = df["timestamp"].to_numpy().astype("datetime64[ms]").astype(np.int64)
+        level = base
+        for k in range(1, 5):
+            level = chart_data_module.merge_pairs(level)
+            groups = pd.DataFrame(base).groupby(np.arange(len(df)) // (1 << k))
+            expected = groups.agg(
+                {"timestamp": "first", "open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+            )
+            for column in expected.columns:
+                _assert(np.allclose(level[column], expected[column].to_numpy()), f"Level {k} {column} differs")
+        results.append(TestResult("chart_data.merge_levels", True))
+    except Exception as exc:
+        results.append(TestResult("chart_data.merge_levels", False, str(exc)))
+
+    try:
+        x = np.arange(500, dtype=float)
+        y = np.cumsum(rng.normal(0, 1, 500))
+        for n_out in (3, 10, 77, 250, 499):
+            got = chart_data_module.lttb_indices(x, y, n_out).tolist()
+            _assert(got == _reference_lttb(x, y, n_out), f"LTTB differs from the reference for n_out={n_out}")
+        _assert(len(chart_data_module.lttb_indices(x, y, 600)) == 500, "n_out >= n should keep every point")
+        results.append(TestResult("chart_data.lttb", True))
+    except Exception as exc:
+        results.append(TestResult("chart_data.lttb", False, str(exc)))
+
+    try:
+        loads = []
+
+        def fake_fetch(**kwargs):
+            loads.append(kwargs)
+            return df.copy()
+
+        chart_data_module.LEVEL_CACHE.clear()
+        with patched_attr(chart_data_module, "fetch_ohlcv", fake_fetch), \
+                patched_attr(chart_data_module, "series_version", lambda *args, **kwargs: "v1"):
+            full = chart_data_module.viewport("binance", "BTC/USDT", "1m", points=100)
+            ts = base["timestamp"]
+            window = chart_data_module.viewport("binance", "BTC/USDT", "1m", start_ts=ts[100], end_ts=ts[399], points=100)
+            line = chart_data_module.viewport("binance", "BTC/USDT", "1m", start_ts=ts[100], end_ts=ts[399], points=100, mode="lttb")
+        _assert(len(loads) == 1, "The series should load once per version")
+        _assert(full["level"] == 4 and len(full["timestamp"]) <= 101, "Full history should use the level that fits 100 points")
+        _assert(window["bars"] == 300 and window["level"] == 2, "Window should pick level 2 for 300 bars")
+        _assert(window["timestamp"][0] <= ts[100] and window["timestamp"][-1] <= ts[399] < window["timestamp"][-1] + 4 * 60_000,
+                "Window buckets should cover the viewport")
+        _assert(np.isclose(window["high"].max(), base["high"][100:400].max()), "Window highs should come from its bars")
+        _assert(len(line["timestamp"]) == 75 and line["timestamp"][0] == ts[100] and line["timestamp"][-1] == ts[399],
+                "LTTB should keep the window's first and last bar")
+        results.append(TestResult("chart_data.viewport", True))
+    except Exception as exc:
+        results.append(TestResult("chart_data.viewport", False, str(exc)))
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "trades.csv")
+            pd.DataFrame(
+                {
+                    "entry_time": pd.to_datetime(df["timestamp"].to_numpy()[[500, 10, 200]], utc=True),
+                    "exit_time": pd.to_datetime(df["timestamp"].to_numpy()[[600, 20, 300]], utc=True),
+                    "side": ["SHORT", "LONG", "LONG"],
+                    "entry_price": [1.0, 2.0, 3.0],
+                    "exit_price": [1.5, 2.5, 3.5],
+                    "net_pnl": [1.0, np.nan, -1.0],
+                    "entry_trigger": ["a", "b", None],
+                    "exit_trigger": ["x", "y", "z"],
+                }
+            ).to_csv(csv_path, index=False)
+            markers = chart_data_module.load_trade_markers(csv_path)
+            ts = base["timestamp"]
+            _assert(markers["entry_ts"].tolist() == [ts[10], ts[200], ts[500]], "Markers should be sorted by entry")
+            picked = chart_data_module.trade_markers(markers, start_ts=ts[15], end_ts=ts[250])
+            _assert(picked["count"] == 2 and picked["net_pnl"] == [None, -1.0], "Overlapping trades with NaN as None")
+            _assert(picked["entry_trigger"] == ["b", None], "Missing triggers should be None")
+            _assert(chart_data_module.trade_markers(markers, limit=1)["truncated"], "Limit should flag truncation")
+        results.append(TestResult("chart_data.trade_markers", True))
+    except Exception as exc:
+        results.append(TestResult("chart_data.trade_markers", False, str(exc)))
+
+    return results
+
+
+def test_plot_trades() -> list[TestResult]:
+    """Candles/markers drawn as batched collections; pooled window rendering."""
+
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection, PathCollection, PolyCollection
+    from matplotlib.colors import to_rgba
+
+    results: list[TestResult] = []
+    df = make_synthetic_ohlcv(rows=300, freq="h")
+    times = df["timestamp"].to_numpy()
+    closes = df["close"].to_numpy()
+    trades = pd.DataFrame(
+        {
+            "entry_time": times[[10, 60, 130, 260]],
+            "exit_time": times[[30, 90, 140, 280]],
+            "side": ["LONG", "SHORT", "LONG", "SHORT"],
+            "entry_price": closes[[10, 60, 130, 260]],
+            "exit_price": closes[[30, 90, 140, 280]],
+            "net_pnl": [1.0, -1.0, 0.5, 2.0],
+            "entry_trigger": ["ema cross", None, "ema cross", "ema cross"],
+            "exit_trigger": ["stop", "tp", None, "stop"],
+        }
+    )
+
+    try:
+        fig, ax = plt.subplots()
+        try:
+            window = df.iloc[:50]
+            x_values = np.arange(50, dtype=float)
+            plot_trades_module._add_candles(
+                ax,
+                x_values,
+                window["open"].to_numpy(dtype=float),
+                window["high"].to_numpy(dtype=float),
+                window["low"].to_numpy(dtype=float),
+                window["close"].to_numpy(dtype=float),
+                0.7,
+            )
+            _assert(not ax.patches, "Candles should not add one patch per candle")
+            wicks = [c for c in ax.collections if isinstance(c, LineCollection)]
+            bodies = [c for c in ax.collections if isinstance(c, PolyCollection)]
+            _assert(len(wicks) == 1 and len(wicks[0].get_segments()) == 50, "Expected one LineCollection of 50 wicks")
+            _assert(len(bodies) == 1 and len(bodies[0].get_paths()) == 50, "Expected one PolyCollection of 50 bodies")
+            segment = wicks[0].get_segments()[7]
+            _assert(
+                np.allclose(segment[:, 1], [window["low"].iloc[7], window["high"].iloc[7]]),
+                "Wick 7 should span low..high",
+            )
+            up = (window["close"] >= window["open"]).to_numpy()
+            greens = np.isclose(bodies[0].get_facecolor()[:, 1], to_rgba(plot_trades_module.UP_COLOR)[1])
+            _assert(np.array_equal(greens, up), "Body colors should follow close >= open")
+        finally:
+            plt.close(fig)
+        results.append(TestResult("plot_trades.collections", True))
+    except Exception as exc:
+        results.append(TestResult("plot_trades.collections", False, str(exc)))
+
+    try:
+        fig, ax = plt.subplots()
+        try:
+            trades_df = plot_trades_module._normalize_trades(trades)
+            has_full, has_markers = plot_trades_module._add_trade_markers(
+                ax, trades_df, pd.Timestamp(times[0]), pd.Timestamp(times[-1])
+            )
+            _assert(has_markers and not has_full, "Missing triggers should make labels best-effort")
+            scatters = [c for c in ax.collections if isinstance(c, PathCollection)]
+            _assert(len(scatters) == 3, f"Expected entry long/short + exit scatters, got {len(scatters)}")
+            _assert(sum(len(c.get_offsets()) for c in scatters) == 8, "Expected 4 entry and 4 exit markers")
+            paths = [c for c in ax.collections if isinstance(c, LineCollection)]
+            _assert(len(paths) == 1 and len(paths[0].get_segments()) == 4, "Expected one LineCollection of 4 trade paths")
+            _assert(len(ax.texts) == 8, "Every marker should keep its annotation")
+        finally:
+            plt.close(fig)
+        results.append(TestResult("plot_trades.markers", True))
+    except Exception as exc:
+        results.append(TestResult("plot_trades.markers", False, str(exc)))
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            outcomes = {}
+            for workers in (1, 2):
+                out_dir = os.path.join(tmp, f"w{workers}")
+                outcomes[workers] = plot_trades_module.plot_trades_candlestick_windows(
+                    df=df,
+                    trades=trades,
+                    output_dir=out_dir,
+                    candles_per_chart=50,
+                    max_charts=3,
+                    workers=workers,
+                )
+                files = sorted(os.listdir(out_dir))
+                _assert(files == [item["filename"] for item in outcomes[workers][1]], f"workers={workers}: files differ")
+            _assert(outcomes[1] == outcomes[2], "Pooled rendering should return the same result as sequential")
+            mode, items, truncated, total = outcomes[1]
+            _assert(mode == "best_effort" and len(items) == 3 and truncated and total == 4, f"Unexpected windows {outcomes[1]}")
+        results.append(TestResult("plot_trades.windows_pool", True))
+    except Exception as exc:
+        results.append(TestResult("plot_trades.windows_pool", False, str(exc)))
+
+    return results
+
+
+def test_history() -> list[TestResult]:
+    """Metric column backfill and keyset-paginated, filtered run history."""
+
+    results: list[TestResult] = []
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "history.db")
+            with patched_attr(database_module, "DB_PATH", db_path):
+                conn = database_module.get_connection()
+                # Layout from before the metric columns.
+                conn.execute("""
+                    CREATE TABLE backtest_runs (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        run_id TEXT UNIQUE NOT NULL,
+                        strategy TEXT NOT NULL,
+                        exchange TEXT NOT NULL,
+                        symbol TEXT NOT NULL,
+                        timeframe TEXT NOT NULL,
+                        start_ts INTEGER,
+                        end_ts INTEGER,
+                        params_json TEXT NOT NULL,
+                        stats_json TEXT NOT NULL,
+                        chart_path TEXT,
+                        csv_path TEXT,
+                        created_at TEXT NOT NULL
+                    )
+                """)
+                rng = np.random.default_rng(5)
+                expected = {}
+                with conn:
+                    for i in range(60):
+                        stats = {
+                            "Total trades": int(rng.integers(0, 50)),
+                            "Profit Factor": float(rng.choice([0.5, 1.0, 1.5, 2.0])),
+                            "Max Drawdown (%)": float(rng.uniform(1, 40)),
+                        }
+                        if i == 7:
+                            stats["Profit Factor"] = float("inf")
+                        if i == 11:
+                            stats["Profit Factor"] = float("nan")
+                        expected[f"r{i:02d}"] = stats
+                        conn.execute(
+                            """
+                            INSERT INTO backtest_runs (
+                                run_id, strategy, exchange, symbol, timeframe, params_json, stats_json, created_at
+                            ) VALUES (?, ?, 'binance', ?, '1h', '{}', ?, ?)
+                            """,
+                            (f"r{i:02d}", ("ema_cross", "rsi_reversion")[i % 2], ("BTC/USDT", "ETH/USDT")[i % 3 == 0],
+                             json.dumps(stats), f"2024-01-01T00:{i:02d}"),
+                        )
+
+                database_module.init_db()
+                database_module.init_db()  # no second backfill or error
+                rows = {row["run_id"]: dict(row) for row in conn.execute("SELECT * FROM backtest_runs")}
+                for run_id, stats in expected.items():
+                    pf = stats["Profit Factor"]
+                    _assert(rows[run_id]["total_trades"] == stats["Total trades"], f"{run_id}: total_trades not backfilled")
+                    _assert(
+                        rows[run_id]["profit_factor"] == (None if math.isnan(pf) else pf),
+                        f"{run_id}: profit_factor {rows[run_id]['profit_factor']} != {pf}",
+                    )
+                    _assert(rows[run_id]["sharpe_ratio"] is None, "Missing stats should stay NULL")
+                indexes = {row[1] for row in conn.execute("PRAGMA index_list(backtest_runs)")}
+                for column in ("strategy", *database_module.RUN_METRIC_COLUMNS):
+                    _assert(f"idx_backtest_runs_{column}" in indexes, f"Missing index on {column}")
+                results.append(TestResult("history.backfill", True))
+
+                def walk(**query):
+                    seen, after = [], None
+                    while True:
+                        page, after_value = history_module.query_runs(conn, after=after, limit=7, **query)
+                        _assert(len(page) <= 7, "Page larger than limit")
+                        seen.extend(row["run_id"] for row in page)
+                        if after_value is None:
+                            return seen
+                        after = history_module.decode_cursor(after_value, query.get("sort", "id"))
+
+                all_rows = list(rows.values())
+                _assert(walk() == [r["run_id"] for r in sorted(all_rows, key=lambda r: -r["id"])], "id pages differ")
+                by_pf = sorted(
+                    (r for r in all_rows if r["profit_factor"] is not None),
+                    key=lambda r: (-r["profit_factor"], -r["id"]),
+                )
+                _assert(walk(sort="profit_factor") == [r["run_id"] for r in by_pf], "profit_factor pages differ")
+                _assert(walk(sort="profit_factor")[0] == "r07", "inf profit factor should sort first")
+                filtered = sorted(
+                    (
+                        r for r in all_rows
+                        if r["strategy"] == "ema_cross" and 10 <= r["total_trades"] <= 30
+                    ),
+                    key=lambda r: (r["max_drawdown_pct"], r["id"]),
+                )
+                got = walk(
+                    filters={"strategy": "ema_cross"},
+                    ranges={"total_trades": (10, 30)},
+                    sort="max_drawdown_pct",
+                    order="asc",
+                )
+                _assert(got == [r["run_id"] for r in filtered], "Filtered drawdown pages differ")
+
+                query = history_module.parse_history_args(
+                    {"symbol": "ETH/USDT", "profit_factor_min": "1.5", "sort": "profit_factor", "limit": "9999"}
+                )
+                _assert(query["limit"] == history_module.MAX_PAGE_SIZE, "limit should be capped")
+                _assert(query["filters"] == {"symbol": "ETH/USDT"} and query["ranges"] == {"profit_factor": (1.5, None)},
+                        f"Unexpected parsed query {query}")
+                for bad in ({"sort": "stats_json"}, {"order": "sideways"}, {"net_profit_max": "x"},
+                            {"sort": "profit_factor", "after": "12"}):
+                    try:
+                        history_module.parse_history_args(bad)
+                    except ValueError:
+                        continue
+                    raise AssertionError(f"{bad} should be rejected")
+                database_module.close_thread_connections()
+        results.append(TestResult("history.keyset_pages", True))
+    except Exception as exc:
+        results.append(TestResult("history", False, str(exc)))
+
+    return results
+
+
 def main() -> int:
     all_results: list[TestResult] = []
 
@@ -441,6 +2331,27 @@ def main() -> int:
         all_results.extend(test_signal_level_logic())
         all_results.extend(test_backtest_smoke())
         all_results.extend(test_backtest_regression())
+        all_results.extend(test_vectorized_engine_parity())
+        all_results.extend(test_streaming_indicators())
+        all_results.extend(test_parameter_sweep())
+        all_results.extend(test_walk_forward())
+        all_results.extend(test_ohlcv_cache())
+        all_results.extend(test_frame_cache())
+        all_results.extend(test_sanitize_gaps())
+        all_results.extend(test_ohlcv_clean_schema())
+        all_results.extend(test_connection_pool())
+        all_results.extend(test_downloader_streaming())
+        all_results.extend(test_resampler())
+        all_results.extend(test_file_ingest())
+        all_results.extend(test_trade_ledger())
+        all_results.extend(test_mark_to_market())
+        all_results.extend(test_performance_stats())
+        all_results.extend(test_portfolio())
+        all_results.extend(test_backtest_jobs())
+        all_results.extend(test_trade_charts_cache())
+        all_results.extend(test_chart_data())
+        all_results.extend(test_plot_trades())
+        all_results.extend(test_history())
     except Exception:
         print("FATAL: unexpected test harness failure")
         print(traceback.format_exc())
@@ -0,0 +1,175 @@
+"""
+Portfolio backtests: one strategy over many symbols with shared capital.
+
+Each symbol's frame comes from fetch_ohlcv and gets its signals from the
+strategy's whole-frame compute_signals() on its own bars (indicators never
+see another symbol's calendar). The signal arrays are then placed on the
+union timestamp index and PortfolioBacktester trades them all at once.
+
+Only the strategies with vectorized signals are supported (SIGNAL_BUILDERS);
+their parameters have the same names as the run_backtest_*_v2 arguments.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.core.backtester_portfolio import PortfolioBacktester, align_frames
+from src.core.data import fetch_ohlcv
+from src.core.ta import compute_rsi
+from src.strategies.donchian_breakout.strategy import compute_donchian
+from src.strategies.donchian_breakout.strategy import compute_signals as donchian_signals
+from src.strategies.ema_cross.strategy import compute_signals as ema_cross_signals
+from src.strategies.rsi_reversion.strategy import compute_signals as rsi_signals
+
+
+# -------------------------------------------------
+# SIGNALS PER SYMBOL
+# -------------------------------------------------
+def _executed_next_bar(row_signals, row_triggers, start):
+    """Row r's signal is acted on at bar r + 1 (as in the runners); nothing before start."""
+    signals = np.zeros(len(row_signals), dtype=np.int8)
+    triggers = np.full(len(row_signals), None, dtype=object)
+    signals[1:] = row_signals[:-1]
+    triggers[1:] = row_triggers[:-1]
+    signals[:start] = 0
+    return signals, triggers
+
+
+def _ema_cross(df, ema_fast, ema_slow):
+    return _executed_next_bar(*ema_cross_signals(df, ema_fast, ema_slow), int(ema_slow) + 1)
+
+
+def _rsi_reversion(df, rsi_period, rsi_entry, rsi_exit):
+    rsi = compute_rsi(df["close"], int(rsi_period)).to_numpy(dtype=float)
+    return _executed_next_bar(*rsi_signals(rsi, rsi_entry, rsi_exit), int(rsi_period) + 1)
+
+
+def _donchian_breakout(df, donchian_lookback):
+    df = compute_donchian(df.copy(), int(donchian_lookback))
+    return _executed_next_bar(*donchian_signals(df, int(donchian_lookback)), int(donchian_lookback) + 1)
+
+
+SIGNAL_BUILDERS = {
+    "ema_cross": _ema_cross,
+    "rsi_reversion": _rsi_reversion,
+    "donchian_breakout": _donchian_breakout,
+}
+
+
+def portfolio_signals(strategy, frames, timestamps, symbols, rows, params):
+    """(bars, symbols) signal codes and triggers on the aligned index."""
+    if strategy not in SIGNAL_BUILDERS:
+        raise ValueError(f"Unknown portfolio strategy '{strategy}'. Options: {', '.join(SIGNAL_BUILDERS)}")
+    build = SIGNAL_BUILDERS[strategy]
+
+    signals = np.zeros((len(timestamps), len(symbols)), dtype=np.int8)
+    triggers = np.full((len(timestamps), len(symbols)), None, dtype=object)
+    for col, symbol in enumerate(symbols):
+        symbol_signals, symbol_triggers = build(frames[symbol], **params)
+        signals[rows[symbol], col] = symbol_signals
+        triggers[rows[symbol], col] = symbol_triggers
+    return signals, triggers
+
+
+# -------------------------------------------------
+# RUN
+# -------------------------------------------------
+def run_portfolio_backtest(
+    strategy,
+    symbols,
+    exchange,
+    timeframe,
+    params,
+    start_date=None,
+    end_date=None,
+    use_clean=True,
+    initial_capital=10_000.0,
+    position_pct=None,
+    max_asset_pct=None,
+    max_positions=None,
+    commission_pct=0.001,
+    slippage_pct=0.001,
+    allow_short=False,
+    stop_loss_pct=0.02,
+    take_profit_pct=None,
+    frames=None,
+    output_dir=None,
+):
+    """
+    Returns a dict with:
+        bt:           the PortfolioBacktester after the run
+        trades:       every closed trade, with a symbol column
+        equity:       per-bar portfolio equity on the union timestamps
+        stats:        portfolio stats
+        symbol_stats: one stats row per symbol
+    frames ({symbol: OHLCV frame}) skips fetch_ohlcv, e.g. for synthetic data.
+    """
+    if frames is None:
+        frames = {
+            symbol: fetch_ohlcv(
+                exchange=exchange,
+                symbol=symbol,
+                timeframe=timeframe,
+                start_date=start_date,
+                end_date=end_date,
+                limit=50000,
+                use_clean=use_clean,
+            )
+            for symbol in symbols
+        }
+    frames = {symbol: frame for symbol, frame in frames.items() if len(frame)}
+    if not frames:
+        raise ValueError("No OHLCV data for any symbol")
+
+    timestamps, symbols, arrays = align_frames(frames)
+    signals, triggers = portfolio_signals(strategy, frames, timestamps, symbols, arrays["rows"], params)
+
+    bt = PortfolioBacktester(
+        symbols,
+        initial_capital=initial_capital,
+        position_pct=position_pct,
+        max_asset_pct=max_asset_pct,
+        max_positions=max_positions,
+        commission_pct=commission_pct,
+        slippage_pct=slippage_pct,
+        allow_short=allow_short,
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+    )
+    bt.run(timestamps, arrays["high"], arrays["low"], arrays["close"], signals, triggers)
+
+    trades = bt.trades_frame()
+    equity = pd.DataFrame({"timestamp": timestamps, "equity": bt.bar_equity})
+    stats = bt.stats()
+    symbol_stats = bt.symbol_stats()
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        trades.to_csv(os.path.join(output_dir, "portfolio_trades.csv"), index=False)
+        equity.to_csv(os.path.join(output_dir, "portfolio_equity.csv"), index=False)
+        symbol_stats.to_csv(os.path.join(output_dir, "portfolio_symbol_stats.csv"))
+        summary = {
+            "strategy": strategy,
+            "exchange": exchange,
+            "timeframe": timeframe,
+            "symbols": symbols,
+            "params": params,
+            "initial_capital": initial_capital,
+            "position_pct": bt.position_pct,
+            "max_asset_pct": max_asset_pct,
+            "max_positions": max_positions,
+            "stats": stats,
+        }
+        with open(os.path.join(output_dir, "portfolio_summary.json"), "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, indent=2, default=str)
+
+    return {
+        "bt": bt,
+        "trades": trades,
+        "equity": equity,
+        "stats": stats,
+        "symbol_stats": symbol_stats,
+    }
@@ -0,0 +1,287 @@
+"""
+Parameter sweep / grid search over the run_backtest_*_v2 runners.
+
+The OHLCV frame is loaded once in the parent and copied into a
+multiprocessing shared memory block. Each worker process attaches to it in
+its initializer and rebuilds the frame once; per task the runner module's
+fetch_ohlcv is patched to return it (or a row slice of it), so tasks only
+carry their parameter dict and slice bounds (plus, optionally, the first
+bar of the slice that may open a trade).
+Reports, plots and equity charts are always disabled inside the sweep.
+"""
+
+import contextlib
+import importlib
+import io
+import itertools
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.core.backtester_v2 import BacktesterV2
+from src.core.data import fetch_ohlcv
+
+
+# -------------------------------------------------
+# STRATEGY REGISTRY
+# -------------------------------------------------
+STRATEGY_RUNNERS = {
+    "ema_cross": (
+        "src.strategies.ema_cross.backtest_ema_cross_v2",
+        "run_backtest_ema_cross_v2",
+    ),
+    "rsi_reversion": (
+        "src.strategies.rsi_reversion.backtest_rsi_reversion_v2",
+        "run_backtest_rsi_reversion_v2",
+    ),
+    "donchian_breakout": (
+        "src.strategies.donchian_breakout.backtest_donchian_breakout_v2",
+        "run_backtest_donchian_breakout_v2",
+    ),
+    "ema_trend_hold": (
+        "src.strategies.ema_trend_hold.backtest_ema_trend_hold_v2",
+        "run_backtest_ema_trend_hold_v2",
+    ),
+    "bmsb": (
+        "src.strategies.bmsb.backtest_bmsb_v2",
+        "run_backtest_bmsb_v2",
+    ),
+    "emalyarovich_smas": (
+        "src.strategies.emalyarovich_smas.backtest_emalyarovich_smas_v2",
+        "run_backtest_emalyarovich_smas_v2",
+    ),
+    "k_davey_mom_keltner": (
+        "src.strategies.k_davey_mom_keltner.backtest_k_davey_mom_keltner_v2",
+        "run_backtest_k_davey_mom_keltner_v2",
+    ),
+    "basic_keltner_reversion": (
+        "src.strategies.basic_keltner_reversion.backtest_basic_keltner_reversion_v2",
+        "run_backtest_basic_keltner_reversion_v2",
+    ),
+}
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def load_runner(strategy):
+    if strategy not in STRATEGY_RUNNERS:
+        raise ValueError(f"Unknown strategy '{strategy}'. Options: {', '.join(STRATEGY_RUNNERS)}")
+    module_name, fn_name = STRATEGY_RUNNERS[strategy]
+    module = importlib.import_module(module_name)
+    return module, getattr(module, fn_name)
+
+
+def expand_grid(param_grid):
+    """{"a": [1, 2], "b": [3]} -> [{"a": 1, "b": 3}, {"a": 2, "b": 3}]"""
+    names = list(param_grid)
+    values = [list(v) if isinstance(v, (list, tuple, range, np.ndarray)) else [v] for v in param_grid.values()]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+# -------------------------------------------------
+# SHARED MEMORY FRAME
+# -------------------------------------------------
+def _share_frame(df):
+    """Copy timestamp + OHLCV into one shared block laid out as (6, n) float64."""
+    n = len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(n, 1) * 8 * (1 + len(OHLCV_COLUMNS)))
+    block = np.ndarray((1 + len(OHLCV_COLUMNS), n), dtype=np.float64, buffer=shm.buf)
+
+    timestamps = df["timestamp"].to_numpy()
+    block[0].view(np.int64)[:] = timestamps.view(np.int64)
+    for row, column in enumerate(OHLCV_COLUMNS, start=1):
+        block[row] = df[column].to_numpy(dtype=float)
+
+    return shm, n, str(timestamps.dtype)
+
+
+def _attach_frame(shm_name, n, timestamp_dtype):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray((1 + len(OHLCV_COLUMNS), n), dtype=np.float64, buffer=shm.buf)
+        data = {"timestamp": block[0].view(np.int64).view(timestamp_dtype).copy()}
+        for row, column in enumerate(OHLCV_COLUMNS, start=1):
+            data[column] = block[row].copy()
+        del block
+    finally:
+        shm.close()
+    return pd.DataFrame(data)
+
+
+# -------------------------------------------------
+# WORKER
+# -------------------------------------------------
+_worker = {}
+
+
+def _init_worker(shm_name, n, timestamp_dtype, strategy, base_kwargs):
+    module, fn = load_runner(strategy)
+    _worker["frame"] = _attach_frame(shm_name, n, timestamp_dtype)
+    _worker["module"] = module
+    _worker["fn"] = fn
+    _worker["base_kwargs"] = base_kwargs
+
+
+def _run_task(task):
+    index, params, bounds, collect_trades, *entry_start = task
+    frame = _worker["frame"]
+    if bounds is not None:
+        frame = frame.iloc[bounds[0]:bounds[1]].reset_index(drop=True)
+
+    # Runners call fetch_ohlcv(...) by name; every task gets a private copy
+    # because some runners add indicator columns to the frame.
+    _worker["module"].fetch_ohlcv = lambda **_kwargs: frame.copy()
+
+    # Runners build their own backtester, so the entry switch is set on the
+    # class for the duration of the task.
+    BacktesterV2.entry_start = int(entry_start[0]) if entry_start else 0
+
+    kwargs = {**_worker["base_kwargs"], **params, "run_id": f"sweep_{index}"}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats, _, csv_rel = _worker["fn"](**kwargs)
+    except Exception as exc:
+        return index, {}, f"{type(exc).__name__}: {exc}", []
+    finally:
+        BacktesterV2.entry_start = 0
+
+    trades = []
+    if collect_trades and csv_rel:
+        csv_path = os.path.join(kwargs["base_path"], "static", csv_rel)
+        trades = pd.read_csv(csv_path, float_precision="round_trip").to_dict("records")
+    return index, stats, None, trades
+
+
+def run_backtest_batch(strategy, df, tasks, base_kwargs, workers=None):
+    """
+    Run runner tasks against one shared OHLCV frame.
+
+    tasks: list of (params, bounds, collect_trades[, entry_start]); bounds is
+    a (start, stop) row slice of df or None for the whole frame, entry_start
+    the first bar of that slice whose signals may open a trade (indicators
+    still see the bars before it). Returns one
+    (stats, error, trades) tuple per task, in order. Trades are the rows of
+    the exported trades CSV when collect_trades is set.
+    """
+    load_runner(strategy)
+    if not tasks:
+        return []
+
+    workers = int(workers or os.cpu_count() or 1)
+    workers = max(1, min(workers, len(tasks)))
+    chunksize = max(1, len(tasks) // (workers * 4))
+
+    artifacts_dir = tempfile.mkdtemp(prefix="sweep_")
+    base_kwargs = {
+        **base_kwargs,
+        "generate_report": False,
+        "generate_plots": False,
+        "generate_equity": False,
+        "base_path": artifacts_dir,
+    }
+
+    shm, n, timestamp_dtype = _share_frame(df)
+    outcomes = {}
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shm.name, n, timestamp_dtype, strategy, base_kwargs),
+        ) as pool:
+            work = ((index, *task) for index, task in enumerate(tasks))
+            for index, stats, error, trades in pool.map(_run_task, work, chunksize=chunksize):
+                outcomes[index] = (stats, error, trades)
+    finally:
+        shm.close()
+        shm.unlink()
+        shutil.rmtree(artifacts_dir, ignore_errors=True)
+
+    return [outcomes[index] for index in range(len(tasks))]
+
+
+def rank_results(strategy, combos, outcomes, rank_by="Total Net Profit", ascending=False):
+    rows = []
+    for params, (stats, error, _trades) in zip(combos, outcomes):
+        rows.append({"strategy": strategy, **params, **stats, "error": error})
+
+    results = pd.DataFrame(rows)
+    if rank_by in results.columns:
+        results = results.sort_values(rank_by, ascending=ascending, na_position="last", kind="stable")
+    results = results.reset_index(drop=True)
+    results.insert(0, "rank", np.arange(1, len(results) + 1))
+    return results
+
+
+# -------------------------------------------------
+# SWEEP
+# -------------------------------------------------
+def run_sweep(
+    strategy,
+    param_grid,
+    exchange,
+    symbol,
+    timeframe,
+    start_date=None,
+    end_date=None,
+    use_clean=True,
+    fixed_params=None,
+    df=None,
+    workers=None,
+    rank_by="Total Net Profit",
+    ascending=False,
+    output_csv=None,
+):
+    """
+    Run every combination of param_grid for one strategy and return a ranked
+    DataFrame (one row per combination: parameters, stats, error).
+
+    df: optional preloaded OHLCV frame; otherwise fetch_ohlcv is called once.
+    fixed_params: runner kwargs shared by all combinations (fees, sizing...).
+    """
+    load_runner(strategy)
+    combos = expand_grid(param_grid)
+    if not combos:
+        return pd.DataFrame()
+
+    if df is None:
+        df = fetch_ohlcv(
+            exchange=exchange,
+            symbol=symbol,
+            timeframe=timeframe,
+            start_date=start_date,
+            end_date=end_date,
+            limit=50000,
+            use_clean=use_clean,
+        )
+    if df is None or df.empty:
+        print("[WARN] No OHLCV data for sweep")
+        return pd.DataFrame()
+
+    base_kwargs = {
+        **(fixed_params or {}),
+        "exchange": exchange,
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "start_date": start_date,
+        "end_date": end_date,
+        "use_clean": use_clean,
+    }
+    outcomes = run_backtest_batch(
+        strategy,
+        df,
+        [(params, None, False) for params in combos],
+        base_kwargs,
+        workers=workers,
+    )
+    results = rank_results(strategy, combos, outcomes, rank_by=rank_by, ascending=ascending)
+
+    if output_csv:
+        os.makedirs(os.path.dirname(os.path.abspath(output_csv)), exist_ok=True)
+        results.to_csv(output_csv, index=False)
+
+    return results
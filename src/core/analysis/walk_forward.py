@@ -0,0 +1,334 @@
+"""
+Walk-forward optimization on top of the sweep worker pool.
+
+The OHLCV frame is fetched once and split into in-sample (IS) /
+out-of-sample (OOS) windows, either rolling (fixed-length IS) or anchored
+(IS always starts at the first bar). Window lengths are bar counts (int) or
+calendar spans ("18M", "6M", "90D", "2W", "1Y").
+
+1) Every IS window x parameter combination runs in one process pool.
+2) The best combination per window (rank_by) runs on its OOS window with
+   `warmup_bars` of the preceding data prepended, so indicators are already
+   warm at the OOS start. Entries are blocked until the OOS start bar
+   (BacktesterV2.entry_start), so every OOS run starts flat with its full
+   initial balance.
+3) OOS trades are stitched into one equity curve and scored.
+
+The default warmup is the largest lookback-like parameter (see
+WARMUP_PARAM_TOKENS); pass warmup_bars when a strategy names its lookbacks
+differently.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.core.analysis.sweep import expand_grid, load_runner, rank_results, run_backtest_batch
+from src.core.data import fetch_ohlcv
+from src.core.performance import performance_stats, performance_stats_batch
+
+
+SPAN_UNITS = {
+    "D": lambda n: pd.DateOffset(days=n),
+    "W": lambda n: pd.DateOffset(weeks=n),
+    "M": lambda n: pd.DateOffset(months=n),
+    "Y": lambda n: pd.DateOffset(years=n),
+}
+
+SUMMARY_STATS = ["Total trades", "Total Net Profit", "Profit Factor", "Max Drawdown (%)"]
+
+# Parameter name parts that mark a lookback ("ema_slow", "rsi_period",
+# "donchian_lookback", "slope_bars"); sizing ints such as initial_balance,
+# trade_size or max_contracts do not match.
+WARMUP_PARAM_TOKENS = {"period", "length", "lookback", "window", "bars", "ema", "sma"}
+
+
+def parse_span(span):
+    """int -> bar count, "18M" / "90D" / "2W" / "1Y" -> pd.DateOffset."""
+    if isinstance(span, (int, np.integer)):
+        return int(span)
+    if isinstance(span, pd.DateOffset):
+        return span
+
+    match = re.fullmatch(r"\s*(\d+)\s*([DWMYdwmy])\s*", str(span))
+    if not match:
+        if str(span).strip().isdigit():
+            return int(span)
+        raise ValueError(f"Invalid window span '{span}'. Use bars (int) or e.g. '18M', '90D', '2W', '1Y'.")
+    return SPAN_UNITS[match.group(2).upper()](int(match.group(1)))
+
+
+def build_windows(timestamps, train="18M", test="6M", step=None, anchored=False):
+    """
+    Return IS/OOS windows as row bounds into `timestamps` (stop exclusive).
+    The last OOS window may be shorter than `test` when the data runs out.
+    """
+    ts = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    n = len(ts)
+    train = parse_span(train)
+    test = parse_span(test)
+    step = parse_span(step) if step is not None else test
+
+    by_bars = [isinstance(span, int) for span in (train, test, step)]
+    if any(by_bars) and not all(by_bars):
+        raise ValueError("train, test and step must all be bar counts or all calendar spans")
+
+    def position(offset_steps, extra=None):
+        if by_bars[0]:
+            return offset_steps * step + (extra or 0)
+        boundary = ts[0] + step * offset_steps if offset_steps else ts[0]
+        if extra is not None:
+            boundary = boundary + extra
+        return int(ts.searchsorted(boundary, side="left"))
+
+    windows = []
+    k = 0
+    while True:
+        is_start = 0 if anchored else position(k)
+        is_stop = position(k, train)
+        if is_stop >= n:
+            break
+        if by_bars[0]:
+            oos_stop = min(is_stop + test, n)
+        else:
+            oos_stop = min(int(ts.searchsorted(ts[0] + step * k + train + test, side="left")), n)
+
+        if is_stop > is_start and oos_stop > is_stop:
+            windows.append(
+                {
+                    "window": len(windows),
+                    "is_start": is_start,
+                    "is_stop": is_stop,
+                    "oos_start": is_stop,
+                    "oos_stop": oos_stop,
+                    "is_start_time": ts[is_start],
+                    "is_end_time": ts[is_stop - 1],
+                    "oos_start_time": ts[is_stop],
+                    "oos_end_time": ts[oos_stop - 1],
+                }
+            )
+        k += 1
+
+    return windows
+
+
+def default_warmup_bars(param_grid, fixed_params=None):
+    """Largest integer lookback parameter (see WARMUP_PARAM_TOKENS), at least 200 bars, plus one."""
+    values = [200]
+    candidates = list((fixed_params or {}).items()) + [item for combo in expand_grid(param_grid) for item in combo.items()]
+    for name, candidate in candidates:
+        if not WARMUP_PARAM_TOKENS.intersection(str(name).lower().split("_")):
+            continue
+        if isinstance(candidate, (int, np.integer)) and not isinstance(candidate, bool):
+            values.append(int(candidate))
+    return max(values) + 1
+
+
+def _trade_equity(net_pnls, initial_capital):
+    return np.concatenate([[initial_capital], initial_capital + np.cumsum(net_pnls)])
+
+
+def trade_stats(net_pnls, initial_capital=1000.0):
+    """BacktesterV2.stats() for an arbitrary sequence of closed trade PnLs."""
+    net_pnls = np.asarray(net_pnls, dtype=np.float64)
+    return performance_stats(net_pnls, _trade_equity(net_pnls, initial_capital))
+
+
+def trade_stats_batch(pnl_lists, initial_capital=1000.0):
+    """trade_stats() of many PnL sequences in one pass, one row per sequence."""
+    pnl_lists = [np.asarray(pnls, dtype=np.float64) for pnls in pnl_lists]
+    return performance_stats_batch(pnl_lists, [_trade_equity(pnls, initial_capital) for pnls in pnl_lists])
+
+
+def _utc(value):
+    value = pd.Timestamp(value)
+    return value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
+
+
+# -------------------------------------------------
+# WALK FORWARD
+# -------------------------------------------------
+def run_walk_forward(
+    strategy,
+    param_grid,
+    exchange,
+    symbol,
+    timeframe,
+    start_date=None,
+    end_date=None,
+    use_clean=True,
+    train="18M",
+    test="6M",
+    step=None,
+    anchored=False,
+    warmup_bars=None,
+    fixed_params=None,
+    df=None,
+    workers=None,
+    rank_by="Total Net Profit",
+    ascending=False,
+    output_dir=None,
+):
+    """
+    Returns a dict with:
+        windows: one row per window (bounds, chosen params, IS score, OOS stats)
+        trades:  stitched OOS trades (with a "window" column)
+        equity:  stitched OOS equity by exit_time
+        stats:   BacktesterV2-style stats of the stitched OOS trades
+    """
+    load_runner(strategy)
+    combos = expand_grid(param_grid)
+    fixed_params = fixed_params or {}
+    initial_capital = float(fixed_params.get("initial_balance", 1000.0))
+
+    if df is None:
+        df = fetch_ohlcv(
+            exchange=exchange,
+            symbol=symbol,
+            timeframe=timeframe,
+            start_date=start_date,
+            end_date=end_date,
+            limit=50000,
+            use_clean=use_clean,
+        )
+    if df is None or df.empty or not combos:
+        print("[WARN] Walk-forward has no data or no parameter combinations")
+        return {"windows": pd.DataFrame(), "trades": pd.DataFrame(), "equity": pd.DataFrame(), "stats": {}}
+
+    df = df.reset_index(drop=True)
+    windows = build_windows(df["timestamp"], train=train, test=test, step=step, anchored=anchored)
+    if warmup_bars is None:
+        warmup_bars = default_warmup_bars(param_grid, fixed_params)
+
+    base_kwargs = {
+        **fixed_params,
+        "exchange": exchange,
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "start_date": start_date,
+        "end_date": end_date,
+        "use_clean": use_clean,
+    }
+
+    # -----------------------------
+    # In-sample: all windows x combos in one pool
+    # -----------------------------
+    is_tasks = [(params, (w["is_start"], w["is_stop"]), False) for w in windows for params in combos]
+    is_outcomes = run_backtest_batch(strategy, df, is_tasks, base_kwargs, workers=workers)
+
+    winners = []
+    for w in windows:
+        offset = w["window"] * len(combos)
+        ranked = rank_results(strategy, combos, is_outcomes[offset:offset + len(combos)], rank_by, ascending)
+        usable = ranked[ranked["error"].isna()]
+        if rank_by in usable.columns:
+            usable = usable[usable[rank_by].notna()]
+        winners.append(None if usable.empty else usable.iloc[0])
+
+    # -----------------------------
+    # Out-of-sample: winners with warmup prepended, no entries before
+    # the OOS start bar
+    # -----------------------------
+    oos_windows = [(w, best) for w, best in zip(windows, winners) if best is not None]
+    oos_tasks = []
+    for w, best in oos_windows:
+        warmup_start = max(0, w["oos_start"] - int(warmup_bars))
+        oos_tasks.append(
+            (
+                {name: best[name] for name in param_grid},
+                (warmup_start, w["oos_stop"]),
+                True,
+                w["oos_start"] - warmup_start,
+            )
+        )
+    oos_outcomes = dict(
+        zip(
+            (w["window"] for w, _ in oos_windows),
+            run_backtest_batch(strategy, df, oos_tasks, base_kwargs, workers=workers),
+        )
+    )
+
+    window_rows = []
+    stitched = []
+    scored = []
+    for w, best in zip(windows, winners):
+        row = {
+            "window": w["window"],
+            "is_start": w["is_start_time"],
+            "is_end": w["is_end_time"],
+            "oos_start": w["oos_start_time"],
+            "oos_end": w["oos_end_time"],
+        }
+        if best is None:
+            row["note"] = "no IS result"
+            window_rows.append(row)
+            continue
+
+        for name in param_grid:
+            row[name] = best[name]
+        row[f"IS {rank_by}"] = best.get(rank_by)
+
+        _stats, error, trades = oos_outcomes[w["window"]]
+        oos_start = _utc(w["oos_start_time"])
+        kept = [t for t in trades if _utc(t["entry_time"]) >= oos_start]
+        for t in kept:
+            t["window"] = w["window"]
+        stitched.extend(kept)
+
+        for key in SUMMARY_STATS:
+            row[f"OOS {key}"] = 0 if key == "Total trades" else None
+        if kept:
+            scored.append((row, [t["net_pnl"] for t in kept]))
+        row["note"] = error or ("no OOS trades" if not kept else "")
+        window_rows.append(row)
+
+    # All windows' OOS stats in one batch
+    if scored:
+        oos_stats = trade_stats_batch([pnls for _, pnls in scored], initial_capital)
+        for (row, _), values in zip(scored, oos_stats[list(SUMMARY_STATS)].to_dict("records")):
+            for key in SUMMARY_STATS:
+                row[f"OOS {key}"] = values[key]
+
+    windows_df = pd.DataFrame(window_rows)
+    trades_df = pd.DataFrame(stitched)
+    equity_df = pd.DataFrame(columns=["exit_time", "equity"])
+    stats = {}
+    if not trades_df.empty:
+        trades_df["exit_time"] = pd.to_datetime(trades_df["exit_time"], utc=True)
+        trades_df["entry_time"] = pd.to_datetime(trades_df["entry_time"], utc=True)
+        trades_df = trades_df.sort_values("exit_time", kind="stable").reset_index(drop=True)
+        equity_df = pd.DataFrame(
+            {
+                "exit_time": trades_df["exit_time"],
+                "equity": initial_capital + trades_df["net_pnl"].cumsum(),
+            }
+        )
+        stats = trade_stats(trades_df["net_pnl"], initial_capital)
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        windows_df.to_csv(os.path.join(output_dir, "walk_forward_windows.csv"), index=False)
+        trades_df.to_csv(os.path.join(output_dir, "walk_forward_trades.csv"), index=False)
+        equity_df.to_csv(os.path.join(output_dir, "walk_forward_equity.csv"), index=False)
+        summary = {
+            "strategy": strategy,
+            "exchange": exchange,
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "train": str(train),
+            "test": str(test),
+            "step": str(step) if step is not None else None,
+            "anchored": anchored,
+            "warmup_bars": int(warmup_bars),
+            "rank_by": rank_by,
+            "windows": len(windows),
+            "combinations": len(combos),
+            "oos_stats": stats,
+        }
+        with open(os.path.join(output_dir, "walk_forward_summary.json"), "w") as f:
+            json.dump(summary, f, indent=2, default=str)
+
+    return {"windows": windows_df, "trades": trades_df, "equity": equity_df, "stats": stats}
@@ -0,0 +1,401 @@
+# src/core/backtester_portfolio.py
+
+"""
+Multi-symbol backtests against one shared pool of capital.
+
+align_frames() puts several fetch_ohlcv frames on the union of their
+timestamps as (bars, symbols) arrays. PortfolioBacktester.run() takes those
+arrays plus a matrix of VectorizedBacktester signal codes and trades every
+symbol with BacktesterV2's spot rules (slippage, percentage fees, stop /
+take profit filled at the level), one position per symbol:
+
+- Entries are sized from the shared cash (realized equity): position_pct of
+  it per entry (default an equal share per symbol), capped per symbol by
+  max_asset_pct and by the capital not already committed to open positions.
+  At most max_positions positions are open at once.
+- On a bar, stop / take-profit fills come first, then exits and reversals,
+  then entries in symbol order, so capital freed on a bar is reused on it.
+
+A position's stop and target are fixed at entry, so the bar it would be
+stopped out on only depends on its own symbol: it is found once, with one
+NumPy scan of that symbol's bars up to its next closing signal, and queued.
+The run then walks the signal bars and the queued exits in time order with
+plain Python numbers; cost follows the number of events, not bars x symbols.
+"""
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from src.core.backtester_v2 import BacktesterV2, Lot
+from src.core.backtester_vectorized import (
+    SIGNAL_EXIT,
+    SIGNAL_EXIT_LONG,
+    SIGNAL_EXIT_SHORT,
+    SIGNAL_LONG,
+    SIGNAL_SHORT,
+)
+from src.core.performance import performance_stats, performance_stats_batch, span_years
+from src.core.trade_ledger import TradeLedger
+
+OHLC_COLUMNS = ("open", "high", "low", "close")
+
+# Codes that close an open LONG / SHORT (SHORT only closes a LONG when shorts are allowed)
+CLOSES_LONG = (SIGNAL_EXIT, SIGNAL_EXIT_LONG, SIGNAL_SHORT)
+CLOSES_SHORT = (SIGNAL_EXIT, SIGNAL_EXIT_SHORT, SIGNAL_LONG)
+
+
+# -------------------------------------------------
+# ALIGNMENT
+# -------------------------------------------------
+def align_frames(frames):
+    """
+    {symbol: OHLCV frame} -> (timestamps, symbols, {column: (bars, symbols) array}).
+
+    timestamps is the sorted union of every frame's timestamps; bars a
+    symbol does not have are NaN, so they never trigger stops or signals.
+    The "rows" entry maps each symbol's own rows to rows of the union.
+    """
+    symbols = list(frames)
+    timestamps = pd.Index(
+        np.concatenate([frames[symbol]["timestamp"].to_numpy() for symbol in symbols])
+    ).unique().sort_values()
+
+    arrays = {column: np.full((len(timestamps), len(symbols)), np.nan) for column in OHLC_COLUMNS}
+    rows = {}
+    for col, symbol in enumerate(symbols):
+        frame = frames[symbol]
+        rows[symbol] = timestamps.get_indexer(frame["timestamp"])
+        for column in OHLC_COLUMNS:
+            arrays[column][rows[symbol], col] = frame[column].to_numpy(dtype=float)
+    arrays["rows"] = rows
+    return timestamps, symbols, arrays
+
+
+# -------------------------------------------------
+# ENGINE
+# -------------------------------------------------
+class PortfolioBacktester:
+    def __init__(
+        self,
+        symbols,
+        initial_capital=10_000.0,
+        position_pct=None,          # share of cash per entry (None: 1 / len(symbols))
+        max_asset_pct=None,         # cap per symbol, share of cash
+        max_positions=None,         # open positions at once (None: no limit)
+        commission_pct=0.001,
+        slippage_pct=0.01,
+        allow_short=True,
+        stop_loss_pct=0.02,
+        take_profit_pct=None,
+    ):
+        self.symbols = list(symbols)
+        self.initial_capital = initial_capital
+        self.cash = initial_capital
+        self.position_pct = position_pct if position_pct is not None else 1.0 / max(len(self.symbols), 1)
+        self.max_asset_pct = max_asset_pct
+        self.max_positions = max_positions
+        self.commission_pct = commission_pct
+        self.slippage_pct = slippage_pct
+        self.allow_short = allow_short
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+
+        self.positions = {}         # symbol column -> open Lot
+        self.committed = 0.0        # position_size of the open lots
+        self.trades = TradeLedger()
+        self.trade_symbols = []     # symbol column of each ledger row
+        self.equity_curve = [initial_capital]
+        self.bar_equity = None
+        self.bar_years = None
+
+    # -------------------------------------------------
+    # RUN
+    # -------------------------------------------------
+    def run(self, timestamps, high, low, close, signals, triggers=None, start=0):
+        """
+        high / low / close / signals / triggers are (bars, symbols) arrays on
+        the timestamps index (see align_frames); signals hold
+        VectorizedBacktester codes for the bar they are executed on.
+        """
+        close = np.asarray(close, dtype=float)
+        signals = np.asarray(signals, dtype=np.int8)
+        timestamps = pd.Index(timestamps)
+
+        n = len(timestamps)
+        shape = (n, len(self.symbols))
+        if not (np.shape(high) == np.shape(low) == close.shape == signals.shape == shape):
+            raise ValueError("OHLC and signals must be (len(timestamps), len(symbols)) arrays")
+
+        start = max(int(start), 0)
+        signals = np.where(np.isnan(close), 0, signals)     # no candle for the symbol on that bar
+        signals[:start] = 0
+
+        # Per symbol, contiguous bars for the stop scans and the rows of closing signals
+        self._high = np.ascontiguousarray(np.asarray(high, dtype=float).T)
+        self._low = np.ascontiguousarray(np.asarray(low, dtype=float).T)
+        closes_short = np.isin(signals, CLOSES_SHORT)
+        closes_long = np.isin(signals, CLOSES_LONG if self.allow_short else CLOSES_LONG[:2])
+        self._closing_rows = {
+            "LONG": [np.flatnonzero(closes_long[:, col]) for col in range(shape[1])],
+            "SHORT": [np.flatnonzero(closes_short[:, col]) for col in range(shape[1])],
+        }
+        self._n = n
+        self._exits = []            # heap of (bar, symbol column, Lot) stop / target fills
+
+        # Signal bars with their (column, code) pairs, row-major
+        rows, cols = np.nonzero(signals)
+        codes = signals[rows, cols].tolist()
+        prices = close[rows, cols].tolist()
+        labels = np.asarray(triggers, dtype=object)[rows, cols].tolist() if triggers is not None else [None] * len(rows)
+        bars = np.flatnonzero(np.diff(rows, prepend=-1)) if len(rows) else np.empty(0, dtype=np.intp)
+        bounds = np.append(bars, len(rows)).tolist()
+        event_rows = rows[bars].tolist()
+        stamps = timestamps[rows[bars]].tolist()
+        cols = cols.tolist()
+
+        exits = self._exits
+        for e, row in enumerate(event_rows):
+            while exits and exits[0][0] <= row:
+                self._fill_exits(exits[0][0], timestamps)
+            a, b = bounds[e], bounds[e + 1]
+            self._on_signals(row, stamps[e], cols[a:b], codes[a:b], prices[a:b], labels[a:b])
+        while exits:
+            self._fill_exits(exits[0][0], timestamps)
+
+        self.mark_to_market(close, timestamps)
+        return self
+
+    # -------------------------------------------------
+    # STOPS
+    # -------------------------------------------------
+    def _queue_exit(self, col, lot):
+        """Find the bar where lot's stop / target fills before its next closing signal, if any."""
+        if lot.stop_price is None and lot.take_profit_price is None:
+            return
+        first = lot.entry_index + 1
+        closing = self._closing_rows[lot.side][col]
+        pos = np.searchsorted(closing, first, side="left")
+        last = int(closing[pos]) if pos < len(closing) else self._n - 1
+        if last < first:
+            return
+
+        high = self._high[col, first:last + 1]
+        low = self._low[col, first:last + 1]
+        # NaN bars (no candle for the symbol) never compare true
+        if lot.side == "LONG":
+            stop_hit = low <= lot.stop_price if lot.stop_price is not None else np.zeros(len(low), dtype=bool)
+            target_hit = high >= lot.take_profit_price if lot.take_profit_price is not None else stop_hit
+        else:
+            stop_hit = high >= lot.stop_price if lot.stop_price is not None else np.zeros(len(high), dtype=bool)
+            target_hit = low <= lot.take_profit_price if lot.take_profit_price is not None else stop_hit
+        hit = stop_hit | target_hit
+        k = int(hit.argmax())
+        if hit[k]:
+            heapq.heappush(self._exits, (first + k, col, bool(stop_hit[k]), lot))
+
+    def _fill_exits(self, row, timestamps):
+        """Close every position whose queued stop / target fills on bar row (symbol order)."""
+        timestamp = timestamps[row]
+        while self._exits and self._exits[0][0] == row:
+            _, col, on_stop, lot = heapq.heappop(self._exits)
+            if self.positions.get(col) is not lot:
+                continue        # closed by a signal first
+            if on_stop:
+                self._close(col, lot.stop_price, row, timestamp, "stop_loss")
+            else:
+                self._close(col, lot.take_profit_price, row, timestamp, "take_profit")
+
+    # -------------------------------------------------
+    # SIGNALS
+    # -------------------------------------------------
+    def _on_signals(self, row, timestamp, cols, codes, prices, triggers):
+        positions = self.positions
+        entries = []
+        for col, code, price, trigger in zip(cols, codes, prices, triggers):
+            lot = positions.get(col)
+            if code == SIGNAL_LONG or (code == SIGNAL_SHORT and self.allow_short):
+                side = "LONG" if code == SIGNAL_LONG else "SHORT"
+                if lot is not None and lot.side != side:
+                    self._close(col, price, row, timestamp, trigger)
+                    lot = None
+                if lot is None:
+                    entries.append((col, side, price, trigger))
+            elif lot is not None and (
+                code == SIGNAL_EXIT
+                or (code == SIGNAL_EXIT_LONG and lot.side == "LONG")
+                or (code == SIGNAL_EXIT_SHORT and lot.side == "SHORT")
+            ):
+                self._close(col, price, row, timestamp, trigger)
+
+        for col, side, price, trigger in entries:
+            self._open(col, side, price, row, timestamp, trigger)
+
+    # -------------------------------------------------
+    # FILLS
+    # -------------------------------------------------
+    def _open(self, col, side, price, bar_index, timestamp, trigger):
+        positions = self.positions
+        if self.max_positions is not None and len(positions) >= self.max_positions:
+            return
+
+        position_size = self.cash * self.position_pct
+        if self.max_asset_pct is not None:
+            position_size = min(position_size, self.cash * self.max_asset_pct)
+        position_size = min(position_size, self.cash - self.committed)
+        if position_size <= 0:
+            return
+
+        if side == "LONG":
+            entry_price = price * (1 + self.slippage_pct)
+            stop_price = entry_price * (1 - self.stop_loss_pct) if self.stop_loss_pct is not None else None
+            take_profit_price = entry_price * (1 + self.take_profit_pct) if self.take_profit_pct is not None else None
+        else:
+            entry_price = price * (1 - self.slippage_pct)
+            stop_price = entry_price * (1 + self.stop_loss_pct) if self.stop_loss_pct is not None else None
+            take_profit_price = entry_price * (1 - self.take_profit_pct) if self.take_profit_pct is not None else None
+
+        commission_entry = position_size * self.commission_pct
+        self.cash -= commission_entry
+
+        lot = Lot(
+            side=side,
+            entry_price=entry_price,
+            entry_time=timestamp,
+            entry_trigger=BacktesterV2._normalize_trigger(trigger, f"{side.lower()}_entry_signal"),
+            entry_index=bar_index,
+            position_size=position_size,
+            qty=position_size / entry_price,
+            commission_entry=commission_entry,
+            stop_price=stop_price,
+            take_profit_price=take_profit_price,
+            pyramid_level=1,
+        )
+        positions[col] = lot
+        self.committed += position_size
+        self._queue_exit(col, lot)
+
+    def _close(self, col, price, bar_index, timestamp, trigger):
+        lot = self.positions.pop(col)
+        self.committed = self.committed - lot.position_size if self.positions else 0.0
+        side = lot.side
+        if side == "LONG":
+            exit_price = price * (1 - self.slippage_pct)
+            gross_pnl = (exit_price - lot.entry_price) * lot.qty
+        else:
+            exit_price = price * (1 + self.slippage_pct)
+            gross_pnl = (lot.entry_price - exit_price) * lot.qty
+        commission_exit = (lot.position_size + gross_pnl) * self.commission_pct
+        total_commission = lot.commission_entry + commission_exit
+        net_pnl = gross_pnl - total_commission
+
+        self.cash += gross_pnl - commission_exit
+        self.equity_curve.append(self.cash)
+
+        self.trades.record(
+            entry_time=lot.entry_time,
+            exit_time=timestamp,
+            side=side,
+            entry_price=float(lot.entry_price),
+            exit_price=float(exit_price),
+            position_size=float(lot.position_size),
+            qty=float(lot.qty),
+            gross_pnl=float(gross_pnl),
+            commission_paid=float(total_commission),
+            net_pnl=float(net_pnl),
+            result="WIN" if net_pnl > 0 else "LOSS",
+            entry_trigger=lot.entry_trigger,
+            exit_trigger=BacktesterV2._normalize_trigger(trigger, f"{side.lower()}_exit_signal"),
+            bars_in_trade=bar_index - lot.entry_index,
+            stop_price=lot.stop_price,
+            take_profit_price=lot.take_profit_price,
+            cash_after_trade=float(self.cash),
+            pyramid_level=1,
+            entry_index=lot.entry_index,
+            commission_entry=float(lot.commission_entry),
+        )
+        self.trade_symbols.append(col)
+
+    # -------------------------------------------------
+    # MARK TO MARKET
+    # -------------------------------------------------
+    def mark_to_market(self, close, timestamps=None):
+        """
+        Portfolio equity per bar: cash plus the open PnL of every position at
+        the symbol's last known close (forward-filled over bars it lacks).
+        Same cumulative-sum construction as BacktesterV2.mark_to_market().
+        """
+        close = pd.DataFrame(np.asarray(close, dtype=float)).ffill().fillna(0.0).to_numpy()
+        n = len(close)
+        trades = self.trades
+        open_cols = list(self.positions)
+        lots = list(self.positions.values())
+
+        symbol = np.array(self.trade_symbols + open_cols, dtype=np.int64)
+        entry_index = np.concatenate(
+            [trades.column("entry_index"), np.array([lot.entry_index for lot in lots], dtype=np.int64)]
+        )
+        exit_index = np.concatenate(
+            [trades.column("entry_index") + trades.column("bars_in_trade"), np.full(len(lots), n, dtype=np.int64)]
+        )
+        side = np.concatenate([trades.column("side"), np.array([lot.side for lot in lots], dtype=object)])
+        qty = np.concatenate([trades.column("qty"), np.array([lot.qty for lot in lots], dtype=np.float64)])
+        exposure = np.where(side == "LONG", 1.0, -1.0) * qty
+        entry_price = np.concatenate(
+            [trades.column("entry_price"), np.array([lot.entry_price for lot in lots], dtype=np.float64)]
+        )
+        commission_entry = np.concatenate(
+            [trades.column("commission_entry"), np.array([lot.commission_entry for lot in lots], dtype=np.float64)]
+        )
+
+        flows = np.zeros(n + 1)
+        np.add.at(flows, entry_index, -commission_entry)
+        closed = len(trades)
+        realized = trades.column("gross_pnl") - (trades.column("commission_paid") - commission_entry[:closed])
+        np.add.at(flows, exit_index[:closed], realized)
+        cash = self.initial_capital + np.cumsum(flows[:n])
+
+        open_count = np.zeros(n + 1, dtype=np.int64)
+        open_exposure = np.zeros((n + 1, len(self.symbols)))
+        open_cost = np.zeros(n + 1)
+        for index, step in ((entry_index, 1), (exit_index, -1)):
+            np.add.at(open_count, index, step)
+            np.add.at(open_exposure, (index, symbol), step * exposure)
+            np.add.at(open_cost, index, step * exposure * entry_price)
+        open_pnl = np.einsum("ij,ij->i", close, np.cumsum(open_exposure[:n], axis=0)) - np.cumsum(open_cost[:n])
+        open_pnl[np.cumsum(open_count[:n]) == 0] = 0.0
+
+        self.bar_equity = cash + open_pnl
+        self.bar_years = span_years(timestamps)
+        return self.bar_equity
+
+    # -------------------------------------------------
+    # RESULTS
+    # -------------------------------------------------
+    def trades_frame(self):
+        """Ledger frame with a leading symbol column."""
+        frame = self.trades.to_frame()
+        frame.insert(0, "symbol", np.asarray(self.symbols, dtype=object)[np.asarray(self.trade_symbols, dtype=np.int64)])
+        return frame
+
+    def stats(self):
+        """Portfolio stats (src.core.performance.STAT_KEYS) over every symbol's trades."""
+        if not self.trades:
+            return {}
+        return performance_stats(
+            self.trades.column("net_pnl"),
+            self.equity_curve,
+            bar_equity=self.bar_equity,
+            years=self.bar_years,
+        )
+
+    def symbol_stats(self):
+        """One stats row per symbol (trade PnLs on top of initial_capital), in one batch."""
+        by_symbol = np.asarray(self.trade_symbols, dtype=np.int64)
+        net_pnl = self.trades.column("net_pnl")
+        pnls = [net_pnl[by_symbol == col] for col in range(len(self.symbols))]
+        curves = [np.concatenate([[self.initial_capital], self.initial_capital + np.cumsum(p)]) for p in pnls]
+        frame = performance_stats_batch(pnls, curves)
+        frame.index = pd.Index(self.symbols, name="symbol")
+        return frame
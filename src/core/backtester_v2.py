@@ -1,7 +1,48 @@
 import numpy as np
 
+from src.core.performance import performance_stats, span_years
+from src.core.trade_ledger import TradeLedger
+
+
+class Lot:
+    """One entry of the open position (several when pyramiding)."""
+
+    __slots__ = (
+        "side", "entry_price", "entry_time", "entry_trigger", "entry_index", "position_size",
+        "qty", "commission_entry", "stop_price", "take_profit_price", "pyramid_level",
+    )
+
+    def __init__(self, side, entry_price, entry_time, entry_trigger, entry_index, position_size,
+                 qty, commission_entry, stop_price, take_profit_price, pyramid_level):
+        self.side = side
+        self.entry_price = entry_price
+        self.entry_time = entry_time
+        self.entry_trigger = entry_trigger
+        self.entry_index = entry_index
+        self.position_size = position_size
+        self.qty = qty
+        self.commission_entry = commission_entry
+        self.stop_price = stop_price
+        self.take_profit_price = take_profit_price
+        self.pyramid_level = pyramid_level
+
+
+class Position:
+    """Side and the stop / target shared by every open lot."""
+
+    __slots__ = ("side", "stop_price", "take_profit_price")
+
+    def __init__(self, side, stop_price, take_profit_price):
+        self.side = side
+        self.stop_price = stop_price
+        self.take_profit_price = take_profit_price
+
 
 class BacktesterV2:
+    # Signals on bars before this index open no trade (walk-forward OOS runs
+    # prepend warmup bars that must not trade).
+    entry_start = 0
+
     def __init__(
         self,
         initial_capital=1000.0,
@@ -45,8 +86,10 @@ class BacktesterV2:
 
         self.position = None
         self.lots = []
-        self.trades = []
+        self.trades = TradeLedger()
         self.equity_curve = [initial_capital]
+        self.bar_equity = None
+        self.bar_years = None
 
     @staticmethod
     def _normalize_trigger(trigger, fallback):
@@ -146,56 +189,45 @@ class BacktesterV2:
             commission_entry = position_size * self.commission_pct
             self.cash -= commission_entry
 
-        if self.position is None:
-            self.position = {
-                "side": side,
-                "stop_price": self.stop_price,
-                "take_profit_price": self.take_profit_price,
-            }
+        position = self.position
+        if position is None:
+            self.position = Position(side, self.stop_price, self.take_profit_price)
         else:
             if side == "LONG" and self.stop_price is not None:
-                if self.position["stop_price"] is None:
-                    self.position["stop_price"] = self.stop_price
+                if position.stop_price is None:
+                    position.stop_price = self.stop_price
                 else:
-                    self.position["stop_price"] = max(
-                        self.position["stop_price"],
-                        self.stop_price,
-                    )
+                    position.stop_price = max(position.stop_price, self.stop_price)
             elif side == "SHORT" and self.stop_price is not None:
-                if self.position["stop_price"] is None:
-                    self.position["stop_price"] = self.stop_price
+                if position.stop_price is None:
+                    position.stop_price = self.stop_price
                 else:
-                    self.position["stop_price"] = min(
-                        self.position["stop_price"],
-                        self.stop_price,
-                    )
-
-            if self.position["take_profit_price"] is None:
-                self.position["take_profit_price"] = self.take_profit_price
-
-        pyramid_level = len(self.lots) + 1
-        lot = {
-            "side": side,
-            "entry_price": entry_price,
-            "entry_time": timestamp,
-            "entry_trigger": entry_trigger,
-            "entry_index": bar_index,
-            "position_size": position_size,
-            "qty": qty,
-            "commission_entry": commission_entry,
-            "stop_price": self.stop_price,
-            "take_profit_price": self.take_profit_price,
-            "pyramid_level": pyramid_level,
-        }
-        self.lots.append(lot)
+                    position.stop_price = min(position.stop_price, self.stop_price)
+
+            if position.take_profit_price is None:
+                position.take_profit_price = self.take_profit_price
+
+        self.lots.append(Lot(
+            side=side,
+            entry_price=entry_price,
+            entry_time=timestamp,
+            entry_trigger=entry_trigger,
+            entry_index=bar_index,
+            position_size=position_size,
+            qty=qty,
+            commission_entry=commission_entry,
+            stop_price=self.stop_price,
+            take_profit_price=self.take_profit_price,
+            pyramid_level=len(self.lots) + 1,
+        ))
 
     def average_entry_price(self):
         if not self.lots:
             return None
-        total_qty = sum(lot["qty"] for lot in self.lots)
+        total_qty = sum(lot.qty for lot in self.lots)
         if total_qty == 0:
             return None
-        weighted = sum(lot["qty"] * lot["entry_price"] for lot in self.lots)
+        weighted = sum(lot.qty * lot.entry_price for lot in self.lots)
         return weighted / total_qty
 
     def update_stop_from_avg(self, atr_value):
@@ -204,17 +236,17 @@ class BacktesterV2:
         avg_price = self.average_entry_price()
         if avg_price is None:
             return
-        side = self.position["side"]
+        side = self.position.side
         if side == "LONG":
             sl_mult = self.atr_sl_mult_long if self.atr_sl_mult_long is not None else self.atr_sl_mult
             if sl_mult is None:
                 return
-            self.position["stop_price"] = avg_price - atr_value * sl_mult
+            self.position.stop_price = avg_price - atr_value * sl_mult
         elif side == "SHORT":
             sl_mult = self.atr_sl_mult_short if self.atr_sl_mult_short is not None else self.atr_sl_mult
             if sl_mult is None:
                 return
-            self.position["stop_price"] = avg_price + atr_value * sl_mult
+            self.position.stop_price = avg_price + atr_value * sl_mult
 
     # -------------------------------------------------
     # CLOSE TRADE
@@ -223,7 +255,8 @@ class BacktesterV2:
         if not self.lots:
             return
 
-        side = self.position["side"]
+        position = self.position
+        side = position.side
         exit_trigger = self._normalize_trigger(trigger, f"{side.lower()}_exit_signal")
 
         if side == "LONG":
@@ -232,9 +265,9 @@ class BacktesterV2:
             exit_price = price * (1 + self.slippage_pct)
 
         for lot in self.lots:
-            entry_price = lot["entry_price"]
-            qty = lot["qty"]
-            position_size = lot["position_size"]
+            entry_price = lot.entry_price
+            qty = lot.qty
+            position_size = lot.position_size
 
             if self.pnl_mode == "futures":
                 if side == "LONG":
@@ -254,33 +287,35 @@ class BacktesterV2:
                     gross_pnl = (entry_price - exit_price) * qty
                 commission_exit = (position_size + gross_pnl) * self.commission_pct
 
-            total_commission = lot["commission_entry"] + commission_exit
+            total_commission = lot.commission_entry + commission_exit
             net_pnl = gross_pnl - total_commission
-            bars_in_trade = bar_index - lot["entry_index"]
+            bars_in_trade = bar_index - lot.entry_index
 
             self.cash += gross_pnl - commission_exit
             self.equity_curve.append(self.cash)
 
-            self.trades.append({
-                "entry_time": lot["entry_time"],
-                "exit_time": timestamp,
-                "side": side,
-                "entry_price": float(entry_price),
-                "exit_price": float(exit_price),
-                "position_size": float(position_size),
-                "qty": float(qty),
-                "gross_pnl": float(gross_pnl),
-                "commission_paid": float(total_commission),
-                "net_pnl": float(net_pnl),
-                "result": "WIN" if net_pnl > 0 else "LOSS",
-                "entry_trigger": lot["entry_trigger"],
-                "exit_trigger": exit_trigger,
-                "bars_in_trade": bars_in_trade,
-                "stop_price": self.position["stop_price"],
-                "take_profit_price": self.position["take_profit_price"],
-                "cash_after_trade": float(self.cash),
-                "pyramid_level": lot["pyramid_level"],
-            })
+            self.trades.record(
+                entry_time=lot.entry_time,
+                exit_time=timestamp,
+                side=side,
+                entry_price=float(entry_price),
+                exit_price=float(exit_price),
+                position_size=float(position_size),
+                qty=float(qty),
+                gross_pnl=float(gross_pnl),
+                commission_paid=float(total_commission),
+                net_pnl=float(net_pnl),
+                result="WIN" if net_pnl > 0 else "LOSS",
+                entry_trigger=lot.entry_trigger,
+                exit_trigger=exit_trigger,
+                bars_in_trade=bars_in_trade,
+                stop_price=position.stop_price,
+                take_profit_price=position.take_profit_price,
+                cash_after_trade=float(self.cash),
+                pyramid_level=lot.pyramid_level,
+                entry_index=lot.entry_index,
+                commission_entry=float(lot.commission_entry),
+            )
 
         self.position = None
         self.lots = []
@@ -290,6 +325,12 @@ class BacktesterV2:
     # -------------------------------------------------
     def on_signal(self, signal, price, timestamp, trigger=None, bar_index=None, atr_value=None):
 
+        if signal is None:
+            return
+
+        if signal in ("LONG", "SHORT") and bar_index is not None and bar_index < self.entry_start:
+            return
+
         if signal == "LONG":
 
             if self.position is None:
@@ -302,7 +343,7 @@ class BacktesterV2:
                     atr_value=atr_value,
                 )
 
-            elif self.position["side"] == "SHORT":
+            elif self.position.side == "SHORT":
                 self._close_trade(price, timestamp, trigger, bar_index)
                 self._open_trade(
                     side="LONG",
@@ -312,7 +353,7 @@ class BacktesterV2:
                     bar_index=bar_index,
                     atr_value=atr_value,
                 )
-            elif self.position["side"] == "LONG":
+            elif self.position.side == "LONG":
                 if len(self.lots) < self.pyramiding:
                     self._open_trade(
                         side="LONG",
@@ -338,7 +379,7 @@ class BacktesterV2:
                     atr_value=atr_value,
                 )
 
-            elif self.position["side"] == "LONG":
+            elif self.position.side == "LONG":
                 self._close_trade(price, timestamp, trigger, bar_index)
                 self._open_trade(
                     side="SHORT",
@@ -348,7 +389,7 @@ class BacktesterV2:
                     bar_index=bar_index,
                     atr_value=atr_value,
                 )
-            elif self.position["side"] == "SHORT":
+            elif self.position.side == "SHORT":
                 if len(self.lots) < self.pyramiding:
                     self._open_trade(
                         side="SHORT",
@@ -374,15 +415,15 @@ class BacktesterV2:
     # -------------------------------------------------
     def on_bar(self, high, low, timestamp, bar_index):
 
-        if self.position is None:
+        position = self.position
+        if position is None:
             return
 
-        side = self.position["side"]
-        stop_price = self.position["stop_price"]
-        take_profit_price = self.position["take_profit_price"]
+        stop_price = position.stop_price
+        take_profit_price = position.take_profit_price
 
         # LONG
-        if side == "LONG":
+        if position.side == "LONG":
             if stop_price is not None and low <= stop_price:
                 self._close_trade(
                     price=stop_price,
@@ -402,7 +443,7 @@ class BacktesterV2:
                 return
 
         # SHORT
-        if side == "SHORT":
+        elif position.side == "SHORT":
             if stop_price is not None and high >= stop_price:
                 self._close_trade(
                     price=stop_price,
@@ -422,61 +463,82 @@ class BacktesterV2:
                 return
 
     # -------------------------------------------------
-    # STATS (compatible)
+    # MARK TO MARKET
     # -------------------------------------------------
-    def stats(self):
-
-        if not self.trades:
-            return {}
-
-        net_pnls = np.array([t["net_pnl"] for t in self.trades])
-
-        wins = net_pnls[net_pnls > 0]
-        losses = net_pnls[net_pnls < 0]
-
-        total_trades = len(net_pnls)
-        total_net_profit = float(net_pnls.sum())
-
-        profit_factor = (
-            wins.sum() / abs(losses.sum())
-            if len(losses) > 0 else np.inf
+    def mark_to_market(self, close, timestamps=None):
+        """
+        Per-bar equity: cash plus the open PnL of every lot at each bar's
+        close, for the bars the run was driven with (bar_index = position in
+        `close`). Built from the trade ledger and the open lots with
+        cumulative sums, no loop over bars. Stored in self.bar_equity.
+
+        timestamps (the bars' datetimes) give the run's span in years,
+        which stats() uses to annualize Sharpe/Sortino and for CAGR.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        n = len(close)
+        trades = self.trades
+        lots = self.lots
+
+        entry_index = np.concatenate(
+            [trades.column("entry_index"), np.array([lot.entry_index for lot in lots], dtype=np.int64)]
         )
+        exit_index = np.concatenate(
+            [trades.column("entry_index") + trades.column("bars_in_trade"), np.full(len(lots), n, dtype=np.int64)]
+        )
+        if len(entry_index) and (entry_index.min() < 0 or exit_index.max() > n):
+            raise ValueError("Trades reference bars outside the close array")
 
-        avg_win = float(wins.mean()) if len(wins) > 0 else 0.0
-        avg_loss = float(losses.mean()) if len(losses) > 0 else 0.0
-
-        win_rate = len(wins) / total_trades
-        loss_rate = len(losses) / total_trades
-
-        tharp_expectancy = (
-            (avg_win * win_rate + avg_loss * loss_rate)
-            / abs(avg_loss) if avg_loss != 0 else np.nan
+        side = np.concatenate([trades.column("side"), np.array([lot.side for lot in lots], dtype=object)])
+        qty = np.concatenate([trades.column("qty"), np.array([lot.qty for lot in lots], dtype=np.float64)])
+        entry_price = np.concatenate(
+            [trades.column("entry_price"), np.array([lot.entry_price for lot in lots], dtype=np.float64)]
+        )
+        commission_entry = np.concatenate(
+            [trades.column("commission_entry"), np.array([lot.commission_entry for lot in lots], dtype=np.float64)]
         )
 
-        equity = np.array(self.equity_curve)
-        peaks = np.maximum.accumulate(equity)
-        drawdowns = (equity - peaks) / peaks
+        multiplier = self.contract_multiplier if self.pnl_mode == "futures" else 1.0
+        exposure = np.where(side == "LONG", 1.0, -1.0) * qty * multiplier
+
+        # Cash: entry fees on the entry bar, gross PnL less the exit fee on the exit bar.
+        flows = np.zeros(n + 1)
+        np.add.at(flows, entry_index, -commission_entry)
+        closed = len(trades)
+        realized = trades.column("gross_pnl") - (trades.column("commission_paid") - commission_entry[:closed])
+        np.add.at(flows, exit_index[:closed], realized)
+        cash = self.initial_capital + np.cumsum(flows[:n])
+
+        # Open PnL: lots count from their entry bar up to (not including) their exit bar.
+        open_lots = np.zeros(n + 1, dtype=np.int64)
+        open_exposure = np.zeros(n + 1)
+        open_cost = np.zeros(n + 1)
+        for index, sign in ((entry_index, 1), (exit_index, -1)):
+            np.add.at(open_lots, index, sign)
+            np.add.at(open_exposure, index, sign * exposure)
+            np.add.at(open_cost, index, sign * exposure * entry_price)
+        open_pnl = close * np.cumsum(open_exposure[:n]) - np.cumsum(open_cost[:n])
+        open_pnl[np.cumsum(open_lots[:n]) == 0] = 0.0
+
+        self.bar_equity = cash + open_pnl
+        self.bar_years = span_years(timestamps)
+        return self.bar_equity
 
-        if len(equity) > 1:
-            x = np.arange(len(equity))
-            equity_slope = np.polyfit(x, equity, 1)[0]
-        else:
-            equity_slope = 0.0
+    # -------------------------------------------------
+    # STATS (compatible)
+    # -------------------------------------------------
+    def stats(self):
+        """
+        Trade and equity statistics (src.core.performance.STAT_KEYS); the
+        drawdown family is taken on the per-bar equity when the run marked
+        it to market, trade-close points miss the excursions of open trades.
+        """
+        if not self.trades:
+            return {}
 
-        if len(net_pnls) > 1:
-            x = np.arange(len(net_pnls))
-            trade_pnl_slope = np.polyfit(x, net_pnls, 1)[0]
-        else:
-            trade_pnl_slope = 0.0
-
-        return {
-            "Total trades": total_trades,
-            "Total Net Profit": total_net_profit,
-            "Profit Factor": profit_factor,
-            "Avg Trade Net Profit": avg_win,
-            "Avg Trade Net Loss": avg_loss,
-            "Tharp Expectancy": float(tharp_expectancy),
-            "Max Drawdown (%)": float(drawdowns.min() * 100),
-            "Equity Curve Slope": float(equity_slope),
-            "Trade Net Profit Slope": float(trade_pnl_slope),
-        }
+        return performance_stats(
+            self.trades.column("net_pnl"),
+            self.equity_curve,
+            bar_equity=self.bar_equity,
+            years=self.bar_years,
+        )
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+from src.core.backtester_v2 import BacktesterV2
+
+
+# -------------------------------------------------
+# SIGNAL CODES
+# -------------------------------------------------
+SIGNAL_NONE = 0
+SIGNAL_LONG = 1
+SIGNAL_SHORT = -1
+SIGNAL_EXIT = 2          # exit whatever side is open
+SIGNAL_EXIT_LONG = 3     # exit only if the open side is LONG
+SIGNAL_EXIT_SHORT = 4    # exit only if the open side is SHORT
+
+
+class VectorizedBacktester(BacktesterV2):
+    """
+    Array-driven counterpart of BacktesterV2.
+
+    Takes precomputed signal codes plus OHLC NumPy arrays and only touches
+    Python on bars where something can happen (an actionable signal or the
+    first stop/take-profit hit of the open position). Fills, fees, trades,
+    equity_curve and stats() are shared with BacktesterV2, so results are
+    identical to the bar-by-bar loop:
+
+        for i in range(start, n):
+            bt.on_bar(high[i], low[i], timestamp[i], i)
+            bt.on_signal(<signal for side>, close[i], timestamp[i], trigger[i], i, atr[i])
+    """
+
+    def run(
+        self,
+        timestamps,
+        high,
+        low,
+        close,
+        signals,
+        triggers=None,
+        atr=None,
+        start=0,
+    ):
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        close = np.asarray(close, dtype=float)
+        signals = np.asarray(signals, dtype=np.int8)
+        atr = np.asarray(atr, dtype=float) if atr is not None else None
+        triggers = np.asarray(triggers, dtype=object) if triggers is not None else None
+        timestamps = pd.Index(timestamps)
+
+        n = len(close)
+        if not (len(high) == len(low) == len(signals) == len(timestamps) == n):
+            raise ValueError("timestamps, OHLC and signals must have the same length")
+
+        # Without entries before entry_start there is nothing to act on earlier.
+        start = max(int(start), int(self.entry_start), 0)
+
+        def _events(mask):
+            idx = np.flatnonzero(mask)
+            return idx[idx >= start]
+
+        long_idx = _events(signals == SIGNAL_LONG)
+        short_idx = _events(signals == SIGNAL_SHORT) if self.allow_short else np.empty(0, dtype=np.intp)
+        exit_idx = _events(signals == SIGNAL_EXIT)
+        exit_long_idx = _events(signals == SIGNAL_EXIT_LONG)
+        exit_short_idx = _events(signals == SIGNAL_EXIT_SHORT)
+
+        def _next(events, after):
+            pos = np.searchsorted(events, after, side="left")
+            return int(events[pos]) if pos < len(events) else n
+
+        i = start
+        while i < n:
+            # -----------------------------
+            # Next bar where a signal can act
+            # -----------------------------
+            if self.position is None:
+                j = min(_next(long_idx, i), _next(short_idx, i))
+            else:
+                side = self.position.side
+                can_add = len(self.lots) < self.pyramiding
+                if side == "LONG":
+                    j = min(
+                        _next(long_idx, i) if can_add else n,
+                        _next(short_idx, i),
+                        _next(exit_idx, i),
+                        _next(exit_long_idx, i),
+                    )
+                else:
+                    j = min(
+                        _next(short_idx, i) if can_add else n,
+                        _next(long_idx, i),
+                        _next(exit_idx, i),
+                        _next(exit_short_idx, i),
+                    )
+
+            # -----------------------------
+            # Stop / take profit before j (inclusive, on_bar runs first)
+            # -----------------------------
+            if self.position is not None:
+                k = self._first_exit_bar(high, low, i, min(j, n - 1))
+                if k is not None:
+                    self.on_bar(high[k], low[k], timestamps[k], k)
+                    i = k
+                    continue
+
+            if j >= n:
+                break
+
+            self.on_signal(
+                self._resolve_signal(signals[j]),
+                close[j],
+                timestamps[j],
+                triggers[j] if triggers is not None else None,
+                j,
+                atr_value=self._atr_at(atr, j),
+            )
+            i = j + 1
+
+        self.mark_to_market(close, timestamps)
+        return self
+
+    # -------------------------------------------------
+    # HELPERS
+    # -------------------------------------------------
+    def _resolve_signal(self, code):
+        if code == SIGNAL_LONG:
+            return "LONG"
+        if code == SIGNAL_SHORT:
+            return "SHORT"
+        if code == SIGNAL_EXIT:
+            return "EXIT"
+        side = self.position.side if self.position else None
+        if code == SIGNAL_EXIT_LONG and side == "LONG":
+            return "EXIT"
+        if code == SIGNAL_EXIT_SHORT and side == "SHORT":
+            return "EXIT"
+        return None
+
+    @staticmethod
+    def _atr_at(atr, index):
+        if atr is None:
+            return None
+        value = atr[index]
+        if np.isnan(value):
+            return None
+        return float(value)
+
+    def _first_exit_bar(self, high, low, first, last):
+        """First bar in [first, last] where on_bar would close the position."""
+        if last < first:
+            return None
+
+        stop_price = self.position.stop_price
+        take_profit_price = self.position.take_profit_price
+        if stop_price is None and take_profit_price is None:
+            return None
+
+        hit = np.zeros(last - first + 1, dtype=bool)
+        if self.position.side == "LONG":
+            if stop_price is not None:
+                hit |= low[first:last + 1] <= stop_price
+            if take_profit_price is not None:
+                hit |= high[first:last + 1] >= take_profit_price
+        else:
+            if stop_price is not None:
+                hit |= high[first:last + 1] >= stop_price
+            if take_profit_price is not None:
+                hit |= low[first:last + 1] <= take_profit_price
+
+        if not hit.any():
+            return None
+        return first + int(hit.argmax())
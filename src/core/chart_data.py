@@ -0,0 +1,256 @@
+# src/core/chart_data.py
+
+"""
+Decimated OHLC and trade markers for the interactive chart.
+
+A series is loaded once (full history, through fetch_ohlcv and the
+columnar cache) and turned into a pyramid of zoom levels: level k merges
+2**k consecutive bars into one candle (open of the first, high max, low
+min, close of the last, volume sum), always on the same bucket grid
+counted from the first bar, so panning at one zoom level reuses the same
+buckets. Each level is built from the one below it and kept in an
+in-process LRU keyed by the series version, like the frame cache.
+
+A viewport request picks the lowest level that fits in `points` buckets
+and slices it with a binary search:
+- mode "ohlc": the level's candles (per-bucket min/max envelope),
+- mode "lttb": Largest-Triangle-Three-Buckets on the raw closes, to the
+  same number of points.
+"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.core.data import fetch_ohlcv
+from src.core.frame_cache import LRUCache
+from src.core.ohlcv_cache import series_version
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+MODES = ("ohlc", "lttb")
+
+MAX_BARS = 10_000_000
+MIN_POINTS = 10
+MAX_POINTS = 10_000
+
+LEVEL_CACHE = LRUCache(int(os.environ.get("CHART_CACHE_MB", "256")) * 1024 * 1024, name="chart_levels")
+MARKER_CACHE = LRUCache(32 * 1024 * 1024, name="chart_markers")
+
+
+# -------------------------------------------------
+# DOWNSAMPLING
+# -------------------------------------------------
+def merge_pairs(level):
+    """Next zoom level: every two consecutive candles merged into one."""
+    n = len(level["timestamp"])
+    starts = np.arange(0, n, 2)
+    ends = np.minimum(starts + 1, n - 1)
+    return {
+        "timestamp": level["timestamp"][starts],
+        "open": level["open"][starts],
+        "high": np.maximum.reduceat(level["high"], starts),
+        "low": np.minimum.reduceat(level["low"], starts),
+        "close": level["close"][ends],
+        "volume": np.add.reduceat(level["volume"], starts),
+    }
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices of the n_out points Largest-Triangle-Three-Buckets keeps (first
+    and last always). x must be increasing; all points if n_out >= len(x).
+    """
+    n = len(x)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    n_out = max(int(n_out), 3)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges over the inner points 1..n-2.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Average of each bucket (the third corner for the bucket before it);
+    # the last inner bucket uses the final point.
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        cx, cy = avg_x[b + 1], avg_y[b + 1]
+        ax, ay = x[a], y[a]
+        areas = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(areas))
+        keep[b + 1] = a
+    return keep
+
+
+# -------------------------------------------------
+# LEVELS
+# -------------------------------------------------
+def _base_level(exchange, symbol, timeframe, use_clean):
+    df = fetch_ohlcv(
+        exchange=exchange,
+        symbol=symbol,
+        timeframe=timeframe,
+        limit=MAX_BARS,
+        use_clean=use_clean,
+    )
+    if df is None or df.empty:
+        return None
+    level = {column: df[column].to_numpy(dtype=np.float64) for column in COLUMNS[1:]}
+    level["timestamp"] = df["timestamp"].to_numpy().astype("datetime64[ms]").astype(np.int64)
+    return level
+
+
+def series_levels(exchange, symbol, timeframe, use_clean=True):
+    """
+    (version, get_level) for a series, or (None, None) if it has no bars.
+    get_level(k) returns level k's arrays; version is None when the
+    columnar cache is off, in which case nothing is cached.
+    """
+    table = "ohlcv_clean" if use_clean else "ohlcv"
+    version = series_version(exchange, symbol, timeframe, table)
+    base = LEVEL_CACHE.get((exchange, symbol, timeframe, bool(use_clean), version, 0)) if version else None
+    if base is None:
+        base = _base_level(exchange, symbol, timeframe, use_clean)
+        if base is None:
+            return None, None
+        # The first load builds the columnar series (and its version).
+        version = series_version(exchange, symbol, timeframe, table)
+        if version is not None:
+            LEVEL_CACHE.put((exchange, symbol, timeframe, bool(use_clean), version, 0), base)
+
+    series = (exchange, symbol, timeframe, bool(use_clean), version)
+    local = {0: base}
+
+    def get_level(k):
+        level = local.get(k)
+        if level is None and version is not None:
+            level = LEVEL_CACHE.get((*series, k))
+        if level is None:
+            level = merge_pairs(get_level(k - 1))
+            if version is not None:
+                LEVEL_CACHE.put((*series, k), level)
+        local[k] = level
+        return level
+
+    return version, get_level
+
+
+# -------------------------------------------------
+# VIEWPORT
+# -------------------------------------------------
+def viewport(exchange, symbol, timeframe, use_clean=True, start_ts=None, end_ts=None, points=1000, mode="ohlc"):
+    """
+    Bars between start_ts and end_ts (ms, inclusive; None = series edge)
+    decimated to about `points` (the buckets cut by the viewport edges are
+    returned whole). Returns None if the series has no bars.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}'. Options: {', '.join(MODES)}")
+    points = int(min(max(int(points), MIN_POINTS), MAX_POINTS))
+
+    version, get_level = series_levels(exchange, symbol, timeframe, use_clean)
+    if get_level is None:
+        return None
+
+    base = get_level(0)
+    timestamps = base["timestamp"]
+    total = len(timestamps)
+    lo = 0 if start_ts is None else int(np.searchsorted(timestamps, int(start_ts), side="left"))
+    hi = total if end_ts is None else int(np.searchsorted(timestamps, int(end_ts), side="right"))
+    hi = max(lo, hi)
+    bars = hi - lo
+
+    level = max(0, math.ceil(math.log2(bars / points))) if bars > points else 0
+    bucket = 1 << level
+    out = {
+        "version": version,
+        "mode": mode,
+        "level": level,
+        "bucket_bars": bucket,
+        "bars": bars,
+        "total_bars": total,
+        "first_ts": int(timestamps[0]),
+        "last_ts": int(timestamps[-1]),
+    }
+
+    if mode == "lttb":
+        keep = lo + lttb_indices(timestamps[lo:hi], base["close"][lo:hi], -(-bars // bucket))
+        out["timestamp"] = timestamps[keep]
+        out["close"] = base["close"][keep]
+        return out
+
+    # Whole buckets touching [lo, hi) on level `level`'s grid.
+    arrays = get_level(level)
+    k_lo, k_hi = lo >> level, -(-hi // bucket)
+    for column in COLUMNS:
+        out[column] = arrays[column][k_lo:k_hi]
+    return out
+
+
+# -------------------------------------------------
+# TRADE MARKERS
+# -------------------------------------------------
+MARKER_COLUMNS = (
+    "side",
+    "entry_price",
+    "exit_price",
+    "net_pnl",
+    "entry_trigger",
+    "exit_trigger",
+)
+
+
+def load_trade_markers(csv_path):
+    """
+    Trades CSV -> frame with entry_ts/exit_ts in ms, sorted by entry, plus
+    MARKER_COLUMNS. Cached by path, size and mtime.
+    """
+    stat = os.stat(csv_path)
+    key = (os.path.abspath(csv_path), stat.st_size, stat.st_mtime_ns)
+    markers = MARKER_CACHE.get(key)
+    if markers is None:
+        markers = _read_trade_markers(csv_path)
+        MARKER_CACHE.put(key, markers)
+    return markers
+
+
+def _read_trade_markers(csv_path):
+    trades = pd.read_csv(csv_path)
+    markers = pd.DataFrame(
+        {
+            "entry_ts": pd.to_datetime(trades["entry_time"], utc=True).dt.tz_convert(None).astype("datetime64[ms]").astype(np.int64),
+            "exit_ts": pd.to_datetime(trades["exit_time"], utc=True).dt.tz_convert(None).astype("datetime64[ms]").astype(np.int64),
+        }
+    )
+    for column in MARKER_COLUMNS:
+        markers[column] = trades[column] if column in trades.columns else None
+    return markers.sort_values("entry_ts", kind="stable").reset_index(drop=True)
+
+
+def trade_markers(markers, start_ts=None, end_ts=None, limit=5000):
+    """Trades overlapping [start_ts, end_ts] (ms), as column lists; at most `limit`."""
+    mask = np.ones(len(markers), dtype=bool)
+    if start_ts is not None:
+        mask &= markers["exit_ts"].to_numpy() >= int(start_ts)
+    if end_ts is not None:
+        mask &= markers["entry_ts"].to_numpy() <= int(end_ts)
+    selected = markers[mask]
+    truncated = len(selected) > limit
+    selected = selected.iloc[:limit]
+    out = {column: selected[column].tolist() for column in selected.columns}
+    # NaN triggers/prices are not valid JSON.
+    for column in MARKER_COLUMNS:
+        out[column] = [None if isinstance(v, float) and math.isnan(v) else v for v in out[column]]
+    out["count"] = len(selected)
+    out["truncated"] = bool(truncated)
+    return out
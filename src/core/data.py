@@ -1,6 +1,9 @@
 from src.core.database import get_connection
+from src.core.frame_cache import cached_frame, frame_cache_enabled
+from src.core.ohlcv_cache import CACHE_ENABLED, load_ohlcv_cached, series_version
 from scripts.sanitize_data import sanitize_data
 from src.data.downloader import BinanceDownloader
+from src.data.resampler import TIMEFRAME_TO_MS, update_derived_series
 from datetime import datetime, date
 import pandas as pd
 
@@ -54,6 +57,17 @@ def _raw_has_data(conn, exchange, symbol, timeframe):
     return cur.fetchone() is not None
 
 
+def _can_derive(conn, exchange, symbol, timeframe, base_timeframe="1m"):
+    if timeframe == base_timeframe or timeframe not in TIMEFRAME_TO_MS:
+        return False
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT 1 FROM ohlcv_clean WHERE exchange = ? AND symbol = ? AND timeframe = ? LIMIT 1",
+        (exchange, symbol, base_timeframe),
+    )
+    return cur.fetchone() is not None
+
+
 def _ensure_raw_data(exchange, symbol, timeframe, start_date):
     if exchange != "binance":
         return
@@ -64,6 +78,24 @@ def _ensure_raw_data(exchange, symbol, timeframe, start_date):
 
 
 def fetch_ohlcv(exchange, symbol, timeframe, start_date=None, end_date=None, limit=50000, use_clean=True):
+    def load():
+        return _load_ohlcv(exchange, symbol, timeframe, start_date, end_date, limit, use_clean)
+
+    # In-process frame cache (web app), keyed on the columnar cache version so
+    # a sanitize rewrite is never served stale. No version -> no caching.
+    if not (frame_cache_enabled() and CACHE_ENABLED):
+        return load()
+
+    table = "ohlcv_clean" if use_clean else "ohlcv"
+    version = series_version(exchange, symbol, timeframe, table)
+    if version is None:
+        return load()
+
+    key = (exchange, symbol, timeframe, use_clean, str(start_date), str(end_date), int(limit), version)
+    return cached_frame(key, load)
+
+
+def _load_ohlcv(exchange, symbol, timeframe, start_date=None, end_date=None, limit=50000, use_clean=True):
     table = "ohlcv_clean" if use_clean else "ohlcv"
 
     with get_connection() as conn:
@@ -77,6 +109,14 @@ def fetch_ohlcv(exchange, symbol, timeframe, start_date=None, end_date=None, lim
             if end_ts is not None:
                 end_ts += 24 * 60 * 60 * 1000 - 1  # add 23:59:59.999
 
+        # Columnar cache first; None means the series is not in SQLite yet.
+        # An empty clean slice goes on to the query below, which refreshes
+        # ohlcv_clean from newer raw candles before giving up.
+        if CACHE_ENABLED:
+            df = load_ohlcv_cached(conn, exchange, symbol, timeframe, table, start_ts, end_ts, limit)
+            if df is not None and not (use_clean and df.empty):
+                return df
+
         query = f"""
             SELECT timestamp, open, high, low, close, volume
             FROM {table}
@@ -101,13 +141,19 @@ def fetch_ohlcv(exchange, symbol, timeframe, start_date=None, end_date=None, lim
         rows = cur.fetchall()
 
         if use_clean and not rows:
-            if not _raw_has_data(conn, exchange, symbol, timeframe):
-                _ensure_raw_data(exchange, symbol, timeframe, start_date)
-
+            # Prefer a stored raw series, then deriving from clean 1m
+            # candles, and only then a download.
             if _raw_has_data(conn, exchange, symbol, timeframe):
                 sanitize_data(exchange=exchange, symbol=symbol, timeframe=timeframe)
-                cur.execute(query, tuple(params))
-                rows = cur.fetchall()
+            elif _can_derive(conn, exchange, symbol, timeframe):
+                update_derived_series(conn, exchange, symbol, [timeframe])
+            else:
+                _ensure_raw_data(exchange, symbol, timeframe, start_date)
+                if _raw_has_data(conn, exchange, symbol, timeframe):
+                    sanitize_data(exchange=exchange, symbol=symbol, timeframe=timeframe)
+
+            cur.execute(query, tuple(params))
+            rows = cur.fetchall()
 
     if not rows:
         return pd.DataFrame()
@@ -1,8 +1,17 @@
 # src/core/database.py
 
+import itertools
+import json
+import os
 import sqlite3
+import threading
+import time
 from pathlib import Path
 
+import numpy as np
+
+from src.core.ohlcv_cache import invalidate_ohlcv_cache
+
 # --- Paths ---
 BASE_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = BASE_DIR / "data"
@@ -11,13 +20,90 @@ DB_PATH = DATA_DIR / "market_data.db"
 # --- Ensure data directory exists ---
 DATA_DIR.mkdir(exist_ok=True)
 
+# --- Connection settings ---
+# WAL lets readers (web requests, backtests) run while a downloader writes;
+# NORMAL sync is durable across app crashes in WAL mode, only a power loss
+# can drop the last commits.
+BUSY_TIMEOUT_S = 10.0
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64 * 1024,          # KiB -> 64 MB page cache per connection
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+WRITE_RETRIES = 5
+RETRY_BASE_DELAY_S = 0.05
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Connection reused by every get_connection() call on the same thread.
+    close() only discards an open transaction (what a real close would do to
+    uncommitted work) and leaves the connection in the pool.
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def close_for_real(self):
+        super().close()
+
+
+def connect(path=None, factory=sqlite3.Connection):
+    """New connection with the busy timeout and PRAGMAS applied (not pooled)."""
+    conn = sqlite3.connect(path or DB_PATH, timeout=BUSY_TIMEOUT_S, factory=factory)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value};")
+    return conn
+
+
+_local = threading.local()
+
+
 # --- Connection helper ---
 def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    # One connection per (process, thread, database file): sqlite3
+    # connections can't cross threads, and forked sweep workers must not
+    # reuse the parent's.
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = _local.pool = {}
+
+    key = (os.getpid(), str(DB_PATH))
+    conn = pool.get(key)
+    if conn is None:
+        conn = pool[key] = connect(DB_PATH, factory=PooledConnection)
+        conn.row_factory = sqlite3.Row
     return conn
 
 
+def close_thread_connections():
+    """Really close the calling thread's pooled connections."""
+    pool = getattr(_local, "pool", None) or {}
+    for conn in pool.values():
+        conn.close_for_real()
+    pool.clear()
+
+
+def run_with_retry(write, retries=WRITE_RETRIES, base_delay=RETRY_BASE_DELAY_S):
+    """
+    Run write() (which opens and commits its own transaction), retrying with
+    exponential backoff when SQLite still reports the database busy/locked
+    after the busy timeout.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return write()
+        except sqlite3.OperationalError as exc:
+            message = str(exc).lower()
+            if attempt == retries or ("locked" not in message and "busy" not in message):
+                raise
+            time.sleep(base_delay * 2 ** attempt)
+
+
 # --- Initialize database ---
 def init_db():
     conn = get_connection()
@@ -44,6 +130,8 @@ def init_db():
         ON ohlcv(exchange, symbol, timeframe, timestamp);
     """)
 
+    ensure_ohlcv_clean_table(cursor)
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS backtest_runs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -62,15 +150,188 @@ def init_db():
         );
     """)
 
-    _ensure_backtest_run_columns(cursor)
+    added_columns = _ensure_backtest_run_columns(cursor)
+    if added_columns & set(RUN_METRIC_COLUMNS):
+        _backfill_run_metrics(cursor)
+
+    # /history filters on these and sorts by id or by one metric; every
+    # index ends in id so keyset pagination can seek on (value, id).
+    for column in ("strategy", "symbol", *RUN_METRIC_COLUMNS):
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_backtest_runs_{column}
+            ON backtest_runs({column}, id);
+        """)
+    _refresh_run_stats(cursor)
+
+    # Web backtests run as background jobs; the row is the queue entry and
+    # the status the /jobs endpoint reports.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS backtest_jobs (
+            job_id TEXT PRIMARY KEY,
+            run_id TEXT UNIQUE NOT NULL,
+            strategy TEXT NOT NULL,
+            payload_json TEXT NOT NULL,
+            status TEXT NOT NULL,
+            stage TEXT,
+            progress REAL NOT NULL DEFAULT 0,
+            error TEXT,
+            worker_pid INTEGER,
+            cache_stats_json TEXT,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT
+        );
+    """)
+    if "cache_stats_json" not in _table_columns(cursor, "backtest_jobs"):
+        cursor.execute("ALTER TABLE backtest_jobs ADD COLUMN cache_stats_json TEXT;")
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_backtest_jobs_status
+        ON backtest_jobs(status, created_at);
+    """)
 
     conn.commit()
     conn.close()
 
 
+# --- Clean OHLCV table ---
+# One row per candle, clustered on the lookup key, so a series read is a
+# range scan on the primary key no matter how many other series are stored.
+OHLCV_CLEAN_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ohlcv_clean (
+        exchange TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        timeframe TEXT NOT NULL,
+        timestamp INTEGER NOT NULL,
+        open REAL NOT NULL,
+        high REAL NOT NULL,
+        low REAL NOT NULL,
+        close REAL NOT NULL,
+        volume REAL NOT NULL,
+        PRIMARY KEY (exchange, symbol, timeframe, timestamp)
+    ) WITHOUT ROWID;
+"""
+
+
+def ensure_ohlcv_clean_table(cursor):
+    """Create ohlcv_clean, migrating the old id/no-key layout if present."""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'ohlcv_clean';")
+    row = cursor.fetchone()
+    if row is not None and "WITHOUT ROWID" in row[0].upper():
+        return
+
+    if row is None:
+        cursor.execute(OHLCV_CLEAN_SCHEMA)
+        return
+
+    # Old layout (created by sanitize_data / to_sql): copy into the keyed
+    # table. Later ids win on duplicate candles.
+    cursor.execute("ALTER TABLE ohlcv_clean RENAME TO ohlcv_clean_legacy;")
+    cursor.execute(OHLCV_CLEAN_SCHEMA)
+    order_by = "ORDER BY id" if "id" in _table_columns(cursor, "ohlcv_clean_legacy") else ""
+    cursor.execute(f"""
+        INSERT OR REPLACE INTO ohlcv_clean (
+            exchange, symbol, timeframe, timestamp,
+            open, high, low, close, volume
+        )
+        SELECT exchange, symbol, timeframe, timestamp, open, high, low, close, volume
+        FROM ohlcv_clean_legacy
+        WHERE exchange IS NOT NULL
+          AND symbol IS NOT NULL
+          AND timeframe IS NOT NULL
+          AND timestamp IS NOT NULL
+        {order_by};
+    """)
+    cursor.execute("DROP TABLE ohlcv_clean_legacy;")
+
+
+def _table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table});")
+    return {row[1] for row in cursor.fetchall()}
+
+
+# Stats copied out of stats_json into their own columns when a run is
+# stored, so runs can be filtered and sorted in SQL.
+# column -> (stats key, SQL type)
+RUN_METRIC_COLUMNS = {
+    "total_trades": ("Total trades", "INTEGER"),
+    "net_profit": ("Total Net Profit", "REAL"),
+    "profit_factor": ("Profit Factor", "REAL"),
+    "max_drawdown_pct": ("Max Drawdown (%)", "REAL"),
+    "sharpe_ratio": ("Sharpe Ratio", "REAL"),
+    "cagr_pct": ("CAGR (%)", "REAL"),
+}
+
+
+def run_metric_values(stats):
+    """{column: value} for RUN_METRIC_COLUMNS; None for missing or NaN stats."""
+    values = {}
+    for column, (key, column_type) in RUN_METRIC_COLUMNS.items():
+        try:
+            value = float(stats.get(key))
+        except (TypeError, ValueError):
+            value = None
+        if value is not None and np.isnan(value):
+            value = None
+        if value is not None and column_type == "INTEGER":
+            value = int(value)
+        values[column] = value
+    return values
+
+
+def _backfill_run_metrics(cursor, batch_size=10_000):
+    """Fill the metric columns of runs stored before they existed."""
+    columns = list(RUN_METRIC_COLUMNS)
+    update_sql = (
+        f"UPDATE backtest_runs SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?;"
+    )
+    last_id = 0
+    while True:
+        cursor.execute(
+            "SELECT id, stats_json FROM backtest_runs WHERE id > ? ORDER BY id LIMIT ?;",
+            (last_id, batch_size),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        updates = []
+        for run_id, stats_json in rows:
+            try:
+                stats = json.loads(stats_json)
+            except (TypeError, ValueError):
+                stats = {}
+            values = run_metric_values(stats if isinstance(stats, dict) else {})
+            updates.append([values[column] for column in columns] + [run_id])
+        cursor.executemany(update_sql, updates)
+        last_id = rows[-1][0]
+
+
+def _refresh_run_stats(cursor, min_runs=1000):
+    """
+    ANALYZE backtest_runs once it has doubled since the last ANALYZE. With
+    the stats the planner knows how many runs a strategy/symbol filter
+    matches, and walks the sort column's index instead when that is many.
+    """
+    cursor.execute("SELECT max(id) FROM backtest_runs;")
+    runs = cursor.fetchone()[0] or 0
+    if runs < min_runs:
+        return
+
+    analyzed = 0
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1';")
+    if cursor.fetchone() is not None:
+        cursor.execute(
+            "SELECT stat FROM sqlite_stat1 WHERE tbl = 'backtest_runs' AND idx = 'idx_backtest_runs_strategy';"
+        )
+        row = cursor.fetchone()
+        analyzed = int(row[0].split()[0]) if row else 0
+    if runs >= 2 * analyzed:
+        cursor.execute("ANALYZE backtest_runs;")
+
+
 def _ensure_backtest_run_columns(cursor):
-    cursor.execute("PRAGMA table_info(backtest_runs);")
-    existing_columns = {row[1] for row in cursor.fetchall()}
+    """Add missing backtest_runs columns; returns the names added."""
+    existing_columns = _table_columns(cursor, "backtest_runs")
 
     desired_columns = {
         "ema_fast": "INTEGER",
@@ -85,30 +346,152 @@ def _ensure_backtest_run_columns(cursor):
         "take_profit_pct": "REAL",
         "allow_short": "INTEGER",
     }
+    desired_columns.update({column: column_type for column, (_, column_type) in RUN_METRIC_COLUMNS.items()})
 
+    added = set()
     for column_name, column_type in desired_columns.items():
         if column_name not in existing_columns:
             cursor.execute(
                 f"ALTER TABLE backtest_runs ADD COLUMN {column_name} {column_type};"
             )
+            added.add(column_name)
+    return added
 
 
 # --- Insert OHLCV batch ---
+INSERT_OHLCV_SQL = """
+    INSERT OR IGNORE INTO ohlcv (
+        exchange, symbol, timeframe, timestamp,
+        open, high, low, close, volume
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+
 def insert_ohlcv_rows(rows):
     """
     rows: iterable of tuples
     (exchange, symbol, timeframe, timestamp, open, high, low, close, volume)
     """
+    rows = list(rows)
     conn = get_connection()
-    cursor = conn.cursor()
 
-    cursor.executemany("""
-        INSERT OR IGNORE INTO ohlcv (
-            exchange, symbol, timeframe, timestamp,
-            open, high, low, close, volume
+    def write():
+        with conn:
+            conn.executemany(INSERT_OHLCV_SQL, rows)
+
+    run_with_retry(write)
+
+    for exchange, symbol, timeframe in {tuple(row[:3]) for row in rows}:
+        invalidate_ohlcv_cache(exchange, symbol, timeframe, table="ohlcv")
+
+
+def insert_ohlcv_frame(df, exchange, symbol, timeframe):
+    """
+    Bulk insert of one series from a frame with an int64 ms `timestamp`
+    column and OHLCV columns. Rows are zipped straight from the column
+    arrays into executemany, without per-row tuples built up front.
+    """
+    if df.empty:
+        return 0
+
+    n = len(df)
+    timestamps = df["timestamp"].to_numpy(dtype=np.int64).tolist()
+    values = [df[c].to_numpy(dtype=np.float64).tolist() for c in ("open", "high", "low", "close", "volume")]
+    conn = get_connection()
+
+    def write():
+        rows = zip(
+            itertools.repeat(exchange, n),
+            itertools.repeat(symbol, n),
+            itertools.repeat(timeframe, n),
+            timestamps,
+            *values,
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
-    """, rows)
+        with conn:
+            conn.executemany(INSERT_OHLCV_SQL, rows)
 
-    conn.commit()
+    run_with_retry(write)
+    invalidate_ohlcv_cache(exchange, symbol, timeframe, table="ohlcv")
+    return n
+
+
+def get_last_timestamp(exchange, symbol, timeframe, table="ohlcv"):
+    """Newest stored timestamp (ms) of a series, None if it has no rows."""
+    conn = get_connection()
+    row = conn.execute(
+        f"SELECT MAX(timestamp) FROM {table} WHERE exchange = ? AND symbol = ? AND timeframe = ?",
+        (exchange, symbol, timeframe),
+    ).fetchone()
+    conn.close()
+    return None if row[0] is None else int(row[0])
+
+
+def download_since(exchange, symbol, timeframe, since, table="ohlcv"):
+    """
+    Timestamp (ms) a download requested from `since` should start at: just
+    after the newest stored candle when `since` already falls inside the
+    stored range, otherwise `since` itself, so an earlier start date still
+    backfills the history before the stored range (rows already stored are
+    skipped by INSERT OR IGNORE).
+    """
+    conn = get_connection()
+    first_ts, last_ts = conn.execute(
+        f"SELECT MIN(timestamp), MAX(timestamp) FROM {table} WHERE exchange = ? AND symbol = ? AND timeframe = ?",
+        (exchange, symbol, timeframe),
+    ).fetchone()
     conn.close()
+    if first_ts is None or not first_ts <= since <= last_ts:
+        return since
+    return int(last_ts) + 1
+
+
+# --- Upsert clean OHLCV batch ---
+UPSERT_OHLCV_CLEAN_SQL = """
+    INSERT INTO ohlcv_clean (
+        exchange, symbol, timeframe, timestamp,
+        open, high, low, close, volume
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (exchange, symbol, timeframe, timestamp) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume;
+"""
+
+
+def upsert_ohlcv_clean_rows(rows, conn=None):
+    """
+    rows: iterable of tuples
+    (exchange, symbol, timeframe, timestamp, open, high, low, close, volume)
+
+    Without `conn` the batch runs in its own transaction and the columnar
+    cache of every touched series is invalidated after the commit. With
+    `conn` it joins the caller's transaction; the caller commits and
+    invalidates.
+    """
+    rows = list(rows)
+    if conn is not None:
+        conn.executemany(UPSERT_OHLCV_CLEAN_SQL, rows)
+        return len(rows)
+
+    conn = get_connection()
+
+    def write():
+        with conn:
+            ensure_ohlcv_clean_table(conn.cursor())
+            conn.executemany(UPSERT_OHLCV_CLEAN_SQL, rows)
+
+    run_with_retry(write)
+
+    for exchange, symbol, timeframe in {tuple(row[:3]) for row in rows}:
+        invalidate_ohlcv_cache(exchange, symbol, timeframe, table="ohlcv_clean")
+    return len(rows)
+
+
+def frame_to_ohlcv_rows(df):
+    """Plain-Python row tuples for the upsert/insert helpers (sqlite3 can't bind numpy scalars)."""
+    columns = ["exchange", "symbol", "timeframe", "timestamp", "open", "high", "low", "close", "volume"]
+    return list(zip(*(df[c].tolist() for c in columns)))
@@ -0,0 +1,205 @@
+# src/core/frame_cache.py
+
+"""
+In-process LRU caches for OHLCV frames and indicator series.
+
+Off by default. The web app calls enable_frame_cache() at startup. After
+that, fetch_ohlcv keeps the frames it loads, keyed by
+(exchange, symbol, timeframe, use_clean, start, end, limit, dataset version),
+and cached_indicator() memoizes indicator series computed from those frames.
+The dataset version is the build id of the columnar series in
+src/core/ohlcv_cache.py, so a sanitize_data rewrite (which drops that series)
+retires every frame and indicator derived from the old data.
+
+Both caches evict least-recently-used entries by total bytes. Callers always
+get copies, because runners add columns to the frames they receive.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def _nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by the summed size of its values in bytes."""
+
+    def __init__(self, max_bytes, name="cache"):
+        self.name = name
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# -------------------------------------------------
+# GLOBAL CACHES
+# -------------------------------------------------
+FRAME_CACHE = None
+INDICATOR_CACHE = None
+
+DATASET_KEY_ATTR = "dataset_key"
+
+
+def enable_frame_cache(max_bytes=512 * 1024 * 1024, indicator_max_bytes=None):
+    """Turn on both caches (indicators default to a quarter of the frame budget)."""
+    global FRAME_CACHE, INDICATOR_CACHE
+    FRAME_CACHE = LRUCache(max_bytes, name="ohlcv_frames")
+    INDICATOR_CACHE = LRUCache(indicator_max_bytes or max_bytes // 4, name="indicators")
+
+
+def disable_frame_cache():
+    global FRAME_CACHE, INDICATOR_CACHE
+    FRAME_CACHE = None
+    INDICATOR_CACHE = None
+
+
+def frame_cache_enabled():
+    return FRAME_CACHE is not None
+
+
+def frame_cache_stats():
+    return {
+        "enabled": FRAME_CACHE is not None,
+        "frames": FRAME_CACHE.stats() if FRAME_CACHE is not None else None,
+        "indicators": INDICATOR_CACHE.stats() if INDICATOR_CACHE is not None else None,
+    }
+
+
+SUMMED_STATS = ("entries", "bytes", "max_bytes", "hits", "misses", "evictions")
+
+
+def combine_frame_cache_stats(snapshots):
+    """Sum frame_cache_stats() snapshots of several processes into one."""
+    total = {"enabled": False, "processes": 0, "frames": None, "indicators": None}
+    for snapshot in snapshots:
+        total["processes"] += 1
+        total["enabled"] = total["enabled"] or bool(snapshot.get("enabled"))
+        for cache in ("frames", "indicators"):
+            stats = snapshot.get(cache)
+            if not stats:
+                continue
+            merged = total[cache] or {"name": stats["name"], **dict.fromkeys(SUMMED_STATS, 0)}
+            for key in SUMMED_STATS:
+                merged[key] += stats.get(key) or 0
+            total[cache] = merged
+
+    for cache in ("frames", "indicators"):
+        merged = total[cache]
+        if merged is not None:
+            lookups = merged["hits"] + merged["misses"]
+            merged["hit_rate"] = round(merged["hits"] / lookups, 4) if lookups else None
+    return total
+
+
+def cached_frame(key, load):
+    """Return a copy of the cached frame for key, calling load() on a miss."""
+    if FRAME_CACHE is None or key is None:
+        return load()
+
+    df = FRAME_CACHE.get(key)
+    if df is None:
+        df = load()
+        if df is None or df.empty:
+            return df
+        df.attrs[DATASET_KEY_ATTR] = key
+        FRAME_CACHE.put(key, df)
+    return df.copy()
+
+
+FINGERPRINT_SAMPLES = 16
+
+
+def _fingerprint(obj):
+    """Hash of FINGERPRINT_SAMPLES evenly spaced rows (and the column names of a frame)."""
+    positions = np.unique(np.linspace(0, len(obj) - 1, FINGERPRINT_SAMPLES).astype(np.intp))
+    sample = pd.util.hash_pandas_object(obj.iloc[positions], index=False).to_numpy().tobytes()
+    columns = tuple(obj.columns) if isinstance(obj, pd.DataFrame) else None
+    return columns, sample
+
+
+def cached_indicator(obj, name, params, compute):
+    """
+    Memoize compute() for a frame/series that came out of fetch_ohlcv.
+
+    The key is the frame's dataset key plus its length, first/last index and
+    a fingerprint of sampled values, so slices and derived series of a
+    cached frame (.shift(), .diff(), ... inherit attrs) never share entries
+    with the frame itself.
+    """
+    dataset_key = getattr(obj, "attrs", {}).get(DATASET_KEY_ATTR)
+    if INDICATOR_CACHE is None or dataset_key is None or len(obj) == 0:
+        return compute()
+
+    key = (dataset_key, len(obj), obj.index[0], obj.index[-1], _fingerprint(obj), name, tuple(params))
+    value = INDICATOR_CACHE.get(key)
+    if value is None:
+        value = compute()
+        if value is None:
+            return None
+        INDICATOR_CACHE.put(key, value)
+    return value.copy() if hasattr(value, "copy") else value
@@ -0,0 +1,156 @@
+# src/core/ohlcv_cache.py
+
+"""
+Columnar on-disk OHLCV cache in front of SQLite.
+
+Each (exchange, symbol, timeframe, table) series is stored once as one .npy
+file per column under data/cache/ohlcv/. Reads memory-map the files, find
+the requested range with a binary search on the timestamp column and only
+copy that slice into the DataFrame.
+
+The cache is a copy of SQLite, never the source of truth:
+- sanitize_data invalidates the ohlcv_clean series it rewrites,
+- insert_ohlcv_rows invalidates the raw ohlcv series it touches,
+- anything else that writes those tables must call invalidate_ohlcv_cache.
+
+Set OHLCV_CACHE=0 to bypass it.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = Path(__file__).resolve().parents[2] / "data" / "cache" / "ohlcv"
+CACHE_ENABLED = os.environ.get("OHLCV_CACHE", "1") != "0"
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+def _series_key(exchange, symbol, timeframe, table):
+    return {"exchange": exchange, "symbol": symbol, "timeframe": timeframe, "table": table}
+
+
+def cache_path(exchange, symbol, timeframe, table="ohlcv_clean", root=None):
+    key = f"{exchange}|{symbol}|{timeframe}|{table}"
+    readable = "".join(c if c.isalnum() or c in "-_." else "_" for c in f"{exchange}_{symbol}_{timeframe}_{table}")
+    digest = hashlib.sha1(key.encode()).hexdigest()[:8]
+    return Path(root or CACHE_DIR) / f"{readable}_{digest}"
+
+
+# -------------------------------------------------
+# BUILD
+# -------------------------------------------------
+def _build(conn, exchange, symbol, timeframe, table, path):
+    df = pd.read_sql_query(
+        f"""
+        SELECT timestamp, open, high, low, close, volume
+        FROM {table}
+        WHERE exchange = ?
+          AND symbol = ?
+          AND timeframe = ?
+        ORDER BY timestamp ASC
+        """,
+        conn,
+        params=(exchange, symbol, timeframe),
+    )
+    if df.empty:
+        return False
+
+    # Write next to the final directory and swap it in, so readers never
+    # see a half-written series.
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    np.save(tmp / "timestamp.npy", df["timestamp"].to_numpy(dtype=np.int64))
+    for column in COLUMNS[1:]:
+        np.save(tmp / f"{column}.npy", df[column].to_numpy(dtype=np.float64))
+
+    meta = {
+        **_series_key(exchange, symbol, timeframe, table),
+        "rows": int(len(df)),
+        "first_ts": int(df["timestamp"].iloc[0]),
+        "last_ts": int(df["timestamp"].iloc[-1]),
+        "build_id": uuid.uuid4().hex,
+    }
+    with open(tmp / "meta.json", "w") as f:
+        json.dump(meta, f)
+
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # Another process built it first; keep theirs.
+        shutil.rmtree(tmp, ignore_errors=True)
+    return True
+
+
+# -------------------------------------------------
+# READ
+# -------------------------------------------------
+def load_ohlcv_cached(conn, exchange, symbol, timeframe, table="ohlcv_clean",
+                      start_ts=None, end_ts=None, limit=50000, root=None):
+    """
+    Same frame fetch_ohlcv builds from SQLite (timestamp as datetime, OHLCV as
+    float, ascending, at most `limit` rows from start_ts), or None when the
+    series does not exist in SQLite yet or its files vanished mid-read (a
+    concurrent invalidate_ohlcv_cache); the caller then reads SQLite.
+    """
+    path = cache_path(exchange, symbol, timeframe, table, root)
+    if not (path / "meta.json").exists():
+        if not _build(conn, exchange, symbol, timeframe, table, path):
+            return None
+
+    try:
+        timestamps = np.load(path / "timestamp.npy", mmap_mode="r")
+        lo = 0 if start_ts is None else int(np.searchsorted(timestamps, start_ts, side="left"))
+        hi = len(timestamps) if end_ts is None else int(np.searchsorted(timestamps, end_ts, side="right"))
+        hi = max(lo, min(hi, lo + int(limit)))
+        if hi == lo:
+            return pd.DataFrame()
+
+        # Same dtype pd.to_datetime(..., unit="ms") gives, without the parsing pass.
+        data = {"timestamp": np.array(timestamps[lo:hi]).view("datetime64[ms]")}
+        for column in COLUMNS[1:]:
+            data[column] = np.array(np.load(path / f"{column}.npy", mmap_mode="r")[lo:hi])
+    except (OSError, ValueError):
+        return None
+    # The slices above are already private copies.
+    return pd.DataFrame(data, copy=False)
+
+
+def series_version(exchange, symbol, timeframe, table="ohlcv_clean", root=None):
+    """Build id of the cached series (changes on every rebuild), None if not cached."""
+    try:
+        with open(cache_path(exchange, symbol, timeframe, table, root) / "meta.json") as f:
+            return json.load(f).get("build_id")
+    except (OSError, ValueError):
+        return None
+
+
+# -------------------------------------------------
+# INVALIDATION
+# -------------------------------------------------
+def invalidate_ohlcv_cache(exchange=None, symbol=None, timeframe=None, table=None, root=None):
+    """Drop cached series matching every argument given (None matches all)."""
+    root = Path(root or CACHE_DIR)
+    if not root.exists():
+        return 0
+
+    wanted = {k: v for k, v in _series_key(exchange, symbol, timeframe, table).items() if v is not None}
+    removed = 0
+    for meta_path in root.glob("*/meta.json"):
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        if all(meta.get(k) == v for k, v in wanted.items()):
+            shutil.rmtree(meta_path.parent, ignore_errors=True)
+            removed += 1
+    return removed
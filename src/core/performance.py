@@ -0,0 +1,195 @@
+# src/core/performance.py
+
+"""
+Performance statistics of backtest runs, computed on NumPy arrays.
+
+performance_stats() is what BacktesterV2.stats() returns; it reads the
+trade ledger's net_pnl column, the trade-close equity curve and, when the
+run was marked to market, the per-bar equity. performance_stats_batch()
+scores many runs at once (sweep candidates, walk-forward windows): the
+runs are zero-padded into 2D arrays and every metric is one reduction along
+axis 1, so scoring N runs costs a handful of NumPy calls, not N loops.
+
+Slopes use the closed-form least-squares slope (no np.polyfit). Drawdown,
+Sharpe, Sortino, CAGR, MAR, Ulcer index and drawdown duration are taken
+from the marked equity: the per-bar curve when there is one, otherwise the
+trade-close curve. Sharpe and Sortino are annualized with the number of
+equity points per year when the run's span in years is known, and are
+per-point ratios otherwise; CAGR and MAR need the span.
+"""
+
+import numpy as np
+import pandas as pd
+
+STAT_KEYS = (
+    "Total trades",
+    "Total Net Profit",
+    "Profit Factor",
+    "Avg Trade Net Profit",
+    "Avg Trade Net Loss",
+    "Tharp Expectancy",
+    "Max Drawdown (%)",
+    "Equity Curve Slope",
+    "Trade Net Profit Slope",
+    "Sharpe Ratio",
+    "Sortino Ratio",
+    "CAGR (%)",
+    "MAR Ratio",
+    "Ulcer Index",
+    "Max Drawdown Duration (bars)",
+)
+
+
+def span_years(timestamps):
+    """Years between the first and last timestamp, None if not datetimes."""
+    if timestamps is None or len(timestamps) < 2:
+        return None
+    index = pd.Index(timestamps)
+    if not isinstance(index, pd.DatetimeIndex):
+        return None
+    seconds = (index[-1] - index[0]).total_seconds()
+    return seconds / (365.25 * 86_400) if seconds > 0 else None
+
+
+def _padded(rows):
+    """List of 1D sequences -> (zero-padded 2D float array, lengths, pad mask or None)."""
+    rows = [np.asarray(row, dtype=np.float64) for row in rows]
+    lengths = np.array([len(row) for row in rows], dtype=np.int64)
+    width = int(lengths.max(initial=0))
+    if (lengths == width).all():
+        return np.stack(rows), lengths, None
+    out = np.zeros((len(rows), width))
+    for i, row in enumerate(rows):
+        out[i, : len(row)] = row
+    return out, lengths, np.arange(width) >= lengths[:, None]
+
+
+def _rowdot(a, b):
+    return np.einsum("ij,ij->i", a, b)
+
+
+def _slope(values, lengths, pads):
+    """Least-squares slope of each row against 0..n-1 (0 for n < 2)."""
+    n = lengths.astype(np.float64)
+    x = np.arange(values.shape[1], dtype=np.float64) - ((n - 1) / 2)[:, None]
+    if pads is not None:
+        x[pads] = 0.0
+    # x sums to 0 over each row, so shifting the values by their first one
+    # leaves sum(x * y) unchanged and keeps the products small.
+    sxy = _rowdot(x, values - values[:, :1]) if values.shape[1] else np.zeros(len(n))
+    sxx = n * (n * n - 1) / 12
+    return np.where(n > 1, sxy / np.where(n > 1, sxx, 1.0), 0.0)
+
+
+def _stats_kernel(pnl, pnl_n, pnl_pads, curve, curve_n, curve_pads, marked, marked_n, marked_pads, years):
+    rows = np.arange(len(marked_n))
+    cols = np.arange(marked.shape[1])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # ---- trades (pads are 0: neither win nor loss)
+        wins = pnl > 0
+        losses = pnl < 0
+        win_n = np.count_nonzero(wins, axis=1)
+        loss_n = np.count_nonzero(losses, axis=1)
+        win_sum = np.add.reduce(pnl, axis=1, where=wins)
+        loss_sum = np.add.reduce(pnl, axis=1, where=losses)
+        total = pnl_n.astype(np.float64)
+
+        avg_win = np.where(win_n > 0, win_sum / win_n, 0.0)
+        avg_loss = np.where(loss_n > 0, loss_sum / loss_n, 0.0)
+        tharp = np.where(
+            avg_loss != 0,
+            (avg_win * (win_n / total) + avg_loss * (loss_n / total)) / np.abs(avg_loss),
+            np.nan,
+        )
+        profit_factor = np.where(loss_n > 0, win_sum / np.abs(loss_sum), np.inf)
+
+        # ---- drawdown (pads come after each row, so running peaks are unaffected)
+        peaks = np.maximum.accumulate(marked, axis=1)
+        drawdowns = (marked - peaks) / peaks
+        if marked_pads is not None:
+            drawdowns[marked_pads] = 0.0
+        max_dd = drawdowns.min(axis=1, initial=0.0) * 100
+        ulcer = np.sqrt(_rowdot(drawdowns, drawdowns) / marked_n) * 100
+
+        last_peak = np.maximum.accumulate(np.where(drawdowns == 0, cols, 0), axis=1)
+        dd_duration = (cols - last_peak).max(axis=1, initial=0)
+
+        # ---- returns
+        returns = marked[:, 1:] / marked[:, :-1] - 1
+        if marked_pads is not None:
+            returns[marked_pads[:, 1:]] = 0.0
+        returns_n = np.maximum(marked_n - 1, 0)
+        mean_r = returns.sum(axis=1) / returns_n
+        var_r = np.maximum(_rowdot(returns, returns) - returns_n * mean_r**2, 0.0) / (returns_n - 1)
+        std_r = np.sqrt(var_r)
+        downside_r = np.minimum(returns, 0.0)
+        downside = np.sqrt(_rowdot(downside_r, downside_r) / returns_n)
+        known = np.isfinite(years) & (years > 0)
+        scale = np.sqrt(np.where(known, returns_n / years, 1.0))
+        sharpe = np.where((returns_n > 1) & (std_r > 0), mean_r / std_r * scale, np.nan)
+        sortino = np.where((returns_n > 0) & (downside > 0), mean_r / downside * scale, np.nan)
+
+        if marked.shape[1]:
+            growth = marked[rows, np.maximum(marked_n - 1, 0)] / marked[:, 0]
+        else:
+            growth = np.full(len(rows), np.nan)
+        cagr = np.where(known & (growth > 0), (growth ** (1 / years) - 1) * 100, np.nan)
+        mar = np.where(max_dd < 0, cagr / np.abs(max_dd), np.nan)
+
+    return {
+        "Total trades": pnl_n,
+        "Total Net Profit": pnl.sum(axis=1),
+        "Profit Factor": profit_factor,
+        "Avg Trade Net Profit": avg_win,
+        "Avg Trade Net Loss": avg_loss,
+        "Tharp Expectancy": tharp,
+        "Max Drawdown (%)": max_dd,
+        "Equity Curve Slope": _slope(curve, curve_n, curve_pads),
+        "Trade Net Profit Slope": _slope(pnl, pnl_n, pnl_pads),
+        "Sharpe Ratio": sharpe,
+        "Sortino Ratio": sortino,
+        "CAGR (%)": cagr,
+        "MAR Ratio": mar,
+        "Ulcer Index": ulcer,
+        "Max Drawdown Duration (bars)": dd_duration,
+    }
+
+
+def performance_stats_batch(net_pnls, equity_curves, bar_equities=None, years=None):
+    """
+    Stats of many runs at once, one DataFrame row per run (STAT_KEYS columns).
+
+    net_pnls:      per run, closed trade PnLs
+    equity_curves: per run, trade-close equity (initial capital first)
+    bar_equities:  optional per run per-bar equity (None entries allowed)
+    years:         optional per run span in years (None entries allowed)
+    """
+    k = len(net_pnls)
+    if k == 0:
+        return pd.DataFrame(columns=list(STAT_KEYS))
+    if bar_equities is None:
+        bar_equities = [None] * k
+    if years is None:
+        years = [None] * k
+    marked_rows = [curve if bars is None else bars for curve, bars in zip(equity_curves, bar_equities)]
+    years = np.array([np.nan if y is None else y for y in years], dtype=np.float64)
+
+    columns = _stats_kernel(*_padded(net_pnls), *_padded(equity_curves), *_padded(marked_rows), years)
+    return pd.DataFrame(columns, columns=list(STAT_KEYS))
+
+
+def performance_stats(net_pnls, equity_curve, bar_equity=None, years=None):
+    """Stats of one run as {name: Python scalar}; {} when there are no trades."""
+    if len(net_pnls) == 0:
+        return {}
+    pnl = np.asarray(net_pnls, dtype=np.float64).reshape(1, -1)
+    curve = np.asarray(equity_curve, dtype=np.float64).reshape(1, -1)
+    marked = curve if bar_equity is None else np.asarray(bar_equity, dtype=np.float64).reshape(1, -1)
+    columns = _stats_kernel(
+        pnl, np.array([pnl.shape[1]]), None,
+        curve, np.array([curve.shape[1]]), None,
+        marked, np.array([marked.shape[1]]), None,
+        np.array([np.nan if years is None else years], dtype=np.float64),
+    )
+    return {key: columns[key][0].item() for key in STAT_KEYS}
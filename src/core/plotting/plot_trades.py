@@ -1,8 +1,11 @@
 import os
 import math
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+import numpy as np
 import pandas as pd
 
 
@@ -55,6 +58,8 @@ def _normalize_trigger(value):
 def _normalize_trades(trades):
     if isinstance(trades, pd.DataFrame):
         trades_df = trades.copy()
+    elif hasattr(trades, "to_frame"):
+        trades_df = trades.to_frame()
     else:
         trades_df = pd.DataFrame(trades)
 
@@ -90,6 +95,137 @@ def _prepare_ohlc(df, start_date=None, end_date=None):
     return df_plot
 
 
+def _add_trade_markers(ax, trades_df, window_start, window_end):
+    """
+    Entry/exit markers of the trades with an entry or exit in the window:
+    one scatter per marker kind and one LineCollection for the trade paths
+    (labels are still one annotation each).
+    Returns (has_full_conditions, has_markers).
+    """
+    required = ["entry_time", "exit_time", "entry_price", "exit_price"]
+    if trades_df.empty or not set(required).issubset(trades_df.columns):
+        return True, False
+
+    trades = trades_df.dropna(subset=required)
+    entry_times = pd.to_datetime(trades["entry_time"])
+    exit_times = pd.to_datetime(trades["exit_time"])
+    entry_in = ((entry_times >= window_start) & (entry_times <= window_end)).to_numpy()
+    exit_in = ((exit_times >= window_start) & (exit_times <= window_end)).to_numpy()
+    keep = entry_in | exit_in
+    if not keep.any():
+        return True, False
+
+    trades = trades[keep]
+    entry_in, exit_in = entry_in[keep], exit_in[keep]
+    entry_x = mdates.date2num(entry_times[keep].to_numpy())
+    exit_x = mdates.date2num(exit_times[keep].to_numpy())
+    entry_prices = trades["entry_price"].to_numpy(dtype=float)
+    exit_prices = trades["exit_price"].to_numpy(dtype=float)
+
+    sides = trades["side"].astype(str).str.upper().to_numpy() if "side" in trades.columns else np.full(len(trades), "")
+    is_short = sides == "SHORT"
+    net_pnl = pd.to_numeric(trades.get("net_pnl", 0.0), errors="coerce")
+    net_pnl = np.nan_to_num(np.broadcast_to(np.asarray(net_pnl, dtype=float), len(trades)), nan=0.0)
+    entry_triggers = [_normalize_trigger(v) for v in trades.get("entry_trigger", pd.Series([None] * len(trades)))]
+    exit_triggers = [_normalize_trigger(v) for v in trades.get("exit_trigger", pd.Series([None] * len(trades)))]
+
+    has_full_conditions = not (
+        any(entry_in[i] and not entry_triggers[i] for i in range(len(trades)))
+        or any(exit_in[i] and not exit_triggers[i] for i in range(len(trades)))
+    )
+
+    # Entries: one scatter per side; the legend's "Entry" goes on the side
+    # of the first entry, as when markers were added trade by trade.
+    entry_rows = np.flatnonzero(entry_in)
+    first_entry_short = len(entry_rows) > 0 and is_short[entry_rows[0]]
+    for short, marker, color in ((False, "^", "#1f77b4"), (True, "v", "#ff7f0e")):
+        rows = entry_rows[is_short[entry_rows] == short]
+        if len(rows):
+            ax.scatter(
+                entry_x[rows],
+                entry_prices[rows],
+                marker=marker,
+                color=color,
+                s=70,
+                zorder=4,
+                label="Entry" if short == first_entry_short else None,
+            )
+        for i in rows:
+            entry_label = entry_triggers[i] or f"{sides[i] or 'Trade'} entry"
+            ax.annotate(
+                f"E: {entry_label}",
+                (entry_x[i], entry_prices[i]),
+                textcoords="offset points",
+                xytext=(6, 8),
+                fontsize=7,
+                color=color,
+                alpha=0.95,
+            )
+
+    exit_rows = np.flatnonzero(exit_in)
+    if len(exit_rows):
+        ax.scatter(exit_x[exit_rows], exit_prices[exit_rows], marker="X", color="#d62728", s=65, zorder=4, label="Exit")
+    for i in exit_rows:
+        ax.annotate(
+            f"X: {exit_triggers[i] or 'Exit'}",
+            (exit_x[i], exit_prices[i]),
+            textcoords="offset points",
+            xytext=(6, -12),
+            fontsize=7,
+            color="#b22222",
+            alpha=0.95,
+        )
+
+    path_rows = np.flatnonzero(entry_in & exit_in)
+    if len(path_rows):
+        segments = np.stack(
+            [
+                np.column_stack([entry_x[path_rows], entry_prices[path_rows]]),
+                np.column_stack([exit_x[path_rows], exit_prices[path_rows]]),
+            ],
+            axis=1,
+        )
+        colors = np.where(net_pnl[path_rows, None] >= 0, to_rgba("#17becf", 0.45), to_rgba("#9467bd", 0.45))
+        ax.add_collection(LineCollection(segments, colors=colors, linewidths=1.0, label="Trade Path"))
+
+    return has_full_conditions, bool(len(entry_rows) or len(exit_rows))
+
+
+UP_COLOR = "#2ca02c"
+DOWN_COLOR = "#d62728"
+
+
+def _add_candles(ax, x_values, opens, highs, lows, closes, candle_width):
+    """All wicks as one LineCollection and all bodies as one PolyCollection."""
+    up = closes >= opens
+    wick_colors = np.where(up[:, None], to_rgba(UP_COLOR, 0.9), to_rgba(DOWN_COLOR, 0.9))
+    body_colors = np.where(up[:, None], to_rgba(UP_COLOR, 0.85), to_rgba(DOWN_COLOR, 0.85))
+
+    wicks = np.stack(
+        [np.column_stack([x_values, lows]), np.column_stack([x_values, highs])],
+        axis=1,
+    )
+    ax.add_collection(LineCollection(wicks, colors=wick_colors, linewidths=1, zorder=2))
+
+    left = x_values - candle_width / 2
+    right = x_values + candle_width / 2
+    bottom = np.minimum(opens, closes)
+    top = bottom + np.maximum(np.abs(closes - opens), 1e-9)
+    bodies = np.stack(
+        [
+            np.column_stack([left, bottom]),
+            np.column_stack([right, bottom]),
+            np.column_stack([right, top]),
+            np.column_stack([left, top]),
+        ],
+        axis=1,
+    )
+    ax.add_collection(
+        PolyCollection(bodies, facecolors=body_colors, edgecolors=body_colors, linewidths=1, zorder=1)
+    )
+    ax.autoscale_view()
+
+
 def _plot_single_candlestick_chart(
     df_plot,
     trades_df,
@@ -100,27 +236,21 @@ def _plot_single_candlestick_chart(
 ):
     fig, ax = plt.subplots(figsize=figsize)
 
-    x_values = mdates.date2num(df_plot.index.to_pydatetime())
+    x_values = mdates.date2num(df_plot.index.to_numpy())
     if len(x_values) > 1:
         candle_width = (x_values[1] - x_values[0]) * 0.7
     else:
         candle_width = 0.02
 
-    for idx, row in zip(x_values, df_plot.itertuples()):
-        color = "#2ca02c" if row.close >= row.open else "#d62728"
-        ax.vlines(idx, row.low, row.high, color=color, linewidth=1, alpha=0.9)
-
-        body_bottom = min(row.open, row.close)
-        body_height = max(abs(row.close - row.open), 1e-9)
-        rect = Rectangle(
-            (idx - candle_width / 2, body_bottom),
-            candle_width,
-            body_height,
-            facecolor=color,
-            edgecolor=color,
-            alpha=0.85,
-        )
-        ax.add_patch(rect)
+    _add_candles(
+        ax,
+        x_values,
+        df_plot["open"].to_numpy(dtype=float),
+        df_plot["high"].to_numpy(dtype=float),
+        df_plot["low"].to_numpy(dtype=float),
+        df_plot["close"].to_numpy(dtype=float),
+        candle_width,
+    )
 
     if indicators:
         window_start = df_plot.index.min()
@@ -138,112 +268,9 @@ def _plot_single_candlestick_chart(
             if not series_to_plot.empty:
                 ax.plot(series_to_plot.index, series_to_plot.values, label=name, linewidth=1)
 
-    has_full_conditions = True
-    first_entry_label = True
-    first_exit_label = True
-    first_path_label = True
-    has_markers = False
     window_start = df_plot.index.min()
     window_end = df_plot.index.max()
-
-    for trade in trades_df.to_dict("records"):
-        entry_time = trade.get("entry_time")
-        exit_time = trade.get("exit_time")
-        entry_price = trade.get("entry_price")
-        exit_price = trade.get("exit_price")
-
-        if (
-            pd.isna(entry_time)
-            or pd.isna(exit_time)
-            or entry_price is None
-            or exit_price is None
-            or pd.isna(entry_price)
-            or pd.isna(exit_price)
-        ):
-            continue
-
-        entry_time = pd.to_datetime(entry_time)
-        exit_time = pd.to_datetime(exit_time)
-
-        entry_in_window = window_start <= entry_time <= window_end
-        exit_in_window = window_start <= exit_time <= window_end
-        if not entry_in_window and not exit_in_window:
-            continue
-
-        side = str(trade.get("side", "")).upper()
-        entry_marker = "^" if side != "SHORT" else "v"
-        entry_color = "#1f77b4" if side != "SHORT" else "#ff7f0e"
-        net_pnl = pd.to_numeric(trade.get("net_pnl", 0.0), errors="coerce")
-        if pd.isna(net_pnl):
-            net_pnl = 0.0
-        trade_line_color = "#17becf" if net_pnl >= 0 else "#9467bd"
-
-        entry_trigger = _normalize_trigger(trade.get("entry_trigger"))
-        exit_trigger = _normalize_trigger(trade.get("exit_trigger"))
-
-        if entry_in_window and not entry_trigger:
-            has_full_conditions = False
-        if exit_in_window and not exit_trigger:
-            has_full_conditions = False
-
-        if entry_in_window:
-            ax.scatter(
-                entry_time,
-                entry_price,
-                marker=entry_marker,
-                color=entry_color,
-                s=70,
-                zorder=4,
-                label="Entry" if first_entry_label else None,
-            )
-            first_entry_label = False
-            has_markers = True
-
-            entry_label = entry_trigger or f"{side or 'Trade'} entry"
-            ax.annotate(
-                f"E: {entry_label}",
-                (entry_time, entry_price),
-                textcoords="offset points",
-                xytext=(6, 8),
-                fontsize=7,
-                color=entry_color,
-                alpha=0.95,
-            )
-
-        if exit_in_window:
-            ax.scatter(
-                exit_time,
-                exit_price,
-                marker="X",
-                color="#d62728",
-                s=65,
-                zorder=4,
-                label="Exit" if first_exit_label else None,
-            )
-            first_exit_label = False
-            has_markers = True
-
-            exit_label = exit_trigger or "Exit"
-            ax.annotate(
-                f"X: {exit_label}",
-                (exit_time, exit_price),
-                textcoords="offset points",
-                xytext=(6, -12),
-                fontsize=7,
-                color="#b22222",
-                alpha=0.95,
-            )
-
-        if entry_in_window and exit_in_window:
-            ax.plot(
-                [entry_time, exit_time],
-                [entry_price, exit_price],
-                color=trade_line_color,
-                alpha=0.45,
-                linewidth=1.0,
-                label="Trade Path" if first_path_label else None,
-            )
-            first_path_label = False
+    has_full_conditions, has_markers = _add_trade_markers(ax, trades_df, window_start, window_end)
 
     ax.set_title(title)
     ax.set_xlabel("Date")
@@ -300,6 +327,19 @@ def plot_trades_candlestick(
     return annotation_mode, chart_created
 
 
+def _render_window(task):
+    window_df, trades_df, indicators, title, output_path, figsize = task
+    annotation_mode, _, _ = _plot_single_candlestick_chart(
+        df_plot=window_df,
+        trades_df=trades_df,
+        indicators=indicators,
+        title=title,
+        output_path=output_path,
+        figsize=figsize,
+    )
+    return annotation_mode
+
+
 def plot_trades_candlestick_windows(
     df,
     trades,
@@ -312,7 +352,14 @@ def plot_trades_candlestick_windows(
     candles_per_chart=50,
     max_charts=10,
     figsize=(20, 8),
+    workers=None,
 ):
+    """
+    One chart per window of candles_per_chart candles that has a trade
+    entry or exit, up to max_charts. With workers > 1 (and an output_dir)
+    the windows are rendered in a process pool; each task only carries its
+    window's candles, trades and indicator slices.
+    """
     df_plot = _prepare_ohlc(df, start_date=start_date, end_date=end_date)
     if df_plot is None:
         return "missing_ohlc", [], False, 0
@@ -324,7 +371,7 @@ def plot_trades_candlestick_windows(
     window_size = max(int(candles_per_chart), 1)
     total_windows = int(math.ceil(len(df_plot) / window_size))
     chart_items = []
-    has_full_conditions = True
+    tasks = []
     trade_windows = 0
     reached_cap = False
 
@@ -337,11 +384,11 @@ def plot_trades_candlestick_windows(
 
         window_start = window_df.index.min()
         window_end = window_df.index.max()
-        has_trade_markers = (
+        in_window = (
             ((trades_df["entry_time"] >= window_start) & (trades_df["entry_time"] <= window_end))
             | ((trades_df["exit_time"] >= window_start) & (trades_df["exit_time"] <= window_end))
-        ).any()
-        if not has_trade_markers:
+        )
+        if not in_window.any():
             continue
 
         trade_windows += 1
@@ -355,17 +402,15 @@ def plot_trades_candlestick_windows(
             f"{title}\n"
             f"Window {trade_windows} | Candles {start_idx + 1}-{min(end_idx, len(df_plot))}"
         )
-        annotation_mode, _, _ = _plot_single_candlestick_chart(
-            df_plot=window_df,
-            trades_df=trades_df,
-            indicators=indicators,
-            title=window_title,
-            output_path=chart_path,
-            figsize=figsize,
-        )
-
-        if annotation_mode == "best_effort":
-            has_full_conditions = False
+        window_indicators = None
+        if indicators:
+            window_indicators = {
+                name: series[(series.index >= window_start) & (series.index <= window_end)]
+                if series is not None and isinstance(series.index, pd.DatetimeIndex)
+                else series
+                for name, series in indicators.items()
+            }
+        tasks.append((window_df, trades_df[in_window], window_indicators, window_title, chart_path, figsize))
 
         chart_items.append(
             {
@@ -380,5 +425,12 @@ def plot_trades_candlestick_windows(
     if not chart_items:
         return "missing_trades", [], False, trade_windows
 
-    annotation_mode = "full" if has_full_conditions else "best_effort"
+    workers = min(int(workers or 1), len(tasks))
+    if workers > 1 and output_dir:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            annotation_modes = list(pool.map(_render_window, tasks))
+    else:
+        annotation_modes = [_render_window(task) for task in tasks]
+
+    annotation_mode = "best_effort" if "best_effort" in annotation_modes else "full"
     return annotation_mode, chart_items, reached_cap, trade_windows
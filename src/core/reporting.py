@@ -1,11 +1,17 @@
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import quantstats as qs
 
 
 def generate_quantstats_report(equity_dates, equity_values, output_dir, title):
-    if not equity_dates or not equity_values:
+    """
+    QuantStats HTML report of an equity curve. equity_values may be a list or
+    an array, normally the engine's per-bar bar_equity with the bar
+    timestamps.
+    """
+    if equity_dates is None or equity_values is None:
         return None
 
     if len(equity_dates) < 2 or len(equity_values) < 2:
@@ -26,16 +32,12 @@ def generate_quantstats_report(equity_dates, equity_values, output_dir, title):
         qs.reports.html(returns, output=str(output_path), title=title)
         return str(output_path)
     except Exception as exc:
-        equity = equity_series.values
+        equity = equity_series.to_numpy(dtype=float)
         total_return = (equity[-1] / equity[0] - 1) if len(equity) > 1 else 0.0
-        peak = equity[0]
-        max_dd = 0.0
-        for val in equity:
-            if val > peak:
-                peak = val
-            drawdown = (val - peak) / peak if peak else 0.0
-            if drawdown < max_dd:
-                max_dd = drawdown
+        peaks = np.maximum.accumulate(equity)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdowns = np.where(peaks != 0, (equity - peaks) / peaks, 0.0)
+        max_dd = min(float(drawdowns.min()), 0.0)
 
         output_path.write_text(
             "\n".join(
@@ -0,0 +1,333 @@
+"""
+O(1)-update indicator state objects for bar-by-bar evaluation.
+
+Each object is fed one bar at a time through update() and returns the
+current value (None while warming up), so per-bar cost does not grow with
+history length. Values follow the full-series output; pandas_ta's "not
+enough rows" checks on short prefixes are left to the caller. The arithmetic mirrors pandas' ewm/rolling kernels and the
+pandas_ta defaults used in src/core/ta.py, so values line up with the
+full-series versions:
+
+    EMA(n)                -> ta.ema(close, n)        (SMA seed)
+    EMA(n, presma=False)  -> close.ewm(span=n, adjust=False).mean()
+    SMA(n)                -> close.rolling(n).mean()
+    ATR(n)                -> ta.atr(high, low, close, n)
+    RSI(n)                -> ta.rsi(close, n)
+    ADX(n)                -> ta.adx(high, low, close, n)["ADX_n"]
+    Keltner(n, scalar)    -> ta.kc(high, low, close, n, scalar)
+    Donchian(n)           -> high.rolling(n).max(), low.rolling(n).min()
+
+Known gap: pandas_ta adds float epsilon to every high-low range of a series
+as soon as one bar has high == low; the streaming versions do not.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+
+class _EWM:
+    """pandas ewm(alpha=..., adjust=False) recursion, one observation at a time."""
+
+    def __init__(self, alpha):
+        self.alpha = float(alpha)
+        self.old_wt_factor = 1.0 - self.alpha
+        self.value = None
+
+    def update(self, x):
+        if x is None or x != x:
+            return self.value
+
+        if self.value is None:
+            self.value = float(x)
+        elif self.value != x:
+            old_wt = self.old_wt_factor
+            self.value = (old_wt * self.value + self.alpha * x) / (old_wt + self.alpha)
+        return self.value
+
+
+class _SeededEWM:
+    """pandas_ta presma: the first `length` values are replaced by their mean."""
+
+    def __init__(self, length, alpha, presma=True):
+        self.length = int(length)
+        self.presma = presma
+        self._ewm = _EWM(alpha)
+        self._seed = [] if presma else None
+        self._observed = 0
+
+    @property
+    def value(self):
+        return self._ewm.value
+
+    def update(self, x):
+        if self._seed is None:
+            return self._ewm.update(x)
+
+        # NaNs keep their position in the seed window but are not averaged (nanmean).
+        missing = x is None or x != x
+        self._seed.append(0.0 if missing else float(x))
+        self._observed += 0 if missing else 1
+        if len(self._seed) < self.length:
+            return None
+
+        seed = np.array(self._seed).sum() / self._observed if self._observed else None
+        self._seed = None
+        return self._ewm.update(seed)
+
+
+def _true_range(high, low, prev_close):
+    hl_range = high - low
+    if prev_close is None:
+        return hl_range
+    return max(abs(hl_range), abs(high - prev_close), abs(prev_close - low))
+
+
+# -------------------------------------------------
+# MOVING AVERAGES
+# -------------------------------------------------
+class EMA:
+    def __init__(self, length, presma=True):
+        self.length = int(length)
+        self._ewm = _SeededEWM(self.length, 2.0 / (self.length + 1), presma=presma)
+        self.value = None
+
+    def update(self, close):
+        self.value = self._ewm.update(close)
+        return self.value
+
+
+class RMA:
+    """Wilder's moving average (ewm alpha = 1 / length), as ta.rma."""
+
+    def __init__(self, length, presma=False):
+        self.length = int(length)
+        self._ewm = _SeededEWM(self.length, 1.0 / self.length, presma=presma)
+        self.value = None
+
+    def update(self, value):
+        self.value = self._ewm.update(value)
+        return self.value
+
+
+class SMA:
+    """Rolling mean with pandas' compensated add/remove kernel."""
+
+    def __init__(self, length):
+        self.length = int(length)
+        self.window = deque()
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.neg_ct = 0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.same_value_count = 0
+        self.prev_value = None
+        self.value = None
+
+    def update(self, close):
+        close = float(close)
+        self.window.append(close)
+        if len(self.window) > self.length:
+            self._remove(self.window.popleft())
+        self._add(close)
+
+        if self.nobs < self.length:
+            self.value = None
+            return None
+
+        result = self.sum_x / self.nobs
+        if self.same_value_count >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        self.value = result
+        return result
+
+    def _add(self, val):
+        if val != val:
+            return
+        self.nobs += 1
+        y = val - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+        if val == self.prev_value:
+            self.same_value_count += 1
+        else:
+            self.same_value_count = 1
+        self.prev_value = val
+
+    def _remove(self, val):
+        if val != val:
+            return
+        self.nobs -= 1
+        y = -val - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+
+# -------------------------------------------------
+# VOLATILITY / MOMENTUM
+# -------------------------------------------------
+class ATR:
+    def __init__(self, length, prenan=False):
+        self.length = int(length)
+        self.prenan = prenan
+        self._rma = RMA(self.length, presma=True)
+        self.prev_close = None
+        self.value = None
+
+    def update(self, high, low, close):
+        if self.prev_close is None and self.prenan:
+            tr = None
+        else:
+            tr = _true_range(high, low, self.prev_close)
+        self.prev_close = close
+
+        self.value = self._rma.update(tr)
+        return self.value
+
+
+class RSI:
+    def __init__(self, length=14):
+        self.length = int(length)
+        self._positive = RMA(self.length)
+        self._negative = RMA(self.length)
+        self.prev_close = None
+        self.value = None
+
+    def update(self, close):
+        if self.prev_close is None:
+            self.prev_close = close
+            return None
+
+        change = close - self.prev_close
+        self.prev_close = close
+
+        positive_avg = self._positive.update(change if change > 0 else 0.0)
+        negative_avg = self._negative.update(change if change < 0 else 0.0)
+
+        denom = positive_avg + abs(negative_avg)
+        self.value = 100 * positive_avg / denom if denom else None
+        return self.value
+
+
+class Donchian:
+    """Rolling max(high) / min(low) over `length` bars using monotonic deques."""
+
+    def __init__(self, length):
+        self.length = int(length)
+        self._highs = deque()
+        self._lows = deque()
+        self.count = 0
+        self.upper = None
+        self.lower = None
+
+    def update(self, high, low):
+        index = self.count
+        self.count += 1
+
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        self._highs.append((index, high))
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._lows.append((index, low))
+
+        oldest = index - self.length + 1
+        if self._highs[0][0] < oldest:
+            self._highs.popleft()
+        if self._lows[0][0] < oldest:
+            self._lows.popleft()
+
+        if self.count < self.length:
+            self.upper = self.lower = None
+        else:
+            self.upper = self._highs[0][1]
+            self.lower = self._lows[0][1]
+        return self.upper, self.lower
+
+
+class Keltner:
+    """ta.kc with mamode="ema": EMA basis, EMA of true range as band."""
+
+    def __init__(self, length=20, scalar=2.0):
+        self.length = int(length)
+        self.scalar = float(scalar)
+        self._basis = EMA(self.length)
+        self._band = EMA(self.length)
+        self.prev_close = None
+        self.lower = self.basis = self.upper = None
+
+    def update(self, high, low, close):
+        tr = _true_range(high, low, self.prev_close)
+        self.prev_close = close
+
+        basis = self._basis.update(close)
+        band = self._band.update(tr)
+
+        if basis is None or band is None:
+            self.lower = self.basis = self.upper = None
+        else:
+            self.basis = basis
+            self.lower = basis - self.scalar * band
+            self.upper = basis + self.scalar * band
+        return self.lower, self.basis, self.upper
+
+    def stochastic(self, close):
+        """Position of close inside the channel, 0 = lower band, 100 = upper band."""
+        if self.upper is None or self.upper == self.lower:
+            return None
+        return 100 * (close - self.lower) / (self.upper - self.lower)
+
+
+class ADX:
+    def __init__(self, length=14, signal_length=None):
+        self.length = int(length)
+        self._atr = ATR(self.length, prenan=True)
+        self._pos = RMA(self.length)
+        self._neg = RMA(self.length)
+        self._adx = RMA(int(signal_length or length))
+        self.prev_high = None
+        self.prev_low = None
+        self.dmp = self.dmn = self.value = None
+
+    def update(self, high, low, close):
+        atr = self._atr.update(high, low, close)
+
+        if self.prev_high is None:
+            self.prev_high, self.prev_low = high, low
+            return None
+
+        up = high - self.prev_high
+        dn = self.prev_low - low
+        self.prev_high, self.prev_low = high, low
+
+        pos = up if (up > dn and up > 0) else 0.0
+        neg = dn if (dn > up and dn > 0) else 0.0
+        pos = 0.0 if abs(pos) < np.finfo(float).eps else pos
+        neg = 0.0 if abs(neg) < np.finfo(float).eps else neg
+
+        pos_avg = self._pos.update(pos)
+        neg_avg = self._neg.update(neg)
+
+        if atr is None:
+            return None
+
+        k = 100 / atr
+        self.dmp = k * pos_avg
+        self.dmn = k * neg_avg
+        total = self.dmp + self.dmn
+        dx = 100 * abs(self.dmp - self.dmn) / total if total else None
+
+        self.value = self._adx.update(dx)
+        return self.value
@@ -1,28 +1,46 @@
 import pandas as pd
 import pandas_ta as ta
 
+from src.core.frame_cache import cached_indicator
+
 
 def compute_rsi(series: pd.Series, period: int) -> pd.Series:
-    return ta.rsi(series, length=int(period))
+    return cached_indicator(
+        series, f"rsi:{series.name}", (int(period),),
+        lambda: ta.rsi(series, length=int(period)),
+    )
 
 
 def compute_atr(df: pd.DataFrame, period: int) -> pd.Series:
-    return ta.atr(
-        high=df["high"],
-        low=df["low"],
-        close=df["close"],
-        length=int(period),
+    return cached_indicator(
+        df, "atr", (int(period),),
+        lambda: ta.atr(
+            high=df["high"],
+            low=df["low"],
+            close=df["close"],
+            length=int(period),
+        ),
     )
 
 
-def compute_adx(df: pd.DataFrame, period: int) -> pd.Series:
-    adx_df = ta.adx(
-        high=df["high"],
-        low=df["low"],
-        close=df["close"],
-        length=int(period),
+def compute_ema(series: pd.Series, span: int) -> pd.Series:
+    return cached_indicator(
+        series, f"ema:{series.name}", (int(span),),
+        lambda: series.ewm(span=int(span), adjust=False).mean(),
     )
-    if adx_df is None:
-        return None
-    adx_col = f"ADX_{int(period)}"
-    return adx_df[adx_col] if adx_col in adx_df.columns else None
+
+
+def compute_adx(df: pd.DataFrame, period: int) -> pd.Series:
+    def compute():
+        adx_df = ta.adx(
+            high=df["high"],
+            low=df["low"],
+            close=df["close"],
+            length=int(period),
+        )
+        if adx_df is None:
+            return None
+        adx_col = f"ADX_{int(period)}"
+        return adx_df[adx_col] if adx_col in adx_df.columns else None
+
+    return cached_indicator(df, "adx", (int(period),), compute)
@@ -0,0 +1,162 @@
+# src/core/trade_ledger.py
+
+"""
+Columnar ledger of closed trades for BacktesterV2.
+
+One preallocated NumPy buffer per field, grown by doubling, instead of a
+dict per closed lot. Numeric fields are float64/int64 columns, the
+rest (timestamps, side, result, triggers) object columns holding the values
+as the engine passed them.
+
+stats() reads column("net_pnl") and the runners' CSV exporters call
+to_frame(), whose columns are views of the buffers (no copy; pandas
+copy-on-write keeps later edits to the frame away from the ledger).
+Iterating or indexing still yields the familiar trade dicts, so existing
+`for t in bt.trades: t["net_pnl"]` code keeps working.
+"""
+
+import numpy as np
+import pandas as pd
+
+TRADE_FIELDS = (
+    ("entry_time", object),
+    ("exit_time", object),
+    ("side", object),
+    ("entry_price", np.float64),
+    ("exit_price", np.float64),
+    ("position_size", np.float64),
+    ("qty", np.float64),
+    ("gross_pnl", np.float64),
+    ("commission_paid", np.float64),
+    ("net_pnl", np.float64),
+    ("result", object),
+    ("entry_trigger", object),
+    ("exit_trigger", object),
+    ("bars_in_trade", np.int64),
+    ("stop_price", np.float64),
+    ("take_profit_price", np.float64),
+    ("cash_after_trade", np.float64),
+    ("pyramid_level", np.int64),
+    # bar positions and the entry fee, for BacktesterV2.mark_to_market()
+    ("entry_index", np.int64),
+    ("commission_entry", np.float64),
+)
+
+# Float fields the engine leaves as None (no stop / no take profit). Stored
+# as NaN, handed back as None in row dicts.
+NULLABLE_FIELDS = ("stop_price", "take_profit_price")
+
+_FILL = {object: None, np.float64: np.nan, np.int64: 0}
+
+
+class TradeLedger:
+    def __init__(self, capacity=256):
+        self._capacity = max(int(capacity), 1)
+        self._size = 0
+        self._columns = {
+            name: np.full(self._capacity, _FILL[dtype], dtype=dtype)
+            for name, dtype in TRADE_FIELDS
+        }
+
+    @classmethod
+    def from_columns(cls, **columns):
+        """Ledger from whole columns (equal lengths); missing fields stay NaN/None/0."""
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("TradeLedger columns must have the same length")
+        n = lengths.pop() if lengths else 0
+
+        ledger = cls(capacity=n)
+        for name, values in columns.items():
+            if name not in ledger._columns:
+                raise KeyError(f"Unknown trade field: {name}")
+            column = ledger._columns[name]
+            column[:n] = np.asarray(values, dtype=column.dtype)
+        ledger._size = n
+        return ledger
+
+    # -------------------------------------------------
+    # WRITE
+    # -------------------------------------------------
+    def _grow(self):
+        self._capacity *= 2
+        for name, dtype in TRADE_FIELDS:
+            old = self._columns[name]
+            new = np.full(self._capacity, _FILL[dtype], dtype=dtype)
+            new[: self._size] = old[: self._size]
+            self._columns[name] = new
+
+    def record(self, **fields):
+        """Store one closed trade; fields not given stay NaN/None/0."""
+        if self._size == self._capacity:
+            self._grow()
+        i = self._size
+        columns = self._columns
+        for name, value in fields.items():
+            if value is None and name in NULLABLE_FIELDS:
+                value = np.nan
+            columns[name][i] = value
+        self._size = i + 1
+
+    def append(self, trade):
+        """list.append() counterpart taking a trade dict."""
+        self.record(**trade)
+
+    # -------------------------------------------------
+    # READ
+    # -------------------------------------------------
+    def column(self, name):
+        """Read-only view of one field over the stored trades."""
+        view = self._columns[name][: self._size]
+        view.flags.writeable = False
+        return view
+
+    def to_frame(self):
+        """DataFrame of every field, built on views of the buffers."""
+        return pd.DataFrame(
+            {name: self._columns[name][: self._size] for name, _ in TRADE_FIELDS},
+            copy=False,
+        )
+
+    def _row(self, i):
+        row = {name: self._columns[name][i] for name, _ in TRADE_FIELDS}
+        for name, dtype in TRADE_FIELDS:
+            if dtype is not object:
+                row[name] = row[name].item()
+        for name in NULLABLE_FIELDS:
+            if row[name] != row[name]:
+                row[name] = None
+        return row
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("trade index out of range")
+        return self._row(index)
+
+    def __iter__(self):
+        names = [name for name, _ in TRADE_FIELDS]
+        lists = [self._columns[name][: self._size].tolist() for name in names]
+        nullable = [names.index(name) for name in NULLABLE_FIELDS]
+        for values in zip(*lists):
+            row = dict(zip(names, values))
+            for j in nullable:
+                if values[j] != values[j]:
+                    row[names[j]] = None
+            yield row
+
+    def __repr__(self):
+        return f"TradeLedger({self._size} trades)"
+
+
+def trades_frame(trades):
+    """DataFrame of a TradeLedger (views) or of a plain list of trade dicts."""
+    if isinstance(trades, TradeLedger):
+        return trades.to_frame()
+    return pd.DataFrame(list(trades))
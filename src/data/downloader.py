@@ -4,12 +4,12 @@ import ccxt
 import time
 from datetime import datetime, timezone
 
-from src.core.database import insert_ohlcv_rows, init_db
+from src.core.database import download_since, insert_ohlcv_rows, init_db
 
 
 class BinanceDownloader:
-    def __init__(self):
-        self.exchange = ccxt.binance({
+    def __init__(self, exchange=None):
+        self.exchange = exchange or ccxt.binance({
             "enableRateLimit": True
         })
         self.exchange.load_markets()
@@ -33,10 +33,20 @@ class BinanceDownloader:
         self,
         symbol: str,
         timeframe: str,
-        start_date: str
+        start_date: str,
+        pages_per_commit: int = 10,
+        resume: bool = True
     ):
         """
         start_date: 'YYYY-MM-DD'
+
+        Candles are written every `pages_per_commit` pages (one transaction
+        each), so memory stays bounded and an interrupted download keeps what
+        it already fetched. With resume=True the download continues after the
+        newest candle already stored for the series when start_date falls
+        inside the stored range; an earlier start_date downloads from there.
+
+        Returns the number of candles fetched.
         """
         since = int(
             datetime.strptime(start_date, "%Y-%m-%d")
@@ -44,11 +54,32 @@ class BinanceDownloader:
             .timestamp() * 1000
         )
 
+        if resume:
+            resumed = download_since("binance", symbol, timeframe, since)
+            if resumed != since:
+                since = resumed
+                resumed_at = datetime.fromtimestamp(since / 1000, timezone.utc).isoformat()
+                print(f"Resuming {symbol} {timeframe} from {resumed_at}")
+
         now = self.exchange.milliseconds()
-        all_rows = []
+        pending = []
+        pages = 0
+        total = 0
+        started = time.perf_counter()
 
         print(f"Downloading {symbol} {timeframe} from {start_date}")
 
+        def flush():
+            nonlocal pending, total
+            if not pending:
+                return
+            insert_ohlcv_rows(pending)
+            total += len(pending)
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            last = datetime.fromtimestamp(pending[-1][3] / 1000, timezone.utc).isoformat()
+            print(f"  {total} rows | {total / elapsed:,.0f} rows/s | up to {last}")
+            pending = []
+
         while since < now:
             candles = self.fetch_ohlcv(symbol, timeframe, since)
 
@@ -57,7 +88,7 @@ class BinanceDownloader:
 
             for c in candles:
                 ts, o, h, l, cl, v = c
-                all_rows.append((
+                pending.append((
                     "binance",
                     symbol,
                     timeframe,
@@ -65,8 +96,14 @@ class BinanceDownloader:
                     o, h, l, cl, v
                 ))
 
+            pages += 1
+            if pages % pages_per_commit == 0:
+                flush()
+
             since = candles[-1][0] + 1
             time.sleep(self.exchange.rateLimit / 1000)
 
-        insert_ohlcv_rows(all_rows)
-        print(f"Inserted {len(all_rows)} rows into SQLite")
+        flush()
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(f"Inserted {total} rows into SQLite ({total / elapsed:,.0f} rows/s)")
+        return total
@@ -0,0 +1,115 @@
+# src/data/ingest.py
+
+"""
+Vectorized OHLCV frame -> ohlcv table ingestion.
+
+Shared by the Stooq / Yahoo downloaders and by ingest_files(), which loads
+many tickers from local CSV or Parquet files (e.g. futures histories
+exported elsewhere) without any network access. Parquet needs pyarrow or
+fastparquet installed; CSV needs nothing extra.
+"""
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.core.database import insert_ohlcv_frame
+
+DATE_COLUMNS = ("date", "datetime", "timestamp", "time")
+FILE_READERS = {".csv": pd.read_csv, ".parquet": pd.read_parquet, ".pq": pd.read_parquet}
+
+
+def to_epoch_ms(values):
+    """
+    Dates -> int64 ms, reading the wall time as UTC (the exchange-local day a
+    daily bar belongs to). Integer input is taken as epoch seconds or ms.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values) or pd.api.types.is_float_dtype(values):
+        ints = values.to_numpy(dtype=np.int64)
+        return np.where(ints < 10**12, ints * 1000, ints)
+
+    dt = pd.to_datetime(values)
+    if dt.dt.tz is not None:
+        dt = dt.dt.tz_localize(None)
+    return dt.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+
+
+def normalize_ohlcv_frame(df, start_date=None, end_date=None):
+    """
+    Lower-case the columns, convert the date column to `timestamp` (int64 ms)
+    and keep timestamp/open/high/low/close/volume as numbers, optionally
+    restricted to [start_date, end_date]. Rows missing a price are dropped.
+    """
+    df = df.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [c[0] for c in df.columns]
+    df.columns = [str(c).lower().strip().replace(" ", "_") for c in df.columns]
+
+    date_column = next((c for c in DATE_COLUMNS if c in df.columns), None)
+    if date_column is None:
+        raise ValueError(f"No date column found (expected one of {', '.join(DATE_COLUMNS)})")
+
+    out = pd.DataFrame({"timestamp": to_epoch_ms(df[date_column])})
+    for column in ("open", "high", "low", "close"):
+        out[column] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+    volume = df["volume"] if "volume" in df.columns else 0.0
+    out["volume"] = pd.to_numeric(pd.Series(volume, index=df.index), errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+
+    out = out.dropna(subset=["open", "high", "low", "close"])
+    if start_date is not None:
+        out = out[out["timestamp"] >= to_epoch_ms([start_date])[0]]
+    if end_date is not None:
+        out = out[out["timestamp"] <= to_epoch_ms([end_date])[0]]
+    return out.reset_index(drop=True)
+
+
+def _expand_paths(paths):
+    files = []
+    for path in [paths] if isinstance(paths, (str, os.PathLike)) else paths:
+        path = str(path)
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if os.path.splitext(name)[1].lower() in FILE_READERS
+            ))
+        elif any(ch in path for ch in "*?["):
+            files.extend(sorted(glob.glob(path)))
+        else:
+            files.append(path)
+    return files
+
+
+def read_ohlcv_file(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FILE_READERS:
+        raise ValueError(f"Unsupported file type '{ext}' ({path}); use .csv or .parquet")
+    try:
+        return FILE_READERS[ext](path)
+    except ImportError as exc:
+        raise ImportError(f"Reading {path} needs a Parquet engine: pip install pyarrow") from exc
+
+
+def ingest_files(paths, exchange, timeframe="1d", symbols=None, start_date=None, end_date=None):
+    """
+    Load OHLCV files into the ohlcv table, one series per file.
+
+    paths:   files, directories (every .csv/.parquet inside) or glob patterns
+    symbols: optional {file stem: symbol}; by default the file stem is the
+             symbol ("ES.F.csv" -> "ES.F")
+
+    Returns {symbol: rows read, or the exception for files that failed}.
+    """
+    results = {}
+    for path in _expand_paths(paths):
+        stem = os.path.basename(path)
+        stem = stem[: -len(os.path.splitext(stem)[1])]
+        symbol = (symbols or {}).get(stem, stem)
+        try:
+            frame = normalize_ohlcv_frame(read_ohlcv_file(path), start_date, end_date)
+            results[symbol] = insert_ohlcv_frame(frame, exchange, symbol, timeframe)
+        except (OSError, ValueError, KeyError, ImportError) as exc:
+            results[symbol] = exc
+    return results
@@ -0,0 +1,231 @@
+# src/data/resampler.py
+
+"""
+Higher timeframes derived from stored base candles (normally 1m).
+
+Derived series live in ohlcv_clean next to the sanitized ones, built from the
+clean base series, so every timeframe of a symbol agrees with the others.
+ohlcv_derived_state records each derived series, its base timeframe and the
+last bar written; updates only aggregate base candles from the next bar on
+(or from `since_ts` when base candles before that were rewritten).
+
+Only complete bars are stored: a bar is written once the base series reaches
+its last base candle, so the still-forming bar never lands in the table.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.core.database import ensure_ohlcv_clean_table, get_connection, upsert_ohlcv_clean_rows
+from src.core.ohlcv_cache import invalidate_ohlcv_cache
+
+TIMEFRAME_TO_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "2h": 7_200_000,
+    "4h": 14_400_000,
+    "6h": 21_600_000,
+    "12h": 43_200_000,
+    "1d": 86_400_000,
+    "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+
+# Bars open at multiples of the step since the epoch, except weeks, which
+# Binance opens on Monday 00:00 UTC (the epoch was a Thursday).
+TIMEFRAME_ANCHOR_MS = {"1w": 4 * 86_400_000}
+
+DERIVED_TIMEFRAMES = ("5m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d", "3d", "1w")
+
+
+def bucket_start(ts, timeframe):
+    """Open time (ms) of the `timeframe` bar containing ts (scalar or array)."""
+    step = TIMEFRAME_TO_MS[timeframe]
+    anchor = TIMEFRAME_ANCHOR_MS.get(timeframe, 0)
+    return (np.asarray(ts, dtype=np.int64) - anchor) // step * step + anchor
+
+
+def _check_timeframes(timeframe, base_timeframe):
+    for tf in (timeframe, base_timeframe):
+        if tf not in TIMEFRAME_TO_MS:
+            raise ValueError(f"Unsupported timeframe: {tf}")
+    step, base_step = TIMEFRAME_TO_MS[timeframe], TIMEFRAME_TO_MS[base_timeframe]
+    if step <= base_step or step % base_step:
+        raise ValueError(f"Cannot derive {timeframe} from {base_timeframe}")
+
+
+# -------------------------------------------------
+# AGGREGATION
+# -------------------------------------------------
+def resample_ohlcv(timestamps, open_, high, low, close, volume, timeframe, base_timeframe="1m"):
+    """
+    Aggregate ascending base candles into complete `timeframe` bars.
+    Returns a dict of arrays (timestamp, open, high, low, close, volume).
+    """
+    _check_timeframes(timeframe, base_timeframe)
+    step, base_step = TIMEFRAME_TO_MS[timeframe], TIMEFRAME_TO_MS[base_timeframe]
+
+    ts = np.asarray(timestamps, dtype=np.int64)
+    empty = {k: np.array([], dtype=np.int64 if k == "timestamp" else np.float64)
+             for k in ("timestamp", "open", "high", "low", "close", "volume")}
+    if len(ts) == 0:
+        return empty
+
+    buckets = bucket_start(ts, timeframe)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+
+    bars = {
+        "timestamp": buckets[starts],
+        "open": np.asarray(open_, dtype=np.float64)[starts],
+        "high": np.maximum.reduceat(np.asarray(high, dtype=np.float64), starts),
+        "low": np.minimum.reduceat(np.asarray(low, dtype=np.float64), starts),
+        "close": np.asarray(close, dtype=np.float64)[ends],
+        "volume": np.add.reduceat(np.asarray(volume, dtype=np.float64), starts),
+    }
+
+    # Drop a first bar the base data starts inside of, and a last bar whose
+    # final base candle has not arrived yet.
+    keep = np.ones(len(starts), dtype=bool)
+    keep[0] &= ts[0] == bars["timestamp"][0]
+    keep[-1] &= ts[-1] >= bars["timestamp"][-1] + step - base_step
+    if keep.all():
+        return bars
+    if not keep.any():
+        return empty
+    return {k: v[keep] for k, v in bars.items()}
+
+
+# -------------------------------------------------
+# DERIVED SERIES
+# -------------------------------------------------
+def _ensure_state_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ohlcv_derived_state (
+            exchange TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            base_timeframe TEXT NOT NULL,
+            last_ts INTEGER,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (exchange, symbol, timeframe)
+        )
+    """)
+
+
+def derived_timeframes(conn, exchange, symbol, base_timeframe="1m"):
+    """Timeframes registered as derived from the base series."""
+    cur = conn.cursor()
+    _ensure_state_table(cur)
+    cur.execute(
+        "SELECT timeframe FROM ohlcv_derived_state WHERE exchange = ? AND symbol = ? AND base_timeframe = ?",
+        (exchange, symbol, base_timeframe),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def update_derived_series(conn, exchange, symbol, timeframes, base_timeframe="1m",
+                          since_ts=None, full_rebuild=False):
+    """
+    Build or extend derived `timeframes` of a series from its clean base
+    candles, reading the base series once. since_ts forces re-aggregation of
+    every bar from the one containing since_ts (base candles rewritten).
+
+    Returns {timeframe: bars written}. Commits on `conn`.
+    """
+    cur = conn.cursor()
+    ensure_ohlcv_clean_table(cur)
+    _ensure_state_table(cur)
+
+    starts = {}
+    for timeframe in timeframes:
+        _check_timeframes(timeframe, base_timeframe)
+        cur.execute(
+            "SELECT last_ts FROM ohlcv_derived_state WHERE exchange = ? AND symbol = ? AND timeframe = ?",
+            (exchange, symbol, timeframe),
+        )
+        row = cur.fetchone()
+        if full_rebuild or row is None or row[0] is None:
+            starts[timeframe] = None
+            continue
+        start = int(row[0]) + TIMEFRAME_TO_MS[timeframe]
+        if since_ts is not None:
+            start = min(start, int(bucket_start(since_ts, timeframe)))
+        starts[timeframe] = start
+
+    if not starts:
+        return {}
+
+    read_from = None if any(s is None for s in starts.values()) else min(starts.values())
+    base = pd.read_sql_query(
+        """
+        SELECT timestamp, open, high, low, close, volume
+        FROM ohlcv_clean
+        WHERE exchange = ?
+          AND symbol = ?
+          AND timeframe = ?
+          AND timestamp >= ?
+        ORDER BY timestamp ASC
+        """,
+        conn,
+        params=(exchange, symbol, base_timeframe, -1 if read_from is None else read_from),
+    )
+    base_ts = base["timestamp"].to_numpy(dtype=np.int64)
+
+    written = {}
+    now = datetime.now(timezone.utc).isoformat()
+    for timeframe, start in starts.items():
+        lo = 0 if start is None else int(np.searchsorted(base_ts, start, side="left"))
+        bars = resample_ohlcv(
+            base_ts[lo:],
+            *(base[c].to_numpy()[lo:] for c in ("open", "high", "low", "close", "volume")),
+            timeframe=timeframe,
+            base_timeframe=base_timeframe,
+        )
+
+        if start is None:
+            cur.execute(
+                "DELETE FROM ohlcv_clean WHERE exchange = ? AND symbol = ? AND timeframe = ?",
+                (exchange, symbol, timeframe),
+            )
+        n = len(bars["timestamp"])
+        if n:
+            upsert_ohlcv_clean_rows(
+                zip([exchange] * n, [symbol] * n, [timeframe] * n, bars["timestamp"].tolist(),
+                    *(bars[c].tolist() for c in ("open", "high", "low", "close", "volume"))),
+                conn=conn,
+            )
+
+        last_ts = int(bars["timestamp"][-1]) if n else None
+        if last_ts is None and start is not None:
+            last_ts = start - TIMEFRAME_TO_MS[timeframe]
+        cur.execute(
+            """
+            INSERT OR REPLACE INTO ohlcv_derived_state
+                (exchange, symbol, timeframe, base_timeframe, last_ts, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (exchange, symbol, timeframe, base_timeframe, last_ts, now),
+        )
+        written[timeframe] = n
+
+    conn.commit()
+    for timeframe, n in written.items():
+        if n:
+            invalidate_ohlcv_cache(exchange, symbol, timeframe, table="ohlcv_clean")
+    return written
+
+
+def derive_timeframes(exchange, symbol, timeframes=DERIVED_TIMEFRAMES, base_timeframe="1m", full_rebuild=False):
+    """update_derived_series on the pooled connection."""
+    conn = get_connection()
+    try:
+        return update_derived_series(conn, exchange, symbol, timeframes, base_timeframe, full_rebuild=full_rebuild)
+    finally:
+        conn.close()
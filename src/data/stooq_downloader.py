@@ -1,12 +1,12 @@
 # src/data/stooq_downloader.py
 
 import io
-from datetime import datetime, timezone
 
 import pandas as pd
 import requests
 
-from src.core.database import insert_ohlcv_rows
+from src.core.database import insert_ohlcv_frame
+from src.data.ingest import normalize_ohlcv_frame
 
 
 class StooqDownloader:
@@ -29,34 +29,5 @@ class StooqDownloader:
         if "date" not in df.columns:
             return 0
 
-        df["date"] = pd.to_datetime(df["date"], utc=True)
-
-        start_dt = pd.to_datetime(start_date, utc=True)
-        end_dt = pd.to_datetime(end_date, utc=True)
-
-        df = df[(df["date"] >= start_dt) & (df["date"] <= end_dt)].copy()
-        if df.empty:
-            return 0
-
-        if "volume" not in df.columns:
-            df["volume"] = 0.0
-
-        rows = []
-        for _, row in df.iterrows():
-            ts = int(row["date"].replace(tzinfo=timezone.utc).timestamp() * 1000)
-            rows.append(
-                (
-                    "stooq",
-                    symbol_label,
-                    "1d",
-                    ts,
-                    float(row["open"]),
-                    float(row["high"]),
-                    float(row["low"]),
-                    float(row["close"]),
-                    float(row["volume"]),
-                )
-            )
-
-        insert_ohlcv_rows(rows)
-        return len(rows)
+        df = normalize_ohlcv_frame(df, start_date=start_date, end_date=end_date)
+        return insert_ohlcv_frame(df, "stooq", symbol_label, "1d")
@@ -0,0 +1,179 @@
+# src/data/universe_downloader.py
+
+"""
+Concurrent Binance backfill for many symbols x timeframes.
+
+One thread per series fetches pages; every request takes a token from a
+single shared TokenBucket, so the whole universe stays under the exchange
+limit however many workers run. Fetched pages go into a queue drained by
+one writer thread, which batches them into insert_ohlcv_rows, so SQLite
+only ever sees one writer.
+
+The exchange object is injectable (anything with load_markets,
+milliseconds, fetch_ohlcv and rateLimit), which is how the selftest runs
+it against a fake.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import ccxt
+
+from src.core.database import download_since, init_db, insert_ohlcv_rows
+
+NETWORK_RETRIES = 3
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/s, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class OhlcvWriter(threading.Thread):
+    """Single SQLite writer: batches queued rows into one transaction per `batch_rows`."""
+
+    _STOP = object()
+
+    def __init__(self, batch_rows=10_000, max_pending_pages=64):
+        super().__init__(name="ohlcv-writer", daemon=True)
+        self.batch_rows = batch_rows
+        self.queue = queue.Queue(maxsize=max_pending_pages)
+        self.rows_written = 0
+        self.error = None
+
+    def put(self, rows):
+        if self.error is not None:
+            raise RuntimeError("OHLCV writer failed") from self.error
+        self.queue.put(rows)
+
+    def close(self):
+        self.queue.put(self._STOP)
+        self.join()
+        if self.error is not None:
+            raise RuntimeError("OHLCV writer failed") from self.error
+
+    def run(self):
+        pending = []
+        while True:
+            try:
+                item = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not self._STOP:
+                pending.extend(item)
+
+            if pending and (item is None or item is self._STOP or len(pending) >= self.batch_rows):
+                try:
+                    insert_ohlcv_rows(pending)
+                    self.rows_written += len(pending)
+                except Exception as exc:
+                    self.error = exc
+                pending = []
+
+            if item is self._STOP:
+                return
+
+
+class UniverseDownloader:
+    def __init__(self, exchange=None, max_workers=4, requests_per_second=None, batch_rows=10_000):
+        # ccxt's own throttle is per call and not thread-safe; the bucket
+        # replaces it.
+        self.exchange = exchange or ccxt.binance({
+            "enableRateLimit": False
+        })
+        self.exchange.load_markets()
+        init_db()
+
+        if requests_per_second is None:
+            requests_per_second = 1000 / max(self.exchange.rateLimit, 1)
+        self.limiter = TokenBucket(requests_per_second, capacity=max(1, max_workers))
+        self.max_workers = max_workers
+        self.batch_rows = batch_rows
+
+    def _fetch_page(self, symbol, timeframe, since, limit):
+        for attempt in range(NETWORK_RETRIES + 1):
+            self.limiter.acquire()
+            try:
+                return self.exchange.fetch_ohlcv(symbol=symbol, timeframe=timeframe, since=since, limit=limit)
+            except ccxt.NetworkError:
+                if attempt == NETWORK_RETRIES:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def _backfill(self, writer, symbol, timeframe, since, now, limit):
+        since = download_since("binance", symbol, timeframe, since)
+
+        fetched = 0
+        while since < now:
+            candles = self._fetch_page(symbol, timeframe, since, limit)
+            if not candles:
+                break
+            writer.put([("binance", symbol, timeframe, ts, o, h, l, cl, v) for ts, o, h, l, cl, v in candles])
+            fetched += len(candles)
+            since = candles[-1][0] + 1
+        return fetched
+
+    def download(self, symbols, timeframes, start_date, limit=1000):
+        """
+        Backfill every (symbol, timeframe) from start_date ('YYYY-MM-DD'),
+        resuming each series after its newest stored candle when start_date
+        falls inside its stored range.
+
+        Returns {(symbol, timeframe): candles fetched, or the exception}.
+        """
+        since = int(
+            datetime.strptime(start_date, "%Y-%m-%d")
+            .replace(tzinfo=timezone.utc)
+            .timestamp() * 1000
+        )
+        now = self.exchange.milliseconds()
+        series = [(symbol, timeframe) for symbol in symbols for timeframe in timeframes]
+
+        writer = OhlcvWriter(batch_rows=self.batch_rows)
+        writer.start()
+        started = time.perf_counter()
+        results = {}
+
+        print(f"Downloading {len(series)} series from {start_date} with {self.max_workers} workers")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(self._backfill, writer, symbol, timeframe, since, now, limit): (symbol, timeframe)
+                    for symbol, timeframe in series
+                }
+                for future, key in futures.items():
+                    try:
+                        results[key] = future.result()
+                        print(f"  {key[0]} {key[1]}: {results[key]} rows")
+                    except Exception as exc:
+                        results[key] = exc
+                        print(f"  {key[0]} {key[1]}: FAILED ({exc})")
+        finally:
+            writer.close()
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(f"Inserted {writer.rows_written} rows into SQLite ({writer.rows_written / elapsed:,.0f} rows/s)")
+        return results
@@ -6,7 +6,8 @@ import pandas as pd
 from src.core.data import fetch_ohlcv
 from src.core.backtester_v2 import BacktesterV2
 from src.core.reporting import generate_quantstats_report
-from src.strategies.basic_keltner_reversion.strategy import keltner_reversion
+from src.core.trade_ledger import trades_frame
+from src.strategies.basic_keltner_reversion.strategy import KeltnerReversionState
 
 
 def export_trades_csv(trades, output_dir, run_id, metadata):
@@ -14,13 +15,12 @@ def export_trades_csv(trades, output_dir, run_id, metadata):
         print("[WARN] No trades to export")
         return None, None
 
-    df = pd.DataFrame(trades)
+    df = trades_frame(trades)
     df["entry_time"] = pd.to_datetime(df["entry_time"], utc=True)
     df["exit_time"] = pd.to_datetime(df["exit_time"], utc=True)
 
     df["pnl_pct"] = ((df["exit_price"] - df["entry_price"]) / df["entry_price"] * 100).round(3)
     df["net_return_pct"] = ((df["net_pnl"] / df["position_size"]) * 100).round(3)
-    df["result"] = df["net_pnl"].apply(lambda x: "WIN" if x > 0 else "LOSS")
     df["balance"] = df["cash_after_trade"].round(6)
 
     for key, value in metadata.items():
@@ -99,33 +99,35 @@ def run_backtest_basic_keltner_reversion_v2(
         pyramiding=pyramiding,
     )
 
-    warmup = max(int(kc_ema_length), int(kc_atr_length)) + 1
-    for i in range(warmup, len(df)):
-        bar = df.iloc[i]
-        timestamp = bar["timestamp"]
-        price = bar["close"]
+    kc_state = KeltnerReversionState(
+        ema_length=kc_ema_length,
+        atr_length=kc_atr_length,
+        atr_mult=kc_atr_mult,
+    )
+    timestamps = df["timestamp"].tolist()
+    highs = df["high"].to_numpy(dtype=float)
+    lows = df["low"].to_numpy(dtype=float)
+    closes = df["close"].to_numpy(dtype=float)
 
-        bt.on_bar(high=bar["high"], low=bar["low"], timestamp=timestamp, bar_index=i)
+    warmup = max(int(kc_ema_length), int(kc_atr_length)) + 1
+    for i in range(len(df)):
+        # Indicator state must see every bar, trading starts after warmup.
+        signal, trigger = kc_state.update(highs[i], lows[i], closes[i])
+        if i < warmup:
+            continue
 
-        signal, trigger = keltner_reversion(
-            df.iloc[: i + 1],
-            ema_length=kc_ema_length,
-            atr_length=kc_atr_length,
-            atr_mult=kc_atr_mult,
-        )
+        timestamp = timestamps[i]
+        price = closes[i]
 
+        bt.on_bar(high=highs[i], low=lows[i], timestamp=timestamp, bar_index=i)
         bt.on_signal(signal, price, timestamp, trigger, i)
 
+    bt.mark_to_market(closes, timestamps)
     stats = bt.stats()
     clean_stats = {k: v.item() if hasattr(v, "item") else v for k, v in stats.items()}
 
-    equity = []
-    equity_dates = []
-    current_equity = bt.initial_capital
-    for t in bt.trades:
-        current_equity += t["net_pnl"]
-        equity.append(current_equity)
-        equity_dates.append(t["exit_time"])
+    equity = bt.bar_equity
+    equity_dates = timestamps
 
     chart_rel = None
     if generate_equity:
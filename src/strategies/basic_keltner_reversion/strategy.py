@@ -1,6 +1,8 @@
 import pandas as pd
 import pandas_ta as ta
 
+from src.core.streaming_ta import ATR, EMA
+
 
 def keltner_reversion(
     df: pd.DataFrame,
@@ -35,3 +37,44 @@ def keltner_reversion(
         return "EXIT", "KC_EXIT_SHORT"
 
     return None, None
+
+
+class KeltnerReversionState:
+    """
+    Streaming keltner_reversion: feed one bar at a time instead of re-running
+    ta.ema / ta.atr on the whole prefix. update() returns what
+    keltner_reversion(df.iloc[:i + 1]) returns for the bar just added.
+    """
+
+    def __init__(self, ema_length=20, atr_length=20, atr_mult=1.5):
+        self.ema = EMA(int(ema_length))
+        self.atr = ATR(int(atr_length))
+        self.atr_mult = float(atr_mult)
+        # ta.ema needs ema_length rows, ta.atr needs atr_length + 1.
+        self.min_bars = max(int(ema_length), int(atr_length) + 1)
+        self.count = 0
+
+    def update(self, high, low, close):
+        ema = self.ema.update(close)
+        atr = self.atr.update(high, low, close)
+        self.count += 1
+
+        if self.count < self.min_bars or ema is None or atr is None:
+            return None, None
+
+        upper = ema + atr * self.atr_mult
+        lower = ema - atr * self.atr_mult
+
+        if close < lower:
+            return "LONG", "KC_LONG"
+
+        if close > upper:
+            return "SHORT", "KC_SHORT"
+
+        if close >= ema:
+            return "EXIT", "KC_EXIT_LONG"
+
+        if close <= ema:
+            return "EXIT", "KC_EXIT_SHORT"
+
+        return None, None
@@ -1,13 +1,15 @@
 import os
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+import numpy as np
 import pandas as pd
 
 from src.core.data import fetch_ohlcv
-from src.core.backtester_v2 import BacktesterV2
+from src.core.backtester_vectorized import SIGNAL_LONG, VectorizedBacktester
 from src.core.reporting import generate_quantstats_report
 from src.core.ta import compute_atr
-from src.strategies.donchian_breakout.strategy import compute_donchian, check_signal
+from src.core.trade_ledger import trades_frame
+from src.strategies.donchian_breakout.strategy import compute_donchian, compute_signals
 
 
 def export_trades_csv(trades, output_dir, run_id, metadata):
@@ -15,7 +17,7 @@ def export_trades_csv(trades, output_dir, run_id, metadata):
         print("[WARN] No trades to export")
         return None, None
 
-    df = pd.DataFrame(trades)
+    df = trades_frame(trades)
 
     df["entry_time"] = pd.to_datetime(df["entry_time"], utc=True)
     df["exit_time"] = pd.to_datetime(df["exit_time"], utc=True)
@@ -28,7 +30,6 @@ def export_trades_csv(trades, output_dir, run_id, metadata):
         (df["net_pnl"] / df["position_size"]) * 100
     ).round(3)
 
-    df["result"] = df["net_pnl"].apply(lambda x: "WIN" if x > 0 else "LOSS")
     df["balance"] = df["cash_after_trade"].round(6)
 
     for key, value in metadata.items():
@@ -137,7 +138,17 @@ def run_backtest_donchian_breakout_v2(
 
     atr_series = compute_atr(df, atr_period) if atr_period else None
 
-    bt = BacktesterV2(
+    # The signal for bar i is read from the previous closed bar (i - 1).
+    row_signals, row_triggers = compute_signals(df, int(donchian_lookback))
+    signals = np.zeros(len(df), dtype=np.int8)
+    triggers = np.full(len(df), None, dtype=object)
+    signals[1:] = row_signals[:-1]
+    triggers[1:] = row_triggers[:-1]
+
+    if atr_series is not None:
+        signals[(signals == SIGNAL_LONG) & atr_series.isna().to_numpy()] = 0
+
+    bt = VectorizedBacktester(
         initial_capital=initial_balance,
         position_mode=position_mode,
         trade_size=trade_size,
@@ -152,42 +163,22 @@ def run_backtest_donchian_breakout_v2(
         position_pct=position_pct,
     )
 
-    for i in range(int(donchian_lookback) + 1, len(df)):
-        slice_df = df.iloc[:i].copy()
-        current_bar = df.iloc[i]
-
-        high = current_bar["high"]
-        low = current_bar["low"]
-        price = current_bar["close"]
-        timestamp = current_bar["timestamp"]
-
-        bt.on_bar(high=high, low=low, timestamp=timestamp, bar_index=i)
-
-        current_side = bt.position["side"] if bt.position else None
-        signal, trigger = check_signal(slice_df, int(donchian_lookback), current_side=current_side)
-
-        atr_value = None
-        if atr_series is not None:
-            atr_raw = atr_series.iloc[i]
-            if pd.notna(atr_raw):
-                atr_value = float(atr_raw)
-
-        if signal == "LONG" and atr_series is not None and atr_value is None:
-            continue
-
-        bt.on_signal(signal, price, timestamp, trigger, i, atr_value=atr_value)
+    bt.run(
+        timestamps=df["timestamp"],
+        high=df["high"],
+        low=df["low"],
+        close=df["close"],
+        signals=signals,
+        triggers=triggers,
+        atr=atr_series,
+        start=int(donchian_lookback) + 1,
+    )
 
     stats = bt.stats()
     clean_stats = {k: v.item() if hasattr(v, "item") else v for k, v in stats.items()}
 
-    equity = []
-    equity_dates = []
-    current_equity = bt.initial_capital
-
-    for t in bt.trades:
-        current_equity += t["net_pnl"]
-        equity.append(current_equity)
-        equity_dates.append(t["exit_time"])
+    equity = bt.bar_equity
+    equity_dates = df["timestamp"]
 
     DB_equity_path = None
     if generate_equity:
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from src.core.backtester_vectorized import SIGNAL_EXIT_LONG, SIGNAL_LONG
+
 
 def compute_donchian(df: pd.DataFrame, lookback: int) -> pd.DataFrame:
     df = df.copy()
@@ -21,3 +24,22 @@ def check_signal(df, lookback: int, current_side=None):
         return "EXIT", f"Donchian exit below {lookback} low"
 
     return None, None
+
+
+def compute_signals(df, lookback: int):
+    """Whole-frame version of check_signal on a compute_donchian() frame."""
+    close = df["close"].to_numpy(dtype=float)
+    warm = np.arange(len(df)) >= lookback
+
+    long_entry = warm & (close > df["donchian_high"].to_numpy(dtype=float))
+    long_exit = warm & ~long_entry & (close < df["donchian_low"].to_numpy(dtype=float))
+
+    signals = np.zeros(len(df), dtype=np.int8)
+    signals[long_entry] = SIGNAL_LONG
+    signals[long_exit] = SIGNAL_EXIT_LONG
+
+    triggers = np.full(len(df), None, dtype=object)
+    triggers[long_entry] = f"Donchian breakout above {lookback} high"
+    triggers[long_exit] = f"Donchian exit below {lookback} low"
+
+    return signals, triggers
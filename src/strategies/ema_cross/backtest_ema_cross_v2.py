@@ -1,14 +1,16 @@
 import os
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+import numpy as np
 import pandas as pd
 
 from flask import current_app
 from src.core.data import fetch_ohlcv
-from src.core.backtester_v2 import BacktesterV2
+from src.core.backtester_vectorized import SIGNAL_LONG, SIGNAL_SHORT, VectorizedBacktester
 from src.core.reporting import generate_quantstats_report
-from src.core.ta import compute_adx, compute_atr
-from src.strategies.ema_cross.strategy import check_signal
+from src.core.ta import compute_adx, compute_atr, compute_ema
+from src.core.trade_ledger import trades_frame
+from src.strategies.ema_cross.strategy import compute_signals
 from src.visualization.plot_trades import plot_trades_by_date
 from src.core.plotting.plot_trades import plot_trades
 
@@ -18,7 +20,7 @@ def export_trades_csv(trades, output_dir, run_id, metadata, prefix="ema_cross_v2
         print("[WARN] No trades to export")
         return None, None
 
-    df = pd.DataFrame(trades)
+    df = trades_frame(trades)
 
     df["entry_time"] = pd.to_datetime(df["entry_time"], utc=True)
     df["exit_time"] = pd.to_datetime(df["exit_time"], utc=True)
@@ -35,7 +37,6 @@ def export_trades_csv(trades, output_dir, run_id, metadata, prefix="ema_cross_v2
         (df["exit_time"] - df["entry_time"]).dt.total_seconds() / 60
     ).round(2)
 
-    df["result"] = df["net_pnl"].apply(lambda x: "WIN" if x > 0 else "LOSS")
 
     df["balance"] = df["cash_after_trade"].round(6)
 
@@ -150,16 +151,35 @@ def run_backtest_ema_cross_v2(
         use_clean=use_clean,
     )
 
-    df["ema_fast"] = df["close"].ewm(span=ema_fast, adjust=False).mean()
-    df["ema_slow"] = df["close"].ewm(span=ema_slow, adjust=False).mean()
+    df["ema_fast"] = compute_ema(df["close"], ema_fast)
+    df["ema_slow"] = compute_ema(df["close"], ema_slow)
 
     atr_series = compute_atr(df, atr_period) if atr_period else None
     adx_series = compute_adx(df, adx_period) if adx_period else None
 
     # --------------------------------------------------
-    # 2) Backtester V2
+    # 2) Señales (una sola pasada sobre todo el frame)
     # --------------------------------------------------
-    bt = BacktesterV2(
+    # check_signal se evaluaba sobre df.iloc[:i], es decir la vela cerrada
+    # anterior: la señal de la fila i-1 se ejecuta en la vela i.
+    row_signals, row_triggers = compute_signals(df, ema_fast, ema_slow)
+    signals = np.zeros(len(df), dtype=np.int8)
+    triggers = np.full(len(df), None, dtype=object)
+    signals[1:] = row_signals[:-1]
+    triggers[1:] = row_triggers[:-1]
+
+    is_entry = (signals == SIGNAL_LONG) | (signals == SIGNAL_SHORT)
+    if atr_series is not None:
+        signals[is_entry & atr_series.isna().to_numpy()] = 0
+    if adx_series is not None and adx_threshold is not None:
+        adx_values = adx_series.to_numpy(dtype=float)
+        adx_blocked = np.isnan(adx_values) | (adx_values < float(adx_threshold))
+        signals[is_entry & adx_blocked] = 0
+
+    # --------------------------------------------------
+    # 3) Backtester (vectorizado, mismas reglas que BacktesterV2)
+    # --------------------------------------------------
+    bt = VectorizedBacktester(
         initial_capital=initial_balance,
         position_mode=position_mode,
         trade_size=trade_size,
@@ -174,51 +194,17 @@ def run_backtest_ema_cross_v2(
         position_pct=position_pct,
     )
 
-    # --------------------------------------------------
-    # 3) Loop vela a vela
-    # --------------------------------------------------
-    for i in range(ema_slow + 1, len(df)):
-
-        slice_df = df.iloc[:i].copy()
-
-        current_bar = df.iloc[i]
-
-        high = current_bar["high"]
-        low = current_bar["low"]
-        price = current_bar["close"]
-        timestamp = current_bar["timestamp"]
-
-        # 1️⃣ Primero chequeamos stop intrabar
-        bt.on_bar(
-            high=high,
-            low=low,
-            timestamp=timestamp,
-            bar_index=i
-        )
-
-        # 2️⃣ Después calculamos señal EMA
-        current_side = bt.position["side"] if bt.position else None
-        signal, trigger = check_signal(slice_df, ema_fast, ema_slow, current_side=current_side)
-
-        # 3️⃣ Ejecutamos señal
-        atr_value = None
-        if atr_series is not None:
-            atr_raw = atr_series.iloc[i]
-            if pd.notna(atr_raw):
-                atr_value = float(atr_raw)
-
-        if signal in {"LONG", "SHORT"}:
-            if atr_series is not None and atr_value is None:
-                continue
-
-            if adx_series is not None and adx_threshold is not None:
-                adx_raw = adx_series.iloc[i]
-                if pd.isna(adx_raw) or float(adx_raw) < float(adx_threshold):
-                    continue
-
-        bt.on_signal(signal, price, timestamp, trigger, i, atr_value=atr_value)
+    bt.run(
+        timestamps=df["timestamp"],
+        high=df["high"],
+        low=df["low"],
+        close=df["close"],
+        signals=signals,
+        triggers=triggers,
+        atr=atr_series,
+        start=ema_slow + 1,
+    )
 
-   
     # --------------------------------------------------
     # 4) Stats
     # --------------------------------------------------
@@ -231,14 +217,8 @@ def run_backtest_ema_cross_v2(
     # --------------------------------------------------
     # 5) Equity Curve (compatible)
     # --------------------------------------------------
-    equity = []
-    equity_dates = []
-    current_equity = bt.initial_capital
-
-    for t in bt.trades:
-        current_equity += t["net_pnl"]
-        equity.append(current_equity)
-        equity_dates.append(t["exit_time"])
+    equity = bt.bar_equity
+    equity_dates = df["timestamp"]
 
     DB_equity_path = None
     if generate_equity:
@@ -3,7 +3,7 @@ import time
 from src.core.clock import wait_for_new_candle
 from src.core.data import fetch_ohlcv
 from src.strategies.ema_cross import config
-from src.strategies.ema_cross.strategy import check_signal
+from src.strategies.ema_cross.strategy import EmaCrossState
 
 position = None
 
@@ -26,25 +26,29 @@ def run():
 
     timeframe_seconds = timeframe_to_seconds(config.TIMEFRAME)
 
+    # EMA state survives between candles; after the first full load only
+    # candles newer than last_timestamp are fetched.
+    state = EmaCrossState(config.EMA_FAST, config.EMA_SLOW)
+    last_timestamp = None
+
     while True:
         wait_for_new_candle(timeframe_seconds)
         df = fetch_ohlcv(
             exchange=config.EXCHANGE,
             symbol=config.SYMBOL,
             timeframe=config.TIMEFRAME,
+            start_date=last_timestamp + 1 if last_timestamp is not None else None,
             use_clean=True,
         )
 
-        if df is None or len(df) < 2:
+        if df is None or df.empty or (last_timestamp is None and len(df) < 2):
             time.sleep(5)
             continue
 
-        signal, trigger = check_signal(
-            df,
-            config.EMA_FAST,
-            config.EMA_SLOW,
-            current_side=position,
-        )
+        signal, trigger = None, None
+        for close in df["close"]:
+            signal, trigger = state.update(float(close), current_side=position)
+        last_timestamp = int(df["timestamp"].iloc[-1].timestamp() * 1000)
 
         if signal == "LONG" and position != "LONG":
             position = "LONG"
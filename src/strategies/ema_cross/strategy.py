@@ -1,3 +1,14 @@
+import numpy as np
+
+from src.core.backtester_vectorized import (
+    SIGNAL_EXIT_LONG,
+    SIGNAL_EXIT_SHORT,
+    SIGNAL_LONG,
+    SIGNAL_SHORT,
+)
+from src.core.streaming_ta import EMA
+
+
 def ema(series, period):
     return series.ewm(span=period, adjust=False).mean()
 
@@ -27,3 +38,94 @@ def check_signal(df, fast, slow, trend_period=200, current_side=None):
         return None, f"Blocked SHORT above EMA{trend_period}"
 
     return None, None
+
+
+class EmaCrossState:
+    """
+    Streaming check_signal for the live runner: keeps the three EMAs as
+    O(1) state, so each new candle costs the same regardless of history.
+    update(close) returns what check_signal returns on the frame ending there.
+    """
+
+    def __init__(self, fast, slow, trend_period=200):
+        self.fast = fast
+        self.slow = slow
+        self.trend_period = trend_period
+        self.ema_fast = EMA(fast, presma=False)
+        self.ema_slow = EMA(slow, presma=False)
+        self.ema_trend = EMA(trend_period, presma=False)
+        self.prev_fast = None
+        self.prev_slow = None
+        self.count = 0
+
+    def update(self, close, current_side=None):
+        prev_fast, prev_slow = self.prev_fast, self.prev_slow
+        last_fast = self.ema_fast.update(close)
+        last_slow = self.ema_slow.update(close)
+        last_trend = self.ema_trend.update(close)
+        self.prev_fast, self.prev_slow = last_fast, last_slow
+        self.count += 1
+
+        if self.count < max(self.slow, self.trend_period) + 1:
+            return None, None
+
+        fast, slow, trend_period = self.fast, self.slow, self.trend_period
+
+        if prev_fast < prev_slow and last_fast > last_slow:
+            if close > last_trend:
+                return "LONG", f"EMA{fast} crossed ABOVE EMA{slow} + EMA{trend_period} filter"
+            if current_side == "SHORT":
+                return "EXIT", f"EMA{fast} crossed ABOVE EMA{slow} (exit short)"
+            return None, f"Blocked LONG below EMA{trend_period}"
+
+        if prev_fast > prev_slow and last_fast < last_slow:
+            if close < last_trend:
+                return "SHORT", f"EMA{fast} crossed BELOW EMA{slow} + EMA{trend_period} filter"
+            if current_side == "LONG":
+                return "EXIT", f"EMA{fast} crossed BELOW EMA{slow} (exit long)"
+            return None, f"Blocked SHORT above EMA{trend_period}"
+
+        return None, None
+
+
+def compute_signals(df, fast, slow, trend_period=200):
+    """
+    Whole-frame version of check_signal.
+
+    Row r holds what check_signal(df.iloc[:r + 1]) returns, as VectorizedBacktester
+    signal codes; EXIT only applies to the side it closes, so it is encoded as
+    SIGNAL_EXIT_SHORT / SIGNAL_EXIT_LONG.
+    """
+    close = df["close"].to_numpy(dtype=float)
+    ema_fast = ema(df["close"], fast).to_numpy()
+    ema_slow = ema(df["close"], slow).to_numpy()
+    ema_trend = ema(df["close"], trend_period).to_numpy()
+
+    signals = np.zeros(len(df), dtype=np.int8)
+    triggers = np.full(len(df), None, dtype=object)
+    if len(df) < 2:
+        return signals, triggers
+
+    cross_up = np.zeros(len(df), dtype=bool)
+    cross_down = np.zeros(len(df), dtype=bool)
+    cross_up[1:] = (ema_fast[:-1] < ema_slow[:-1]) & (ema_fast[1:] > ema_slow[1:])
+    cross_down[1:] = (ema_fast[:-1] > ema_slow[:-1]) & (ema_fast[1:] < ema_slow[1:])
+
+    warm = np.arange(len(df)) >= max(slow, trend_period)
+    cross_up &= warm
+    cross_down &= warm
+
+    long_entry = cross_up & (close > ema_trend)
+    short_entry = cross_down & (close < ema_trend)
+
+    signals[long_entry] = SIGNAL_LONG
+    signals[cross_up & ~long_entry] = SIGNAL_EXIT_SHORT
+    signals[short_entry] = SIGNAL_SHORT
+    signals[cross_down & ~short_entry] = SIGNAL_EXIT_LONG
+
+    triggers[long_entry] = f"EMA{fast} crossed ABOVE EMA{slow} + EMA{trend_period} filter"
+    triggers[cross_up & ~long_entry] = f"EMA{fast} crossed ABOVE EMA{slow} (exit short)"
+    triggers[short_entry] = f"EMA{fast} crossed BELOW EMA{slow} + EMA{trend_period} filter"
+    triggers[cross_down & ~short_entry] = f"EMA{fast} crossed BELOW EMA{slow} (exit long)"
+
+    return signals, triggers
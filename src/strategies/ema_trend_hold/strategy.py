@@ -1,8 +1,10 @@
 import pandas as pd
 
+from src.core.ta import compute_ema
+
 
 def compute_trend_ema(series: pd.Series, period: int) -> pd.Series:
-    return series.ewm(span=period, adjust=False).mean()
+    return compute_ema(series, period)
 
 
 def check_signal(price, trend_value, trend_period, current_side=None):
@@ -6,7 +6,8 @@ import pandas as pd
 from src.core.data import fetch_ohlcv
 from src.core.backtester_v2 import BacktesterV2
 from src.core.reporting import generate_quantstats_report
-from src.strategies.emalyarovich_smas.strategy import compute_smas, check_signal
+from src.core.trade_ledger import trades_frame
+from src.strategies.emalyarovich_smas.strategy import check_signal_at, compute_smas
 
 
 def export_trades_csv(trades, output_dir, run_id, metadata):
@@ -14,7 +15,7 @@ def export_trades_csv(trades, output_dir, run_id, metadata):
         print("[WARN] No trades to export")
         return None, None
 
-    df = pd.DataFrame(trades)
+    df = trades_frame(trades)
 
     df["entry_time"] = pd.to_datetime(df["entry_time"], utc=True)
     df["exit_time"] = pd.to_datetime(df["exit_time"], utc=True)
@@ -27,7 +28,6 @@ def export_trades_csv(trades, output_dir, run_id, metadata):
         (df["net_pnl"] / df["position_size"]) * 100
     ).round(3)
 
-    df["result"] = df["net_pnl"].apply(lambda x: "WIN" if x > 0 else "LOSS")
     df["balance"] = df["cash_after_trade"].round(6)
 
     for key, value in metadata.items():
@@ -150,18 +150,26 @@ def run_backtest_emalyarovich_smas_v2(
         position_pct=position_pct,
     )
 
-    for i in range(max(sma_fast, sma_slow, slope_bars) + 1, len(df)):
-        current_bar = df.iloc[i]
-        price = current_bar["close"]
-        high = current_bar["high"]
-        low = current_bar["low"]
-        timestamp = current_bar["timestamp"]
-
-        bt.on_bar(high=high, low=low, timestamp=timestamp, bar_index=i)
+    timestamps = df["timestamp"].tolist()
+    highs = df["high"].to_numpy(dtype=float)
+    lows = df["low"].to_numpy(dtype=float)
+    closes = df["close"].to_numpy(dtype=float)
+    sma_fast_values = df["sma_fast"].to_numpy(dtype=float)
+    sma_slow_values = df["sma_slow"].to_numpy(dtype=float)
 
-        current_side = bt.position["side"] if bt.position else None
-        signal, trigger = check_signal(
-            df.iloc[:i + 1],
+    for i in range(max(sma_fast, sma_slow, slope_bars) + 1, len(df)):
+        price = closes[i]
+        timestamp = timestamps[i]
+
+        bt.on_bar(high=highs[i], low=lows[i], timestamp=timestamp, bar_index=i)
+
+        current_side = bt.position.side if bt.position else None
+        signal, trigger = check_signal_at(
+            i,
+            closes,
+            lows,
+            sma_fast_values,
+            sma_slow_values,
             sma_fast,
             sma_slow,
             slope_bars,
@@ -170,17 +178,12 @@ def run_backtest_emalyarovich_smas_v2(
 
         bt.on_signal(signal, price, timestamp, trigger, i)
 
+    bt.mark_to_market(closes, timestamps)
     stats = bt.stats()
     clean_stats = {k: v.item() if hasattr(v, "item") else v for k, v in stats.items()}
 
-    equity = []
-    equity_dates = []
-    current_equity = bt.initial_capital
-
-    for t in bt.trades:
-        current_equity += t["net_pnl"]
-        equity.append(current_equity)
-        equity_dates.append(t["exit_time"])
+    equity = bt.bar_equity
+    equity_dates = timestamps
 
     DB_equity_path = None
     if generate_equity:
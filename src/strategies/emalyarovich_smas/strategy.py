@@ -8,25 +8,39 @@ def compute_smas(df: pd.DataFrame, sma_fast: int, sma_slow: int) -> pd.DataFrame
     return df
 
 
-def _has_positive_slope(series: pd.Series, bars: int) -> bool:
-    if len(series) < bars + 1:
+def _has_positive_slope(values, i: int, bars: int) -> bool:
+    if i < bars:
         return False
-    recent = series.tail(bars + 1).values
-    return all(recent[i] > recent[i - 1] for i in range(1, len(recent)))
+    return all(values[j] > values[j - 1] for j in range(i - bars + 1, i + 1))
 
 
-def check_signal(df: pd.DataFrame, sma_fast: int, sma_slow: int, slope_bars: int, current_side=None):
-    if len(df) < max(sma_fast, sma_slow, slope_bars) + 1:
+def check_signal_at(i: int, close, low, sma_fast_values, sma_slow_values, sma_fast: int, sma_slow: int,
+                    slope_bars: int, current_side=None):
+    """check_signal() for bar i of whole-series arrays (the runner's per-bar path)."""
+    if i < max(sma_fast, sma_slow, slope_bars):
         return None, None
 
-    last = df.iloc[-1]
-    slope_ok = _has_positive_slope(df["sma_fast"], int(slope_bars))
+    slope_ok = _has_positive_slope(sma_fast_values, i, int(slope_bars))
 
-    if last.close > last.sma_slow and last.low <= last.sma_fast and last.close > last.sma_fast:
+    if close[i] > sma_slow_values[i] and low[i] <= sma_fast_values[i] and close[i] > sma_fast_values[i]:
         if slope_ok:
             return "LONG", f"SMA{int(sma_fast)} touch + close above"
 
-    if current_side == "LONG" and last.close < last.sma_fast:
+    if current_side == "LONG" and close[i] < sma_fast_values[i]:
         return "EXIT", f"Close below SMA{int(sma_fast)}"
 
     return None, None
+
+
+def check_signal(df: pd.DataFrame, sma_fast: int, sma_slow: int, slope_bars: int, current_side=None):
+    return check_signal_at(
+        len(df) - 1,
+        df["close"].to_numpy(dtype=float),
+        df["low"].to_numpy(dtype=float),
+        df["sma_fast"].to_numpy(dtype=float),
+        df["sma_slow"].to_numpy(dtype=float),
+        sma_fast,
+        sma_slow,
+        slope_bars,
+        current_side=current_side,
+    )
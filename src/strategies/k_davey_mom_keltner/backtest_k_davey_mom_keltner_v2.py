@@ -1,12 +1,15 @@
 import os
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+import numpy as np
 import pandas as pd
 
 from src.core.data import fetch_ohlcv
 from src.core.backtester_v2 import BacktesterV2
+from src.core.frame_cache import cached_indicator
 from src.core.reporting import generate_quantstats_report
-from src.core.ta import compute_atr
+from src.core.ta import compute_atr, compute_ema
+from src.core.trade_ledger import trades_frame
 from src.strategies.k_davey_mom_keltner.strategy import (
     compute_keltner_stochastic,
     compute_position_size,
@@ -18,7 +21,7 @@ def export_trades_csv(trades, output_dir, run_id, metadata):
         print("[WARN] No trades to export")
         return None, None
 
-    df = pd.DataFrame(trades)
+    df = trades_frame(trades)
 
     df["entry_time"] = pd.to_datetime(df["entry_time"], utc=True)
     df["exit_time"] = pd.to_datetime(df["exit_time"], utc=True)
@@ -31,7 +34,6 @@ def export_trades_csv(trades, output_dir, run_id, metadata):
         (df["net_pnl"] / df["position_size"]) * 100
     ).round(3)
 
-    df["result"] = df["net_pnl"].apply(lambda x: "WIN" if x > 0 else "LOSS")
     df["balance"] = df["cash_after_trade"].round(6)
 
     for key, value in metadata.items():
@@ -154,13 +156,18 @@ def run_backtest_k_davey_mom_keltner_v2(
         print("[WARN] No data returned for K. Davey backtest")
         return {}, None, None
 
-    df["keltner_stoch"] = compute_keltner_stochastic(
+    df["keltner_stoch"] = cached_indicator(
         df,
-        keltner_length,
-        keltner_atr_mult,
-        mamode="ema",
+        "keltner_stoch",
+        (keltner_length, keltner_atr_mult, "ema"),
+        lambda: compute_keltner_stochastic(
+            df,
+            keltner_length,
+            keltner_atr_mult,
+            mamode="ema",
+        ),
     )
-    df["trend_ema"] = df["close"].ewm(span=int(trend_ema), adjust=False).mean()
+    df["trend_ema"] = compute_ema(df["close"], int(trend_ema))
     atr_series = compute_atr(df, atr_period)
     atr_vol = compute_atr(df, volatility_atr_period)
     atr_vol_avg = atr_vol.rolling(int(volatility_sma_period)).mean() if atr_vol is not None else None
@@ -188,6 +195,17 @@ def run_backtest_k_davey_mom_keltner_v2(
         position_pct=position_pct,
     )
 
+    timestamps = df["timestamp"].tolist()
+    opens = df["open"].to_numpy(dtype=float)
+    highs = df["high"].to_numpy(dtype=float)
+    lows = df["low"].to_numpy(dtype=float)
+    closes = df["close"].to_numpy(dtype=float)
+    keltner_stochs = df["keltner_stoch"].to_numpy(dtype=float)
+    trend_values = df["trend_ema"].to_numpy(dtype=float)
+    atr_values = atr_series.to_numpy(dtype=float) if atr_series is not None else None
+    vol_values = atr_vol.to_numpy(dtype=float) if atr_vol is not None else None
+    vol_avg_values = atr_vol_avg.to_numpy(dtype=float) if atr_vol_avg is not None else None
+
     pending_action = None
 
     start_index = max(
@@ -200,12 +218,9 @@ def run_backtest_k_davey_mom_keltner_v2(
         volatility_sma_period,
     ) + 1
     for i in range(start_index, len(df)):
-        current_bar = df.iloc[i]
-        open_price = current_bar["open"]
-        price = current_bar["close"]
-        high = current_bar["high"]
-        low = current_bar["low"]
-        timestamp = current_bar["timestamp"]
+        open_price = opens[i]
+        price = closes[i]
+        timestamp = timestamps[i]
 
         if pending_action is not None:
             if pending_action["type"] == "ENTRY":
@@ -228,15 +243,13 @@ def run_backtest_k_davey_mom_keltner_v2(
             pending_action = None
 
         atr_value = None
-        if atr_series is not None:
-            atr_raw = atr_series.iloc[i]
-            if pd.notna(atr_raw):
-                atr_value = float(atr_raw)
+        if atr_values is not None and not np.isnan(atr_values[i]):
+            atr_value = float(atr_values[i])
 
         if bt.position is not None and atr_value is not None:
             bt.update_stop_from_avg(atr_value)
 
-        bt.on_bar(high=high, low=low, timestamp=timestamp, bar_index=i)
+        bt.on_bar(high=highs[i], low=lows[i], timestamp=timestamp, bar_index=i)
 
         if atr_value is None:
             continue
@@ -244,9 +257,9 @@ def run_backtest_k_davey_mom_keltner_v2(
         open_pnl = 0.0
         if bt.lots:
             for lot in bt.lots:
-                entry_price = lot["entry_price"]
-                qty = lot["qty"]
-                if lot["side"] == "LONG":
+                entry_price = lot.entry_price
+                qty = lot.qty
+                if lot.side == "LONG":
                     open_pnl += (price - entry_price) * contract_multiplier * qty
                 else:
                     open_pnl += (entry_price - price) * contract_multiplier * qty
@@ -268,32 +281,32 @@ def run_backtest_k_davey_mom_keltner_v2(
             )
         bt.trade_size = float(ncons)
 
-        keltner_stoch = current_bar["keltner_stoch"]
+        keltner_stoch = keltner_stochs[i]
 
         if i >= len(df) - 1:
             continue
 
-        long_cond = price > df["close"].iloc[i - int(mom_length_long)]
-        short_cond = price < df["close"].iloc[i - int(mom_length_short)]
-        trend_long = price > current_bar["trend_ema"]
-        trend_short = price < current_bar["trend_ema"]
+        long_cond = price > closes[i - int(mom_length_long)]
+        short_cond = price < closes[i - int(mom_length_short)]
+        trend_long = price > trend_values[i]
+        trend_short = price < trend_values[i]
 
         volatility_ok = True
-        if atr_vol is not None and atr_vol_avg is not None:
-            vol_raw = atr_vol.iloc[i]
-            vol_avg = atr_vol_avg.iloc[i]
-            if pd.isna(vol_raw) or pd.isna(vol_avg):
+        if vol_values is not None and vol_avg_values is not None:
+            vol_raw = vol_values[i]
+            vol_avg = vol_avg_values[i]
+            if np.isnan(vol_raw) or np.isnan(vol_avg):
                 volatility_ok = False
             else:
                 volatility_ok = float(vol_raw) > float(vol_avg) * float(volatility_mult)
 
         if bt.position is not None:
-            if bt.position["side"] == "LONG" and keltner_stoch > exit_threshold:
+            if bt.position.side == "LONG" and keltner_stoch > exit_threshold:
                 pending_action = {
                     "type": "EXIT",
                     "trigger": "Keltner stoch exit",
                 }
-            elif bt.position["side"] == "SHORT" and keltner_stoch < (100 - exit_threshold):
+            elif bt.position.side == "SHORT" and keltner_stoch < (100 - exit_threshold):
                 pending_action = {
                     "type": "EXIT",
                     "trigger": "Keltner stoch exit",
@@ -301,7 +314,7 @@ def run_backtest_k_davey_mom_keltner_v2(
             if pending_action is not None:
                 continue
 
-        if bt.position is None or (bt.position["side"] == "LONG" and len(bt.lots) < bt.pyramiding):
+        if bt.position is None or (bt.position.side == "LONG" and len(bt.lots) < bt.pyramiding):
             if long_cond and trend_long and volatility_ok and keltner_stoch < entry_threshold:
                 pending_action = {
                     "type": "ENTRY",
@@ -310,7 +323,7 @@ def run_backtest_k_davey_mom_keltner_v2(
                     "atr_value": atr_value,
                 }
 
-        if allow_short and (bt.position is None or (bt.position["side"] == "SHORT" and len(bt.lots) < bt.pyramiding)):
+        if allow_short and (bt.position is None or (bt.position.side == "SHORT" and len(bt.lots) < bt.pyramiding)):
             if short_cond and trend_short and volatility_ok and keltner_stoch > (100 - entry_threshold):
                 pending_action = {
                     "type": "ENTRY",
@@ -319,17 +332,12 @@ def run_backtest_k_davey_mom_keltner_v2(
                     "atr_value": atr_value,
                 }
 
+    bt.mark_to_market(closes, timestamps)
     stats = bt.stats()
     clean_stats = {k: v.item() if hasattr(v, "item") else v for k, v in stats.items()}
 
-    equity = []
-    equity_dates = []
-    current_equity = bt.initial_capital
-
-    for t in bt.trades:
-        current_equity += t["net_pnl"]
-        equity.append(current_equity)
-        equity_dates.append(t["exit_time"])
+    equity = bt.bar_equity
+    equity_dates = timestamps
 
     DB_equity_path = None
     if generate_equity:
@@ -1,3 +1,8 @@
+import numpy as np
+
+from src.core.backtester_vectorized import SIGNAL_EXIT_LONG, SIGNAL_LONG
+
+
 def check_signal(rsi_value, entry_level, exit_level, current_side=None):
     if rsi_value is None:
         return None, None
@@ -9,3 +14,23 @@ def check_signal(rsi_value, entry_level, exit_level, current_side=None):
         return "EXIT", f"RSI {rsi_value:.2f} above {exit_level}"
 
     return None, None
+
+
+def compute_signals(rsi_values, entry_level, exit_level):
+    """Whole-series version of check_signal; row r uses rsi_values[r]."""
+    rsi_values = np.asarray(rsi_values, dtype=float)
+
+    long_entry = rsi_values < entry_level
+    long_exit = ~long_entry & (rsi_values > exit_level)
+
+    signals = np.zeros(len(rsi_values), dtype=np.int8)
+    signals[long_entry] = SIGNAL_LONG
+    signals[long_exit] = SIGNAL_EXIT_LONG
+
+    triggers = np.full(len(rsi_values), None, dtype=object)
+    for idx in np.flatnonzero(long_entry):
+        triggers[idx] = f"RSI {rsi_values[idx]:.2f} below {entry_level}"
+    for idx in np.flatnonzero(long_exit):
+        triggers[idx] = f"RSI {rsi_values[idx]:.2f} above {exit_level}"
+
+    return signals, triggers
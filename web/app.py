@@ -1,120 +1,44 @@
 import json
 import os
 import uuid
-import pandas as pd
+import numpy as np
 
 from datetime import datetime, timezone
-from flask import Flask, render_template, request, redirect, url_for, jsonify, current_app
-from src.core.database import get_connection, init_db
-from src.core.data import fetch_ohlcv
-from src.core.plotting.plot_trades import plot_trades_candlestick_windows
-from src.strategies.ema_cross.backtest_ema_cross_v2 import run_backtest_ema_cross_v2
-from src.strategies.rsi_reversion.backtest_rsi_reversion_v2 import (
-    run_backtest_rsi_reversion_v2,
-)
-from src.strategies.donchian_breakout.backtest_donchian_breakout_v2 import (
-    run_backtest_donchian_breakout_v2,
-)
-from src.strategies.ema_trend_hold.backtest_ema_trend_hold_v2 import (
-    run_backtest_ema_trend_hold_v2,
-)
-from src.strategies.bmsb.backtest_bmsb_v2 import run_backtest_bmsb_v2
-from src.strategies.emalyarovich_smas.backtest_emalyarovich_smas_v2 import (
-    run_backtest_emalyarovich_smas_v2,
-)
-from src.strategies.k_davey_mom_keltner.backtest_k_davey_mom_keltner_v2 import (
-    run_backtest_k_davey_mom_keltner_v2,
-)
-from src.strategies.basic_keltner_reversion.backtest_basic_keltner_reversion_v2 import (
-    run_backtest_basic_keltner_reversion_v2,
-)
+from flask import Flask, render_template, request, redirect, url_for, jsonify, current_app, send_from_directory
+from src.core.chart_data import COLUMNS as CHART_COLUMNS, load_trade_markers, trade_markers, viewport
+from src.core.database import RUN_METRIC_COLUMNS, get_connection, init_db
+from src.core.frame_cache import combine_frame_cache_stats, enable_frame_cache, frame_cache_stats
+from web import jobs
+from web.history import FILTER_COLUMNS as HISTORY_FILTER_COLUMNS, parse_history_args, query_runs
+from web.trade_charts import charts_rel_dir, load_trade_charts
 
 app = Flask(__name__,template_folder="templates",static_folder="static")
 init_db()
+FRAME_CACHE_BYTES = int(os.environ.get("FRAME_CACHE_MB", "512")) * 1024 * 1024
+enable_frame_cache(max_bytes=FRAME_CACHE_BYTES)
+CHART_MAX_AGE_S = 365 * 24 * 3600
+CHART_API_MAX_AGE_S = 60
 
 
-def _build_trades_chart_for_results(run, params):
-    csv_rel_path = run.get("csv_path")
-    if not csv_rel_path:
-        return None, None, "Trades CSV not available for this run."
-
-    csv_abs_path = os.path.join(current_app.static_folder, csv_rel_path)
-    if not os.path.exists(csv_abs_path):
-        return None, None, "Trades CSV file was not found on disk."
-
-    trades_df = pd.read_csv(csv_abs_path)
-    if trades_df.empty:
-        return None, None, "No trades available to render the trades chart."
-
-    for col in ["entry_time", "exit_time"]:
-        if col in trades_df.columns:
-            trades_df[col] = pd.to_datetime(trades_df[col], utc=True, errors="coerce").dt.tz_convert(None)
-
-    if "entry_time" not in trades_df.columns or "exit_time" not in trades_df.columns:
-        return None, None, "Trades CSV is missing entry/exit timestamps."
-
-    trades_df = trades_df.dropna(subset=["entry_time", "exit_time"]).copy()
-    if trades_df.empty:
-        return None, None, "Trades CSV has no valid timestamps to draw chart markers."
-
-    start_date = trades_df["entry_time"].min().floor("D")
-    end_date = trades_df["exit_time"].max().ceil("D")
-    use_clean = bool(params.get("use_clean", True))
-
-    ohlc_df = fetch_ohlcv(
-        exchange=run["exchange"],
-        symbol=run["symbol"],
-        timeframe=run["timeframe"],
-        start_date=start_date,
-        end_date=end_date,
-        limit=50000,
-        use_clean=use_clean,
-    )
-
-    charts_rel_dir = f"backtests/{run['strategy']}/{run['run_id']}/trades_windows"
-    charts_abs_dir = os.path.join(current_app.static_folder, charts_rel_dir)
-
-    annotation_mode, chart_items, was_truncated, total_trade_windows = plot_trades_candlestick_windows(
-        df=ohlc_df,
-        trades=trades_df,
-        title=(
-            f"{run['strategy']} {run['symbol']} {run['timeframe']}\n"
-            "Candlesticks + Entry/Exit Markers + Conditions"
-        ),
-        output_dir=charts_abs_dir,
-        filename_prefix=f"trades_graph_{run['run_id']}",
-        candles_per_chart=50,
-        max_charts=10,
-    )
-
-    if not chart_items:
-        if annotation_mode == "missing_ohlc":
-            return None, None, "OHLC data is unavailable for the trades range."
-        if annotation_mode == "missing_trades":
-            return None, None, "No trade rows available to render entry/exit markers."
-        return None, None, "Trades chart could not be generated."
+def _trade_charts_for_results(run, params):
+    manifest = load_trade_charts(run, params, current_app.static_folder)
+    if not manifest["charts"]:
+        return None, None, manifest["error"]
 
     chart_entries = [
         {
-            "path": f"{charts_rel_dir}/{item['filename']}",
-            "label": item["window_label"],
+            "url": url_for(
+                "trade_chart",
+                strategy=run["strategy"],
+                run_id=run["run_id"],
+                key=manifest["key"],
+                filename=chart["filename"],
+            ),
+            "label": chart["label"],
         }
-        for item in chart_items
+        for chart in manifest["charts"]
     ]
-
-    notes = []
-    if annotation_mode == "best_effort":
-        notes.append(
-            "Condition labels are best-effort: rendered from entry_trigger/exit_trigger when "
-            "available, with fallback labels otherwise."
-        )
-    if was_truncated:
-        notes.append(
-            f"Showing first 10 trade windows of 50 candles each (total windows with trades: {total_trade_windows})."
-        )
-    annotation_note = " ".join(notes) if notes else None
-
-    return chart_entries, annotation_note, None
+    return chart_entries, manifest["note"], None
 
 
 @app.route("/")
@@ -244,243 +168,30 @@ def run_backtest():
     unique_id = uuid.uuid4().hex[:8]
     run_id = f"{timestamp}_{unique_id}"
 
-    #2) Ejecutar backtest
-    if strategy == "rsi_reversion":
-        stats, chart_path, csv_path = run_backtest_rsi_reversion_v2(
-            exchange=exchange,
-            symbol=symbol,
-            timeframe=timeframe,
-            start_date=start_date,
-            end_date=end_date,
-            rsi_period=rsi_period,
-            rsi_entry=rsi_entry,
-            rsi_exit=rsi_exit,
-            run_id=run_id,
-            initial_balance=initial_balance,
-            position_mode=position_mode,
-            trade_size=trade_size,
-            position_pct=position_pct,
-            commission_pct=commission_pct,
-            slippage_pct=slippage_pct,
-            allow_short=False,
-            stop_loss_pct=stop_loss_pct,
-            take_profit_pct=take_profit_pct,
-            pyramiding=pyramiding,
-            base_path=current_app.root_path,
-        )
-    elif strategy == "donchian_breakout":
-        stats, chart_path, csv_path = run_backtest_donchian_breakout_v2(
-            exchange=exchange,
-            symbol=symbol,
-            timeframe=timeframe,
-            start_date=start_date,
-            end_date=end_date,
-            donchian_lookback=donchian_lookback,
-            run_id=run_id,
-            initial_balance=initial_balance,
-            position_mode=position_mode,
-            trade_size=trade_size,
-            position_pct=position_pct,
-            commission_pct=commission_pct,
-            slippage_pct=slippage_pct,
-            allow_short=False,
-            stop_loss_pct=stop_loss_pct,
-            take_profit_pct=take_profit_pct,
-            pyramiding=pyramiding,
-            base_path=current_app.root_path,
-        )
-    elif strategy == "ema_trend_hold":
-        stats, chart_path, csv_path = run_backtest_ema_trend_hold_v2(
-            exchange=exchange,
-            symbol=symbol,
-            timeframe=timeframe,
-            start_date=start_date,
-            end_date=end_date,
-            trend_ema=trend_ema,
-            run_id=run_id,
-            initial_balance=initial_balance,
-            position_mode=position_mode,
-            trade_size=trade_size,
-            position_pct=position_pct,
-            commission_pct=commission_pct,
-            slippage_pct=slippage_pct,
-            allow_short=False,
-            stop_loss_pct=stop_loss_pct,
-            take_profit_pct=take_profit_pct,
-            pyramiding=pyramiding,
-            base_path=current_app.root_path,
-        )
-    elif strategy == "bmsb":
-        stats, chart_path, csv_path = run_backtest_bmsb_v2(
-            exchange=exchange,
-            symbol=symbol,
-            timeframe=timeframe,
-            start_date=start_date,
-            end_date=end_date,
-            sma_period=bmsb_sma,
-            ema_period=bmsb_ema,
-            tensignal_window=bmsb_tensignal,
-            trail_percent=bmsb_trail,
-            run_id=run_id,
-            initial_balance=initial_balance,
-            position_mode=position_mode,
-            trade_size=trade_size,
-            position_pct=position_pct,
-            commission_pct=commission_pct,
-            slippage_pct=slippage_pct,
-            allow_short=False,
-            stop_loss_pct=None,
-            take_profit_pct=None,
-            pyramiding=pyramiding,
-            use_tp_sl=use_tp_sl,
-            base_path=current_app.root_path,
-        )
-    elif strategy == "emalyarovich_smas":
-        stats, chart_path, csv_path = run_backtest_emalyarovich_smas_v2(
-            exchange=exchange,
-            symbol=symbol,
-            timeframe=timeframe,
-            start_date=start_date,
-            end_date=end_date,
-            sma_fast=sma_fast,
-            sma_slow=sma_slow,
-            slope_bars=slope_bars,
-            run_id=run_id,
-            initial_balance=initial_balance,
-            position_mode=position_mode,
-            trade_size=trade_size,
-            position_pct=position_pct,
-            commission_pct=commission_pct,
-            slippage_pct=slippage_pct,
-            allow_short=False,
-            stop_loss_pct=stop_loss_pct,
-            take_profit_pct=take_profit_pct or 0.03,
-            pyramiding=pyramiding,
-            base_path=current_app.root_path,
-        )
-    elif strategy == "k_davey_mom_keltner":
-        stats, chart_path, csv_path = run_backtest_k_davey_mom_keltner_v2(
-            exchange=exchange,
-            symbol=symbol,
-            timeframe=timeframe,
-            start_date=start_date,
-            end_date=end_date,
-            mom_length_long=mom_length_long,
-            mom_length_short=mom_length_short,
-            keltner_length=keltner_length,
-            keltner_atr_mult=keltner_atr_mult,
-            entry_threshold=keltner_entry_threshold,
-            exit_threshold=keltner_exit_threshold,
-            trend_ema=keltner_trend_ema,
-            volatility_atr_period=14,
-            volatility_sma_period=keltner_vol_sma,
-            volatility_mult=keltner_vol_mult,
-            use_position_sizing=use_position_sizing,
-            base_equity=base_equity,
-            sizing_factor=sizing_factor,
-            max_contracts=max_contracts,
-            run_id=run_id,
-            initial_balance=initial_balance,
-            position_mode="contracts",
-            trade_size=trade_size,
-            position_pct=position_pct,
-            commission_pct=commission_pct,
-            slippage_pct=slippage_pct,
-            allow_short=True,
-            atr_period=atr_period,
-            atr_sl_mult_long=atr_sl_long,
-            atr_sl_mult_short=atr_sl_short,
-            pyramiding=pyramiding,
-            base_path=current_app.root_path,
-        )
-    elif strategy == "basic_keltner_reversion":
-        stats, chart_path, csv_path = run_backtest_basic_keltner_reversion_v2(
-            exchange=exchange,
-            symbol=symbol,
-            timeframe=timeframe,
-            start_date=start_date,
-            end_date=end_date,
-            kc_ema_length=kc_rev_ema_length,
-            kc_atr_length=kc_rev_atr_length,
-            kc_atr_mult=kc_rev_atr_mult,
-            run_id=run_id,
-            initial_balance=initial_balance,
-            position_mode=position_mode,
-            trade_size=trade_size,
-            position_pct=position_pct,
-            commission_pct=commission_pct,
-            slippage_pct=slippage_pct,
-            allow_short=True,
-            stop_loss_pct=stop_loss_pct,
-            take_profit_pct=take_profit_pct,
-            pyramiding=pyramiding,
-            base_path=current_app.root_path,
-        )
-    else:
-        stats, chart_path, csv_path = run_backtest_ema_cross_v2(
-            exchange=exchange,
-            symbol=symbol,
-            timeframe=timeframe,
-            start_date=start_date,
-            end_date=end_date,
-            ema_fast=ema_fast,
-            ema_slow=ema_slow,
-            run_id=run_id,
-            initial_balance=initial_balance,
-            position_mode=position_mode,
-            trade_size=trade_size,
-            position_pct=position_pct,
-            commission_pct=commission_pct,
-            slippage_pct=slippage_pct,
-            allow_short=allow_short,
-            stop_loss_pct=stop_loss_pct,
-            take_profit_pct=take_profit_pct,
-            pyramiding=pyramiding,
-            base_path=current_app.root_path,
-        )
-
-    #3) guardad en DB
-    created_at = now.isoformat()
+    #2) Encolar backtest (se ejecuta y se guarda en DB en un worker)
+    payload = {
+        "strategy": strategy,
+        "exchange": exchange,
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "start_date": start_date,
+        "end_date": end_date,
+        "params": params,
+    }
+    job_id = jobs.create_job(run_id, payload)
+    jobs.submit_job(job_id, current_app.root_path, frame_cache_bytes=FRAME_CACHE_BYTES)
 
-    conn = get_connection()
-    cur = conn.cursor()
+    return redirect(url_for("results", run_id=run_id))
 
-    cur.execute("""
-        INSERT INTO backtest_runs (
-            run_id, strategy, exchange, symbol, timeframe,
-            start_ts, end_ts,
-            params_json, stats_json,
-            chart_path, csv_path, created_at,
-            ema_fast, ema_slow, use_clean,
-            initial_balance, position_mode, trade_size,
-            commission_pct, slippage_pct, stop_loss_pct, take_profit_pct, allow_short
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        run_id, strategy, exchange, symbol, timeframe,
-        None, None,
-        json.dumps(params),
-        json.dumps(stats),
-        chart_path,
-        csv_path,
-        created_at,
-        ema_fast,
-        ema_slow,
-        int(use_clean),
-        initial_balance,
-        position_mode,
-        trade_size,
-        commission_pct,
-        slippage_pct,
-        stop_loss_pct,
-        take_profit_pct,
-        int(allow_short),
-    ))
-
-    conn.commit()
-    conn.close()
 
-    return redirect(url_for("results", run_id=run_id))
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] == "done":
+        job["results_url"] = url_for("results", run_id=job["run_id"])
+    return jsonify(job)
 
 @app.route("/results/<run_id>")
 def results(run_id):
@@ -492,7 +203,12 @@ def results(run_id):
     conn.close()
 
     if not row:
-        return "Run not found", 404
+        job = jobs.get_job(run_id=run_id)
+        if job is None:
+            return "Run not found", 404
+        # Still queued/running (or failed): the page polls /jobs/<job_id>
+        # and reloads into the results once the run is stored.
+        return render_template("job.html", job=job)
 
     stats = json.loads(row["stats_json"])
     params = json.loads(row["params_json"])
@@ -512,7 +228,7 @@ def results(run_id):
         "k_davey_mom_keltner": "Exit: Keltner Stochastic crosses threshold (if TP/SL = 0.00).",
     }
 
-    trades_charts, trades_chart_note, trades_chart_error = _build_trades_chart_for_results(run, params)
+    trades_charts, trades_chart_note, trades_chart_error = _trade_charts_for_results(run, params)
 
     return render_template(
         "results.html",
@@ -527,21 +243,151 @@ def results(run_id):
     )
 
 
+@app.route("/trade_charts/<strategy>/<run_id>/<key>/<filename>")
+def trade_chart(strategy, run_id, key, filename):
+    # Files under a key never change (the key hashes the trades CSV), so
+    # browsers may keep them; the ETag covers a forced revalidation.
+    charts_dir = os.path.join(
+        current_app.static_folder, charts_rel_dir({"strategy": strategy, "run_id": run_id}), key
+    )
+    response = send_from_directory(charts_dir, filename, max_age=CHART_MAX_AGE_S, etag=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def _load_run(run_id):
+    conn = get_connection()
+    row = conn.execute("SELECT * FROM backtest_runs WHERE run_id = ?", (run_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def _ms_arg(name):
+    value = request.args.get(name)
+    return int(value) if value not in (None, "") else None
+
+
+def _conditional(response):
+    # Responses only change when the series or the trades CSV is rewritten.
+    response.cache_control.private = True
+    response.cache_control.max_age = CHART_API_MAX_AGE_S
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@app.route("/results/<run_id>/chart")
+def run_chart(run_id):
+    run = _load_run(run_id)
+    if run is None:
+        return "Run not found", 404
+    return render_template("chart.html", run=run)
+
+
+@app.route("/api/runs/<run_id>/ohlc")
+def api_run_ohlc(run_id):
+    """
+    Decimated OHLC of the run's series for a viewport.
+    Query: start/end (ms), points, mode (ohlc | lttb), format (json | bin).
+    format=bin returns the columns as consecutive little-endian float64
+    arrays; their names and the metadata are in the X-Chart-Meta header.
+    """
+    run = _load_run(run_id)
+    if run is None:
+        return jsonify({"error": "Run not found"}), 404
+    params = json.loads(run["params_json"])
+
+    try:
+        data = viewport(
+            run["exchange"],
+            run["symbol"],
+            run["timeframe"],
+            use_clean=bool(params.get("use_clean", True)),
+            start_ts=_ms_arg("start"),
+            end_ts=_ms_arg("end"),
+            points=request.args.get("points", 1000),
+            mode=request.args.get("mode", "ohlc"),
+        )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    if data is None:
+        return jsonify({"error": "No OHLC data for this run's series."}), 404
+
+    columns = [column for column in CHART_COLUMNS if column in data]
+    meta = {key: value for key, value in data.items() if key not in CHART_COLUMNS}
+    meta["rows"] = len(data["timestamp"])
+    meta["columns"] = columns
+
+    if request.args.get("format") == "bin":
+        body = np.concatenate([np.asarray(data[column], dtype="<f8") for column in columns]).tobytes()
+        response = current_app.response_class(body, mimetype="application/octet-stream")
+        response.headers["X-Chart-Meta"] = json.dumps(meta)
+    else:
+        response = jsonify({**meta, **{column: data[column].tolist() for column in columns}})
+    return _conditional(response)
+
+
+@app.route("/api/runs/<run_id>/trades")
+def api_run_trades(run_id):
+    """Trade markers overlapping start/end (ms) from the run's trades CSV."""
+    run = _load_run(run_id)
+    if run is None:
+        return jsonify({"error": "Run not found"}), 404
+
+    csv_abs_path = os.path.join(current_app.static_folder, run["csv_path"]) if run["csv_path"] else None
+    if csv_abs_path is None or not os.path.exists(csv_abs_path):
+        return jsonify({"error": "Trades CSV not available for this run."}), 404
+
+    try:
+        limit = min(int(request.args.get("limit", 5000)), 50000)
+        markers = trade_markers(load_trade_markers(csv_abs_path), _ms_arg("start"), _ms_arg("end"), limit=limit)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return _conditional(jsonify(markers))
+
+
 @app.route("/history")
 def history():
+    """
+    Stored runs, newest first by default. Query: strategy, exchange, symbol,
+    timeframe, <metric>_min / <metric>_max, sort (id or a metric), order
+    (desc | asc), limit, after (next-page cursor).
+    """
+    try:
+        query = parse_history_args(request.args)
+    except ValueError as exc:
+        return str(exc), 400
+
     conn = get_connection()
-    cur = conn.cursor()
+    runs, next_after = query_runs(conn, **query)
+    conn.close()
 
-    cur.execute("""
-        SELECT run_id, strategy, exchange, symbol, timeframe, created_at
-        FROM backtest_runs
-        ORDER BY id DESC
-        LIMIT 50
-    """)
-    runs = cur.fetchall()
+    args = {name: value for name, value in request.args.items() if value and name != "after"}
+    next_url = url_for("history", **args, after=next_after) if next_after else None
+    first_url = url_for("history", **args) if query["after"] else None
+    return render_template(
+        "history.html",
+        runs=runs,
+        args=args,
+        query=query,
+        metric_columns=RUN_METRIC_COLUMNS,
+        filter_columns=HISTORY_FILTER_COLUMNS,
+        next_url=next_url,
+        first_url=first_url,
+    )
 
-    conn.close()
-    return render_template("history.html", runs=runs)
+@app.route("/ops/cache")
+def ops_cache():
+    # Job workers hold their own caches; their stats come from the job rows.
+    web_stats = frame_cache_stats()
+    workers = jobs.worker_cache_stats()
+    return jsonify(
+        {
+            "web": web_stats,
+            "workers": {str(pid): stats for pid, stats in workers.items()},
+            "total": combine_frame_cache_stats([web_stats, *workers.values()]),
+        }
+    )
 
 @app.route("/charts/<strategy>")
 def view_charts(strategy):
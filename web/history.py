@@ -0,0 +1,139 @@
+"""
+Run history for /history: filter, sort and page through backtest_runs
+without reading stats_json.
+
+The stats the page shows are backtest_runs columns (RUN_METRIC_COLUMNS,
+filled when a run is stored and backfilled by init_db), each indexed on
+(column, id), as are strategy and symbol. Pages use keyset pagination:
+the next page starts after the last row's (sort value, id), so a deep page
+costs the same as the first one however many runs are stored, and runs
+stored between two requests never shift a page. Sorting by a metric skips
+the runs that have no value for it.
+"""
+
+from src.core.database import RUN_METRIC_COLUMNS
+
+SORT_COLUMNS = ("id", *RUN_METRIC_COLUMNS)
+FILTER_COLUMNS = ("strategy", "exchange", "symbol", "timeframe")
+ORDERS = ("desc", "asc")
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+LIST_COLUMNS = (
+    "id", "run_id", "strategy", "exchange", "symbol", "timeframe", "created_at",
+    *RUN_METRIC_COLUMNS,
+)
+
+
+def _float_arg(args, name):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a number") from None
+
+
+def encode_cursor(row, sort):
+    """Opaque `after` value for the page following `row`."""
+    return str(row["id"]) if sort == "id" else f"{row[sort]!r}:{row['id']}"
+
+
+def decode_cursor(after, sort):
+    """(sort value, id) from an `after` value; the value is None for sort=id."""
+    try:
+        if sort == "id":
+            return None, int(after)
+        value, last_id = after.rsplit(":", 1)
+        return float(value), int(last_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{after}' for sort '{sort}'") from None
+
+
+def parse_history_args(args):
+    """
+    query_runs() keyword arguments from request args: strategy, exchange,
+    symbol, timeframe (exact match), <metric>_min / <metric>_max, sort,
+    order, after, limit. Raises ValueError on a bad value.
+    """
+    sort = args.get("sort") or "id"
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort '{sort}'. Options: {', '.join(SORT_COLUMNS)}")
+    order = args.get("order") or "desc"
+    if order not in ORDERS:
+        raise ValueError(f"Unknown order '{order}'. Options: {', '.join(ORDERS)}")
+
+    ranges = {}
+    for column in RUN_METRIC_COLUMNS:
+        bounds = (_float_arg(args, f"{column}_min"), _float_arg(args, f"{column}_max"))
+        if bounds != (None, None):
+            ranges[column] = bounds
+
+    try:
+        limit = int(args.get("limit") or PAGE_SIZE)
+    except ValueError:
+        raise ValueError("'limit' must be an integer") from None
+
+    return {
+        "filters": {column: args[column] for column in FILTER_COLUMNS if args.get(column)},
+        "ranges": ranges,
+        "sort": sort,
+        "order": order,
+        "after": decode_cursor(args["after"], sort) if args.get("after") else None,
+        "limit": min(max(limit, 1), MAX_PAGE_SIZE),
+    }
+
+
+def query_runs(conn, filters=None, ranges=None, sort="id", order="desc", after=None, limit=PAGE_SIZE):
+    """
+    One page of runs as dicts of LIST_COLUMNS, plus the `after` value of
+    the next page (None on the last page).
+
+    filters: {column: value} on FILTER_COLUMNS
+    ranges:  {metric: (min, max)}, either bound None
+    after:   (sort value, id) of the previous page's last row
+    """
+    if sort not in SORT_COLUMNS or order not in ORDERS:
+        raise ValueError(f"Unknown sort/order '{sort} {order}'")
+
+    where, args = [], []
+    for column, value in (filters or {}).items():
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Unknown filter '{column}'")
+        where.append(f"{column} = ?")
+        args.append(value)
+    for column, (low, high) in (ranges or {}).items():
+        if column not in RUN_METRIC_COLUMNS:
+            raise ValueError(f"Unknown metric '{column}'")
+        if low is not None:
+            where.append(f"{column} >= ?")
+            args.append(low)
+        if high is not None:
+            where.append(f"{column} <= ?")
+            args.append(high)
+
+    op = "<" if order == "desc" else ">"
+    direction = order.upper()
+    if sort == "id":
+        order_by = f"id {direction}"
+        if after is not None:
+            where.append(f"id {op} ?")
+            args.append(after[1])
+    else:
+        order_by = f"{sort} {direction}, id {direction}"
+        where.append(f"{sort} IS NOT NULL")
+        if after is not None:
+            where.append(f"({sort}, id) {op} (?, ?)")
+            args.extend(after)
+
+    sql = f"""
+        SELECT {', '.join(LIST_COLUMNS)}
+        FROM backtest_runs
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY {order_by}
+        LIMIT ?
+    """
+    rows = [dict(row) for row in conn.execute(sql, (*args, limit + 1)).fetchall()]
+    next_after = encode_cursor(rows[limit - 1], sort) if len(rows) > limit else None
+    return rows[:limit], next_after
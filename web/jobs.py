@@ -0,0 +1,445 @@
+"""
+Background backtest jobs for the web app.
+
+/run_backtest only records a job row in backtest_jobs (SQLite) and hands
+the job id to a process pool, so a long backtest, its equity plot and its
+QuantStats report never hold a request worker, and several backtests run
+in parallel across cores. The worker claims the row, runs the strategy
+runner, stores the backtest_runs row and marks the job done or failed;
+/jobs/<job_id> reports status, stage and progress from the same row.
+
+Progress is by stage: the runner module's fetch_ohlcv and
+generate_quantstats_report are wrapped inside the worker to tell when the
+data is loaded and when the report starts. After the run is stored the
+worker also renders its trade-window charts (web/trade_charts.py), so the
+first /results view is served from the cache.
+
+Each worker process has its own frame/indicator caches; when a job ends
+the worker stores its frame_cache_stats() in the job row, and
+worker_cache_stats() reads the latest snapshot of every live worker for
+/ops/cache.
+"""
+
+import json
+import multiprocessing
+import os
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from src.core.analysis.sweep import STRATEGY_RUNNERS, load_runner
+from src.core.database import get_connection, run_metric_values, run_with_retry
+from src.core.frame_cache import enable_frame_cache, frame_cache_stats
+from web.trade_charts import load_trade_charts
+
+
+# -------------------------------------------------
+# STAGES
+# -------------------------------------------------
+# stage -> progress reported while the job is in it
+STAGES = {
+    "queued": 0.0,
+    "loading": 0.05,
+    "backtest": 0.25,
+    "report": 0.6,
+    "saving": 0.85,
+    "charts": 0.9,
+    "done": 1.0,
+}
+
+JOB_WORKERS = int(os.environ.get("BACKTEST_WORKERS") or os.cpu_count() or 1)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _write(sql, args):
+    conn = get_connection()
+
+    def write():
+        with conn:
+            return conn.execute(sql, args).rowcount
+
+    return run_with_retry(write)
+
+
+def _set_stage(job_id, stage):
+    _write(
+        "UPDATE backtest_jobs SET stage = ?, progress = ? WHERE job_id = ?",
+        (stage, STAGES[stage], job_id),
+    )
+
+
+# -------------------------------------------------
+# JOB TABLE
+# -------------------------------------------------
+def create_job(run_id, payload):
+    """
+    Queue a job. payload holds strategy, exchange, symbol, timeframe,
+    start_date, end_date and the params dict of the /run_backtest form.
+    """
+    job_id = uuid.uuid4().hex
+    _write(
+        """
+        INSERT INTO backtest_jobs (
+            job_id, run_id, strategy, payload_json, status, stage, progress, created_at
+        )
+        VALUES (?, ?, ?, ?, 'queued', 'queued', 0, ?)
+        """,
+        (job_id, run_id, payload["strategy"], json.dumps(payload), _now()),
+    )
+    return job_id
+
+
+def get_job(job_id=None, run_id=None):
+    """Job row as a dict (payload excluded), by job_id or run_id; None if missing."""
+    column, value = ("job_id", job_id) if job_id is not None else ("run_id", run_id)
+    conn = get_connection()
+    row = conn.execute(
+        f"""
+        SELECT job_id, run_id, strategy, status, stage, progress, error,
+               created_at, started_at, finished_at
+        FROM backtest_jobs
+        WHERE {column} = ?
+        """,
+        (value,),
+    ).fetchone()
+    conn.close()
+    return dict(row) if row is not None else None
+
+
+def _claim(job_id):
+    """queued -> running; False if another worker got it (or it already ran)."""
+    claimed = _write(
+        """
+        UPDATE backtest_jobs
+        SET status = 'running', stage = 'loading', progress = ?, started_at = ?, worker_pid = ?
+        WHERE job_id = ? AND status = 'queued'
+        """,
+        (STAGES["loading"], _now(), os.getpid(), job_id),
+    )
+    return claimed == 1
+
+
+def _finish(job_id, error=None, cache_stats=None):
+    cache_json = json.dumps(cache_stats) if cache_stats is not None else None
+    if error is None:
+        _write(
+            """
+            UPDATE backtest_jobs
+            SET status = 'done', stage = 'done', progress = 1, finished_at = ?, cache_stats_json = ?
+            WHERE job_id = ?
+            """,
+            (_now(), cache_json, job_id),
+        )
+    else:
+        _write(
+            """
+            UPDATE backtest_jobs
+            SET status = 'failed', error = ?, finished_at = ?, cache_stats_json = ?
+            WHERE job_id = ?
+            """,
+            (error, _now(), cache_json, job_id),
+        )
+
+
+def worker_cache_stats():
+    """
+    {worker pid: frame_cache_stats()} of the live job workers, as of each
+    worker's last finished job.
+    """
+    conn = get_connection()
+    rows = conn.execute(
+        """
+        SELECT worker_pid, cache_stats_json, MAX(finished_at)
+        FROM backtest_jobs
+        WHERE cache_stats_json IS NOT NULL
+        GROUP BY worker_pid
+        """
+    ).fetchall()
+    conn.close()
+    return {
+        row["worker_pid"]: json.loads(row["cache_stats_json"])
+        for row in rows
+        if _pid_alive(row["worker_pid"])
+    }
+
+
+# -------------------------------------------------
+# BACKTEST
+# -------------------------------------------------
+def _runner_kwargs(strategy, params):
+    """Strategy-specific arguments of its run_backtest_*_v2 call."""
+    common = {
+        "initial_balance": params["initial_balance"],
+        "position_mode": params["position_mode"],
+        "trade_size": params["trade_size"],
+        "position_pct": params["position_pct"],
+        "commission_pct": params["commission_pct"],
+        "slippage_pct": params["slippage_pct"],
+        "pyramiding": params["pyramiding"],
+    }
+    stops = {
+        "stop_loss_pct": params["stop_loss_pct"],
+        "take_profit_pct": params["take_profit_pct"],
+    }
+
+    if strategy == "rsi_reversion":
+        return {
+            "rsi_period": params["rsi_period"],
+            "rsi_entry": params["rsi_entry"],
+            "rsi_exit": params["rsi_exit"],
+            **common,
+            "allow_short": False,
+            **stops,
+        }
+    if strategy == "donchian_breakout":
+        return {"donchian_lookback": params["donchian_lookback"], **common, "allow_short": False, **stops}
+    if strategy == "ema_trend_hold":
+        return {"trend_ema": params["trend_ema"], **common, "allow_short": False, **stops}
+    if strategy == "bmsb":
+        return {
+            "sma_period": params["bmsb_sma"],
+            "ema_period": params["bmsb_ema"],
+            "tensignal_window": params["bmsb_tensignal"],
+            "trail_percent": params["bmsb_trail"],
+            **common,
+            "allow_short": False,
+            "stop_loss_pct": None,
+            "take_profit_pct": None,
+            "use_tp_sl": params["use_tp_sl"],
+        }
+    if strategy == "emalyarovich_smas":
+        return {
+            "sma_fast": params["sma_fast"],
+            "sma_slow": params["sma_slow"],
+            "slope_bars": params["slope_bars"],
+            **common,
+            "allow_short": False,
+            "stop_loss_pct": params["stop_loss_pct"],
+            "take_profit_pct": params["take_profit_pct"] or 0.03,
+        }
+    if strategy == "k_davey_mom_keltner":
+        return {
+            "mom_length_long": params["mom_length_long"],
+            "mom_length_short": params["mom_length_short"],
+            "keltner_length": params["keltner_length"],
+            "keltner_atr_mult": params["keltner_atr_mult"],
+            "entry_threshold": params["keltner_entry_threshold"],
+            "exit_threshold": params["keltner_exit_threshold"],
+            "trend_ema": params["keltner_trend_ema"],
+            "volatility_atr_period": 14,
+            "volatility_sma_period": params["keltner_vol_sma"],
+            "volatility_mult": params["keltner_vol_mult"],
+            "use_position_sizing": params["use_position_sizing"],
+            "base_equity": params["base_equity"],
+            "sizing_factor": params["sizing_factor"],
+            "max_contracts": params["max_contracts"],
+            **common,
+            "position_mode": "contracts",
+            "allow_short": True,
+            "atr_period": params["atr_period"],
+            "atr_sl_mult_long": params["atr_sl_long"],
+            "atr_sl_mult_short": params["atr_sl_short"],
+        }
+    if strategy == "basic_keltner_reversion":
+        return {
+            "kc_ema_length": params["kc_rev_ema_length"],
+            "kc_atr_length": params["kc_rev_atr_length"],
+            "kc_atr_mult": params["kc_rev_atr_mult"],
+            **common,
+            "allow_short": True,
+            **stops,
+        }
+    return {
+        "ema_fast": params["ema_fast"],
+        "ema_slow": params["ema_slow"],
+        **common,
+        "allow_short": params["allow_short"],
+        **stops,
+    }
+
+
+def run_backtest_payload(payload, run_id, base_path, on_stage=None):
+    """
+    Run the payload's strategy runner; returns (stats, chart_path, csv_path).
+    Unknown strategies fall back to ema_cross, as the form always did.
+    on_stage(stage) is called when the data is loaded and when the report starts.
+    """
+    strategy = payload["strategy"] if payload["strategy"] in STRATEGY_RUNNERS else "ema_cross"
+    module, fn = load_runner(strategy)
+
+    kwargs = {
+        "exchange": payload["exchange"],
+        "symbol": payload["symbol"],
+        "timeframe": payload["timeframe"],
+        "start_date": payload["start_date"],
+        "end_date": payload["end_date"],
+        "run_id": run_id,
+        "base_path": base_path,
+        **_runner_kwargs(strategy, payload["params"]),
+    }
+    if on_stage is None:
+        return fn(**kwargs)
+
+    fetch, report = module.fetch_ohlcv, module.generate_quantstats_report
+
+    def staged_fetch(*args, **fetch_kwargs):
+        df = fetch(*args, **fetch_kwargs)
+        on_stage("backtest")
+        return df
+
+    def staged_report(*args, **report_kwargs):
+        on_stage("report")
+        return report(*args, **report_kwargs)
+
+    module.fetch_ohlcv, module.generate_quantstats_report = staged_fetch, staged_report
+    try:
+        return fn(**kwargs)
+    finally:
+        module.fetch_ohlcv, module.generate_quantstats_report = fetch, report
+
+
+def save_run(run_id, payload, stats, chart_path, csv_path, created_at):
+    params = payload["params"]
+    metrics = run_metric_values(stats)
+    conn = get_connection()
+
+    def write():
+        with conn:
+            conn.execute(f"""
+                INSERT INTO backtest_runs (
+                    run_id, strategy, exchange, symbol, timeframe,
+                    start_ts, end_ts,
+                    params_json, stats_json,
+                    chart_path, csv_path, created_at,
+                    ema_fast, ema_slow, use_clean,
+                    initial_balance, position_mode, trade_size,
+                    commission_pct, slippage_pct, stop_loss_pct, take_profit_pct, allow_short,
+                    {", ".join(metrics)}
+                )
+                VALUES ({", ".join("?" * (23 + len(metrics)))})
+            """, (
+                run_id, payload["strategy"], payload["exchange"], payload["symbol"], payload["timeframe"],
+                None, None,
+                json.dumps(params),
+                json.dumps(stats),
+                chart_path,
+                csv_path,
+                created_at,
+                params["ema_fast"],
+                params["ema_slow"],
+                int(params["use_clean"]),
+                params["initial_balance"],
+                params["position_mode"],
+                params["trade_size"],
+                params["commission_pct"],
+                params["slippage_pct"],
+                params["stop_loss_pct"],
+                params["take_profit_pct"],
+                int(params["allow_short"]),
+                *metrics.values(),
+            ))
+
+    run_with_retry(write)
+
+
+def run_job(job_id, base_path):
+    """Worker entry point: claim, run and store one job. Returns its final status."""
+    if not _claim(job_id):
+        return get_job(job_id)["status"]
+
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT run_id, payload_json, created_at FROM backtest_jobs WHERE job_id = ?", (job_id,)
+    ).fetchone()
+    conn.close()
+    payload = json.loads(row["payload_json"])
+
+    try:
+        stats, chart_path, csv_path = run_backtest_payload(
+            payload, row["run_id"], base_path, on_stage=lambda stage: _set_stage(job_id, stage)
+        )
+        _set_stage(job_id, "saving")
+        save_run(row["run_id"], payload, stats, chart_path, csv_path, row["created_at"])
+    except Exception as exc:
+        traceback.print_exc()
+        _finish(job_id, error=f"{type(exc).__name__}: {exc}", cache_stats=frame_cache_stats())
+        return "failed"
+
+    # The run is stored; a chart failure only means /results renders them.
+    _set_stage(job_id, "charts")
+    try:
+        run = {"run_id": row["run_id"], "csv_path": csv_path, **payload}
+        load_trade_charts(run, payload["params"], os.path.join(base_path, "static"))
+    except Exception:
+        traceback.print_exc()
+
+    _finish(job_id, cache_stats=frame_cache_stats())
+    return "done"
+
+
+# -------------------------------------------------
+# POOL
+# -------------------------------------------------
+_pool = {}
+
+
+def _init_worker(frame_cache_bytes):
+    if frame_cache_bytes:
+        enable_frame_cache(max_bytes=frame_cache_bytes)
+
+
+def _pid_alive(pid):
+    if not pid or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+def recover_jobs():
+    """
+    Fail jobs whose worker process is gone (server stopped mid-run) and
+    return the ids of jobs still queued.
+    """
+    conn = get_connection()
+    running = conn.execute("SELECT job_id, worker_pid FROM backtest_jobs WHERE status = 'running'").fetchall()
+    queued = [
+        row["job_id"]
+        for row in conn.execute("SELECT job_id FROM backtest_jobs WHERE status = 'queued' ORDER BY created_at")
+    ]
+    conn.close()
+
+    for row in running:
+        if not _pid_alive(row["worker_pid"]):
+            _finish(row["job_id"], error="Interrupted: the worker stopped while the job was running.")
+    return queued
+
+
+def get_executor(base_path, workers=None, frame_cache_bytes=None):
+    """
+    The process's job pool, created on first use; creating it also
+    resubmits the jobs a previous server left queued. Workers are spawned,
+    not forked: the server process has threads and open SQLite connections.
+    """
+    executor = _pool.get(os.getpid())
+    if executor is None:
+        executor = _pool[os.getpid()] = ProcessPoolExecutor(
+            max_workers=workers or JOB_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(frame_cache_bytes,),
+        )
+        for job_id in recover_jobs():
+            executor.submit(run_job, job_id, base_path)
+    return executor
+
+
+def submit_job(job_id, base_path, frame_cache_bytes=None):
+    """Run a queued job in the pool (a job resubmitted twice only runs once)."""
+    return get_executor(base_path, frame_cache_bytes=frame_cache_bytes).submit(run_job, job_id, base_path)
@@ -0,0 +1,169 @@
+"""
+Trade-window charts of a run, rendered once and served from disk.
+
+The PNGs of a run live in
+    static/backtests/<strategy>/<run_id>/trades_windows/<key>/
+next to a manifest.json with their labels and notes. The key hashes the
+trades CSV bytes together with the chart settings, so a rewritten CSV (or
+new settings) gets a new directory and the files under a key never
+change; they are served with a long max-age and an ETag.
+
+Background jobs render them right after the run is stored; runs older
+than this cache are rendered on their first /results view.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import pandas as pd
+
+from src.core.data import fetch_ohlcv
+from src.core.plotting.plot_trades import plot_trades_candlestick_windows
+
+CANDLES_PER_CHART = 50
+MAX_CHARTS = 10
+# Bump when the rendering changes so cached charts are rebuilt.
+CHARTS_VERSION = 2
+
+MANIFEST = "manifest.json"
+
+
+def charts_rel_dir(run):
+    return f"backtests/{run['strategy']}/{run['run_id']}/trades_windows"
+
+
+def charts_key(run, params, csv_abs_path):
+    """Content hash of the trades CSV plus everything else the charts depend on."""
+    digest = hashlib.sha256()
+    with open(csv_abs_path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    settings = {
+        "exchange": run["exchange"],
+        "symbol": run["symbol"],
+        "timeframe": run["timeframe"],
+        "use_clean": bool(params.get("use_clean", True)),
+        "candles_per_chart": CANDLES_PER_CHART,
+        "max_charts": MAX_CHARTS,
+        "version": CHARTS_VERSION,
+    }
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def _csv_abs_path(run, static_folder):
+    csv_rel_path = run.get("csv_path")
+    if not csv_rel_path:
+        return None, "Trades CSV not available for this run."
+    csv_abs_path = os.path.join(static_folder, csv_rel_path)
+    if not os.path.exists(csv_abs_path):
+        return None, "Trades CSV file was not found on disk."
+    return csv_abs_path, None
+
+
+def _render(run, params, csv_abs_path, output_dir):
+    """Render into output_dir; returns (manifest, cacheable)."""
+    trades_df = pd.read_csv(csv_abs_path)
+    if trades_df.empty:
+        return {"charts": [], "note": None, "error": "No trades available to render the trades chart."}, True
+
+    for col in ["entry_time", "exit_time"]:
+        if col in trades_df.columns:
+            trades_df[col] = pd.to_datetime(trades_df[col], utc=True, errors="coerce").dt.tz_convert(None)
+
+    if "entry_time" not in trades_df.columns or "exit_time" not in trades_df.columns:
+        return {"charts": [], "note": None, "error": "Trades CSV is missing entry/exit timestamps."}, True
+
+    trades_df = trades_df.dropna(subset=["entry_time", "exit_time"]).copy()
+    if trades_df.empty:
+        return {"charts": [], "note": None, "error": "Trades CSV has no valid timestamps to draw chart markers."}, True
+
+    ohlc_df = fetch_ohlcv(
+        exchange=run["exchange"],
+        symbol=run["symbol"],
+        timeframe=run["timeframe"],
+        start_date=trades_df["entry_time"].min().floor("D"),
+        end_date=trades_df["exit_time"].max().ceil("D"),
+        limit=50000,
+        use_clean=bool(params.get("use_clean", True)),
+    )
+
+    annotation_mode, chart_items, was_truncated, total_trade_windows = plot_trades_candlestick_windows(
+        df=ohlc_df,
+        trades=trades_df,
+        title=(
+            f"{run['strategy']} {run['symbol']} {run['timeframe']}\n"
+            "Candlesticks + Entry/Exit Markers + Conditions"
+        ),
+        output_dir=output_dir,
+        filename_prefix=f"trades_graph_{run['run_id']}",
+        candles_per_chart=CANDLES_PER_CHART,
+        max_charts=MAX_CHARTS,
+    )
+
+    if not chart_items:
+        if annotation_mode == "missing_ohlc":
+            # The candles may still be downloaded later: don't cache this.
+            return {"charts": [], "note": None, "error": "OHLC data is unavailable for the trades range."}, False
+        if annotation_mode == "missing_trades":
+            error = "No trade rows available to render entry/exit markers."
+        else:
+            error = "Trades chart could not be generated."
+        return {"charts": [], "note": None, "error": error}, True
+
+    notes = []
+    if annotation_mode == "best_effort":
+        notes.append(
+            "Condition labels are best-effort: rendered from entry_trigger/exit_trigger when "
+            "available, with fallback labels otherwise."
+        )
+    if was_truncated:
+        notes.append(
+            f"Showing first {MAX_CHARTS} trade windows of {CANDLES_PER_CHART} candles each "
+            f"(total windows with trades: {total_trade_windows})."
+        )
+
+    charts = [{"filename": item["filename"], "label": item["window_label"]} for item in chart_items]
+    return {"charts": charts, "note": " ".join(notes) if notes else None, "error": None}, True
+
+
+def load_trade_charts(run, params, static_folder, render=True):
+    """
+    Manifest of the run's charts: {"key", "dir", "charts": [{filename,
+    label}], "note", "error"}. Reads the cached manifest when present;
+    otherwise renders (render=True) or returns None.
+    """
+    csv_abs_path, error = _csv_abs_path(run, static_folder)
+    if csv_abs_path is None:
+        return {"key": None, "dir": None, "charts": [], "note": None, "error": error}
+
+    key = charts_key(run, params, csv_abs_path)
+    rel_dir = f"{charts_rel_dir(run)}/{key}"
+    abs_dir = os.path.join(static_folder, rel_dir)
+    manifest_path = os.path.join(abs_dir, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as fh:
+            return json.load(fh)
+    if not render:
+        return None
+
+    # Render into a private directory and rename it into place, so a
+    # concurrent view never sees half the files; the first rename wins.
+    tmp_dir = f"{abs_dir}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_dir)
+    try:
+        manifest, cacheable = _render(run, params, csv_abs_path, tmp_dir)
+        manifest = {"key": key, "dir": rel_dir, **manifest}
+        if cacheable:
+            with open(os.path.join(tmp_dir, MANIFEST), "w", encoding="utf-8") as fh:
+                json.dump(manifest, fh, indent=2)
+            try:
+                os.rename(tmp_dir, abs_dir)
+            except OSError:
+                pass
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return manifest